@@ -0,0 +1,63 @@
+import heapq
+import itertools
+from typing import List, Optional, Tuple
+
+# Configuration Section
+REGULATION_FAST_INTERVAL = 0.5  # Seconds between checks of an account with a position close to its next stop-loss trigger
+REGULATION_IDLE_INTERVAL = 120  # Seconds between checks of an account with no positions and no pending orders
+REGULATION_CLOSED_INTERVAL = 300  # Seconds between checks of an account whose position markets are all closed
+REGULATION_NEAR_TRIGGER_PERCENT = 0.05  # Price distance to a trigger, in percent of price, that counts as near
+
+# Account Activity Class
+class AccountActivity:
+    """What one regulation pass saw on an account, used to pick its next check time."""
+    def __init__(self, pending_orders: int = 0):
+        self.positions: int = 0
+        self.pending_orders: int = pending_orders
+        self.markets_open: bool = True
+        self.nearest_trigger: Optional[float] = None  # Smallest relative distance from price to a trigger not yet crossed
+
+    def note_trigger(self, distance: Optional[float]) -> None:
+        """Keep the smallest trigger distance seen across the account's symbols."""
+        if distance is not None and (self.nearest_trigger is None or distance < self.nearest_trigger):
+            self.nearest_trigger = distance
+
+def next_interval(activity: Optional[AccountActivity], base_interval: float) -> float:
+    """Return the seconds until an account's next check.
+
+    Accounts that were not fully regulated keep the base interval. Accounts without positions back off
+    to REGULATION_IDLE_INTERVAL unless they have pending orders that may fill; accounts whose position
+    markets are all closed back off to REGULATION_CLOSED_INTERVAL; accounts with a price near a
+    stop-loss trigger tighten to REGULATION_FAST_INTERVAL.
+    """
+    if activity is None:
+        return base_interval
+    if activity.positions == 0:
+        return base_interval if activity.pending_orders else max(base_interval, REGULATION_IDLE_INTERVAL)
+    if not activity.markets_open:
+        return max(base_interval, REGULATION_CLOSED_INTERVAL)
+    if activity.nearest_trigger is not None and activity.nearest_trigger <= REGULATION_NEAR_TRIGGER_PERCENT / 100:
+        return min(base_interval, REGULATION_FAST_INTERVAL)
+    return base_interval
+
+# Account Schedule Class
+class AccountSchedule:
+    """Min-heap of (due time, account key); each account is in the heap at most once."""
+    def __init__(self):
+        self.heap: List[Tuple[float, int, str]] = []
+        self.counter = itertools.count()  # Tie-breaker keeping insertion order for equal due times
+
+    def add(self, account_key: str, due: float) -> None:
+        """Schedule an account's next check at a monotonic time."""
+        heapq.heappush(self.heap, (due, next(self.counter), account_key))
+
+    def next_due(self) -> Optional[float]:
+        """Return the earliest due time, or None if nothing is scheduled."""
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now: float) -> List[str]:
+        """Remove and return every account due at or before now, earliest first."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            due.append(heapq.heappop(self.heap)[2])
+        return due
@@ -0,0 +1,220 @@
+import os
+import json
+import logging
+import time
+from typing import List, Dict, Optional, Callable, Tuple
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+SIGNAL_MATCH_TOLERANCE = 0.0001  # Entry price distance below which a position or order belongs to a signal
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Account State Class
+class AccountState:
+    """One account's running trades, closed trades and limit orders keyed by ticket.
+
+    Records keep the order they were loaded in; a ticket listed twice keeps its first record,
+    like the next(...) scans this replaces.
+    """
+    def __init__(self, account_key: str, running_trades: List[Dict], closed_trades: List[Dict], limit_orders: List[Dict]):
+        self.account_key: str = account_key
+        self.running: Dict[int, Dict] = self.by_ticket(running_trades)
+        self.closed: Dict[int, Dict] = self.by_ticket(closed_trades)
+        self.limits: Dict[int, Dict] = self.by_ticket(limit_orders)
+
+    @staticmethod
+    def by_ticket(records: List[Dict]) -> Dict[int, Dict]:
+        """Index records by ticket, keeping the first record of a repeated ticket."""
+        indexed = {}
+        for record in records:
+            indexed.setdefault(record['ticket'], record)
+        return indexed
+
+    def running_trade(self, ticket: int) -> Optional[Dict]:
+        """Return the running trade record for a ticket, or None."""
+        return self.running.get(ticket)
+
+    def limit_order(self, ticket: int) -> Optional[Dict]:
+        """Return the limit order record for a ticket, or None."""
+        return self.limits.get(ticket)
+
+    def is_closed(self, ticket: int) -> bool:
+        """Return True if the ticket is recorded as a closed trade."""
+        return ticket in self.closed
+
+    def drop_limits(self, tickets: set) -> int:
+        """Forget limit orders by ticket; returns how many were dropped."""
+        dropped = 0
+        for ticket in tickets:
+            if self.limits.pop(ticket, None) is not None:
+                dropped += 1
+        return dropped
+
+# Signal Index Class
+class SignalIndex:
+    """Signals hashed by (server symbol, order type, entry bucket) for one trade server.
+
+    Buckets are SIGNAL_MATCH_TOLERANCE wide, so a lookup probes its own bucket and both neighbours
+    and then applies the exact tolerance check. Signals are keyed by store id, which increases with
+    insertion order, so the lowest matching id is the first match a linear scan would have found.
+    """
+    def __init__(self, resolve: Callable[[str], Optional[str]], tolerance: float = SIGNAL_MATCH_TOLERANCE):
+        self.resolve = resolve
+        self.tolerance: float = tolerance
+        self.keys: Dict[int, Tuple[str, str, int, float]] = {}  # signal id -> (symbol, order type, bucket, entry)
+        self.buckets: Dict[Tuple[str, str, int], Dict[int, float]] = {}
+
+    def add(self, signal_id: int, signal: Dict) -> bool:
+        """Index one signal; returns False if its pair does not resolve or its entry is not a number."""
+        try:
+            server_symbol = self.resolve(signal['pair'].lower())
+            entry = float(signal['entry_price'])
+            order_type = signal['order_type'].lower()
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return False
+        if not server_symbol:
+            return False
+        self.remove(signal_id)
+        bucket = int(entry // self.tolerance)
+        self.keys[signal_id] = (server_symbol.lower(), order_type, bucket, entry)
+        self.buckets.setdefault((server_symbol.lower(), order_type, bucket), {})[signal_id] = entry
+        return True
+
+    def extend(self, signal_ids: List[int], signals: List[Dict]) -> None:
+        """Index parallel lists of signal ids and signals."""
+        for signal_id, signal in zip(signal_ids, signals):
+            self.add(signal_id, signal)
+
+    def remove(self, signal_id: int) -> None:
+        """Drop a signal from the index."""
+        key = self.keys.pop(signal_id, None)
+        if key is None:
+            return
+        bucket_key = key[:3]
+        bucket = self.buckets.get(bucket_key)
+        if bucket is not None:
+            bucket.pop(signal_id, None)
+            if not bucket:
+                del self.buckets[bucket_key]
+
+    def match(self, server_symbol: str, order_type: str, entry_price: float) -> Optional[int]:
+        """Return the id of the earliest signal for the symbol and order type within tolerance of the entry, or None."""
+        symbol = server_symbol.lower()
+        order_type = order_type.lower()
+        bucket = int(entry_price // self.tolerance)
+        best = None
+        for probe in (bucket - 1, bucket, bucket + 1):
+            for signal_id, entry in self.buckets.get((symbol, order_type, probe), {}).items():
+                if abs(entry - entry_price) < self.tolerance and (best is None or signal_id < best):
+                    best = signal_id
+        return best
+
+# Account State Cache Class
+class AccountStateCache:
+    """Per-account trade JSON files (running, closed, limit) kept in memory across cycles.
+
+    A file is re-read only when its mtime or size changed since this process last read or wrote it.
+    store() marks a file dirty only if its records differ from the cached ones, and flush() writes the
+    dirty files at the end of the cycle with a temp file and an atomic replace. Records are treated as
+    immutable: callers replace records instead of editing them in place.
+    """
+    def __init__(self):
+        self.records: Dict[str, List[Dict]] = {}
+        self.signatures: Dict[str, Optional[Tuple[int, int]]] = {}  # path -> (mtime_ns, size) when last read or written
+        self.dirty: set = set()
+        self.reads: int = 0
+        self.writes: int = 0
+
+    @staticmethod
+    def signature(path: str) -> Optional[Tuple[int, int]]:
+        """Return the file's (mtime_ns, size), or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def read(self, path: str) -> List[Dict]:
+        """Read a JSON list from disk; a missing or corrupted file reads as empty."""
+        if not os.path.exists(path):
+            return []
+        self.reads += 1
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return data if isinstance(data, list) else []
+        except json.JSONDecodeError:
+            log_and_print(f"Corrupted JSON file at {path}, starting fresh", "WARNING")
+            return []
+
+    def load(self, path: str) -> List[Dict]:
+        """Return a file's records, reading the file only if it is new to the cache or changed on disk."""
+        if path not in self.dirty:
+            signature = self.signature(path)
+            if path not in self.records or signature != self.signatures.get(path):
+                self.records[path] = self.read(path)
+                self.signatures[path] = signature
+        return list(self.records[path])
+
+    def store(self, path: str, records: List[Dict]) -> bool:
+        """Replace a file's records; returns True if they changed and the file is now dirty."""
+        records = list(records)
+        if path in self.records and self.records[path] == records:
+            return False
+        self.records[path] = records
+        self.dirty.add(path)
+        return True
+
+    def append(self, path: str, records: List[Dict]) -> bool:
+        """Append records to a file; returns True if the file is now dirty."""
+        if not records:
+            return False
+        return self.store(path, self.load(path) + list(records))
+
+    def write(self, path: str) -> bool:
+        """Write one file's records with a temp file and an atomic replace."""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            parent_dir = os.path.dirname(path)
+            if parent_dir and not os.path.exists(parent_dir):
+                os.makedirs(parent_dir, exist_ok=True)
+                log_and_print(f"Created directory: {parent_dir}", "INFO")
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.records[path], file, indent=4)
+            os.replace(temp_path, path)
+            self.signatures[path] = self.signature(path)
+            self.dirty.discard(path)
+            self.writes += 1
+            log_and_print(f"Saved {len(self.records[path])} records to {path}", "INFO")
+            return True
+        except Exception as e:
+            log_and_print(f"Error saving to {path}: {str(e)}", "ERROR")
+            return False
+
+    def flush(self) -> int:
+        """Write every dirty file; a file that fails stays dirty for the next flush. Returns the files written."""
+        written = 0
+        for path in sorted(self.dirty):
+            if self.write(path):
+                written += 1
+        return written
@@ -1,9 +1,18 @@
 import connectwithinfinitydb as db
 import validatesignals
+import errorjournal
+import orderengine
+import orderplan
+import marketwatch
+import dealhistory
+import signalstore
+import closedledger
+import symbolresolver
+import numpy as np
 import MetaTrader5 as mt5
 import os
 import shutil
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from colorama import Fore, Style, init
 import logging
 import time
@@ -11,9 +20,8 @@ import asyncio
 from datetime import datetime, timezone,  timedelta
 import pytz
 import json
+import hashlib
 import threading
-import difflib
-from collections import defaultdict
 
 
 # Initialize colorama for colored console output
@@ -46,10 +54,50 @@ MAX_RETRIES = 5
 MT5_RETRY_DELAY = 3
 RUNNING_TRADES_DIR = r"C:\xampp\htdocs\CIPHER\cipher trader\market\runningtrades"
 CLOSED_TRADES_DIR = r"C:\xampp\htdocs\CIPHER\cipher trader\market\closedtrades"
+REMOVECLOSED_CONSUMER = "removeclosedtrades"  # Watermark consumer name for closed-trade reconciliation
 LIMIT_ORDERS_DIR = r"C:\xampp\htdocs\CIPHER\cipher trader\market\limitorders"
 BASE_LOTSIZE_FOLDER = r"C:\xampp\htdocs\CIPHER\cipher trader\market"
 MAX_RETRIES = 5
 MT5_RETRY_DELAY = 3
+SIGNALS_FULL_RESYNC_HOURS = 24  # Full signal fetch at least this often, restoring signals dropped locally since the last one
+LOTSIZE_INDEX_FILE = "lotsizeandriskindex.json"  # (pair, timeframe) index saved next to lotsizeandrisk.json
+LOTSIZE_QUERY = """
+        SELECT id, pair, timeframe, lot_size, allowed_risk, created_at
+        FROM ciphercontracts_lotsizeandrisk
+    """
+SIGNALS_QUERY = """
+        SELECT id, pair, timeframe, order_type, entry_price, exit_price, ratio_0_5_price, ratio_1_price, 
+            ratio_2_price, profit_price, created_at
+        FROM cipherbouncestream_signals
+    """
+SIGNAL_IDS_QUERY = "SELECT id FROM cipherbouncestream_signals"  # Id-only tombstone check for incremental fetches
+ACTIVE_USERS_QUERY = """
+            SELECT id
+            FROM users
+            WHERE account_status = 'active'
+        """
+USER_PROGRAMMES_QUERY = """
+            SELECT 
+                u.id AS user_id, 
+                u.account_status, 
+                up.id AS programme_id, 
+                up.user_id AS up_user_id, 
+                up.subaccount_id, 
+                up.programme, 
+                up.broker,
+                up.broker_server,
+                up.broker_loginid,
+                up.broker_password,
+                up.programme_timeframe
+            FROM 
+                users u
+            LEFT JOIN
+                user_programmes up ON u.id = up.user_id
+        """
+ENGINE_COUNTER_FIELDS = (
+    'total_failed_orders', 'total_priority_lowtohigh_orders', 'total_priority_hightolow_orders',
+    'total_priority_timeframes_orders', 'total_skipped_running', 'total_skipped_closed', 'total_skipped_limit'
+)  # ProgrammeFetcher counters returned by order engine workers and summed in the parent
 
 # Logging Helper Function
 def log_and_print(message, level="INFO"):
@@ -71,8 +119,110 @@ def log_and_print(message, level="INFO"):
     logger.log(getattr(logging, log_level), message)
 
 BASE_LOTSIZE_FOLDER = r"C:\xampp\htdocs\CIPHER\cipher trader\market"
-async def fetchlotsizeandriskallowed(json_dir: str = BASE_LOTSIZE_FOLDER) -> bool:
-    """Fetch all lot size and allowed risk data from ciphercontracts_lotsizeandrisk table and save to lotsizeandrisk.json."""
+# Lot Size Index Functions
+def build_lotsize_index(lotsize_data: List[Dict]) -> Dict[Tuple[str, str], Tuple[float, float]]:
+    """Index lot size rows by (pair, normalized timeframe) -> (lot_size, allowed_risk); the first row for a key wins."""
+    index = {}
+    for item in lotsize_data:
+        key = (item['pair'].lower(), orderplan.normalize_timeframe(item['timeframe']))
+        if key not in index:
+            lot_size = float(item.get('lot_size', 0.0)) if item.get('lot_size') is not None else 0.0
+            allowed_risk = float(item.get('allowed_risk', 0.0)) if item.get('allowed_risk') is not None else 0.0
+            index[key] = (lot_size, allowed_risk)
+    return index
+
+def save_lotsize_index(index: Dict[Tuple[str, str], Tuple[float, float]], json_dir: str = BASE_LOTSIZE_FOLDER) -> None:
+    """Persist the lot size index as {"pair|timeframe": {"lot_size", "allowed_risk"}}."""
+    index_path = os.path.join(json_dir, LOTSIZE_INDEX_FILE)
+    data = {f"{pair}|{timeframe}": {'lot_size': lot_size, 'allowed_risk': allowed_risk}
+            for (pair, timeframe), (lot_size, allowed_risk) in index.items()}
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    os.chmod(index_path, 0o666)  # Read/write for owner, group, others
+
+def load_lotsize_index(json_dir: str = BASE_LOTSIZE_FOLDER) -> Dict[Tuple[str, str], Tuple[float, float]]:
+    """Load the persisted lot size index, rebuilding it from lotsizeandrisk.json when missing or older."""
+    lotsize_json_path = os.path.join(json_dir, "lotsizeandrisk.json")
+    index_path = os.path.join(json_dir, LOTSIZE_INDEX_FILE)
+    if os.path.exists(index_path) and (not os.path.exists(lotsize_json_path)
+                                       or os.path.getmtime(index_path) >= os.path.getmtime(lotsize_json_path)):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {tuple(key.split('|', 1)): (entry['lot_size'], entry['allowed_risk']) for key, entry in data.items()}
+    with open(lotsize_json_path, 'r', encoding='utf-8') as f:
+        index = build_lotsize_index(json.load(f))
+    save_lotsize_index(index, json_dir)
+    log_and_print(f"Rebuilt lot size index {index_path} from {lotsize_json_path}", "INFO")
+    return index
+
+def lotsize_fingerprint(index: Dict[Tuple[str, str], Tuple[float, float]]) -> str:
+    """Return a digest of the lot size index, stored with the signals to detect lot size/risk table edits."""
+    rows = sorted(f"{pair}|{timeframe}|{lot_size}|{allowed_risk}" for (pair, timeframe), (lot_size, allowed_risk) in index.items())
+    return hashlib.sha1("\n".join(rows).encode('utf-8')).hexdigest()
+
+def apply_lotsize(signal: Dict, index: Dict[Tuple[str, str], Tuple[float, float]]) -> Dict:
+    """Return the signal with lot_size and allowed_risk taken from the lot size index (0.0 when not listed)."""
+    key = (str(signal.get('pair', '')).lower(), orderplan.normalize_timeframe(str(signal.get('timeframe', ''))))
+    lot_size, allowed_risk = index.get(key, (0.0, 0.0))
+    return {**signal, 'lot_size': lot_size, 'allowed_risk': allowed_risk}
+
+# Cycle Bootstrap
+class CycleBootstrap:
+    """Results of a cycle's independent startup reads, fetched concurrently and handed to later stages.
+
+    Each result is the raw db.execute_query dict (None when not prefetched). Stages use it for their
+    first attempt and query the database again on retries.
+    """
+    def __init__(self, signals_query: str, incremental: bool, results: Dict[str, Optional[Dict]]):
+        self.signals_query: str = signals_query
+        self.incremental: bool = incremental
+        self.lotsize_result: Optional[Dict] = results.get('lotsize')
+        self.signals_result: Optional[Dict] = results.get('signals')
+        self.signal_ids_result: Optional[Dict] = results.get('signal_ids')
+        self.active_users_result: Optional[Dict] = results.get('active_users')
+        self.programmes_result: Optional[Dict] = results.get('programmes')
+
+def build_signals_query(json_dir: str = BASE_LOTSIZE_FOLDER, incremental: bool = True) -> Tuple[str, bool]:
+    """Return (signals query, incremental): only rows past the store's id watermark unless this is the
+    first sync or the periodic full resync is due."""
+    store = signalstore.get_store(os.path.join(json_dir, "bouncestreamsignals.json"))
+    watermark = store.get_meta('signals_max_id')
+    last_full_sync = store.get_meta('signals_full_sync_at')
+    incremental = (incremental and watermark is not None and last_full_sync is not None
+                   and time.time() - float(last_full_sync) < SIGNALS_FULL_RESYNC_HOURS * 3600)
+    if not incremental:
+        return SIGNALS_QUERY, False
+    return SIGNALS_QUERY + f"    WHERE id > {int(watermark)}\n        ORDER BY id\n    ", True
+
+async def bootstrap_cycle(json_dir: str = BASE_LOTSIZE_FOLDER) -> CycleBootstrap:
+    """Issue the lot size, signals, active users and user programmes reads concurrently."""
+    log_and_print("===== Cycle Bootstrap: Fetching Startup Data =====", "TITLE")
+    try:
+        signals_query, incremental = build_signals_query(json_dir)
+    except Exception as e:
+        log_and_print(f"Error reading signal store watermark, fetching all signals: {str(e)}", "WARNING")
+        signals_query, incremental = SIGNALS_QUERY, False
+    queries = {
+        'lotsize': LOTSIZE_QUERY,
+        'signals': signals_query,
+        'active_users': ACTIVE_USERS_QUERY,
+        'programmes': USER_PROGRAMMES_QUERY
+    }
+    if incremental:
+        queries['signal_ids'] = SIGNAL_IDS_QUERY
+
+    started = time.time()
+    try:
+        results = db.execute_queries(list(queries.values()))
+    except Exception as e:
+        log_and_print(f"Concurrent startup reads failed, stages will query individually: {str(e)}", "WARNING")
+        results = [None] * len(queries)
+    log_and_print(f"Fetched {len(queries)} startup reads in {time.time() - started:.2f} seconds", "INFO")
+    return CycleBootstrap(signals_query, incremental, dict(zip(queries, results)))
+
+async def fetchlotsizeandriskallowed(json_dir: str = BASE_LOTSIZE_FOLDER, prefetched: Optional[Dict] = None) -> bool:
+    """Fetch all lot size and allowed risk data from ciphercontracts_lotsizeandrisk table and save to lotsizeandrisk.json
+    together with its (pair, timeframe) index."""
     log_and_print("Fetching all lot size and allowed risk data", "INFO")
     
     # Initialize error log list
@@ -91,10 +241,7 @@ async def fetchlotsizeandriskallowed(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
             log_and_print(f"Failed to save errors to {error_json_path}: {str(e)}", "ERROR")
     
     # SQL query to fetch all rows
-    sql_query = """
-        SELECT id, pair, timeframe, lot_size, allowed_risk, created_at
-        FROM ciphercontracts_lotsizeandrisk
-    """
+    sql_query = LOTSIZE_QUERY
     
     # Create output directory if it doesn't exist
     if not os.path.exists(json_dir):
@@ -113,7 +260,7 @@ async def fetchlotsizeandriskallowed(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
     # Execute query with retries
     for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
         try:
-            result = db.execute_query(sql_query)
+            result = prefetched if attempt == 1 and prefetched is not None else db.execute_query(sql_query)
             log_and_print(f"Raw query result for lot size and risk: {json.dumps(result, indent=2)}", "DEBUG")
             
             if not isinstance(result, dict):
@@ -171,6 +318,7 @@ async def fetchlotsizeandriskallowed(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
                     json.dump(data, f, indent=4)
                 # Set file permissions to ensure accessibility
                 os.chmod(output_json_path, 0o666)  # Read/write for owner, group, others
+                save_lotsize_index(build_lotsize_index(data), json_dir)
                 log_and_print(f"Lot size and allowed risk data saved to {output_json_path}", "SUCCESS")
                 return True
             except Exception as e:
@@ -209,17 +357,20 @@ async def fetchlotsizeandriskallowed(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
     })
     save_errors()
     return False
-async def executefetchlotsizeandrisk():
+async def executefetchlotsizeandrisk(prefetched: Optional[Dict] = None):
     """Execute the fetchlotsizeandriskallowed function and handle its result."""
     log_and_print("Starting lot size and risk data fetch", "INFO")
-    if not await fetchlotsizeandriskallowed():
+    if not await fetchlotsizeandriskallowed(prefetched=prefetched):
         log_and_print("Failed to fetch lot size and allowed risk data. Exiting.", "ERROR")
         return False
     log_and_print("Successfully fetched lot size and allowed risk data", "SUCCESS")
     return True
 #bouncestream signals
-async def fetch_bouncestream_signals(json_dir: str = BASE_LOTSIZE_FOLDER) -> bool:
-    """Fetch bouncestream signals, add summary with timeframe counts, and store them in bouncestreamsignals.json with lot size and allowed risk."""
+async def fetch_bouncestream_signals(json_dir: str = BASE_LOTSIZE_FOLDER, incremental: bool = True,
+                                     bootstrap: Optional[CycleBootstrap] = None) -> bool:
+    """Fetch bouncestream signals with lot size and allowed risk into the signal store, which keeps the timeframe counts.
+    In incremental mode only rows past the stored id watermark are pulled, and server-side deletions are applied from an id-only query.
+    When the lot size index changed since the signals were stored, its values are re-applied to every stored signal."""
     log_and_print("===== Fetching Bouncestream Signals =====", "TITLE")
 
     # Initialize error log list
@@ -237,9 +388,9 @@ async def fetch_bouncestream_signals(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
         except Exception as e:
             log_and_print(f"Failed to save errors to {error_json_path}: {str(e)}", "ERROR")
 
-    # Load lot size and risk data from JSON
+    # Load the lot size and risk index built alongside lotsizeandrisk.json
     lotsize_json_path = os.path.join(json_dir, "lotsizeandrisk.json")
-    if not os.path.exists(lotsize_json_path):
+    if not os.path.exists(lotsize_json_path) and not os.path.exists(os.path.join(json_dir, LOTSIZE_INDEX_FILE)):
         error_log.append({
             "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
             "error": f"Lot size JSON file not found at {lotsize_json_path}"
@@ -249,9 +400,8 @@ async def fetch_bouncestream_signals(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
         return False
 
     try:
-        with open(lotsize_json_path, 'r', encoding='utf-8') as f:
-            lotsize_data = json.load(f)
-        log_and_print(f"Loaded lot size data from {lotsize_json_path}", "INFO")
+        lotsize_index = load_lotsize_index(json_dir)
+        log_and_print(f"Loaded lot size index with {len(lotsize_index)} entries from {json_dir}", "INFO")
     except Exception as e:
         error_log.append({
             "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
@@ -261,92 +411,113 @@ async def fetch_bouncestream_signals(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
         log_and_print(f"Failed to load lot size JSON: {str(e)}", "ERROR")
         return False
 
-    # SQL query to fetch signals
-    sql_query = """
-        SELECT id, pair, timeframe, order_type, entry_price, exit_price, ratio_0_5_price, ratio_1_price, 
-            ratio_2_price, profit_price, created_at
-        FROM cipherbouncestream_signals
-    """
-    log_and_print(f"Fetching signals with query: {sql_query}", "INFO")
+    # Define output path for signals JSON
+    output_json_path = os.path.join(json_dir, "bouncestreamsignals.json")
 
-    # Execute query with retries
-    signals = []
-    for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
+    # Create output directory if it doesn't exist
+    if not os.path.exists(json_dir):
         try:
-            result = db.execute_query(sql_query)
-            log_and_print(f"Raw query result for signals: {json.dumps(result, indent=2)}", "DEBUG")
+            os.makedirs(json_dir, exist_ok=True)
+            log_and_print(f"Created output directory: {json_dir}", "INFO")
+        except Exception as e:
+            error_log.append({
+                "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
+                "error": f"Error creating directory {json_dir}: {str(e)}"
+            })
+            save_errors()
+            log_and_print(f"Error creating directory {json_dir}: {str(e)}", "ERROR")
+            return False
 
-            if not isinstance(result, dict):
-                error_log.append({
-                    "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
-                    "error": f"Invalid result format on attempt {attempt}: Expected dict, got {type(result)}"
-                })
-                save_errors()
-                log_and_print(f"Invalid result format on attempt {attempt}: Expected dict, got {type(result)}", "ERROR")
-                continue
+    # Helper function to run a query with retries and return its rows (None on failure)
+    async def query_rows(sql_query: str, description: str, prefetched: Optional[Dict] = None) -> Optional[List[Dict]]:
+        for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
+            try:
+                result = prefetched if attempt == 1 and prefetched is not None else db.execute_query(sql_query)
+                log_and_print(f"Raw query result for {description}: {json.dumps(result, indent=2)}", "DEBUG")
 
-            if result.get('status') != 'success':
-                error_message = result.get('message', 'No message provided')
-                error_log.append({
-                    "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
-                    "error": f"Query failed on attempt {attempt}: {error_message}"
-                })
-                save_errors()
-                log_and_print(f"Query failed on attempt {attempt}: {error_message}", "ERROR")
-                continue
+                if not isinstance(result, dict):
+                    error_log.append({
+                        "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
+                        "error": f"Invalid result format on attempt {attempt}: Expected dict, got {type(result)}"
+                    })
+                    save_errors()
+                    log_and_print(f"Invalid result format on attempt {attempt}: Expected dict, got {type(result)}", "ERROR")
+                    continue
 
-            rows = None
-            if 'data' in result and 'rows' in result['data'] and isinstance(result['data']['rows'], list):
-                rows = result['data']['rows']
-            elif 'results' in result and isinstance(result['results'], list):
-                rows = result['results']
-            else:
+                if result.get('status') != 'success':
+                    error_message = result.get('message', 'No message provided')
+                    error_log.append({
+                        "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
+                        "error": f"Query failed on attempt {attempt}: {error_message}"
+                    })
+                    save_errors()
+                    log_and_print(f"Query failed on attempt {attempt}: {error_message}", "ERROR")
+                    continue
+
+                if 'data' in result and 'rows' in result['data'] and isinstance(result['data']['rows'], list):
+                    return result['data']['rows']
+                if 'results' in result and isinstance(result['results'], list):
+                    return result['results']
                 error_log.append({
                     "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
                     "error": f"Invalid or missing rows in result on attempt {attempt}: {json.dumps(result, indent=2)}"
                 })
                 save_errors()
                 log_and_print(f"Invalid or missing rows in result on attempt {attempt}: {json.dumps(result, indent=2)}", "ERROR")
-                continue
-
-            signals = [
-                {
-                    'pair': row.get('pair', '').lower(),
-                    'timeframe': row.get('timeframe', '').lower(),
-                    'order_type': row.get('order_type', '').lower(),
-                    'entry_price': float(row.get('entry_price', 0.0)),
-                    'exit_price': float(row.get('exit_price', 0.0)),
-                    'ratio_0_5_price': float(row.get('ratio_0_5_price', 0.0)),
-                    'ratio_1_price': float(row.get('ratio_1_price', 0.0)),
-                    'ratio_2_price': float(row.get('ratio_2_price', 0.0)),
-                    'profit_price': float(row.get('profit_price', 0.0)),
-                    'created_at': row.get('created_at', 'N/A')
-                } for row in rows
-            ]
-            log_and_print(f"Fetched {len(signals)} signals from cipherbouncestream_signals", "SUCCESS")
-            break
 
-        except Exception as e:
-            error_log.append({
-                "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
-                "error": f"Exception on attempt {attempt}: {str(e)}"
-            })
-            save_errors()
-            log_and_print(f"Exception on attempt {attempt}: {str(e)}", "ERROR")
-            if attempt < RETRY_MAX_ATTEMPTS:
-                delay = RETRY_DELAY * (2 ** (attempt - 1))
-                log_and_print(f"Retrying after {delay} seconds...", "INFO")
-                await asyncio.sleep(delay)
-            else:
+            except Exception as e:
                 error_log.append({
                     "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
-                    "error": "Max retries reached for fetching signals"
+                    "error": f"Exception on attempt {attempt}: {str(e)}"
                 })
                 save_errors()
-                log_and_print("Max retries reached for fetching signals", "ERROR")
-                return False
+                log_and_print(f"Exception on attempt {attempt}: {str(e)}", "ERROR")
+                if attempt < RETRY_MAX_ATTEMPTS:
+                    delay = RETRY_DELAY * (2 ** (attempt - 1))
+                    log_and_print(f"Retrying after {delay} seconds...", "INFO")
+                    await asyncio.sleep(delay)
+        error_log.append({
+            "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
+            "error": f"Max retries reached for fetching {description}"
+        })
+        save_errors()
+        log_and_print(f"Max retries reached for fetching {description}", "ERROR")
+        return None
+
+    # Pull only rows past the id watermark unless this is the first sync or the periodic full resync is due
+    try:
+        store = signalstore.get_store(output_json_path)
+        watermark = store.get_meta('signals_max_id')
+        if bootstrap is not None:
+            sql_query, incremental = bootstrap.signals_query, bootstrap.incremental
+        else:
+            sql_query, incremental = build_signals_query(json_dir, incremental)
+    except Exception as e:
+        log_and_print(f"Error opening signal store for {output_json_path}: {str(e)}", "ERROR")
+        return False
+    log_and_print(f"Fetching {'new' if incremental else 'all'} signals with query: {sql_query}", "INFO")
+
+    rows = await query_rows(sql_query, "signals", bootstrap.signals_result if bootstrap else None)
+    if rows is None:
+        return False
+    signals = [
+        {
+            'pair': row.get('pair', '').lower(),
+            'timeframe': row.get('timeframe', '').lower(),
+            'order_type': row.get('order_type', '').lower(),
+            'entry_price': float(row.get('entry_price', 0.0)),
+            'exit_price': float(row.get('exit_price', 0.0)),
+            'ratio_0_5_price': float(row.get('ratio_0_5_price', 0.0)),
+            'ratio_1_price': float(row.get('ratio_1_price', 0.0)),
+            'ratio_2_price': float(row.get('ratio_2_price', 0.0)),
+            'profit_price': float(row.get('profit_price', 0.0)),
+            'created_at': row.get('created_at', 'N/A')
+        } for row in rows
+    ]
+    server_ids = [int(row.get('id', 0)) for row in rows]
+    log_and_print(f"Fetched {len(signals)} {'new ' if incremental else ''}signals from cipherbouncestream_signals", "SUCCESS")
 
-    if not signals:
+    if not signals and not incremental:
         error_log.append({
             "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
             "error": "No signals found to process"
@@ -355,93 +526,36 @@ async def fetch_bouncestream_signals(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
         log_and_print("No signals found to process", "WARNING")
         return False
 
-    # Add lot size and allowed risk to each signal
-    for signal in signals:
-        lot_size = None
-        allowed_risk = None
-        # Normalize timeframe for matching with lotsize_data
-        normalized_timeframe = signal['timeframe'].lower().replace('4hour', '4hours')
-        for item in lotsize_data:
-            item_timeframe = item['timeframe'].lower().replace('4hour', '4hours')
-            if item['pair'].lower() == signal['pair'] and item_timeframe == normalized_timeframe:
-                lot_size = float(item.get('lot_size', 0.0)) if item.get('lot_size') is not None else 0.0
-                allowed_risk = float(item.get('allowed_risk', 0.0)) if item.get('allowed_risk') is not None else 0.0
-                break
-
-        signal['lot_size'] = lot_size if lot_size is not None else 0.0
-        signal['allowed_risk'] = allowed_risk if allowed_risk is not None else 0.0
-
-    # Calculate summary statistics
-    total_pending = len(signals)
-    timeframe_counts = {
-        '5minutes': 0,
-        '15minutes': 0,
-        '30minutes': 0,
-        '1hour': 0,
-        '4hours': 0
-    }
-    for signal in signals:
-        timeframe = signal['timeframe'].lower().replace('4hour', '4hours')
-        if timeframe == '5minutes':
-            timeframe_counts['5minutes'] += 1
-        elif timeframe == '15minutes':
-            timeframe_counts['15minutes'] += 1
-        elif timeframe == '30minutes':
-            timeframe_counts['30minutes'] += 1
-        elif timeframe == '1hour':
-            timeframe_counts['1hour'] += 1
-        elif timeframe == '4hours':
-            timeframe_counts['4hours'] += 1
-
-    # Create output JSON structure with summary
-    output_data = {
-        "bouncestream_pendingorders": total_pending,
-        "5minutes pending orders": timeframe_counts['5minutes'],
-        "15minutes pending orders": timeframe_counts['15minutes'],
-        "30minutes pending orders": timeframe_counts['30minutes'],
-        "1Hour pending orders": timeframe_counts['1hour'],
-        "4Hours pending orders": timeframe_counts['4hours'],
-        "orders": signals
-    }
-
-    # Define output path for signals JSON
-    output_json_path = os.path.join(json_dir, "bouncestreamsignals.json")
-
-    # Create output directory if it doesn't exist
-    if not os.path.exists(json_dir):
-        try:
-            os.makedirs(json_dir, exist_ok=True)
-            log_and_print(f"Created output directory: {json_dir}", "INFO")
-        except Exception as e:
-            error_log.append({
-                "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
-                "error": f"Error creating directory {json_dir}: {str(e)}"
-            })
-            save_errors()
-            log_and_print(f"Error creating directory {json_dir}: {str(e)}", "ERROR")
-            return False
-
-    # Delete existing file if it exists to overwrite
-    if os.path.exists(output_json_path):
-        try:
-            os.remove(output_json_path)
-            log_and_print(f"Existing {output_json_path} deleted", "INFO")
-        except Exception as e:
-            error_log.append({
-                "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00'),
-                "error": f"Error deleting existing {output_json_path}: {str(e)}"
-            })
-            save_errors()
-            log_and_print(f"Error deleting existing {output_json_path}: {str(e)}", "ERROR")
-            return False
+    # Add lot size and allowed risk to each signal with one index lookup
+    signals = [apply_lotsize(signal, lotsize_index) for signal in signals]
+    fingerprint = lotsize_fingerprint(lotsize_index)
 
-    # Save signals with summary to JSON
+    new_watermark = max(server_ids + ([int(watermark)] if watermark is not None else [0]))
     try:
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=4)
-        # Set file permissions to ensure accessibility
-        os.chmod(output_json_path, 0o666)  # Read/write for owner, group, others
-        log_and_print(f"Bouncestream signals with summary saved to {output_json_path}", "SUCCESS")
+        if incremental:
+            # Tombstones: stored server ids that no longer exist on the server (id-only query)
+            deleted_server_ids = []
+            id_rows = await query_rows(SIGNAL_IDS_QUERY, "signal ids", bootstrap.signal_ids_result if bootstrap else None)
+            if id_rows is not None:
+                live_ids = {int(row.get('id', 0)) for row in id_rows}
+                deleted_server_ids = sorted(store.server_ids() - live_ids)
+            if not store.merge(signals, server_ids, deleted_server_ids, {'signals_max_id': str(new_watermark)}):
+                raise RuntimeError(f"signal store {store.db_path} was not updated")
+            log_and_print(f"Merged {len(signals)} new signals and {len(deleted_server_ids)} deletions into {store.db_path}", "INFO")
+            if store.get_meta('lotsize_fingerprint') != fingerprint:
+                updated = store.rewrite_payloads(lambda signal: apply_lotsize(signal, lotsize_index), {'lotsize_fingerprint': fingerprint})
+                if updated < 0:
+                    raise RuntimeError(f"lot sizes in signal store {store.db_path} were not updated")
+                log_and_print(f"Lot size index changed, re-applied lot size and allowed risk to {updated} stored signals", "INFO")
+            if store.counts()['total'] == 0:
+                log_and_print("No signals found to process", "WARNING")
+                return False
+        elif not store.replace_all(signals, server_ids, {'signals_max_id': str(new_watermark), 'signals_full_sync_at': str(time.time()),
+                                                          'lotsize_fingerprint': fingerprint}):
+            raise RuntimeError(f"signal store {store.db_path} was not updated")
+
+        # Summary counts are maintained by the store; bouncestreamsignals.json is exported at the end of the cycle
+        log_and_print(f"Bouncestream signals with summary saved to {store.db_path}", "SUCCESS")
         return True
     except Exception as e:
         error_log.append({
@@ -451,10 +565,10 @@ async def fetch_bouncestream_signals(json_dir: str = BASE_LOTSIZE_FOLDER) -> boo
         save_errors()
         log_and_print(f"Error saving {output_json_path}: {str(e)}", "ERROR")
         return False
-async def execute_fetch_bouncestream_signals():
+async def execute_fetch_bouncestream_signals(bootstrap: Optional[CycleBootstrap] = None):
     """Execute the fetch_bouncestream_signals function and handle its result."""
     log_and_print("Starting bouncestream signals fetch", "INFO")
-    if not await fetch_bouncestream_signals():
+    if not await fetch_bouncestream_signals(bootstrap=bootstrap):
         log_and_print("Failed to fetch bouncestream signals. Exiting.", "ERROR")
         return False
     log_and_print("Successfully fetched bouncestream signals", "SUCCESS")
@@ -600,6 +714,7 @@ class ProgrammeFetcher:
         self.total_skipped_running: int = 0
         self.total_skipped_closed: int = 0
         self.total_skipped_limit: int = 0
+        self.duplicate_indexes: Dict[str, Dict[tuple, str]] = {}  # Per-account duplicate index for the current session
 
     def normalize_row(self, row: Dict) -> Dict:
         """Normalize row data to handle string 'None' values and ensure correct types."""
@@ -613,15 +728,11 @@ class ProgrammeFetcher:
                 normalized[key] = value
         return normalized
 
-    async def get_active_users(self) -> List[Dict[str, str]]:
-        """Fetch active users from the users table."""
-        sql_query = """
-            SELECT id
-            FROM users
-            WHERE account_status = 'active'
-        """
+    async def get_active_users(self, prefetched: Optional[Dict] = None) -> List[Dict[str, str]]:
+        """Fetch active users from the users table (or use the cycle bootstrap's prefetched result)."""
+        sql_query = ACTIVE_USERS_QUERY
         log_and_print(f"Fetching active users with query: {sql_query}", "INFO")
-        result = db.execute_query(sql_query)
+        result = prefetched if prefetched is not None else db.execute_query(sql_query)
         
         if result['status'] != 'success':
             log_and_print(f"Failed to fetch active users: {result.get('message', 'No message')}", "ERROR")
@@ -684,31 +795,15 @@ class ProgrammeFetcher:
         }
 
 
-    async def fetch_user_programmes(self) -> Optional[List[Dict]]:
-        """Fetch user programmes from the user_programmes table, including broker details and programme_timeframe."""
-        sql_query = """
-            SELECT 
-                u.id AS user_id, 
-                u.account_status, 
-                up.id AS programme_id, 
-                up.user_id AS up_user_id, 
-                up.subaccount_id, 
-                up.programme, 
-                up.broker,
-                up.broker_server,
-                up.broker_loginid,
-                up.broker_password,
-                up.programme_timeframe
-            FROM 
-                users u
-            LEFT JOIN
-                user_programmes up ON u.id = up.user_id
-        """
+    async def fetch_user_programmes(self, prefetched: Optional[Dict] = None) -> Optional[List[Dict]]:
+        """Fetch user programmes from the user_programmes table, including broker details and programme_timeframe.
+        The cycle bootstrap's prefetched result is used for the first attempt."""
+        sql_query = USER_PROGRAMMES_QUERY
         log_and_print(f"Sending query: {sql_query}", "INFO")
         
         for attempt in range(1, RETRY_MAX_ATTEMPTS + 1):
             try:
-                result = db.execute_query(sql_query)
+                result = prefetched if attempt == 1 and prefetched is not None else db.execute_query(sql_query)
                 log_and_print(f"Raw query result: {json.dumps(result, indent=2)}", "DEBUG")
                 
                 if not isinstance(result, dict):
@@ -746,19 +841,15 @@ class ProgrammeFetcher:
         return None
 
     async def removeclosedtrades(self, valid_accounts: List[Dict]) -> int:
-        """Check each account's trade history, match closed trades with bouncestream signals, remove matched signals from JSON, and append unique closed trades to allclosedorders.json."""
+        """Reconcile each account's closed positions with bouncestream signals: pair IN/OUT deals fetched since the
+        account's last-seen deal, remove matched signals from the signal store, and append unique closed trades to the closed-trade ledger."""
         log_and_print("===== Removing Closed Trades from Bouncestream Signals =====", "TITLE")
 
         signals_path = os.path.join(BASE_LOTSIZE_FOLDER, "bouncestreamsignals.json")
-        if not os.path.exists(signals_path):
-            log_and_print(f"Signals file not found: {signals_path}", "ERROR")
-            return 0
-
         try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
-            signals = signals_data['orders']
-            log_and_print(f"Loaded {len(signals)} signals from {signals_path}", "INFO")
+            store = signalstore.get_store(signals_path)
+            signal_ids, signals = store.snapshot()
+            log_and_print(f"Loaded {len(signals)} signals from {store.db_path}", "INFO")
         except Exception as e:
             log_and_print(f"Error loading signals from {signals_path}: {str(e)}", "ERROR")
             return 0
@@ -767,34 +858,23 @@ class ProgrammeFetcher:
             log_and_print("No signals to process for closed trades", "INFO")
             return 0
 
-        # Create signal key to index mapping for quick lookup and removal
-        signals_dict = {}
-        for idx, signal in enumerate(signals):
-            key = f"{signal['pair']}_{signal['order_type']}_{signal['entry_price']:.5f}"
-            signals_dict[key] = idx
-
-        # Closed trades path
-        closed_dir = os.path.join(BASE_LOTSIZE_FOLDER, "closedtrades")
-        closed_path = os.path.join(closed_dir, "allclosedorders.json")
-        os.makedirs(closed_dir, exist_ok=True)
+        # Signal key array for the vectorized join (the last signal holding a key is matched, as before)
+        signal_keys = dealhistory.trade_keys(
+            np.array([signal['pair'] for signal in signals]),
+            np.array([signal['order_type'] for signal in signals]),
+            np.array([float(signal['entry_price']) for signal in signals])
+        )
+        unique_signal_keys, signal_key_rows = dealhistory.last_index_by_key(signal_keys)
 
-        # Load existing closed trades to check for duplicates
-        existing_closed = []
-        existing_closed_keys = set()
-        if os.path.exists(closed_path):
-            try:
-                with open(closed_path, 'r', encoding='utf-8') as f:
-                    existing_closed = json.load(f)
-                for closed_record in existing_closed:
-                    key = f"{closed_record['pair']}_{closed_record['order_type']}_{closed_record['entry_price']:.5f}"
-                    existing_closed_keys.add(key)
-                log_and_print(f"Loaded {len(existing_closed)} existing closed trades from {closed_path}", "INFO")
-            except Exception as e:
-                log_and_print(f"Error loading existing closed trades from {closed_path}: {str(e)}", "WARNING")
-                existing_closed = []
+        # Closed-trade ledger; duplicates are checked against its key index instead of a loaded allclosedorders.json
+        closed_ledger = closedledger.get_ledger(os.path.join(BASE_LOTSIZE_FOLDER, "closedtrades"))
+        closed_path = closed_ledger.json_path(closedledger.ALL_CLOSED_SCOPE)
+        seen_closed_keys = set()
 
         closed_to_add = []
         indices_to_remove = set()
+        history_sync = dealhistory.HistorySync(CLOSED_TRADES_DIR, REMOVECLOSED_CONSUMER)
+        lagos_tz = pytz.timezone('Africa/Lagos')
 
         # Process each valid account
         for account in valid_accounts:
@@ -817,336 +897,92 @@ class ProgrammeFetcher:
                 log_and_print(f"Skipping closed trades check for {account_key}: MT5 initialization failed", "WARNING")
                 continue
 
-            # Get history deals for the last 7 days
-            from_date = datetime.now(timezone.utc) - timedelta(days=7)
-            to_date = datetime.now(timezone.utc)
-            history_deals = thread_local.mt5.history_deals_get(from_date, to_date)
-            if not history_deals:
-                log_and_print(f"No history deals found for {account_key}", "DEBUG")
-                continue
-
-            # Group deals by position_id
-            positions = defaultdict(list)
-            for deal in history_deals:
-                if deal.entry in [thread_local.mt5.DEAL_ENTRY_IN, thread_local.mt5.DEAL_ENTRY_OUT]:
-                    positions[deal.position_id].append(deal)
-
-            # Process each closed position
-            for pos_id, deals in positions.items():
-                if len(deals) < 2:
-                    continue
-                in_deals = [d for d in deals if d.entry == thread_local.mt5.DEAL_ENTRY_IN]
-                out_deals = [d for d in deals if d.entry == thread_local.mt5.DEAL_ENTRY_OUT]
-                if not in_deals or not out_deals:
-                    continue
-
-                open_deal = in_deals[0]
-                close_deal = out_deals[0]
-
-                if open_deal.symbol == '':
-                    continue
-
-                symbol = open_deal.symbol.lower()
-                deal_type = open_deal.type
-                if deal_type not in [thread_local.mt5.DEAL_TYPE_BUY, thread_local.mt5.DEAL_TYPE_SELL]:
+            # Get deals since this account's last-seen deal and pair IN/OUT deals per position
+            mt5_api = thread_local.mt5
+            try:
+                new_deals = history_sync.sync_account(mt5_api, account_key)
+                if len(new_deals) == 0:
+                    log_and_print(f"No new history deals found for {account_key}", "DEBUG")
                     continue
+                history = dealhistory.fetch_missing_opens(mt5_api, new_deals, mt5_api.DEAL_ENTRY_IN, mt5_api.DEAL_ENTRY_OUT)
+                open_deals, close_deals = dealhistory.pair_in_out(history, mt5_api.DEAL_ENTRY_IN, mt5_api.DEAL_ENTRY_OUT)
+            except Exception as e:
+                log_and_print(f"Error loading history deals for {account_key}: {str(e)}", "WARNING")
+                continue
 
-                order_type = 'buy_limit' if deal_type == thread_local.mt5.DEAL_TYPE_BUY else 'sell_limit'
-                entry_price = open_deal.price
-                key = f"{symbol}_{order_type}_{entry_price:.5f}"
-
-                if key in signals_dict:
-                    idx = signals_dict[key]
-                    if key not in existing_closed_keys:
-                        signal = signals[idx]
-                        closed_record = signal.copy()
-                        closed_record['close_time'] = datetime.fromtimestamp(close_deal.time, tz=timezone.utc).astimezone(pytz.timezone('Africa/Lagos')).isoformat()
-                        closed_record['close_price'] = close_deal.price
-                        closed_record['profit'] = close_deal.profit
-                        closed_record['close_timestamp'] = datetime.now(pytz.timezone('Africa/Lagos')).isoformat()
-                        closed_to_add.append(closed_record)
-                        existing_closed_keys.add(key)
-                        log_and_print(f"New closed trade matched for {key} in {account_key}", "INFO")
-
-                    indices_to_remove.add(idx)
-                    log_and_print(f"Matched and marking for removal: {key} from signals", "INFO")
-
-        # Remove matched signals (in reverse order to avoid index shifting)
-        removed_count = 0
-        for idx in sorted(indices_to_remove, reverse=True):
-            del signals[idx]
-            removed_count += 1
+            valid = (open_deals['symbol'] != '') & np.isin(open_deals['type'], [mt5_api.DEAL_TYPE_BUY, mt5_api.DEAL_TYPE_SELL])
+            open_deals, close_deals = open_deals[valid], close_deals[valid]
+            order_types = np.where(open_deals['type'] == mt5_api.DEAL_TYPE_BUY, 'buy_limit', 'sell_limit')
+            deal_keys = dealhistory.trade_keys(np.char.lower(open_deals['symbol']), order_types, open_deals['price'])
+            signal_rows = dealhistory.lookup_keys(unique_signal_keys, signal_key_rows, deal_keys)
+
+            for i in np.flatnonzero(signal_rows >= 0):
+                key = str(deal_keys[i])
+                idx = int(signal_rows[i])
+                if key not in seen_closed_keys and not closed_ledger.contains(closedledger.ALL_CLOSED_SCOPE, key):
+                    closed_record = signals[idx].copy()
+                    closed_record['close_time'] = datetime.fromtimestamp(int(close_deals['time'][i]), tz=timezone.utc).astimezone(lagos_tz).isoformat()
+                    closed_record['close_price'] = float(close_deals['price'][i])
+                    closed_record['profit'] = float(close_deals['profit'][i])
+                    closed_record['close_timestamp'] = datetime.now(lagos_tz).isoformat()
+                    closed_to_add.append(closed_record)
+                    seen_closed_keys.add(key)
+                    log_and_print(f"New closed trade matched for {key} in {account_key}", "INFO")
+
+                indices_to_remove.add(idx)
+                log_and_print(f"Matched and marking for removal: {key} from signals", "INFO")
+
+        # Remove matched signals with keyed deletes; the store keeps the timeframe counts
+        removed_count = store.remove_ids([signal_ids[idx] for idx in sorted(indices_to_remove)])
+        signals_saved = removed_count >= 0
+        removed_count = max(removed_count, 0)
 
         if removed_count > 0:
-            # Recalculate summary after removals
-            timeframe_counts = {
-                '5minutes': 0,
-                '15minutes': 0,
-                '30minutes': 0,
-                '1hour': 0,
-                '4hours': 0
-            }
-            for signal in signals:
-                timeframe = signal['timeframe'].lower().replace('4hour', '4hours')
-                if timeframe == '5minutes':
-                    timeframe_counts['5minutes'] += 1
-                elif timeframe == '15minutes':
-                    timeframe_counts['15minutes'] += 1
-                elif timeframe == '30minutes':
-                    timeframe_counts['30minutes'] += 1
-                elif timeframe == '1hour':
-                    timeframe_counts['1hour'] += 1
-                elif timeframe == '4hours':
-                    timeframe_counts['4hours'] += 1
-
-            signals_data['orders'] = signals
-            signals_data.update({
-                "bouncestream_pendingorders": len(signals),
-                "5minutes pending orders": timeframe_counts['5minutes'],
-                "15minutes pending orders": timeframe_counts['15minutes'],
-                "30minutes pending orders": timeframe_counts['30minutes'],
-                "1Hour pending orders": timeframe_counts['1hour'],
-                "4Hours pending orders": timeframe_counts['4hours'],
-            })
-
-            # Save updated signals
-            try:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
-                os.chmod(signals_path, 0o666)
-                log_and_print(f"Updated signals saved to {signals_path} ({removed_count} signals removed)", "SUCCESS")
-            except Exception as e:
-                log_and_print(f"Error saving updated signals to {signals_path}: {str(e)}", "ERROR")
+            log_and_print(f"Removed {removed_count} signals from {store.db_path}", "SUCCESS")
 
             # Append new closed trades
             if closed_to_add:
-                existing_closed.extend(closed_to_add)
-                try:
-                    with open(closed_path, 'w', encoding='utf-8') as f:
-                        json.dump(existing_closed, f, indent=4)
-                    os.chmod(closed_path, 0o666)
-                    log_and_print(f"Appended {len(closed_to_add)} unique closed trades to {closed_path}", "SUCCESS")
-                except Exception as e:
-                    log_and_print(f"Error saving closed trades to {closed_path}: {str(e)}", "ERROR")
+                added = closed_ledger.append(closedledger.ALL_CLOSED_SCOPE, closed_to_add)
+                if added >= 0 and closed_ledger.export_json(closedledger.ALL_CLOSED_SCOPE):
+                    log_and_print(f"Appended {added} unique closed trades to {closed_path}", "SUCCESS")
+                else:
+                    log_and_print(f"Error saving closed trades to {closed_path}", "ERROR")
+
+        # Keep the previous watermarks if the signals could not be saved, so the same deals are reconciled next run
+        if signals_saved:
+            history_sync.commit()
 
         log_and_print(f"Closed trades processing complete: {removed_count} signals removed, {len(closed_to_add)} new closed trades added", "INFO")
         return removed_count
 
-    async def removeclosedtrades(self, valid_accounts: List[Dict]) -> int:
-        """Check each account's trade history, match closed trades with bouncestream signals, remove matched signals from JSON, and append unique closed trades to allclosedorders.json."""
-        log_and_print("===== Removing Closed Trades from Bouncestream Signals =====", "TITLE")
-
-        signals_path = os.path.join(BASE_LOTSIZE_FOLDER, "bouncestreamsignals.json")
-        if not os.path.exists(signals_path):
-            log_and_print(f"Signals file not found: {signals_path}", "ERROR")
-            return 0
-
-        try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
-            signals = signals_data['orders']
-            log_and_print(f"Loaded {len(signals)} signals from {signals_path}", "INFO")
-        except Exception as e:
-            log_and_print(f"Error loading signals from {signals_path}: {str(e)}", "ERROR")
+    async def batch_update_programme_startdate(self, programme_ids: List[str]) -> int:
+        """Batch update programmetrade_startdate for programmes with successful orders if the date is NULL or empty."""
+        log_and_print(f"Received {len(programme_ids)} programme IDs for start date update", "DEBUG")
+        if not programme_ids:
+            log_and_print("No programme IDs to update for programmetrade_startdate", "INFO")
             return 0
 
-        if not signals:
-            log_and_print("No signals to process for closed trades", "INFO")
-            return 0
+        update_queries = []
+        current_date = datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S')
 
-        # Create signal key to index mapping for quick lookup and removal
-        signals_dict = {}
-        for idx, signal in enumerate(signals):
-            key = f"{signal['pair']}_{signal['order_type']}_{signal['entry_price']:.5f}"
-            signals_dict[key] = idx
+        for programme_id in programme_ids:
+            # Verify programme_id exists and programmetrade_startdate is NULL
+            check_query = f"""
+                SELECT programmetrade_startdate
+                FROM user_programmes
+                WHERE id = '{programme_id}'
+            """
+            log_and_print(f"Verifying programme_id={programme_id} with query: {check_query}", "DEBUG")
+            result = db.execute_query(check_query)
+            
+            if result['status'] != 'success' or not isinstance(result['results'], list) or not result['results']:
+                log_and_print(f"Skipping update for programme_id={programme_id}: ID does not exist or query failed", "ERROR")
+                continue
 
-        # Closed trades path
-        closed_dir = os.path.join(BASE_LOTSIZE_FOLDER, "closedtrades")
-        closed_path = os.path.join(closed_dir, "allclosedorders.json")
-        os.makedirs(closed_dir, exist_ok=True)
-
-        # Load existing closed trades to check for duplicates
-        existing_closed = []
-        existing_closed_keys = set()
-        if os.path.exists(closed_path):
-            try:
-                with open(closed_path, 'r', encoding='utf-8') as f:
-                    existing_closed = json.load(f)
-                for closed_record in existing_closed:
-                    key = f"{closed_record['pair']}_{closed_record['order_type']}_{closed_record['entry_price']:.5f}"
-                    existing_closed_keys.add(key)
-                log_and_print(f"Loaded {len(existing_closed)} existing closed trades from {closed_path}", "INFO")
-            except Exception as e:
-                log_and_print(f"Error loading existing closed trades from {closed_path}: {str(e)}", "WARNING")
-                existing_closed = []
-
-        closed_to_add = []
-        indices_to_remove = set()
-
-        # Process each valid account
-        for account in valid_accounts:
-            user_id = account['user_id']
-            subaccount_id = account['subaccount_id']
-            account_type = "sa" if subaccount_id else "ma"
-            account_key = f"user_{user_id}_sub_{subaccount_id}" if subaccount_id else f"user_{user_id}"
-            terminal_path = self.config.create_account_terminal(user_id, account_type)
-            if not terminal_path:
-                log_and_print(f"Skipping closed trades check for {account_key}: Failed to create terminal", "WARNING")
-                continue
-
-            # Initialize MT5
-            if not self.mt5_manager.initialize_mt5(
-                server=account['broker_server'],
-                login=account['broker_loginid'],
-                password=account['broker_password'],
-                terminal_path=terminal_path
-            ):
-                log_and_print(f"Skipping closed trades check for {account_key}: MT5 initialization failed", "WARNING")
-                continue
-
-            # Get history deals for the last 5 days
-            from_date = datetime.now(timezone.utc) - timedelta(days=5)
-            to_date = datetime.now(timezone.utc)
-            history_deals = thread_local.mt5.history_deals_get(from_date, to_date)
-            if not history_deals:
-                log_and_print(f"No history deals found for {account_key}", "DEBUG")
-                continue
-
-            # Group deals by position_id
-            positions = defaultdict(list)
-            for deal in history_deals:
-                if deal.entry in [thread_local.mt5.DEAL_ENTRY_IN, thread_local.mt5.DEAL_ENTRY_OUT]:
-                    positions[deal.position_id].append(deal)
-
-            # Process each closed position
-            for pos_id, deals in positions.items():
-                if len(deals) < 2:
-                    continue
-                in_deals = [d for d in deals if d.entry == thread_local.mt5.DEAL_ENTRY_IN]
-                out_deals = [d for d in deals if d.entry == thread_local.mt5.DEAL_ENTRY_OUT]
-                if not in_deals or not out_deals:
-                    continue
-
-                open_deal = in_deals[0]
-                close_deal = out_deals[0]
-
-                if open_deal.symbol == '':
-                    continue
-
-                symbol = open_deal.symbol.lower()
-                deal_type = open_deal.type
-                if deal_type not in [thread_local.mt5.DEAL_TYPE_BUY, thread_local.mt5.DEAL_TYPE_SELL]:
-                    continue
-
-                order_type = 'buy_limit' if deal_type == thread_local.mt5.DEAL_TYPE_BUY else 'sell_limit'
-                entry_price = open_deal.price
-                key = f"{symbol}_{order_type}_{entry_price:.5f}"
-
-                if key in signals_dict:
-                    idx = signals_dict[key]
-                    if key not in existing_closed_keys:
-                        signal = signals[idx]
-                        closed_record = signal.copy()
-                        closed_record['close_time'] = datetime.fromtimestamp(close_deal.time, tz=timezone.utc).astimezone(pytz.timezone('Africa/Lagos')).isoformat()
-                        closed_record['close_price'] = close_deal.price
-                        closed_record['profit'] = close_deal.profit
-                        closed_record['close_timestamp'] = datetime.now(pytz.timezone('Africa/Lagos')).isoformat()
-                        closed_to_add.append(closed_record)
-                        existing_closed_keys.add(key)
-                        log_and_print(f"New closed trade matched for {key} in {account_key}", "INFO")
-
-                    indices_to_remove.add(idx)
-                    log_and_print(f"Matched and marking for removal: {key} from signals", "INFO")
-
-        # Remove matched signals (in reverse order to avoid index shifting)
-        removed_count = 0
-        for idx in sorted(indices_to_remove, reverse=True):
-            del signals[idx]
-            removed_count += 1
-
-        if removed_count > 0:
-            # Recalculate summary after removals
-            timeframe_counts = {
-                '5minutes': 0,
-                '15minutes': 0,
-                '30minutes': 0,
-                '1hour': 0,
-                '4hours': 0
-            }
-            for signal in signals:
-                timeframe = signal['timeframe'].lower().replace('4hour', '4hours')
-                if timeframe == '5minutes':
-                    timeframe_counts['5minutes'] += 1
-                elif timeframe == '15minutes':
-                    timeframe_counts['15minutes'] += 1
-                elif timeframe == '30minutes':
-                    timeframe_counts['30minutes'] += 1
-                elif timeframe == '1hour':
-                    timeframe_counts['1hour'] += 1
-                elif timeframe == '4hours':
-                    timeframe_counts['4hours'] += 1
-
-            signals_data['orders'] = signals
-            signals_data.update({
-                "bouncestream_pendingorders": len(signals),
-                "5minutes pending orders": timeframe_counts['5minutes'],
-                "15minutes pending orders": timeframe_counts['15minutes'],
-                "30minutes pending orders": timeframe_counts['30minutes'],
-                "1Hour pending orders": timeframe_counts['1hour'],
-                "4Hours pending orders": timeframe_counts['4hours'],
-            })
-
-            # Save updated signals
-            try:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
-                os.chmod(signals_path, 0o666)
-                log_and_print(f"Updated signals saved to {signals_path} ({removed_count} signals removed)", "SUCCESS")
-            except Exception as e:
-                log_and_print(f"Error saving updated signals to {signals_path}: {str(e)}", "ERROR")
-
-            # Append new closed trades
-            if closed_to_add:
-                existing_closed.extend(closed_to_add)
-                try:
-                    with open(closed_path, 'w', encoding='utf-8') as f:
-                        json.dump(existing_closed, f, indent=4)
-                    os.chmod(closed_path, 0o666)
-                    log_and_print(f"Appended {len(closed_to_add)} unique closed trades to {closed_path}", "SUCCESS")
-                except Exception as e:
-                    log_and_print(f"Error saving closed trades to {closed_path}: {str(e)}", "ERROR")
-
-        log_and_print(f"Closed trades processing complete: {removed_count} signals removed, {len(closed_to_add)} new closed trades added", "INFO")
-        return removed_count
-
-    async def batch_update_programme_startdate(self, programme_ids: List[str]) -> int:
-        """Batch update programmetrade_startdate for programmes with successful orders if the date is NULL or empty."""
-        log_and_print(f"Received {len(programme_ids)} programme IDs for start date update", "DEBUG")
-        if not programme_ids:
-            log_and_print("No programme IDs to update for programmetrade_startdate", "INFO")
-            return 0
-
-        update_queries = []
-        current_date = datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S')
-
-        for programme_id in programme_ids:
-            # Verify programme_id exists and programmetrade_startdate is NULL
-            check_query = f"""
-                SELECT programmetrade_startdate
-                FROM user_programmes
-                WHERE id = '{programme_id}'
-            """
-            log_and_print(f"Verifying programme_id={programme_id} with query: {check_query}", "DEBUG")
-            result = db.execute_query(check_query)
-            
-            if result['status'] != 'success' or not isinstance(result['results'], list) or not result['results']:
-                log_and_print(f"Skipping update for programme_id={programme_id}: ID does not exist or query failed", "ERROR")
-                continue
-
-            current_startdate = result['results'][0].get('programmetrade_startdate')
-            if current_startdate is not None:
-                log_and_print(f"Skipping update for programme_id={programme_id}: programmetrade_startdate already set to {current_startdate}", "INFO")
-                continue
+            current_startdate = result['results'][0].get('programmetrade_startdate')
+            if current_startdate is not None:
+                log_and_print(f"Skipping update for programme_id={programme_id}: programmetrade_startdate already set to {current_startdate}", "INFO")
+                continue
 
             # Build update query
             sql_query = f"""
@@ -1196,26 +1032,19 @@ class ProgrammeFetcher:
             log_and_print("Aborting initialization due to invalid MetaTrader 5 directory", "ERROR")
             return 0, 0, 0, 0
 
-        # Load signals from JSON
+        # Start a fresh account session for duplicate detection
+        self.duplicate_indexes = {}
+
+        # Load signals from the signal store
         signals_json_path = os.path.join(BASE_LOTSIZE_FOLDER, "bouncestreamsignals.json")
         try:
-            with open(signals_json_path, 'r') as file:
-                signals_data = json.load(file)
-            signals = signals_data.get('orders', [])
+            signals = signalstore.get_store(signals_json_path).load()
             self.total_signals_loaded += len(signals)
             log_and_print(f"Loaded {len(signals)} signals from {signals_json_path}", "INFO")
         except Exception as e:
             log_and_print(f"Error loading signals from {signals_json_path}: {str(e)}", "ERROR")
             return 0, 0, 0, 0
 
-        # Group signals by symbol
-        symbol_signals = {}
-        for signal in signals:
-            symbol = signal['pair'].lower()
-            if symbol not in symbol_signals:
-                symbol_signals[symbol] = []
-            symbol_signals[symbol].append(signal)
-
         # Update programmetrade_startdate for all valid accounts before processing
         programme_ids_to_update = []
         for account in valid_accounts:
@@ -1246,90 +1075,101 @@ class ProgrammeFetcher:
         else:
             log_and_print("No programmes need programmetrade_startdate updates", "INFO")
 
+        # Dispatch each account's full placement plan to an isolated MT5 worker process
+        plans = orderplan.OrderPlanCompiler(signals).compile_all()
+        engine = orderengine.OrderPlacementEngine()
+        results = await engine.run(valid_accounts, signals, plans)
+
         accounts_logged_in = 0
         accounts_with_symbols = 0
         total_orders_placed = 0
         accounts_with_orders = set()
-        batch_size = 20
-
-        # Process accounts in batches of 20
-        for batch_start in range(0, len(valid_accounts), batch_size):
-            batch_accounts = valid_accounts[batch_start:batch_start + batch_size]
-            log_and_print(f"Processing batch {batch_start // batch_size + 1} with {len(batch_accounts)} accounts", "INFO")
-
-            # For each symbol, process all accounts in the batch
-            for symbol, symbol_specific_signals in symbol_signals.items():
-                log_and_print(f"Processing orders for symbol {symbol} across batch", "INFO")
-                for account in batch_accounts:
-                    user_id = account['user_id']
-                    subaccount_id = account['subaccount_id']
-                    account_type = "sa" if subaccount_id else "ma"
-                    account_key = f"user_{user_id}_sub_{subaccount_id}" if subaccount_id else f"user_{user_id}"
-
-                    broker_details = {
-                        'broker_server': account.get('broker_server'),
-                        'broker_loginid': account.get('broker_loginid'),
-                        'broker_password': account.get('broker_password')
-                    }
-
-                    if not all([broker_details['broker_server'], broker_details['broker_loginid'], broker_details['broker_password']]):
-                        error_message = "Missing broker details (server, login, or password)"
-                        log_and_print(f"Skipping initialization for {account_key}: {error_message}", "ERROR")
-                        self.save_account_order_error(account_key, "N/A", error_message)
-                        continue
+        for account, result in zip(valid_accounts, results):
+            if result is None:
+                continue
+            self.merge_counters(result)
+            accounts_logged_in += result['logged_in']
+            if result['symbols_added'] > 0:
+                accounts_with_symbols += 1
+            if result['orders_placed'] > 0:
+                accounts_with_orders.add(orderengine.account_key_for(account))
+            total_orders_placed += result['orders_placed']
 
-                    terminal_path = self.config.create_account_terminal(user_id, account_type)
-                    if not terminal_path:
-                        error_message = "Failed to create MetaTrader 5 terminal directory"
-                        log_and_print(f"Skipping initialization for {account_key}: {error_message}", "ERROR")
-                        self.save_account_order_error(account_key, "N/A", error_message)
-                        continue
+        return accounts_logged_in, accounts_with_symbols, total_orders_placed, len(accounts_with_orders)
 
-                    # Initialize MT5 and get available symbols
-                    for attempt in range(1, MAX_RETRIES + 1):
-                        try:
-                            if self.mt5_manager.initialize_mt5(
-                                server=account['broker_server'],
-                                login=account['broker_loginid'],
-                                password=account['broker_password'],
-                                terminal_path=terminal_path
-                            ):
-                                log_and_print(f"MT5 initialization successful for {account_key} for symbol {symbol}", "SUCCESS")
-                                accounts_logged_in += 1
-                                break
-                            else:
-                                error_message = f"MT5 initialization failed: {thread_local.mt5.last_error()}"
-                                log_and_print(f"MT5 initialization failed for {account_key} on attempt {attempt}: {error_message}", "ERROR")
-                                if attempt == MAX_RETRIES:
-                                    self.save_account_order_error(account_key, "N/A", error_message)
-                                    continue
-                                log_and_print(f"Retrying MT5 initialization after {MT5_RETRY_DELAY} seconds...", "INFO")
-                                await asyncio.sleep(MT5_RETRY_DELAY)
-                        except Exception as e:
-                            error_message = f"Exception during MT5 initialization: {str(e)}"
-                            log_and_print(f"Exception during MT5 initialization for {account_key} on attempt {attempt}: {error_message}", "ERROR")
-                            if attempt == MAX_RETRIES:
-                                self.save_account_order_error(account_key, "N/A", error_message)
-                                continue
-                            log_and_print(f"Retrying MT5 initialization after {MT5_RETRY_DELAY} seconds...", "INFO")
-                            await asyncio.sleep(MT5_RETRY_DELAY)
-
-                    available_symbols = self.get_available_symbols()
-                    if not available_symbols:
-                        error_message = "No available symbols retrieved from server"
-                        log_and_print(f"No available symbols for {account_key}, aborting order placement: {error_message}", "ERROR")
-                        self.save_account_order_error(account_key, "N/A", error_message)
-                        continue
+    def collect_counters(self) -> Dict[str, int]:
+        """Return this fetcher's order placement counters."""
+        return {name: getattr(self, name) for name in ENGINE_COUNTER_FIELDS}
+
+    def merge_counters(self, counters: Dict[str, int]) -> None:
+        """Add counters returned by an order engine worker to this fetcher's totals."""
+        for name in ENGINE_COUNTER_FIELDS:
+            setattr(self, name, getattr(self, name) + counters.get(name, 0))
+
+    async def run_account_plan(self, account: Dict, signals: List[Dict], plans: Optional[Dict[tuple, Dict]] = None) -> Dict[str, int]:
+        """Initialize MT5 for one account and place its orders for all signals; runs inside an order engine worker."""
+        user_id = account['user_id']
+        subaccount_id = account['subaccount_id']
+        account_type = "sa" if subaccount_id else "ma"
+        account_key = f"user_{user_id}_sub_{subaccount_id}" if subaccount_id else f"user_{user_id}"
+        result = {'logged_in': 0, 'symbols_added': 0, 'orders_placed': 0}
+
+        broker_details = {
+            'broker_server': account.get('broker_server'),
+            'broker_loginid': account.get('broker_loginid'),
+            'broker_password': account.get('broker_password')
+        }
 
-                    # Place orders for this symbol
-                    symbols_added, orders_placed = await self.place_orders_for_account(account, terminal_path, symbol_specific_signals, available_symbols)
-                    if symbols_added > 0:
-                        accounts_with_symbols += 1
-                    if orders_placed > 0:
-                        accounts_with_orders.add(account_key)
-                    total_orders_placed += orders_placed
+        if not all([broker_details['broker_server'], broker_details['broker_loginid'], broker_details['broker_password']]):
+            error_message = "Missing broker details (server, login, or password)"
+            log_and_print(f"Skipping initialization for {account_key}: {error_message}", "ERROR")
+            self.save_account_order_error(account_key, "N/A", error_message)
+            return {**result, **self.collect_counters()}
 
-        return accounts_logged_in, accounts_with_symbols, total_orders_placed, len(accounts_with_orders)
+        terminal_path = self.config.create_account_terminal(user_id, account_type)
+        if not terminal_path:
+            error_message = "Failed to create MetaTrader 5 terminal directory"
+            log_and_print(f"Skipping initialization for {account_key}: {error_message}", "ERROR")
+            self.save_account_order_error(account_key, "N/A", error_message)
+            return {**result, **self.collect_counters()}
+
+        # Initialize MT5 and get available symbols
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                if self.mt5_manager.initialize_mt5(
+                    server=account['broker_server'],
+                    login=account['broker_loginid'],
+                    password=account['broker_password'],
+                    terminal_path=terminal_path
+                ):
+                    log_and_print(f"MT5 initialization successful for {account_key}", "SUCCESS")
+                    result['logged_in'] = 1
+                    break
+                else:
+                    error_message = f"MT5 initialization failed: {thread_local.mt5.last_error()}"
+                    log_and_print(f"MT5 initialization failed for {account_key} on attempt {attempt}: {error_message}", "ERROR")
+            except Exception as e:
+                error_message = f"Exception during MT5 initialization: {str(e)}"
+                log_and_print(f"Exception during MT5 initialization for {account_key} on attempt {attempt}: {error_message}", "ERROR")
+            if attempt == MAX_RETRIES:
+                self.save_account_order_error(account_key, "N/A", error_message)
+                return {**result, **self.collect_counters()}
+            log_and_print(f"Retrying MT5 initialization after {MT5_RETRY_DELAY} seconds...", "INFO")
+            await asyncio.sleep(MT5_RETRY_DELAY)
+
+        available_symbols = self.get_available_symbols()
+        if not available_symbols:
+            error_message = "No available symbols retrieved from server"
+            log_and_print(f"No available symbols for {account_key}, aborting order placement: {error_message}", "ERROR")
+            self.save_account_order_error(account_key, "N/A", error_message)
+            return {**result, **self.collect_counters()}
+
+        # Place orders for all symbols in one pass for this account
+        symbols_added, orders_placed = await self.place_orders_for_account(account, terminal_path, signals, available_symbols, plans, initialized=True)
+        symbolresolver.report_misses()
+        result['symbols_added'] = symbols_added
+        result['orders_placed'] = orders_placed
+        return {**result, **self.collect_counters()}
 
     def get_available_symbols(self) -> List[str]:
         """Fetch and return all available symbols on the server."""
@@ -1347,22 +1187,15 @@ class ProgrammeFetcher:
             return []
 
     def get_exact_symbol_match(self, json_symbol: str, available_symbols: List[str]) -> Optional[str]:
-        """Find the exact server symbol matching the JSON symbol (case-insensitive)."""
-        json_lower = json_symbol.lower()
-        lower_available = [s.lower() for s in available_symbols]
-        if json_lower in lower_available:
-            index = lower_available.index(json_lower)
-            exact = available_symbols[index]
-            log_and_print(f"Matched '{json_symbol}' to exact server symbol: '{exact}'", "DEBUG")
-            return exact
-        else:
-            close_matches = difflib.get_close_matches(json_symbol, available_symbols, n=3, cutoff=0.6)
-            log_and_print(f"No exact match for '{json_symbol}'. Closest server symbols: {', '.join(close_matches) if close_matches else 'None'}", "WARNING")
-            return None
+        """Find the server symbol matching the JSON symbol (case-insensitive, then normalized aliases)."""
+        server_symbol = symbolresolver.resolve_symbol(json_symbol, available_symbols)
+        if server_symbol is not None:
+            log_and_print(f"Matched '{json_symbol}' to server symbol: '{server_symbol}'", "DEBUG")
+        return server_symbol
 
     def save_failed_orders(self, symbol: str, order_type: str, entry_price: float, profit_price: float, stop_loss: float, 
                         lot_size: float, allowed_risk: float, error_message: str, error_category: str = "unknown") -> None:
-        """Save a single failed pending order to a categorized JSON file incrementally."""
+        """Journal a single failed pending order for its categorized JSON file."""
         base_path = os.path.join(BASE_LOTSIZE_FOLDER, "errors")
         output_paths = {
             "invalid_entry": os.path.join(base_path, "failedordersinvalidentry.json"),
@@ -1382,66 +1215,31 @@ class ProgrammeFetcher:
             "error_message": error_message,
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
-        try:
-            os.makedirs(base_path, exist_ok=True)
-            existing_data = []
-            if os.path.exists(output_path):
-                try:
-                    with open(output_path, 'r') as file:
-                        existing_data = json.load(file)
-                    if not isinstance(existing_data, list):
-                        existing_data = []
-                except json.JSONDecodeError:
-                    log_and_print(f"Corrupted JSON file at {output_path}, starting fresh", "WARNING")
-                    existing_data = []
-
-            existing_data.append(failed_order)
-            with open(output_path, 'w') as file:
-                json.dump(existing_data, file, indent=4)
-            log_and_print(f"Successfully saved failed order for {symbol} to {output_path} (Category: {error_category})", "SUCCESS")
-        except Exception as e:
-            log_and_print(f"Error saving failed order for {symbol} to {output_path}: {str(e)}", "ERROR")
+        errorjournal.get_journal(output_path, layout="list").append(failed_order)
+        log_and_print(f"Journaled failed order for {symbol} to {output_path} (Category: {error_category})", "DEBUG")
 
-    # Modified check_for_duplicate function
-    def check_for_duplicate(self, account: Dict, server_symbol: str, json_symbol: str, order_type: str, entry_price: float) -> tuple[bool, str]:
-        """
-        Check if an order with the given symbol, order_type, and entry_price already exists as:
-        - A running position in MT5 or runningtrades.json
-        - A pending limit order in MT5
-        - A closed trade in closedtrades.json
-        
-        Returns (True, reason) if duplicate exists (skip placement), (False, 'none') otherwise.
-        Reason can be 'running', 'limit', or 'closed'.
+    def duplicate_key(self, pair: str, order_type: str, entry_price: float, source: str = 'json') -> tuple:
+        """Build the hashed duplicate-index key for a pair, order type and entry price.
+
+        source is 'mt5' for live positions and orders, which are keyed by server symbol, and 'json' for
+        the running trades file, which is keyed by the signal pair like the per-signal checks it replaces.
         """
-        account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
-        key = f"{json_symbol.lower()}_{order_type.lower()}_{entry_price:.5f}"
-        log_and_print(f"Checking for duplicate order for {account_key}: {key}", "DEBUG")
+        return (source, str(pair).lower(), str(order_type).lower(), round(float(entry_price), 5))
 
-        # Check 1: Existing running positions in MT5
-        try:
-            positions = thread_local.mt5.positions_get(symbol=server_symbol)
-            if positions:
-                pos_type = thread_local.mt5.ORDER_TYPE_BUY if 'buy' in order_type.lower() else thread_local.mt5.ORDER_TYPE_SELL
-                for pos in positions:
-                    if pos.type == pos_type and abs(pos.price_open - entry_price) < 0.0001:  # Tolerance for floating point
-                        log_and_print(f"Duplicate running position found in MT5 for {key} in {account_key}", "WARNING")
-                        return True, 'running'
-        except Exception as e:
-            log_and_print(f"Error checking MT5 positions for {account_key}: {str(e)}", "WARNING")
+    def build_duplicate_index(self, account: Dict) -> Dict[tuple, str]:
+        """
+        Build the duplicate index for an account session with one positions_get(), one orders_get()
+        and one load of the running trades JSON file.
 
-        # Check 2: Existing pending limit orders in MT5
-        try:
-            pending_orders = thread_local.mt5.orders_get(symbol=server_symbol)
-            if pending_orders:
-                order_mt5_type = thread_local.mt5.ORDER_TYPE_BUY_LIMIT if 'buy_limit' in order_type.lower() else thread_local.mt5.ORDER_TYPE_SELL_LIMIT
-                for order in pending_orders:
-                    if order.type == order_mt5_type and abs(order.price_open - entry_price) < 0.0001:
-                        log_and_print(f"Duplicate pending order found in MT5 for {key} in {account_key}", "WARNING")
-                        return True, 'limit'
-        except Exception as e:
-            log_and_print(f"Error checking MT5 pending orders for {account_key}: {str(e)}", "WARNING")
+        Keys are (source, pair, order_type, rounded_entry) and values are the skip reason ('running' or
+        'limit'); MT5 positions and orders are keyed by their server symbol. Sources are inserted from lowest to highest precedence so the reason matches the
+        order the old per-signal checks ran in. Closed trades, the lowest precedence, are checked
+        against the closed-trade ledger by check_for_duplicate instead of being loaded here.
+        """
+        account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
+        index: Dict[tuple, str] = {}
 
-        # Check 3: Running trades in per-account JSON
+        # Running trades in per-account JSON
         running_file = os.path.join(self.config.running_trades_dir, f"{account_key}_runningtrades.json")
         if os.path.exists(running_file):
             try:
@@ -1450,12 +1248,8 @@ class ProgrammeFetcher:
                 if isinstance(running_trades, list):
                     for trade in running_trades:
                         try:
-                            trade_entry_price = float(trade.get('entry_price', 0))
-                            trade_key = f"{trade.get('pair', '').lower()}_{trade.get('order_type', '').lower()}_{trade_entry_price:.5f}"
-                            if trade_key == key:
-                                log_and_print(f"Duplicate running trade found in JSON for {key} in {account_key}", "WARNING")
-                                return True, 'running'
-                        except (ValueError, KeyError):
+                            index[self.duplicate_key(trade.get('pair', ''), trade.get('order_type', ''), trade.get('entry_price', 0))] = 'running'
+                        except (ValueError, TypeError, AttributeError):
                             log_and_print(f"Invalid trade data in running trades JSON for {account_key}", "DEBUG")
                 else:
                     log_and_print(f"Running trades JSON for {account_key} is not a list, skipping", "DEBUG")
@@ -1464,40 +1258,98 @@ class ProgrammeFetcher:
             except Exception as e:
                 log_and_print(f"Error loading running trades JSON for {account_key}: {str(e)}", "WARNING")
 
-        # Check 4: Closed trades in per-account JSON
-        closed_file = os.path.join(self.config.closed_trades_dir, f"{account_key}_closedtrades.json")
-        if os.path.exists(closed_file):
-            try:
-                with open(closed_file, 'r', encoding='utf-8') as f:
-                    closed_trades = json.load(f)
-                if isinstance(closed_trades, list):
-                    for trade in closed_trades:
-                        try:
-                            trade_entry_price = float(trade.get('entry_price', 0))
-                            trade_key = f"{trade.get('pair', '').lower()}_{trade.get('order_type', '').lower()}_{trade_entry_price:.5f}"
-                            if trade_key == key:
-                                log_and_print(f"Duplicate closed trade found in JSON for {key} in {account_key}", "WARNING")
-                                return True, 'closed'
-                        except (ValueError, KeyError):
-                            log_and_print(f"Invalid trade data in closed trades JSON for {account_key}", "DEBUG")
-                else:
-                    log_and_print(f"Closed trades JSON for {account_key} is not a list, skipping", "DEBUG")
-            except json.JSONDecodeError as e:
-                log_and_print(f"Corrupted closed trades JSON for {account_key}: {str(e)}. Skipping and resetting file.", "DEBUG")
-                # Optionally reset the file to empty list
-                try:
-                    with open(closed_file, 'w', encoding='utf-8') as f:
-                        json.dump([], f, indent=4)
-                    log_and_print(f"Reset corrupted closed trades JSON for {account_key} to empty list", "INFO")
-                except Exception as reset_e:
-                    log_and_print(f"Failed to reset closed trades JSON for {account_key}: {str(reset_e)}", "WARNING")
-            except Exception as e:
-                log_and_print(f"Error loading closed trades JSON for {account_key}: {str(e)}", "WARNING")
+        # Pending limit orders in MT5
+        try:
+            pending_orders = thread_local.mt5.orders_get()
+            for order in pending_orders or []:
+                if order.type == thread_local.mt5.ORDER_TYPE_BUY_LIMIT:
+                    index[self.duplicate_key(order.symbol, 'buy_limit', order.price_open, 'mt5')] = 'limit'
+                elif order.type == thread_local.mt5.ORDER_TYPE_SELL_LIMIT:
+                    index[self.duplicate_key(order.symbol, 'sell_limit', order.price_open, 'mt5')] = 'limit'
+        except Exception as e:
+            log_and_print(f"Error checking MT5 pending orders for {account_key}: {str(e)}", "WARNING")
+
+        # Running positions in MT5 (highest precedence)
+        try:
+            positions = thread_local.mt5.positions_get()
+            for pos in positions or []:
+                order_type = 'buy_limit' if pos.type == thread_local.mt5.ORDER_TYPE_BUY else 'sell_limit'
+                index[self.duplicate_key(pos.symbol, order_type, pos.price_open, 'mt5')] = 'running'
+        except Exception as e:
+            log_and_print(f"Error checking MT5 positions for {account_key}: {str(e)}", "WARNING")
+
+        log_and_print(f"Built duplicate index for {account_key} with {len(index)} keys", "DEBUG")
+        return index
+
+    def record_placed_order(self, account: Dict, server_symbol: str, order_type: str, entry_price: float) -> None:
+        """Add a freshly placed pending order to the account's duplicate index under its server symbol."""
+        account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
+        index = self.duplicate_indexes.get(account_key)
+        if index is not None:
+            index[self.duplicate_key(server_symbol, order_type, entry_price, 'mt5')] = 'limit'
+
+    def check_for_duplicate(self, account: Dict, server_symbol: str, json_symbol: str, order_type: str, entry_price: float) -> tuple[bool, str]:
+        """
+        Check if an order with the given symbol, order_type, and entry_price already exists as:
+        - A running position in MT5 or runningtrades.json
+        - A pending limit order in MT5
+        - A closed trade in the account's closed-trade ledger
+
+        The account's duplicate index is built on first use and reused for the rest of the session;
+        closed trades are one indexed ledger lookup, so the check does not grow with trade history.
+        Returns (True, reason) if duplicate exists (skip placement), (False, 'none') otherwise.
+        Reason can be 'running', 'limit', or 'closed'.
+        """
+        account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
+        index = self.duplicate_indexes.get(account_key)
+        if index is None:
+            index = self.build_duplicate_index(account)
+            self.duplicate_indexes[account_key] = index
+
+        key = self.duplicate_key(json_symbol, order_type, entry_price)
+        reason = index.get(self.duplicate_key(server_symbol, order_type, entry_price, 'mt5')) or index.get(key)
+        if not reason and closedledger.get_ledger(self.config.closed_trades_dir).has_trade(
+                closedledger.account_scope(account_key), json_symbol, order_type, entry_price):
+            reason = 'closed'
+        if reason:
+            log_and_print(f"Duplicate {reason} order found for {key} in {account_key}", "WARNING")
+            return True, reason
 
         log_and_print(f"No duplicate found for {key} in {account_key}, safe to place", "DEBUG")
         return False, 'none'
 
     # Updated alltimeframesorder function to respect programme_timeframe
+    def add_symbols_to_market_watch(self, account: Dict, terminal_path: str, unique_symbols: List[str], signals: List[Dict],
+                                    available_symbols: List[str], added_symbols: List[str], failed_symbols: List[str]) -> marketwatch.MarketWatch:
+        """Make the signals' server symbols visible using the terminal's provisioned Market Watch, filling added/failed lists."""
+        account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
+        market_watch = marketwatch.MarketWatch(thread_local.mt5, os.path.dirname(terminal_path), f"{account['broker_server']}_{account['broker_loginid']}")
+
+        server_symbols = {}
+        for json_symbol in unique_symbols:
+            server_symbol = self.get_exact_symbol_match(json_symbol, available_symbols)
+            if server_symbol is None:
+                error_message = "No server symbol match found"
+                log_and_print(f"Skipping {json_symbol} for {account_key}: {error_message}", "ERROR")
+                failed_symbols.append(json_symbol)
+                self.save_account_order_error(account_key, json_symbol, error_message)
+                self.total_failed_orders += sum(1 for signal in signals if signal['pair'] == json_symbol)
+                continue
+            server_symbols[json_symbol] = server_symbol
+
+        visible_symbols, _ = market_watch.provision(list(server_symbols.values()))
+        for json_symbol, server_symbol in server_symbols.items():
+            if server_symbol in visible_symbols:
+                added_symbols.append(server_symbol)
+                continue
+            error_message = f"Failed to add {server_symbol} to Market Watch: {thread_local.mt5.last_error()}"
+            log_and_print(f"{error_message} for {account_key}", "ERROR")
+            failed_symbols.append(json_symbol)
+            self.save_account_order_error(account_key, json_symbol, error_message)
+            self.total_failed_orders += sum(1 for signal in signals if signal['pair'] == json_symbol)
+        log_and_print(f"Market Watch ready for {account_key}: {len(added_symbols)} symbols visible", "SUCCESS" if added_symbols else "WARNING")
+        return market_watch
+
     async def alltimeframesorder(self, account: Dict, terminal_path: str, signals: List[Dict], available_symbols: List[str]) -> tuple[int, int]:
         """Place one order per timeframe (15m, 30m, 1h, 4h) for each symbol if available, except M5 unless no other timeframes exist."""
         account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
@@ -1587,46 +1439,7 @@ class ProgrammeFetcher:
 
         # Step 1: Add symbols to Market Watch
         unique_symbols = list(set(signal['pair'] for signal in signals))
-        for json_symbol in unique_symbols:
-            try:
-                server_symbol = self.get_exact_symbol_match(json_symbol, available_symbols)
-                if server_symbol is None:
-                    error_message = "No server symbol match found"
-                    log_and_print(f"Skipping {json_symbol} for {account_key}: {error_message}", "ERROR")
-                    failed_symbols.append(json_symbol)
-                    self.save_account_order_error(account_key, json_symbol, error_message)
-                    self.total_failed_orders += sum(1 for signal in signals if signal['pair'] == json_symbol)
-                    continue
-
-                for attempt in range(1, MAX_RETRIES + 1):
-                    if thread_local.mt5.symbol_select(server_symbol, True):
-                        log_and_print(f"Symbol {server_symbol} selected directly in Market Watch for {account_key}", "SUCCESS")
-                        added_symbols.append(server_symbol)
-                        break
-                    else:
-                        log_and_print(f"Direct selection of {server_symbol} failed for {account_key}, attempting test order on attempt {attempt}", "WARNING")
-                        if self.place_test_order(server_symbol):
-                            log_and_print(f"Symbol {server_symbol} added to Market Watch via test order for {account_key}", "SUCCESS")
-                            added_symbols.append(server_symbol)
-                            break
-                        else:
-                            log_and_print(f"Attempt {attempt}/{MAX_RETRIES}: Test order for {server_symbol} failed for {account_key}", "WARNING")
-                            if attempt == MAX_RETRIES:
-                                error_message = f"Failed to add {server_symbol} to Market Watch after retries: {thread_local.mt5.last_error()}"
-                                log_and_print(error_message, "ERROR")
-                                failed_symbols.append(json_symbol)
-                                self.save_account_order_error(account_key, json_symbol, error_message)
-                                self.total_failed_orders += sum(1 for signal in signals if signal['pair'] == json_symbol)
-                                continue
-                            log_and_print(f"Retrying test order after {MT5_RETRY_DELAY} seconds...", "INFO")
-                            await asyncio.sleep(MT5_RETRY_DELAY)
-
-            except Exception as e:
-                error_message = f"Error processing symbol {json_symbol}: {str(e)}"
-                log_and_print(error_message, "ERROR")
-                failed_symbols.append(json_symbol)
-                self.save_account_order_error(account_key, json_symbol, error_message)
-                self.total_failed_orders += sum(1 for signal in signals if signal['pair'] == json_symbol)
+        self.add_symbols_to_market_watch(account, terminal_path, unique_symbols, signals, available_symbols, added_symbols, failed_symbols)
 
         # Step 2: Group signals by symbol
         symbol_signals = {}
@@ -1728,6 +1541,7 @@ class ProgrammeFetcher:
                         server_symbol, order_type, entry_price, profit_price, stop_loss, adjusted_lot_size, signal_allowed_risk
                     )
                     if success:
+                        self.record_placed_order(account, server_symbol, order_type, entry_price)
                         pending_orders_placed.append((server_symbol, order_id, order_type, entry_price, profit_price, stop_loss, signal_allowed_risk, multiplier))
                         self.total_alltimeframes_orders += 1  # Increment alltimeframes counter
                         log_and_print(f"Order placed for {json_symbol} ({timeframe}) for {account_key}: {order_type} at {entry_price}, lot_size={adjusted_lot_size} (multiplier={multiplier})", "SUCCESS")
@@ -1766,20 +1580,15 @@ class ProgrammeFetcher:
         return len(added_symbols), len(pending_orders_placed)
 
     async def cleanup_signals_from_trades(self, valid_accounts: List[Dict]) -> int:
-        """Clean up bouncestreamsignals.json by removing signals matching running or closed trades from per-account JSONs.
+        """Clean up the signal store by removing signals matching running or closed trades from per-account JSONs.
         Collect unique running trades into allrunningorders.json and append unique closed trades to allclosedorders.json."""
         log_and_print("===== Cleaning Up Bouncestream Signals from Running and Closed Trades =====", "TITLE")
 
         signals_path = os.path.join(BASE_LOTSIZE_FOLDER, "bouncestreamsignals.json")
-        if not os.path.exists(signals_path):
-            log_and_print(f"Signals file not found: {signals_path}", "ERROR")
-            return 0
-
         try:
-            with open(signals_path, 'r', encoding='utf-8') as f:
-                signals_data = json.load(f)
-            signals = signals_data['orders']
-            log_and_print(f"Loaded {len(signals)} signals from {signals_path}", "INFO")
+            store = signalstore.get_store(signals_path)
+            signal_ids, signals = store.snapshot()
+            log_and_print(f"Loaded {len(signals)} signals from {store.db_path}", "INFO")
         except Exception as e:
             log_and_print(f"Error loading signals from {signals_path}: {str(e)}", "ERROR")
             return 0
@@ -1803,8 +1612,9 @@ class ProgrammeFetcher:
         # Running trades path
         running_path = os.path.join(running_dir, "allrunningorders.json")
 
-        # Closed trades path
-        closed_path = os.path.join(closed_dir, "allclosedorders.json")
+        # Closed-trade ledger; allclosedorders.json is its materialized view
+        closed_ledger = closedledger.get_ledger(closed_dir)
+        closed_path = closed_ledger.json_path(closedledger.ALL_CLOSED_SCOPE)
 
         # Collect unique running trades
         running_dict = {}
@@ -1835,103 +1645,43 @@ class ProgrammeFetcher:
         except Exception as e:
             log_and_print(f"Error saving running trades to {running_path}: {str(e)}", "ERROR")
 
-        # Collect unique closed trades
-        closed_dict = {}
-        # Load existing closed trades
-        if os.path.exists(closed_path):
-            try:
-                with open(closed_path, 'r', encoding='utf-8') as f:
-                    existing_closed = json.load(f)
-                for closed_record in existing_closed:
-                    key = f"{closed_record['pair']}_{closed_record['order_type']}_{float(closed_record['entry_price']):.5f}"
-                    closed_dict[key] = closed_record
-                log_and_print(f"Loaded {len(existing_closed)} existing closed trades from {closed_path}", "INFO")
-            except Exception as e:
-                log_and_print(f"Error loading existing closed trades from {closed_path}: {str(e)}", "WARNING")
-                existing_closed = []
-
-        # Load per-account closed trades and add unique
+        # Aggregate closed trades appended to each account's ledger scope since the last cleanup
+        account_ledger = closedledger.get_ledger(self.config.closed_trades_dir)
         new_closed_count = 0
         for account in valid_accounts:
             user_id = account['user_id']
             subaccount_id = str(account['subaccount_id']) if account['subaccount_id'] else None
             account_key = f"user_{user_id}_sub_{subaccount_id}" if subaccount_id else f"user_{user_id}"
-            closed_file = os.path.join(self.config.closed_trades_dir, f"{account_key}_closedtrades.json")
-            if os.path.exists(closed_file):
-                try:
-                    with open(closed_file, 'r', encoding='utf-8') as f:
-                        account_closed = json.load(f)
-                    for closed_record in account_closed:
-                        key = f"{closed_record['pair']}_{closed_record['order_type']}_{float(closed_record['entry_price']):.5f}"
-                        if key not in closed_dict:
-                            closed_dict[key] = closed_record
-                            new_closed_count += 1
-                    log_and_print(f"Loaded {len(account_closed)} closed trades from {closed_file} for {account_key}", "DEBUG")
-                except Exception as e:
-                    log_and_print(f"Error loading closed trades from {closed_file}: {str(e)}", "WARNING")
-
-        # Save aggregated closed trades
-        all_closed = list(closed_dict.values())
-        try:
-            with open(closed_path, 'w', encoding='utf-8') as f:
-                json.dump(all_closed, f, indent=4)
-            os.chmod(closed_path, 0o666)
-            log_and_print(f"Saved {len(all_closed)} unique closed trades to {closed_path} ({new_closed_count} new)", "SUCCESS")
-        except Exception as e:
-            log_and_print(f"Error saving closed trades to {closed_path}: {str(e)}", "ERROR")
+            scope = closedledger.account_scope(account_key)
+            watermark_key = f"aggregated:{scope}"
+            rows = account_ledger.records(scope, int(account_ledger.get_meta(watermark_key) or 0))
+            if not rows:
+                continue
+            added = closed_ledger.append(closedledger.ALL_CLOSED_SCOPE, [record for _, record in rows])
+            if added < 0:
+                continue  # Keep the watermark so these trades are aggregated next time
+            new_closed_count += added
+            account_ledger.set_meta(watermark_key, str(rows[-1][0]))
+            log_and_print(f"Aggregated {len(rows)} closed trades for {account_key} ({added} new)", "DEBUG")
+
+        # Refresh the aggregated closed trades view
+        closed_count = closed_ledger.count(closedledger.ALL_CLOSED_SCOPE)
+        if closed_ledger.export_json(closedledger.ALL_CLOSED_SCOPE):
+            log_and_print(f"Saved {closed_count} unique closed trades to {closed_path} ({new_closed_count} new)", "SUCCESS")
+        else:
+            log_and_print(f"Error saving closed trades to {closed_path}", "ERROR")
 
         # Get all matching keys from running and closed
-        all_trade_keys = set(running_dict.keys()) | set(closed_dict.keys())
+        all_trade_keys = set(running_dict.keys()) | closed_ledger.existing_keys(closedledger.ALL_CLOSED_SCOPE, list(signals_dict))
         indices_to_remove = [signals_dict[key] for key in all_trade_keys if key in signals_dict]
 
-        # Remove matched signals (in reverse order to avoid index shifting)
-        removed_count = 0
-        for idx in sorted(indices_to_remove, reverse=True):
-            del signals[idx]
-            removed_count += 1
+        # Remove matched signals with keyed deletes; the store keeps the timeframe counts
+        removed_count = max(store.remove_ids([signal_ids[idx] for idx in sorted(indices_to_remove)]), 0)
 
         if removed_count > 0:
-            # Recalculate summary after removals
-            timeframe_counts = {
-                '5minutes': 0,
-                '15minutes': 0,
-                '30minutes': 0,
-                '1hour': 0,
-                '4hours': 0
-            }
-            for signal in signals:
-                timeframe = signal['timeframe'].lower().replace('4hour', '4hours')
-                if timeframe == '5minutes':
-                    timeframe_counts['5minutes'] += 1
-                elif timeframe == '15minutes':
-                    timeframe_counts['15minutes'] += 1
-                elif timeframe == '30minutes':
-                    timeframe_counts['30minutes'] += 1
-                elif timeframe == '1hour':
-                    timeframe_counts['1hour'] += 1
-                elif timeframe == '4hours':
-                    timeframe_counts['4hours'] += 1
-
-            signals_data['orders'] = signals
-            signals_data.update({
-                "bouncestream_pendingorders": len(signals),
-                "5minutes pending orders": timeframe_counts['5minutes'],
-                "15minutes pending orders": timeframe_counts['15minutes'],
-                "30minutes pending orders": timeframe_counts['30minutes'],
-                "1Hour pending orders": timeframe_counts['1hour'],
-                "4Hours pending orders": timeframe_counts['4hours'],
-            })
-
-            # Save updated signals
-            try:
-                with open(signals_path, 'w', encoding='utf-8') as f:
-                    json.dump(signals_data, f, indent=4)
-                os.chmod(signals_path, 0o666)
-                log_and_print(f"Updated signals saved to {signals_path} ({removed_count} signals removed)", "SUCCESS")
-            except Exception as e:
-                log_and_print(f"Error saving updated signals to {signals_path}: {str(e)}", "ERROR")
+            log_and_print(f"Removed {removed_count} signals from {store.db_path}", "SUCCESS")
 
-        log_and_print(f"Cleanup complete: {len(all_running)} unique running trades, {len(all_closed)} unique closed trades, {removed_count} signals removed", "INFO")
+        log_and_print(f"Cleanup complete: {len(all_running)} unique running trades, {closed_count} unique closed trades, {removed_count} signals removed", "INFO")
         return removed_count
 
     def place_pending_order(self, symbol: str, order_type: str, entry_price: float, profit_price: float, stop_loss: float, 
@@ -1949,141 +1699,19 @@ class ProgrammeFetcher:
                 log_and_print(error_message, "ERROR")
                 return False, None, error_message, "unknown"
 
-            if not symbol_info.trade_mode == thread_local.mt5.SYMBOL_TRADE_MODE_FULL:
-                error_message = f"Symbol {symbol} is not tradeable (trade mode: {symbol_info.trade_mode})"
-                log_and_print(error_message, "ERROR")
-                return False, None, error_message, "unknown"
-
             tick = thread_local.mt5.symbol_info_tick(symbol)
             if tick is None:
                 error_message = f"Cannot retrieve tick data for {symbol}, error: {thread_local.mt5.last_error()}"
                 log_and_print(error_message, "ERROR")
                 return False, None, error_message, "unknown"
 
-            tick_size = symbol_info.trade_tick_size
-            point = symbol_info.point
-            stops_level = symbol_info.trade_stops_level * point
-            current_bid = tick.bid
-            current_ask = tick.ask
-
-            entry_price = round(float(entry_price) / tick_size) * tick_size
-            profit_price = round(float(profit_price) / tick_size) * tick_size if profit_price else 0.0
-            stop_loss = round(float(stop_loss) / tick_size) * tick_size if stop_loss else 0.0
-
-            log_and_print(
-                f"Validating order for {symbol}: "
-                f"Order Type={order_type}, Entry={entry_price}, TP={profit_price}, SL={stop_loss}, "
-                f"Current Bid={current_bid}, Ask={current_ask}, Stops Level={stops_level}, Tick Size={tick_size}, "
-                f"Allowed Risk={allowed_risk}",
-                "DEBUG"
+            is_valid, request, error_message, error_category = orderengine.validate_pending_order(
+                thread_local.mt5, symbol_info, tick, symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk
             )
+            if not is_valid:
+                return False, None, error_message, error_category
 
-            is_buy_limit = order_type.lower() == "buy_limit"
-            is_sell_limit = order_type.lower() == "sell_limit"
-
-            if is_buy_limit:
-                min_price = current_ask - stops_level
-                if entry_price > min_price:
-                    error_message = (
-                        f"Invalid buy_limit entry price for {symbol}. "
-                        f"Entry: {entry_price}, must be <= {min_price} (ask: {current_ask}, stops_level: {stops_level})"
-                    )
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "invalid_entry"
-            elif is_sell_limit:
-                max_price = current_bid + stops_level
-                if entry_price < max_price:
-                    error_message = (
-                        f"Invalid sell_limit entry price for {symbol}. "
-                        f"Entry: {entry_price}, must be >= {max_price} (bid: {current_bid}, stops_level: {stops_level})"
-                    )
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "invalid_entry"
-            else:
-                error_message = f"Unsupported order type {order_type} for {symbol}"
-                log_and_print(error_message, "ERROR")
-                return False, None, error_message, "unknown"
-
-            if is_buy_limit:
-                if stop_loss and stop_loss > entry_price:
-                    error_message = f"Invalid stop-loss for {symbol} (buy_limit). SL: {stop_loss}, must be <= {entry_price}"
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "stop_loss"
-                if profit_price and profit_price < entry_price:
-                    error_message = f"Invalid take-profit for {symbol} (buy_limit). TP: {profit_price}, must be >= {entry_price}"
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "stop_loss"
-                if stop_loss and abs(entry_price - stop_loss) < stops_level:
-                    error_message = (
-                        f"Stop-loss too close to entry price for {symbol}. "
-                        f"SL: {stop_loss}, Entry: {entry_price}, Distance: {abs(entry_price - stop_loss)}, "
-                        f"Required: >= {stops_level}"
-                    )
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "stop_loss"
-                if profit_price and abs(profit_price - entry_price) < stops_level:
-                    error_message = (
-                        f"Take-profit too close to entry price for {symbol}. "
-                        f"TP: {profit_price}, Entry: {entry_price}, Distance: {abs(profit_price - entry_price)}, "
-                        f"Required: >= {stops_level}"
-                    )
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "stop_loss"
-            elif is_sell_limit:
-                if stop_loss and stop_loss < entry_price:
-                    error_message = f"Invalid stop-loss for {symbol} (sell_limit). SL: {stop_loss}, must be >= {entry_price}"
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "stop_loss"
-                if profit_price and profit_price > entry_price:
-                    error_message = f"Invalid take-profit for {symbol} (sell_limit). TP: {profit_price}, must be <= {entry_price}"
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "stop_loss"
-                if stop_loss and abs(entry_price - stop_loss) < stops_level:
-                    error_message = (
-                        f"Stop-loss too close to entry price for {symbol}. "
-                        f"SL: {stop_loss}, Entry: {entry_price}, Distance: {abs(entry_price - stop_loss)}, "
-                        f"Required: >= {stops_level}"
-                    )
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "stop_loss"
-                if profit_price and abs(profit_price - entry_price) < stops_level:
-                    error_message = (
-                        f"Take-profit too close to entry price for {symbol}. "
-                        f"TP: {profit_price}, Entry: {entry_price}, Distance: {abs(profit_price - entry_price)}, "
-                        f"Required: >= {stops_level}"
-                    )
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "stop_loss"
-
-            mt5_order_type = thread_local.mt5.ORDER_TYPE_BUY_LIMIT if is_buy_limit else thread_local.mt5.ORDER_TYPE_SELL_LIMIT
-            request = {
-                "action": thread_local.mt5.TRADE_ACTION_PENDING,
-                "symbol": symbol,
-                "volume": float(lot_size),
-                "type": mt5_order_type,
-                "price": entry_price,
-                "sl": stop_loss if stop_loss else 0.0,
-                "tp": profit_price if profit_price else 0.0,
-                "type_time": thread_local.mt5.ORDER_TIME_GTC,
-                "type_filling": thread_local.mt5.ORDER_FILLING_IOC,
-            }
-
-            log_and_print(f"Sending order for {symbol}: {request}, Allowed Risk={allowed_risk}", "DEBUG")
-
-            result = thread_local.mt5.order_send(request)
-            if result.retcode != thread_local.mt5.TRADE_RETCODE_DONE:
-                error_code, error_message = thread_local.mt5.last_error()
-                full_error = f"Pending order for {symbol} failed, error: {result.retcode}, {error_message}"
-                log_and_print(full_error, "ERROR")
-                error_category = "invalid_entry" if result.retcode == 10015 else "stop_loss" if result.retcode == 10016 else "unknown"
-                return False, None, full_error, error_category
-
-            log_and_print(
-                f"Pending {order_type} order for {symbol} placed successfully at {entry_price} "
-                f"with TP {profit_price}, SL {stop_loss}, Allowed Risk={allowed_risk} (Order #{result.order})",
-                "SUCCESS"
-            )
-            return True, result.order, None, None
+            return orderengine.submit_order_batch(thread_local.mt5, [request])[0]
 
         except Exception as e:
             error_message = f"Error placing pending order for {symbol}: {str(e)}"
@@ -2091,7 +1719,7 @@ class ProgrammeFetcher:
             return False, None, error_message, "unknown"
 
     def save_account_order_error(self, account_key: str, market: str, error_message: str) -> None:
-        """Save account-specific order placement errors to accountsordersissues.json."""
+        """Journal account-specific order placement errors for accountsordersissues.json."""
         error_dir = os.path.join(BASE_LOTSIZE_FOLDER, "errors")
         output_path = os.path.join(error_dir, "accountsordersissues.json")
         
@@ -2100,76 +1728,53 @@ class ProgrammeFetcher:
             "market": market if market else "N/A",
             "pending_order_status": f"fails({error_message})"
         }
-        
-        try:
-            os.makedirs(error_dir, exist_ok=True)
-            existing_data = []
-            if os.path.exists(output_path):
-                try:
-                    with open(output_path, 'r', encoding='utf-8') as file:
-                        existing_data = json.load(file)
-                    if not isinstance(existing_data, list):
-                        existing_data = []
-                except json.JSONDecodeError:
-                    log_and_print(f"Corrupted JSON file at {output_path}, starting fresh", "WARNING")
-                    existing_data = []
-            
-            existing_data.append(error_entry)
-            with open(output_path, 'w', encoding='utf-8') as file:
-                json.dump(existing_data, file, indent=4)
-            log_and_print(f"Saved error for {account_key} (market: {market}) to {output_path}", "INFO")
-        except Exception as e:
-            log_and_print(f"Error saving to {output_path}: {str(e)}", "ERROR")
+        errorjournal.get_journal(output_path, layout="list").append(error_entry)
+        log_and_print(f"Journaled error for {account_key} (market: {market}) to {output_path}", "INFO")
 
     # Updated place_orders_for_account function (already handles priorities correctly, but ensuring separate definitions for clarity)
-    async def place_orders_for_account(self, account: Dict, terminal_path: str, signals: List[Dict], available_symbols: List[str]) -> tuple[int, int]:
+    async def place_orders_for_account(self, account: Dict, terminal_path: str, signals: List[Dict], available_symbols: List[str],
+                                       plans: Optional[Dict[tuple, Dict]] = None, initialized: bool = False) -> tuple[int, int]:
         """Place pending orders for a valid account based on provided signals, using priority_timeframe logic (low-to-high or high-to-low).
         Modified to place one buy and one sell per symbol across timeframes, preferring both from the same timeframe if possible and far apart (>= 30 pips).
-        If only one available in a timeframe, place it and seek the opposite in subsequent timeframes if distance allows."""
-        programme_timeframe = account.get('programme_timeframe', 'priority_lowtohigh_timeframe')
+        If only one available in a timeframe, place it and seek the opposite in subsequent timeframes if distance allows.
+        Plan templates compiled by orderplan.OrderPlanCompiler can be passed in; otherwise they are compiled from the signals.
+        initialized=True means the caller already logged in to this account's terminal, so MT5 is not initialized again."""
+        programme_timeframe = orderplan.resolve_programme_timeframe(account.get('programme_timeframe', orderplan.DEFAULT_PROGRAMME_TIMEFRAME))
         log_and_print(f"Using {programme_timeframe} order placement strategy for account", "INFO")
-
-        # Define timeframe priorities separately based on strategy
-        if programme_timeframe == 'priority_lowtohigh_timeframe':
-            timeframe_priority = ['15minutes', '30minutes', '1hour', '4hours', '5minutes']
-            log_and_print(f"Timeframe priority order (low-to-high): {', '.join(timeframe_priority)}", "INFO")
-        elif programme_timeframe == 'priority_hightolow_timeframe':
-            timeframe_priority = ['4hours', '1hour', '30minutes', '15minutes', '5minutes']
-            log_and_print(f"Timeframe priority order (high-to-low): {', '.join(timeframe_priority)}", "INFO")
-        else:
-            log_and_print(f"Unknown programme_timeframe '{programme_timeframe}', defaulting to low-to-high", "WARNING")
-            timeframe_priority = ['15minutes', '30minutes', '1hour', '4hours', '5minutes']
+        timeframe_priority = orderplan.TIMEFRAME_PRIORITIES[programme_timeframe]
+        log_and_print(f"Timeframe priority order: {', '.join(timeframe_priority)}", "INFO")
 
         account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
         log_and_print(f"===== Placing Priority-Timeframe Orders for {account_key} =====", "TITLE")
 
-        # Initialize MT5 for the account
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                if self.mt5_manager.initialize_mt5(
-                    server=account['broker_server'],
-                    login=account['broker_loginid'],
-                    password=account['broker_password'],
-                    terminal_path=terminal_path
-                ):
-                    log_and_print(f"MT5 initialization successful for {account_key} on attempt {attempt}", "SUCCESS")
-                    break
-                else:
-                    error_message = f"MT5 initialization failed: {thread_local.mt5.last_error()}"
-                    log_and_print(f"MT5 initialization failed for {account_key} on attempt {attempt}: {error_message}", "ERROR")
+        # Initialize MT5 for the account unless the caller already did
+        if not initialized:
+            for attempt in range(1, MAX_RETRIES + 1):
+                try:
+                    if self.mt5_manager.initialize_mt5(
+                        server=account['broker_server'],
+                        login=account['broker_loginid'],
+                        password=account['broker_password'],
+                        terminal_path=terminal_path
+                    ):
+                        log_and_print(f"MT5 initialization successful for {account_key} on attempt {attempt}", "SUCCESS")
+                        break
+                    else:
+                        error_message = f"MT5 initialization failed: {thread_local.mt5.last_error()}"
+                        log_and_print(f"MT5 initialization failed for {account_key} on attempt {attempt}: {error_message}", "ERROR")
+                        if attempt == MAX_RETRIES:
+                            self.save_account_order_error(account_key, "N/A", error_message)
+                            return 0, 0
+                        log_and_print(f"Retrying MT5 initialization after {MT5_RETRY_DELAY} seconds...", "INFO")
+                        await asyncio.sleep(MT5_RETRY_DELAY)
+                except Exception as e:
+                    error_message = f"Exception during MT5 initialization: {str(e)}"
+                    log_and_print(f"Exception during MT5 initialization for {account_key} on attempt {attempt}: {error_message}", "ERROR")
                     if attempt == MAX_RETRIES:
                         self.save_account_order_error(account_key, "N/A", error_message)
                         return 0, 0
                     log_and_print(f"Retrying MT5 initialization after {MT5_RETRY_DELAY} seconds...", "INFO")
                     await asyncio.sleep(MT5_RETRY_DELAY)
-            except Exception as e:
-                error_message = f"Exception during MT5 initialization: {str(e)}"
-                log_and_print(f"Exception during MT5 initialization for {account_key} on attempt {attempt}: {error_message}", "ERROR")
-                if attempt == MAX_RETRIES:
-                    self.save_account_order_error(account_key, "N/A", error_message)
-                    return 0, 0
-                log_and_print(f"Retrying MT5 initialization after {MT5_RETRY_DELAY} seconds...", "INFO")
-                await asyncio.sleep(MT5_RETRY_DELAY)
 
         # Get account balance
         try:
@@ -2187,24 +1792,15 @@ class ProgrammeFetcher:
             self.save_account_order_error(account_key, "N/A", error_message)
             return 0, 0
 
-        # Determine allowed risk levels and multipliers based on balance
-        allowed_risk_levels = []
-        risk_multipliers = {}
-        if balance < 96:
-            allowed_risk_levels = [4.0]
-            risk_multipliers[4.0] = 1
-        elif balance >= 96 and balance < 144:
-            allowed_risk_levels = [4.0, 8.0]
-            risk_multipliers[4.0] = 4
-            risk_multipliers[8.0] = 1
+        # Select the precompiled plan for this account's balance tier and multipliers for its balance
+        tier = orderplan.balance_tier(balance)
+        risk_multipliers = orderplan.risk_multipliers(balance)
+        if plans is None:
+            plan = orderplan.OrderPlanCompiler(signals).template(programme_timeframe, tier)
         else:
-            allowed_risk_levels = [4.0, 8.0, 16.0]
-            base_multiplier = 3 + max(0, int((balance - 144) // 48))
-            risk_multipliers[4.0] = base_multiplier
-            risk_multipliers[8.0] = 2
-            risk_multipliers[16.0] = 1
+            plan = plans[(programme_timeframe, tier)]
 
-        log_and_print(f"Allowed risk levels for {account_key}: {allowed_risk_levels}", "INFO")
+        log_and_print(f"Allowed risk levels for {account_key}: {plan['allowed_risk_levels']}", "INFO")
         log_and_print(f"Risk multipliers for {account_key}: {risk_multipliers}", "INFO")
 
         added_symbols = []
@@ -2212,66 +1808,17 @@ class ProgrammeFetcher:
         pending_orders_placed = []
 
         # Step 1: Add symbols to Market Watch
-        unique_symbols = list(set(signal['pair'] for signal in signals))
-        for json_symbol in unique_symbols:
-            try:
-                server_symbol = self.get_exact_symbol_match(json_symbol, available_symbols)
-                if server_symbol is None:
-                    error_message = "No server symbol match found"
-                    log_and_print(f"Skipping {json_symbol} for {account_key}: {error_message}", "ERROR")
-                    failed_symbols.append(json_symbol)
-                    self.save_account_order_error(account_key, json_symbol, error_message)
-                    self.total_failed_orders += sum(1 for signal in signals if signal['pair'] == json_symbol)
-                    continue
-
-                for attempt in range(1, MAX_RETRIES + 1):
-                    if thread_local.mt5.symbol_select(server_symbol, True):
-                        log_and_print(f"Symbol {server_symbol} selected directly in Market Watch for {account_key}", "SUCCESS")
-                        added_symbols.append(server_symbol)
-                        break
-                    else:
-                        log_and_print(f"Direct selection of {server_symbol} failed for {account_key}, attempting test order on attempt {attempt}", "WARNING")
-                        if self.place_test_order(server_symbol):
-                            log_and_print(f"Symbol {server_symbol} added to Market Watch via test order for {account_key}", "SUCCESS")
-                            added_symbols.append(server_symbol)
-                            break
-                        else:
-                            log_and_print(f"Attempt {attempt}/{MAX_RETRIES}: Test order for {server_symbol} failed for {account_key}", "WARNING")
-                            if attempt == MAX_RETRIES:
-                                error_message = f"Failed to add {server_symbol} to Market Watch after retries: {thread_local.mt5.last_error()}"
-                                log_and_print(error_message, "ERROR")
-                                failed_symbols.append(json_symbol)
-                                self.save_account_order_error(account_key, json_symbol, error_message)
-                                self.total_failed_orders += sum(1 for signal in signals if signal['pair'] == json_symbol)
-                                continue
-                            log_and_print(f"Retrying test order after {MT5_RETRY_DELAY} seconds...", "INFO")
-                            await asyncio.sleep(MT5_RETRY_DELAY)
-
-            except Exception as e:
-                error_message = f"Error processing symbol {json_symbol}: {str(e)}"
-                log_and_print(error_message, "ERROR")
-                failed_symbols.append(json_symbol)
-                self.save_account_order_error(account_key, json_symbol, error_message)
-                self.total_failed_orders += sum(1 for signal in signals if signal['pair'] == json_symbol)
-
-        # Step 2: Group signals by symbol
-        symbol_signals = {}
-        for signal in signals:
-            symbol = signal['pair'].lower()
-            if symbol not in symbol_signals:
-                symbol_signals[symbol] = []
-            signal_allowed_risk = float(signal.get('allowed_risk', 0.0)) if signal.get('allowed_risk') is not None else 0.0
-            if signal_allowed_risk in allowed_risk_levels:
-                symbol_signals[symbol].append(signal)
+        unique_symbols = plan['unique_symbols']
+        market_watch = self.add_symbols_to_market_watch(account, terminal_path, unique_symbols, signals, available_symbols, added_symbols, failed_symbols)
 
-        # Step 3: Process signals per symbol, respecting timeframe priority with buy/sell pairing logic
+        # Step 2: Take one symbol info/tick snapshot per symbol for the batch
+        symbol_contexts = {}
         for json_symbol in unique_symbols:
             server_symbol = self.get_exact_symbol_match(json_symbol, available_symbols)
             if server_symbol is None or server_symbol not in added_symbols:
                 log_and_print(f"Skipping orders for {json_symbol} (server: {server_symbol}) as it was not added to Market Watch", "WARNING")
                 continue
 
-            # Get symbol info for min_distance calculation
             symbol_info = thread_local.mt5.symbol_info(server_symbol)
             if symbol_info is None:
                 error_message = f"Cannot retrieve symbol info for {server_symbol}"
@@ -2279,129 +1826,72 @@ class ProgrammeFetcher:
                 failed_symbols.append(json_symbol)
                 self.save_account_order_error(account_key, json_symbol, error_message)
                 continue
-            point = symbol_info.point
-            min_distance = 300 * point  # 30 pips (assuming 5-digit broker, pip = 10 * point)
+            tick = thread_local.mt5.symbol_info_tick(server_symbol)
+            if tick is None:
+                error_message = f"Cannot retrieve tick data for {server_symbol}, error: {thread_local.mt5.last_error()}"
+                log_and_print(f"Skipping {json_symbol} for {account_key}: {error_message}", "ERROR")
+                market_watch.forget(server_symbol)
+                failed_symbols.append(json_symbol)
+                self.save_account_order_error(account_key, json_symbol, error_message)
+                continue
+            min_distance = 300 * symbol_info.point  # 30 pips (assuming 5-digit broker, pip = 10 * point)
 
             log_and_print(f"Processing orders for symbol {json_symbol} (server: {server_symbol}), min_distance: {min_distance}", "INFO")
+            symbol_contexts[json_symbol] = {
+                'server_symbol': server_symbol,
+                'symbol_info': symbol_info,
+                'tick': tick,
+                'min_distance': min_distance,
+                'steps': plan['symbol_steps'].get(json_symbol, []),
+                'prepared': {},  # id(signal) -> pre-validated order
+                'outcomes': {}   # id(signal) -> placement result once attempted
+            }
 
-            # Get signals for this symbol
-            symbol_specific_signals = symbol_signals.get(json_symbol.lower(), [])
-
-            # Group signals by timeframe
-            signals_by_timeframe = {}
-            for signal in symbol_specific_signals:
-                timeframe = signal['timeframe'].lower().replace('4hour', '4hours')
-                if timeframe not in signals_by_timeframe:
-                    signals_by_timeframe[timeframe] = []
-                signals_by_timeframe[timeframe].append(signal)
-
-            # Initialize placed entries
-            placed_buy_entry = None
-            placed_sell_entry = None
-            both_from_same_tf = False
-
-            # Process timeframes in priority order
-            for timeframe in timeframe_priority:
-                normalized_timeframe = timeframe.lower().replace('4hour', '4hours')
-                if normalized_timeframe not in signals_by_timeframe:
-                    log_and_print(f"No signals for {json_symbol} on {timeframe}", "INFO")
-                    continue
-
-                tf_signals = signals_by_timeframe[normalized_timeframe]
-                buys = [s for s in tf_signals if s['order_type'].lower() == 'buy_limit']
-                sells = [s for s in tf_signals if s['order_type'].lower() == 'sell_limit']
-
-                candidates_buy = buys if placed_buy_entry is None else []
-                candidates_sell = sells if placed_sell_entry is None else []
-
-                # Case 1: This timeframe has candidates for both (none placed yet)
-                if candidates_buy and candidates_sell:
-                    buy_sig = candidates_buy[0]
-                    sell_sig = candidates_sell[0]
-                    buy_entry = buy_sig['entry_price']
-                    sell_entry = sell_sig['entry_price']
-                    if abs(buy_entry - sell_entry) >= min_distance:
-                        log_and_print(f"Placing both buy and sell from {timeframe} for {json_symbol} (dist: {abs(buy_entry - sell_entry)} >= {min_distance})", "INFO")
-
-                        # Place buy
-                        buy_success, buy_order_id, buy_error, buy_category = await self._place_single_order(
-                            account, server_symbol, json_symbol, buy_sig, risk_multipliers, min_distance
-                        )
-                        if buy_success:
-                            placed_buy_entry = buy_entry
-                            pending_orders_placed.append((server_symbol, buy_order_id, buy_sig['order_type'], buy_entry, buy_sig.get('profit_price'), buy_sig.get('exit_price'), float(buy_sig.get('allowed_risk', 0.0)), risk_multipliers.get(float(buy_sig.get('allowed_risk', 0.0)), 1)))
-                            self.total_priority_timeframes_orders += 1
-                            if programme_timeframe == 'priority_lowtohigh_timeframe':
-                                self.total_priority_lowtohigh_orders += 1
-                            else:
-                                self.total_priority_hightolow_orders += 1
-                            log_and_print(f"Buy order placed for {json_symbol} ({timeframe}) for {account_key}", "SUCCESS")
-
-                        # Place sell
-                        sell_success, sell_order_id, sell_error, sell_category = await self._place_single_order(
-                            account, server_symbol, json_symbol, sell_sig, risk_multipliers, min_distance
-                        )
-                        if sell_success:
-                            placed_sell_entry = sell_entry
-                            pending_orders_placed.append((server_symbol, sell_order_id, sell_sig['order_type'], sell_entry, sell_sig.get('profit_price'), sell_sig.get('exit_price'), float(sell_sig.get('allowed_risk', 0.0)), risk_multipliers.get(float(sell_sig.get('allowed_risk', 0.0)), 1)))
-                            self.total_priority_timeframes_orders += 1
-                            if programme_timeframe == 'priority_lowtohigh_timeframe':
-                                self.total_priority_lowtohigh_orders += 1
-                            else:
-                                self.total_priority_hightolow_orders += 1
-                            log_and_print(f"Sell order placed for {json_symbol} ({timeframe}) for {account_key}", "SUCCESS")
-
-                        both_from_same_tf = True
-                        break  # Skip other timeframes
-                    else:
-                        log_and_print(f"Buy and sell too close in {timeframe} for {json_symbol}: dist {abs(buy_entry - sell_entry)} < {min_distance}, skipping TF", "WARNING")
+        # Step 3: Resolve the buy/sell pairing from pre-validated orders and submit the account's orders back-to-back.
+        # A failed send only changes the pairing of its own symbol, which is re-resolved in the next round.
+        round_number = 0
+        while True:
+            batch = []
+            for json_symbol, context in symbol_contexts.items():
+                attempts = orderplan.resolve_pairing(
+                    context['steps'], context['min_distance'],
+                    lambda signal, json_symbol=json_symbol, context=context: self.predict_order(account, json_symbol, context, signal, risk_multipliers),
+                    log_skips=round_number == 0
+                )
+                for timeframe, signal in attempts:
+                    if id(signal) in context['outcomes']:
                         continue
+                    prepared = context['prepared'][id(signal)]
+                    if prepared['status'] != 'ready':
+                        context['outcomes'][id(signal)] = False
+                        self.record_order_failure(account_key, json_symbol, context['server_symbol'], prepared)
+                        continue
+                    batch.append((json_symbol, timeframe, signal, prepared))
 
-                # Case 2: Place candidate buy if available (no dist check needed yet)
-                if candidates_buy:
-                    buy_sig = candidates_buy[0]
-                    buy_success, buy_order_id, buy_error, buy_category = await self._place_single_order(
-                        account, server_symbol, json_symbol, buy_sig, risk_multipliers, min_distance
-                    )
-                    if buy_success:
-                        placed_buy_entry = buy_sig['entry_price']
-                        pending_orders_placed.append((server_symbol, buy_order_id, buy_sig['order_type'], buy_sig['entry_price'], buy_sig.get('profit_price'), buy_sig.get('exit_price'), float(buy_sig.get('allowed_risk', 0.0)), risk_multipliers.get(float(buy_sig.get('allowed_risk', 0.0)), 1)))
-                        self.total_priority_timeframes_orders += 1
-                        if programme_timeframe == 'priority_lowtohigh_timeframe':
-                            self.total_priority_lowtohigh_orders += 1
-                        else:
-                            self.total_priority_hightolow_orders += 1
-                        log_and_print(f"Buy order placed for {json_symbol} ({timeframe}) for {account_key}", "SUCCESS")
-
-                # Case 3: Place candidate sell if available
-                if candidates_sell:
-                    sell_sig = candidates_sell[0]
-                    sell_entry = sell_sig['entry_price']
-                    dist_ok = True
-                    if placed_buy_entry is not None:
-                        if abs(placed_buy_entry - sell_entry) < min_distance:
-                            dist_ok = False
-                            log_and_print(f"Sell too close to placed buy in {timeframe} for {json_symbol}: dist {abs(placed_buy_entry - sell_entry)} < {min_distance}, skipping", "WARNING")
-
-                    if dist_ok:
-                        sell_success, sell_order_id, sell_error, sell_category = await self._place_single_order(
-                            account, server_symbol, json_symbol, sell_sig, risk_multipliers, min_distance
-                        )
-                        if sell_success:
-                            placed_sell_entry = sell_entry
-                            pending_orders_placed.append((server_symbol, sell_order_id, sell_sig['order_type'], sell_entry, sell_sig.get('profit_price'), sell_sig.get('exit_price'), float(sell_sig.get('allowed_risk', 0.0)), risk_multipliers.get(float(sell_sig.get('allowed_risk', 0.0)), 1)))
-                            self.total_priority_timeframes_orders += 1
-                            if programme_timeframe == 'priority_lowtohigh_timeframe':
-                                self.total_priority_lowtohigh_orders += 1
-                            else:
-                                self.total_priority_hightolow_orders += 1
-                            log_and_print(f"Sell order placed for {json_symbol} ({timeframe}) for {account_key}", "SUCCESS")
-
-                # If both placed now, break
-                if placed_buy_entry is not None and placed_sell_entry is not None:
-                    break
+            if not batch:
+                break
+            log_and_print(f"Submitting batch of {len(batch)} orders for {account_key} (round {round_number + 1})", "INFO")
+            results = orderengine.submit_order_batch(thread_local.mt5, [prepared['request'] for _, _, _, prepared in batch])
+            for (json_symbol, timeframe, signal, prepared), (success, order_id, error_message, error_category) in zip(batch, results):
+                context = symbol_contexts[json_symbol]
+                context['outcomes'][id(signal)] = success
+                if not success:
+                    prepared.update({'kind': 'rejected', 'error_message': error_message, 'error_category': error_category})
+                    self.record_order_failure(account_key, json_symbol, context['server_symbol'], prepared)
+                    continue
+                self.record_placed_order(account, context['server_symbol'], prepared['order_type'], prepared['entry_price'])
+                pending_orders_placed.append((context['server_symbol'], order_id, signal['order_type'], signal['entry_price'], signal.get('profit_price'), signal.get('exit_price'), prepared['allowed_risk'], prepared['multiplier']))
+                self.total_priority_timeframes_orders += 1
+                if programme_timeframe == 'priority_lowtohigh_timeframe':
+                    self.total_priority_lowtohigh_orders += 1
+                else:
+                    self.total_priority_hightolow_orders += 1
+                side = "Buy" if prepared['order_type'] == 'buy_limit' else "Sell"
+                log_and_print(f"{side} order placed for {json_symbol} ({timeframe}) for {account_key}: at {prepared['entry_price']}, lot_size={prepared['lot_size']} (multiplier={prepared['multiplier']})", "SUCCESS")
+            round_number += 1
 
-            if placed_buy_entry is None and placed_sell_entry is None:
+        for json_symbol, context in symbol_contexts.items():
+            if not any(context['outcomes'].values()):
                 log_and_print(f"No valid buy/sell orders placed for {json_symbol}", "WARNING")
 
         # Log summary
@@ -2421,9 +1911,9 @@ class ProgrammeFetcher:
 
         return len(added_symbols), len(pending_orders_placed)
 
-    async def _place_single_order(self, account: Dict, server_symbol: str, json_symbol: str, signal: Dict, risk_multipliers: Dict, min_distance: float) -> tuple[bool, Optional[int], Optional[str], Optional[str]]:
-        """Helper method to place a single order with all validations, duplicate checks, etc."""
-        account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
+    def prepare_order(self, account: Dict, server_symbol: str, json_symbol: str, signal: Dict, risk_multipliers: Dict,
+                      symbol_info, tick) -> Dict:
+        """Run the field, duplicate and price checks for one signal against the symbol snapshot without sending it."""
         order_type = signal['order_type']
         entry_price = signal['entry_price']
         profit_price = signal['profit_price'] if signal['profit_price'] else None
@@ -2431,32 +1921,71 @@ class ProgrammeFetcher:
         lot_size = signal['lot_size']
         signal_allowed_risk = float(signal.get('allowed_risk', 0.0)) if signal.get('allowed_risk') is not None else 0.0
         multiplier = risk_multipliers.get(signal_allowed_risk, 1)
-        adjusted_lot_size = float(lot_size) * multiplier
+        adjusted_lot_size = float(lot_size) * multiplier if lot_size else 0.0
+        prepared = {
+            'order_type': order_type,
+            'entry_price': entry_price,
+            'profit_price': profit_price,
+            'stop_loss': stop_loss,
+            'lot_size': adjusted_lot_size,
+            'allowed_risk': signal_allowed_risk,
+            'multiplier': multiplier,
+            'status': 'failed',
+            'kind': 'invalid',
+            'request': None,
+            'error_message': None,
+            'error_category': "unknown"
+        }
 
         # Pre-validate signal data
         if not all([json_symbol, order_type, entry_price, lot_size]):
-            error_message = "Invalid signal data: Missing required fields"
-            log_and_print(f"Skipping order for {json_symbol} for {account_key}: {error_message}", "ERROR")
-            self.save_account_order_error(account_key, json_symbol, error_message)
-            self.total_failed_orders += 1
-            return False, None, error_message, "unknown"
+            prepared['error_message'] = "Invalid signal data: Missing required fields"
+            return prepared
         if order_type not in ['buy_limit', 'sell_limit']:
-            error_message = f"Unsupported order type {order_type}"
-            log_and_print(f"Skipping order for {json_symbol} for {account_key}: {error_message}", "ERROR")
-            self.save_account_order_error(account_key, json_symbol, error_message)
-            self.total_failed_orders += 1
-            return False, None, error_message, "unknown"
+            prepared['error_message'] = f"Unsupported order type {order_type}"
+            return prepared
         if adjusted_lot_size <= 0.0:
-            error_message = f"Invalid adjusted lot size {adjusted_lot_size} (original: {lot_size}, multiplier: {multiplier})"
-            log_and_print(f"Skipping order for {json_symbol} for {account_key}: {error_message}", "ERROR")
-            self.save_account_order_error(account_key, json_symbol, error_message)
-            self.total_failed_orders += 1
-            return False, None, error_message, "unknown"
+            prepared['error_message'] = f"Invalid adjusted lot size {adjusted_lot_size} (original: {lot_size}, multiplier: {multiplier})"
+            return prepared
 
         # Check for duplicates before placing order
         is_duplicate, reason = self.check_for_duplicate(account, server_symbol, json_symbol, order_type, entry_price)
         if is_duplicate:
-            error_message = f"Duplicate order detected for {json_symbol} ({order_type} at {entry_price}): {reason}"
+            prepared.update({
+                'kind': 'duplicate',
+                'error_message': f"Duplicate order detected for {json_symbol} ({order_type} at {entry_price}): {reason}",
+                'error_category': "duplicate",
+                'duplicate_reason': reason
+            })
+            return prepared
+
+        # Validate prices against the snapshot
+        is_valid, request, error_message, error_category = orderengine.validate_pending_order(
+            thread_local.mt5, symbol_info, tick, server_symbol, order_type, entry_price, profit_price, stop_loss,
+            adjusted_lot_size, signal_allowed_risk
+        )
+        if not is_valid:
+            prepared.update({'kind': 'rejected', 'error_message': error_message, 'error_category': error_category})
+            return prepared
+        prepared.update({'status': 'ready', 'kind': None, 'request': request})
+        return prepared
+
+    def predict_order(self, account: Dict, json_symbol: str, context: Dict, signal: Dict, risk_multipliers: Dict) -> bool:
+        """Report whether a signal is (or is expected to be) placed: known result if attempted, else its pre-validation."""
+        key = id(signal)
+        if key in context['outcomes']:
+            return context['outcomes'][key]
+        if key not in context['prepared']:
+            context['prepared'][key] = self.prepare_order(
+                account, context['server_symbol'], json_symbol, signal, risk_multipliers, context['symbol_info'], context['tick']
+            )
+        return context['prepared'][key]['status'] == 'ready'
+
+    def record_order_failure(self, account_key: str, json_symbol: str, server_symbol: str, prepared: Dict) -> None:
+        """Record a skipped or failed order in the counters and error journals."""
+        error_message = prepared['error_message']
+        if prepared['kind'] == 'duplicate':
+            reason = prepared['duplicate_reason']
             log_and_print(f"Skipping order for {json_symbol} for {account_key}: {error_message}", "WARNING")
             self.save_account_order_error(account_key, json_symbol, f"skips({reason})")
             if reason == 'running':
@@ -2465,38 +1994,36 @@ class ProgrammeFetcher:
                 self.total_skipped_limit += 1
             elif reason == 'closed':
                 self.total_skipped_closed += 1
-            return False, None, error_message, "duplicate"
-
-        # Place the order
-        success, order_id, error_message, error_category = self.place_pending_order(
-            server_symbol, order_type, entry_price, profit_price, stop_loss, adjusted_lot_size, signal_allowed_risk
-        )
-        if not success:
-            log_and_print(f"Failed to place order for {json_symbol} for {account_key}: {error_message}", "ERROR")
-            self.save_account_order_error(account_key, server_symbol, f"fails({error_message})")
+            return
+        if prepared['kind'] == 'invalid':
+            log_and_print(f"Skipping order for {json_symbol} for {account_key}: {error_message}", "ERROR")
+            self.save_account_order_error(account_key, json_symbol, error_message)
             self.total_failed_orders += 1
-            self.save_failed_orders(
-                server_symbol, order_type, entry_price, profit_price, stop_loss,
-                adjusted_lot_size, signal_allowed_risk, error_message, error_category
-            )
-        else:
-            log_and_print(f"Order placed for {json_symbol} for {account_key}: {order_type} at {entry_price}, lot_size={adjusted_lot_size} (multiplier={multiplier})", "SUCCESS")
-
-        return success, order_id, error_message, error_category
+            return
+        log_and_print(f"Failed to place order for {json_symbol} for {account_key}: {error_message}", "ERROR")
+        self.save_account_order_error(account_key, server_symbol, f"fails({error_message})")
+        self.total_failed_orders += 1
+        self.save_failed_orders(
+            server_symbol, prepared['order_type'], prepared['entry_price'], prepared['profit_price'], prepared['stop_loss'],
+            prepared['lot_size'], prepared['allowed_risk'], error_message, prepared['error_category']
+        )
 
 async def main():
     """Main function to fetch lot size/risk data, bouncestream signals, initialize MT5, add symbols to watchlist, and place orders for bouncestream accounts."""
     print("\n")
     log_and_print("===== Server Bouncestream Processing Started =====", "TITLE")
     
+    # Issue the independent startup reads concurrently, then process them in order
+    bootstrap = await bootstrap_cycle()
+
     # Fetch lot size and allowed risk data first
-    if not await executefetchlotsizeandrisk():
+    if not await executefetchlotsizeandrisk(bootstrap.lotsize_result):
         log_and_print("Aborting due to failure in fetching lot size and risk data", "ERROR")
         print("\n")
         return
 
     # Fetch bouncestream signals
-    if not await execute_fetch_bouncestream_signals():
+    if not await execute_fetch_bouncestream_signals(bootstrap):
         log_and_print("Aborting due to failure in fetching bouncestream signals", "ERROR")
         print("\n")
         return
@@ -2509,13 +2036,13 @@ async def main():
         print("\n")
         return
 
-    active_users = await fetcher.get_active_users()
+    active_users = await fetcher.get_active_users(bootstrap.active_users_result)
     if not active_users:
         log_and_print("No active users found", "WARNING")
         print("\n")
         return
 
-    programmes = await fetcher.fetch_user_programmes()
+    programmes = await fetcher.fetch_user_programmes(bootstrap.programmes_result)
     if not programmes:
         log_and_print("No user programmes fetched, aborting", "ERROR")
         print("\n")
@@ -2537,6 +2064,10 @@ async def main():
 
     accounts_initialized, accounts_with_symbols, total_orders_placed, accounts_with_orders = await fetcher.process_account_initialization(valid_accounts)
 
+    # Write all journaled order errors and the changed signals to their JSON files in one pass
+    errorjournal.materialize_all()
+    signalstore.export_all()
+
     print("\n")
     log_and_print("===== Processing Summary =====", "TITLE")
     log_and_print(f"Total programme records processed: {total_programmes}", "INFO")
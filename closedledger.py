@@ -0,0 +1,313 @@
+import os
+import json
+import logging
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple
+from colorama import Fore, Style
+import signalstore
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+LEDGER_DB_NAME = "closedtrades.db"  # Ledger database, next to the legacy closed-trade JSON files
+LEDGER_BUSY_TIMEOUT = 30  # Seconds a writer waits for another process's transaction
+LEDGER_EXPORT_JSON = True  # Keep materializing the legacy JSON files for the website and other readers
+LEDGER_COMPACT_EVERY = 1000  # Appended rows between WAL checkpoints and incremental vacuums
+LEDGER_QUERY_CHUNK = 500  # Keys per IN (...) query, below SQLite's bound-parameter limit
+ALL_CLOSED_SCOPE = "allclosedorders.json"  # Aggregated closed trades, deduplicated by trade key
+ACCOUNT_SCOPE_SUFFIX = "_closedtrades.json"  # Per-account closed trades, deduplicated by ticket
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS closed_trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scope TEXT NOT NULL,
+        dedupe_key TEXT NOT NULL,
+        match_key TEXT,
+        ticket INTEGER,
+        order_type TEXT,
+        entry_price REAL,
+        payload TEXT NOT NULL
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS closed_trades_dedupe ON closed_trades (scope, dedupe_key);
+    CREATE INDEX IF NOT EXISTS closed_trades_match ON closed_trades (scope, match_key);
+    CREATE INDEX IF NOT EXISTS closed_trades_ticket ON closed_trades (scope, ticket);
+    CREATE INDEX IF NOT EXISTS closed_trades_entry ON closed_trades (scope, order_type, entry_price);
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Key Helpers
+def account_scope(account_key: str) -> str:
+    """Return the ledger scope of an account's closed trades (its legacy JSON file name)."""
+    return f"{account_key}{ACCOUNT_SCOPE_SUFFIX}"
+
+def dedupe_key(scope: str, record: Dict) -> str:
+    """Per-account scopes deduplicate by ticket, the aggregate scope by '{pair}_{order_type}_{entry:.5f}'."""
+    if scope.endswith(ACCOUNT_SCOPE_SUFFIX) and record.get('ticket') is not None:
+        return str(record['ticket'])
+    return signalstore.trade_key(record['pair'], record['order_type'], record['entry_price'])
+
+def match_key(pair: str, order_type: str, entry_price: float) -> Optional[str]:
+    """Case-insensitive trade key used for duplicate checks, or None if the entry is not a number."""
+    try:
+        return signalstore.trade_key(str(pair).lower(), str(order_type).lower(), entry_price)
+    except (ValueError, TypeError):
+        return None
+
+# Closed Ledger Class
+class ClosedLedger:
+    """Append-only closed-trade ledger for one directory, backed by SQLite in WAL mode.
+
+    Each legacy JSON file (allclosedorders.json, <account>_closedtrades.json) is a scope of the
+    ledger, seeded once from the file. Appends are INSERT OR IGNORE against a unique
+    (scope, dedupe key) index, so deduplication and membership checks are index lookups that
+    stay flat as history grows, and nothing is rewritten. Rows are never updated or deleted;
+    compact() checkpoints the WAL and returns free pages every LEDGER_COMPACT_EVERY appends.
+    export_json() keeps the legacy files as a materialized view, written only when a scope changed.
+    """
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        self.db_path: str = os.path.join(directory, LEDGER_DB_NAME)
+        self.lock = threading.Lock()
+        self.imported: set = set()  # Scopes whose legacy JSON was checked in this process
+        self.appended_since_compact: int = 0
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path, timeout=LEDGER_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA auto_vacuum=INCREMENTAL")  # Only takes effect on a new database
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def json_path(self, scope: str) -> str:
+        """Return the legacy JSON file of a scope."""
+        return os.path.join(self.directory, scope)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Return a meta value, or None if unset."""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Set a meta value."""
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def ensure_scope(self, scope: str) -> None:
+        """Seed a scope once from its legacy JSON file."""
+        if scope in self.imported:
+            return
+        self.imported.add(scope)
+        if self.get_meta(f"legacy_imported:{scope}") or not os.path.exists(self.json_path(scope)):
+            self.set_meta(f"legacy_imported:{scope}", '1')
+            return
+        try:
+            with open(self.json_path(scope), 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            records = [record for record in data if isinstance(record, dict)] if isinstance(data, list) else []
+        except Exception as e:
+            log_and_print(f"Error importing legacy closed trades from {self.json_path(scope)}: {str(e)}", "WARNING")
+            records = []
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")
+                if self.connection.execute("SELECT value FROM meta WHERE key = ?", (f"legacy_imported:{scope}",)).fetchone() is None:
+                    added = self.insert_rows(scope, records)
+                    self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"legacy_imported:{scope}", '1'))
+                    log_and_print(f"Imported {added} closed trades from {self.json_path(scope)} into {self.db_path}", "INFO")
+                self.connection.execute("COMMIT")
+            except Exception as e:
+                self.connection.execute("ROLLBACK")
+                self.imported.discard(scope)
+                log_and_print(f"Error importing legacy closed trades for {scope}: {str(e)}", "ERROR")
+
+    def insert_rows(self, scope: str, records: List[Dict]) -> int:
+        """Insert records inside the caller's transaction, skipping duplicates; returns the number inserted."""
+        added = 0
+        for record in records:
+            try:
+                key = dedupe_key(scope, record)
+            except (KeyError, ValueError, TypeError):
+                log_and_print(f"Skipping closed trade without pair, order type or entry price in {scope}", "DEBUG")
+                continue
+            try:
+                entry_price = float(record.get('entry_price'))
+            except (ValueError, TypeError):
+                entry_price = None
+            ticket = record.get('ticket')
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO closed_trades (scope, dedupe_key, match_key, ticket, order_type, entry_price, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    scope,
+                    key,
+                    match_key(record.get('pair', ''), record.get('order_type', ''), entry_price) if entry_price is not None else None,
+                    int(ticket) if isinstance(ticket, (int, float)) else None,
+                    str(record.get('order_type', '')).lower(),
+                    entry_price,
+                    json.dumps(record)
+                )
+            )
+            added += cursor.rowcount
+        return added
+
+    def append(self, scope: str, records: List[Dict]) -> int:
+        """Append closed trades to a scope, ignoring ones already recorded; returns the number added (-1 on failure)."""
+        self.ensure_scope(scope)
+        if not records:
+            return 0
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")
+                added = self.insert_rows(scope, records)
+                self.connection.execute("COMMIT")
+            except Exception as e:
+                self.connection.execute("ROLLBACK")
+                log_and_print(f"Error appending closed trades to {scope} in {self.db_path}: {str(e)}", "ERROR")
+                return -1
+        self.appended_since_compact += added
+        if self.appended_since_compact >= LEDGER_COMPACT_EVERY:
+            self.compact()
+        return added
+
+    def contains(self, scope: str, key: str) -> bool:
+        """Return True if the scope holds a record with this dedupe key."""
+        self.ensure_scope(scope)
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM closed_trades WHERE scope = ? AND dedupe_key = ? LIMIT 1", (scope, key)).fetchone()
+        return row is not None
+
+    def existing_keys(self, scope: str, keys: List[str]) -> set:
+        """Return which of the given dedupe keys the scope already holds."""
+        self.ensure_scope(scope)
+        keys = list(dict.fromkeys(keys))
+        found = set()
+        with self.lock:
+            for start in range(0, len(keys), LEDGER_QUERY_CHUNK):
+                chunk = keys[start:start + LEDGER_QUERY_CHUNK]
+                rows = self.connection.execute(
+                    f"SELECT dedupe_key FROM closed_trades WHERE scope = ? AND dedupe_key IN ({', '.join('?' * len(chunk))})",
+                    [scope] + chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def has_trade(self, scope: str, pair: str, order_type: str, entry_price: float) -> bool:
+        """Return True if the scope holds a trade with this pair, order type and entry (case-insensitive, 5 decimals)."""
+        key = match_key(pair, order_type, entry_price)
+        if key is None:
+            return False
+        self.ensure_scope(scope)
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM closed_trades WHERE scope = ? AND match_key = ? LIMIT 1", (scope, key)).fetchone()
+        return row is not None
+
+    def with_tickets(self, scope: str, tickets: set) -> List[Dict]:
+        """Return the scope's records whose ticket is one of the given tickets, oldest first."""
+        self.ensure_scope(scope)
+        tickets = [int(ticket) for ticket in tickets]
+        rows = []
+        with self.lock:
+            for start in range(0, len(tickets), LEDGER_QUERY_CHUNK):
+                chunk = tickets[start:start + LEDGER_QUERY_CHUNK]
+                rows.extend(self.connection.execute(
+                    f"SELECT id, payload FROM closed_trades WHERE scope = ? AND ticket IN ({', '.join('?' * len(chunk))})",
+                    [scope] + chunk
+                ).fetchall())
+        return [json.loads(payload) for _, payload in sorted(rows)]
+
+    def near(self, scope: str, order_type: str, entry_price: float, tolerance: float) -> List[Dict]:
+        """Return the scope's records of an order type with an entry within tolerance (inclusive), oldest first."""
+        self.ensure_scope(scope)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT payload FROM closed_trades WHERE scope = ? AND order_type = ? AND entry_price BETWEEN ? AND ? ORDER BY id",
+                (scope, str(order_type).lower(), entry_price - tolerance, entry_price + tolerance)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def records(self, scope: str, after_id: int = 0) -> List[Tuple[int, Dict]]:
+        """Return (ledger id, record) pairs of a scope appended after after_id, oldest first."""
+        self.ensure_scope(scope)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT id, payload FROM closed_trades WHERE scope = ? AND id > ? ORDER BY id", (scope, after_id)
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def count(self, scope: str) -> int:
+        """Return the number of records in a scope."""
+        self.ensure_scope(scope)
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM closed_trades WHERE scope = ?", (scope,)).fetchone()[0]
+
+    def export_json(self, scope: str) -> bool:
+        """Materialize a scope as its legacy JSON list with an atomic replace, skipping unchanged scopes."""
+        if not LEDGER_EXPORT_JSON:
+            return True
+        self.ensure_scope(scope)
+        with self.lock:
+            last_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM closed_trades WHERE scope = ?", (scope,)).fetchone()[0]
+        json_path = self.json_path(scope)
+        if self.get_meta(f"exported:{scope}") == str(last_id) and os.path.exists(json_path):
+            return True
+        records = [record for _, record in self.records(scope)]
+        temp_path = f"{json_path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(records, file, indent=4)
+            os.replace(temp_path, json_path)
+            os.chmod(json_path, 0o666)  # Read/write for owner, group, others
+            self.set_meta(f"exported:{scope}", str(last_id))
+            log_and_print(f"Exported {len(records)} closed trades to {json_path}", "DEBUG")
+            return True
+        except Exception as e:
+            log_and_print(f"Error exporting closed trades to {json_path}: {str(e)}", "ERROR")
+            return False
+
+    def compact(self) -> None:
+        """Checkpoint and truncate the WAL and return free pages to the file system."""
+        with self.lock:
+            try:
+                self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self.connection.execute("PRAGMA incremental_vacuum")
+                self.connection.execute("PRAGMA optimize")
+                self.appended_since_compact = 0
+                log_and_print(f"Compacted closed-trade ledger {self.db_path}", "DEBUG")
+            except Exception as e:
+                log_and_print(f"Error compacting closed-trade ledger {self.db_path}: {str(e)}", "WARNING")
+
+# Ledger Registry
+_ledgers: Dict[str, ClosedLedger] = {}
+_registry_lock = threading.Lock()
+
+def get_ledger(directory: str) -> ClosedLedger:
+    """Return this process's shared ledger for a closed-trades directory, opening it on first use."""
+    with _registry_lock:
+        ledger = _ledgers.get(directory)
+        if ledger is None:
+            ledger = ClosedLedger(directory)
+            _ledgers[directory] = ledger
+        return ledger
@@ -15,6 +15,8 @@ from colorama import Fore, Style
 from bs4 import BeautifulSoup
 import re
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Initialize colorama for colored output
@@ -37,11 +39,14 @@ admin_email = 'ciphercirclex12@gmail.com'
 admin_password = '@ciphercircleadminauthenticator#'
 temp_download_dir = r'C:\xampp\htdocs\CIPHER\temp_downloads'
 json_log_path = r'C:\xampp\htdocs\CIPHER\cipher trader\market\dbserver\connectwithdb.json'
+query_max_workers = 5  # Concurrent direct POST queries in execute_queries
 
 # Global driver and session
 driver = None
 session = None
 current_servers = primary_servers  # Start with primary servers
+browser_lock = threading.RLock()  # Selenium driver and session setup are not thread-safe
+json_log_lock = threading.Lock()
 
 def log_and_print(message, level="INFO"):
     """Helper function to print formatted messages with color coding and spacing."""
@@ -69,6 +74,11 @@ def append_to_json_log(server_type, server_url):
         'server_url': server_url,
         'status': 'success'
     }
+    with json_log_lock:
+        write_json_log(log_entry, server_type, server_url)
+
+def write_json_log(log_entry, server_type, server_url):
+    """Write a server log entry; callers hold json_log_lock."""
     log_data = []
 
     # Check if JSON file exists and load existing data
@@ -273,6 +283,80 @@ def initialize_browser():
                 time.sleep(2)
                 break  # Move to next server
 
+def post_query(sql_query):
+    """
+    Execute an SQL query with a direct POST to the current, backup and third server in turn.
+    Safe to call from worker threads once initialize_browser() has set up the session.
+    Returns:
+        dict: Same shape as execute_query, or None if every server failed (caller falls back to Selenium).
+    """
+    server_attempts = [
+        (current_servers, "Current"),
+        (backup_servers if current_servers != backup_servers else primary_servers, "Backup"),
+        (server3, "Server3")
+    ]
+    for servers, server_type in server_attempts:
+        log_and_print(f"Executing query via POST on {server_type} server: {sql_query}", "INFO")
+        try:
+            headers = {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'application/json, text/plain, */*',
+                'Accept-Language': 'en-US,en;q=0.5',
+                'Connection': 'keep-alive'
+            }
+            data = {'sql_query': sql_query}
+            response = session.post(servers['fetch'], headers=headers, data=data, timeout=10, verify=True)
+            response.raise_for_status()
+            try:
+                response_data = response.json()
+            except ValueError as e:
+                log_and_print(f"Invalid JSON response from {server_type} server: {str(e)}", "INFO")
+                debug_path = r"C:\xampp\htdocs\CIPHER\cipher trader\__pycache__\debugs"
+                os.makedirs(debug_path, exist_ok=True)
+                with open(os.path.join(debug_path, f"direct_post_error_{server_type.lower()}.html"), "w", encoding="utf-8") as f:
+                    f.write(response.text)
+                log_and_print(f"Saved direct POST error response to {debug_path}\\direct_post_error_{server_type.lower()}.html", "INFO")
+                if server_type == "Server3":
+                    log_and_print("All servers (Primary, Backup, Server3) failed POST, falling back to Selenium", "WARNING")
+                continue
+
+            log_and_print(f"Server response: {json.dumps(response_data, indent=2)}", "DEBUG")
+            
+            if response_data.get('status') == 'success':
+                results = []
+                if 'rows' in response_data['data']:
+                    for row in response_data['data']['rows']:
+                        results.append({key: str(value) for key, value in row.items()})
+                    log_and_print(f"Fetched {len(results)} rows from direct POST on {server_type} server", "SUCCESS")
+                elif 'affectedRows' in response_data['data']:
+                    results = {'affected_rows': response_data['data']['affectedRows']}
+                    log_and_print(f"Non-SELECT query affected {results['affected_rows']} rows on {server_type} server", "SUCCESS")
+                else:
+                    log_and_print("Query executed successfully, but no results returned", "INFO")
+                append_to_json_log(server_type, servers['fetch'])
+                return {
+                    'status': 'success',
+                    'message': response_data.get('message', 'Query executed successfully'),
+                    'results': results
+                }
+            else:
+                log_and_print(f"Direct POST failed on {server_type} server: {response_data.get('message', 'Unknown error')}", "INFO")
+                debug_path = r"C:\xampp\htdocs\CIPHER\cipher trader\__pycache__\debugs"
+                os.makedirs(debug_path, exist_ok=True)
+                with open(os.path.join(debug_path, f"direct_post_error_{server_type.lower()}.json"), "w", encoding="utf-8") as f:
+                    f.write(json.dumps(response_data, indent=2))
+                log_and_print(f"Saved direct POST error response to {debug_path}\\direct_post_error_{server_type.lower()}.json", "INFO")
+                if server_type == "Server3":
+                    log_and_print("All servers (Primary, Backup, Server3) failed POST, falling back to Selenium", "WARNING")
+                continue
+        except Exception as e:
+            log_and_print(f"Direct POST request failed on {server_type} server: {str(e)}", "INFO")
+            if server_type == "Server3":
+                log_and_print("All servers (Primary, Backup, Server3) failed POST, falling back to Selenium", "WARNING")
+            continue
+    return None
+
 def execute_query(sql_query):
     """
     Execute an SQL query via the PHP web interface using direct POST request or Selenium.
@@ -281,80 +365,24 @@ def execute_query(sql_query):
     Returns:
         dict: Contains 'status', 'message', and 'results' (list of dictionaries or affected rows).
     """
+    with browser_lock:
+        return execute_query_locked(sql_query)
+
+def execute_query_locked(sql_query):
+    """Body of execute_query; callers hold browser_lock."""
     global driver, session, current_servers
     try:
-        signal.signal(signal.SIGINT, signal_handler)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, signal_handler)
         log_and_print("===== Database Query Execution =====", "TITLE")
 
         if not initialize_browser():
             return {'status': 'error', 'message': 'Failed to initialize browser, all servers unavailable', 'results': []}
 
         log_and_print("--- Step 4: Attempting Direct POST Request ---", "TITLE")
-        server_attempts = [
-            (current_servers, "Current"),
-            (backup_servers if current_servers != backup_servers else primary_servers, "Backup"),
-            (server3, "Server3")
-        ]
-        for servers, server_type in server_attempts:
-            log_and_print(f"Executing query via POST on {server_type} server: {sql_query}", "INFO")
-            try:
-                headers = {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                    'Accept': 'application/json, text/plain, */*',
-                    'Accept-Language': 'en-US,en;q=0.5',
-                    'Connection': 'keep-alive'
-                }
-                data = {'sql_query': sql_query}
-                response = session.post(servers['fetch'], headers=headers, data=data, timeout=10, verify=True)
-                response.raise_for_status()
-                try:
-                    response_data = response.json()
-                except ValueError as e:
-                    log_and_print(f"Invalid JSON response from {server_type} server: {str(e)}", "INFO")
-                    debug_path = r"C:\xampp\htdocs\CIPHER\cipher trader\__pycache__\debugs"
-                    os.makedirs(debug_path, exist_ok=True)
-                    with open(os.path.join(debug_path, f"direct_post_error_{server_type.lower()}.html"), "w", encoding="utf-8") as f:
-                        f.write(response.text)
-                    log_and_print(f"Saved direct POST error response to {debug_path}\\direct_post_error_{server_type.lower()}.html", "INFO")
-                    if server_type == "Server3":
-                        log_and_print("All servers (Primary, Backup, Server3) failed POST, falling back to Selenium", "WARNING")
-                    continue
-
-                log_and_print(f"Server response: {json.dumps(response_data, indent=2)}", "DEBUG")
-                
-                if response_data.get('status') == 'success':
-                    results = []
-                    if 'rows' in response_data['data']:
-                        for row in response_data['data']['rows']:
-                            results.append({key: str(value) for key, value in row.items()})
-                        log_and_print(f"Fetched {len(results)} rows from direct POST on {server_type} server", "SUCCESS")
-                    elif 'affectedRows' in response_data['data']:
-                        results = {'affected_rows': response_data['data']['affectedRows']}
-                        log_and_print(f"Non-SELECT query affected {results['affected_rows']} rows on {server_type} server", "SUCCESS")
-                    else:
-                        log_and_print("Query executed successfully, but no results returned", "INFO")
-                    append_to_json_log(server_type, servers['fetch'])
-                    return {
-                        'status': 'success',
-                        'message': response_data.get('message', 'Query executed successfully'),
-                        'results': results
-                    }
-                else:
-                    log_and_print(f"Direct POST failed on {server_type} server: {response_data.get('message', 'Unknown error')}", "INFO")
-                    debug_path = r"C:\xampp\htdocs\CIPHER\cipher trader\__pycache__\debugs"
-                    os.makedirs(debug_path, exist_ok=True)
-                    with open(os.path.join(debug_path, f"direct_post_error_{server_type.lower()}.json"), "w", encoding="utf-8") as f:
-                        f.write(json.dumps(response_data, indent=2))
-                    log_and_print(f"Saved direct POST error response to {debug_path}\\direct_post_error_{server_type.lower()}.json", "INFO")
-                    if server_type == "Server3":
-                        log_and_print("All servers (Primary, Backup, Server3) failed POST, falling back to Selenium", "WARNING")
-                    continue
-            except Exception as e:
-                log_and_print(f"Direct POST request failed on {server_type} server: {str(e)}", "INFO")
-                if server_type == "Server3":
-                    log_and_print("All servers (Primary, Backup, Server3) failed POST, falling back to Selenium", "WARNING")
-                continue
+        result = post_query(sql_query)
+        if result is not None:
+            return result
 
         log_and_print("--- Step 4: Executing SQL Query via Selenium ---", "TITLE")
         log_and_print(f"Executing query: {sql_query}", "INFO")
@@ -485,6 +513,26 @@ def execute_query(sql_query):
         log_and_print(f"Critical Error: {str(e)}", "ERROR")
         return {'status': 'error', 'message': str(e), 'results': []}
 
+def execute_queries(sql_queries, max_workers=query_max_workers):
+    """
+    Execute independent SQL queries concurrently.
+    The browser session is refreshed once, the direct POSTs run in parallel, and any query every
+    server rejected falls back to execute_query (Selenium) one at a time.
+    Args:
+        sql_queries (list): SQL queries that do not depend on each other.
+    Returns:
+        list: One execute_query-style result dict per query, in order.
+    """
+    if not sql_queries:
+        return []
+    log_and_print(f"===== Executing {len(sql_queries)} Database Queries Concurrently =====", "TITLE")
+    with browser_lock:
+        if not initialize_browser():
+            return [{'status': 'error', 'message': 'Failed to initialize browser, all servers unavailable', 'results': []} for _ in sql_queries]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sql_queries)))) as executor:
+        results = list(executor.map(post_query, sql_queries))
+    return [result if result is not None else execute_query(sql_query) for sql_query, result in zip(sql_queries, results)]
+
 def shutdown():
     """Explicitly shut down the browser and cleanup."""
     cleanup()
@@ -0,0 +1,203 @@
+import os
+import json
+import logging
+import time
+from datetime import datetime, timezone, timedelta
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+HISTORY_INITIAL_DAYS = 5  # Window used for an account without a watermark yet
+HISTORY_OVERLAP_SECONDS = 60  # Re-read this much before the watermark time; deals are deduplicated by ticket
+DEAL_DTYPE = np.dtype([
+    ('ticket', np.int64),
+    ('position_id', np.int64),
+    ('time', np.int64),
+    ('entry', np.int8),
+    ('type', np.int8),
+    ('price', np.float64),
+    ('profit', np.float64),
+    ('symbol', 'U64')
+])
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Structured Array Helpers
+def deals_to_array(deals) -> np.ndarray:
+    """Convert MT5 TradeDeal tuples into a DEAL_DTYPE structured array."""
+    if not deals:
+        return np.empty(0, dtype=DEAL_DTYPE)
+    return np.array(
+        [(d.ticket, d.position_id, d.time, d.entry, d.type, d.price, d.profit, d.symbol) for d in deals],
+        dtype=DEAL_DTYPE
+    )
+
+def first_by_position(deals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (position_ids, row indexes) of the first deal for each position, keeping history order."""
+    position_ids, first_rows = np.unique(deals['position_id'], return_index=True)
+    return position_ids, first_rows
+
+def pair_in_out(deals: np.ndarray, entry_in: int, entry_out: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Group deals by position_id and return matching (open deals, close deals) arrays.
+
+    Each closed position is paired from its first IN deal and its first OUT deal.
+    """
+    ins = deals[deals['entry'] == entry_in]
+    outs = deals[deals['entry'] == entry_out]
+    in_positions, in_rows = first_by_position(ins)
+    out_positions, out_rows = first_by_position(outs)
+    _, in_match, out_match = np.intersect1d(in_positions, out_positions, assume_unique=True, return_indices=True)
+    return ins[in_rows[in_match]], outs[out_rows[out_match]]
+
+def trade_keys(symbols: np.ndarray, order_types: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    """Build '{pair}_{order_type}_{entry:.5f}' keys for whole arrays at once."""
+    keys = np.char.add(np.char.add(symbols.astype(str), '_'), order_types.astype(str))
+    return np.char.add(np.char.add(keys, '_'), np.char.mod('%.5f', prices.astype(np.float64)))
+
+def last_index_by_key(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (sorted unique keys, index of the last row holding each key) for searchsorted joins."""
+    unique_keys, reversed_rows = np.unique(keys[::-1], return_index=True)
+    return unique_keys, len(keys) - 1 - reversed_rows
+
+def lookup_keys(unique_keys: np.ndarray, key_rows: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Join keys against a last_index_by_key table; returns the matching row or -1 per key."""
+    if len(unique_keys) == 0 or len(keys) == 0:
+        return np.full(len(keys), -1, dtype=np.int64)
+    positions = np.clip(np.searchsorted(unique_keys, keys), 0, len(unique_keys) - 1)
+    found = unique_keys[positions] == keys
+    return np.where(found, key_rows[positions], -1)
+
+# Deal Watermark Store Class
+class DealWatermarkStore:
+    """Persists the last-seen deal ticket and time per account for one history consumer.
+
+    Several processes may share one file for disjoint accounts (e.g. regulation shards); each save
+    re-reads the file and only overwrites the accounts this process advanced.
+    """
+    def __init__(self, path: str):
+        self.path: str = path
+        self.data: Dict[str, Dict[str, int]] = self.load()
+        self.owned: set = set()  # Accounts advanced by this process
+
+    def load(self) -> Dict:
+        """Load watermarks from disk, starting empty on a missing or corrupted file."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return data if isinstance(data, dict) else {}
+        except Exception as e:
+            log_and_print(f"Error loading deal watermarks from {self.path}: {str(e)}, starting fresh", "WARNING")
+            return {}
+
+    def get(self, account_key: str) -> Optional[Dict[str, int]]:
+        """Return {'ticket', 'time'} for an account, or None if never synced."""
+        return self.data.get(account_key)
+
+    def advance(self, account_key: str, deals: np.ndarray) -> None:
+        """Move an account's watermark to the newest deal in the array."""
+        if len(deals) == 0:
+            return
+        self.owned.add(account_key)
+        newest = deals[np.argmax(deals['ticket'])]
+        current = self.get(account_key)
+        if current and current['ticket'] >= int(newest['ticket']):
+            return
+        self.data[account_key] = {'ticket': int(newest['ticket']), 'time': int(newest['time'])}
+
+    def save(self) -> None:
+        """Write this process's watermarks to disk with an atomic replace, keeping other processes' accounts."""
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            data = self.load() if os.path.exists(self.path) else {}
+            data.update({account_key: self.data[account_key] for account_key in self.owned if account_key in self.data})
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=4)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            log_and_print(f"Error saving deal watermarks to {self.path}: {str(e)}", "ERROR")
+
+# History Sync Class
+class HistorySync:
+    """Fetches each account's new deals once per cycle and shares them with every history consumer in the process.
+
+    Each program keeps its own watermark file ({consumer}_dealwatermarks.json), so separate programs never
+    consume each other's deals. Watermarks only move when commit() is called after the deals were processed.
+    """
+    def __init__(self, watermark_dir: str, consumer: str):
+        self.consumer: str = consumer
+        self.store = DealWatermarkStore(os.path.join(watermark_dir, f"{consumer}_dealwatermarks.json"))
+        self.cycle_deals: Dict[str, np.ndarray] = {}
+
+    def start_cycle(self) -> None:
+        """Forget the deals fetched in the previous cycle."""
+        self.cycle_deals = {}
+
+    def sync_account(self, mt5_api, account_key: str) -> np.ndarray:
+        """Return the account's deals since its watermark, fetching them with one call per cycle."""
+        if account_key not in self.cycle_deals:
+            try:
+                deals = fetch_new_deals(mt5_api, self.store.get(account_key))
+            except Exception as e:
+                log_and_print(f"Error fetching new deals for {account_key}: {str(e)}", "WARNING")
+                deals = np.empty(0, dtype=DEAL_DTYPE)
+            self.cycle_deals[account_key] = deals
+            log_and_print(f"Synced {len(deals)} new deals for {account_key} ({self.consumer})", "DEBUG")
+        return self.cycle_deals[account_key]
+
+    def commit(self, account_keys: Optional[List[str]] = None) -> None:
+        """Advance watermarks past this cycle's deals for the given (default: all synced) accounts and save."""
+        for account_key in (self.cycle_deals if account_keys is None else account_keys):
+            if account_key in self.cycle_deals:
+                self.store.advance(account_key, self.cycle_deals[account_key])
+        self.store.save()
+
+# History Fetch Functions
+def fetch_new_deals(mt5_api, watermark: Optional[Dict[str, int]]) -> np.ndarray:
+    """Fetch deals newer than the watermark (or the initial window) as a structured array."""
+    if watermark:
+        from_date = datetime.fromtimestamp(max(0, watermark['time'] - HISTORY_OVERLAP_SECONDS), tz=timezone.utc)
+    else:
+        from_date = datetime.now(timezone.utc) - timedelta(days=HISTORY_INITIAL_DAYS)
+    to_date = datetime.now(timezone.utc) + timedelta(days=1)  # Deal times are server time, which may run ahead of UTC
+    deals = deals_to_array(mt5_api.history_deals_get(from_date, to_date))
+    if watermark and len(deals):
+        deals = deals[deals['ticket'] > watermark['ticket']]
+    return deals
+
+def fetch_missing_opens(mt5_api, deals: np.ndarray, entry_in: int, entry_out: int) -> np.ndarray:
+    """Fetch IN deals for positions that closed in this batch but were opened before the watermark."""
+    out_positions = np.unique(deals['position_id'][deals['entry'] == entry_out])
+    in_positions = np.unique(deals['position_id'][deals['entry'] == entry_in])
+    missing = np.setdiff1d(out_positions, in_positions, assume_unique=True)
+    if len(missing) == 0:
+        return deals
+    fetched = [deals]
+    for position_id in missing:
+        position_deals = deals_to_array(mt5_api.history_deals_get(position=int(position_id)))
+        if len(position_deals):
+            fetched.append(position_deals[position_deals['entry'] == entry_in])
+    log_and_print(f"Fetched opening deals for {len(missing)} positions opened before the watermark", "DEBUG")
+    return np.concatenate(fetched)
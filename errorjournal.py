@@ -0,0 +1,230 @@
+import os
+import glob
+import json
+import logging
+import time
+import atexit
+import threading
+from typing import List, Dict, Optional
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+JOURNAL_FLUSH_SIZE = 50  # Buffered entries before they are appended to the JSONL journal
+TIMEFRAME_SUMMARY_KEYS = {
+    "5m": "5m_failed_orders",
+    "15m": "15m_failed_orders",
+    "30m": "30m_failed_orders",
+    "1h": "1h_failed_orders",
+    "4h": "4h_failed_orders"
+}
+
+# Journal shard for this process; worker processes write their own shard so appends never interleave
+_shard: Optional[str] = None
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Error Journal Class
+class ErrorJournal:
+    """Buffers error entries in memory, appends them to a JSONL journal and materializes the legacy JSON file.
+
+    Layouts:
+    - "list": the legacy file is a plain JSON list of entries (accountsordersissues.json, failedorders*.json).
+    - "summary": the legacy file is a dict with total/per-timeframe failed order counters and an "orders" list.
+    """
+    def __init__(self, legacy_path: str, layout: str = "list"):
+        self.legacy_path: str = legacy_path
+        self.journal_base: str = os.path.splitext(legacy_path)[0]
+        self.layout: str = layout
+        self.buffer: List[Dict] = []
+        self.lock = threading.Lock()
+
+    @property
+    def journal_path(self) -> str:
+        """Path of the journal this process appends to."""
+        return f"{self.journal_base}.{_shard}.jsonl" if _shard else f"{self.journal_base}.jsonl"
+
+    def journal_paths(self) -> List[str]:
+        """Paths of the main journal and all worker shards that currently exist."""
+        paths = glob.glob(glob.escape(self.journal_base) + ".*.jsonl")
+        main_path = f"{self.journal_base}.jsonl"
+        if os.path.exists(main_path):
+            paths.insert(0, main_path)
+        return paths
+
+    def append(self, entry: Dict) -> None:
+        """Buffer a single entry, flushing to the journal once the buffer is full."""
+        with self.lock:
+            self.buffer.append(entry)
+            should_flush = len(self.buffer) >= JOURNAL_FLUSH_SIZE
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """Append all buffered entries to the JSONL journal in a single write."""
+        with self.lock:
+            if not self.buffer:
+                return 0
+            entries = self.buffer
+            self.buffer = []
+        try:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            with open(self.journal_path, 'a', encoding='utf-8') as file:
+                file.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            return len(entries)
+        except Exception as e:
+            log_and_print(f"Error appending {len(entries)} entries to {self.journal_path}: {str(e)}", "ERROR")
+            with self.lock:
+                self.buffer = entries + self.buffer
+            return 0
+
+    def read_journal(self, paths: Optional[List[str]] = None) -> List[Dict]:
+        """Read all entries currently stored in the JSONL journal and its worker shards."""
+        entries = []
+        for path in (self.journal_paths() if paths is None else paths):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    for line in file:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entries.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            log_and_print(f"Skipping corrupted journal line in {path}", "WARNING")
+            except Exception as e:
+                log_and_print(f"Error reading journal {path}: {str(e)}", "ERROR")
+        return entries
+
+    def load_legacy(self):
+        """Load the legacy JSON file, falling back to an empty structure for the layout."""
+        empty = [] if self.layout == "list" else self.empty_summary()
+        if not os.path.exists(self.legacy_path):
+            return empty
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except json.JSONDecodeError:
+            log_and_print(f"Corrupted JSON file at {self.legacy_path}, starting fresh", "WARNING")
+            return empty
+        if self.layout == "list" and not isinstance(data, list):
+            return empty
+        if self.layout == "summary" and (not isinstance(data, dict) or "orders" not in data):
+            log_and_print(f"Corrupted JSON file at {self.legacy_path}, resetting with new structure", "WARNING")
+            return empty
+        return data
+
+    def empty_summary(self) -> Dict:
+        """Return an empty summary structure for failed order files."""
+        summary = {"total_failed_orders": 0}
+        for key in TIMEFRAME_SUMMARY_KEYS.values():
+            summary[key] = 0
+        summary["orders"] = []
+        return summary
+
+    def materialize(self) -> bool:
+        """Merge the journal into the legacy JSON file with a single rewrite and truncate the journal."""
+        self.flush()
+        paths = self.journal_paths()
+        entries = self.read_journal(paths)
+        if not entries:
+            return True
+
+        data = self.load_legacy()
+        if self.layout == "list":
+            data.extend(entries)
+        else:
+            data["orders"].extend(entries)
+            data["total_failed_orders"] = len(data["orders"])
+            for entry in entries:
+                timeframe_key = TIMEFRAME_SUMMARY_KEYS.get(entry.get("timeframe"))
+                if timeframe_key:
+                    data[timeframe_key] = data.get(timeframe_key, 0) + 1
+
+        try:
+            os.makedirs(os.path.dirname(self.legacy_path), exist_ok=True)
+            with open(self.legacy_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=4)
+            for path in paths:
+                os.remove(path)
+            log_and_print(f"Materialized {len(entries)} journaled entries into {self.legacy_path}", "INFO")
+            return True
+        except Exception as e:
+            log_and_print(f"Error materializing journal into {self.legacy_path}: {str(e)}", "ERROR")
+            return False
+
+    def reset(self) -> None:
+        """Drop buffered and journaled entries and clear the legacy JSON file."""
+        with self.lock:
+            self.buffer = []
+        try:
+            for path in self.journal_paths():
+                os.remove(path)
+            if os.path.exists(self.legacy_path):
+                with open(self.legacy_path, 'w', encoding='utf-8') as file:
+                    json.dump([], file)
+                log_and_print(f"Cleared error file {self.legacy_path}", "DEBUG")
+        except Exception as e:
+            log_and_print(f"Error clearing {self.legacy_path}: {str(e)}", "WARNING")
+
+# Journal Registry
+_journals: Dict[str, ErrorJournal] = {}
+_registry_lock = threading.Lock()
+
+def get_journal(legacy_path: str, layout: str = "list") -> ErrorJournal:
+    """Return the shared journal for a legacy JSON file, creating it on first use."""
+    with _registry_lock:
+        journal = _journals.get(legacy_path)
+        if journal is None:
+            journal = ErrorJournal(legacy_path, layout)
+            _journals[legacy_path] = journal
+            return journal
+    if journal.layout != layout:
+        # Another writer shares this file with a different layout; settle its entries first
+        journal.materialize()
+        journal.layout = layout
+    return journal
+
+def set_shard(name: Optional[str]) -> None:
+    """Write this process's journal entries to a named shard (used by order engine worker processes)."""
+    global _shard
+    flush_all()
+    _shard = name
+
+def flush_all() -> None:
+    """Append every buffered entry to its journal."""
+    for journal in list(_journals.values()):
+        journal.flush()
+
+def materialize_all(paths: Optional[List[str]] = None) -> None:
+    """Materialize the legacy JSON files for all journals, or only the given legacy paths."""
+    for journal in list(_journals.values()):
+        if paths is None or journal.legacy_path in paths:
+            journal.materialize()
+
+def _at_exit() -> None:
+    """Materialize on exit in the main process; worker processes only flush their shard."""
+    if _shard:
+        flush_all()
+    else:
+        materialize_all()
+
+atexit.register(_at_exit)
@@ -0,0 +1,110 @@
+import logging
+import time
+import mt5retry
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+SNAPSHOT_TICK_MAX_AGE = 5.0  # Seconds a cycle's tick is reused before it is fetched again
+MARKET_OPEN_MAX_TICK_AGE = 300  # A symbol whose last tick is older than this is treated as closed
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Market Snapshot Class
+class MarketSnapshot:
+    """Cycle-scoped ticks and symbol specs of one trade server, shared by every account on that server.
+
+    Each symbol's tick is fetched once per cycle (re-fetched only if older than SNAPSHOT_TICK_MAX_AGE, so a
+    long cycle never trades on stale prices) and its symbol_info once per cycle. Missing data is cached too.
+    Fetches run on the MT5 executor; an mt5retry.MT5Timeout propagates to abort the account pass.
+    """
+    def __init__(self, server: str):
+        self.server: str = server
+        self.ticks: Dict[str, tuple] = {}  # symbol -> (fetched at monotonic time, tick or None)
+        self.specs: Dict[str, object] = {}
+        self.tick_reads: int = 0
+
+    async def tick(self, mt5_api, symbol: str):
+        """Return the symbol's tick for this cycle, fetching it on first use."""
+        cached = self.ticks.get(symbol)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] <= SNAPSHOT_TICK_MAX_AGE:
+            return cached[1]
+        try:
+            tick = await mt5retry.call(mt5_api.symbol_info_tick, symbol, description=f"symbol_info_tick({symbol})")
+        except mt5retry.MT5Timeout:
+            raise
+        except Exception as e:
+            log_and_print(f"Error reading tick for {symbol} on {self.server}: {str(e)}", "WARNING")
+            tick = None
+        self.tick_reads += 1
+        self.ticks[symbol] = (now, tick)
+        return tick
+
+    async def spec(self, mt5_api, symbol: str):
+        """Return the symbol's symbol_info for this cycle, fetching it on first use."""
+        if symbol not in self.specs:
+            try:
+                self.specs[symbol] = await mt5retry.call(mt5_api.symbol_info, symbol, description=f"symbol_info({symbol})")
+            except mt5retry.MT5Timeout:
+                raise
+            except Exception as e:
+                log_and_print(f"Error reading symbol info for {symbol} on {self.server}: {str(e)}", "WARNING")
+                self.specs[symbol] = None
+        return self.specs[symbol]
+
+    async def is_market_open(self, mt5_api, symbol: str) -> bool:
+        """Check if the market is open for the symbol based on the age of its snapshot tick."""
+        tick = await self.tick(mt5_api, symbol)
+        if tick is None:
+            log_and_print(f"No tick data available for {symbol}, assuming market closed", "DEBUG")
+            return False
+
+        tick_datetime = datetime.fromtimestamp(tick.time, tz=timezone.utc)
+        time_diff = (datetime.now(tz=timezone.utc) - tick_datetime).total_seconds()
+        if time_diff > MARKET_OPEN_MAX_TICK_AGE:
+            log_and_print(f"Last tick for {symbol} is {time_diff:.0f}s old, assuming market closed", "DEBUG")
+            return False
+
+        log_and_print(f"Market open for {symbol} (last tick: {tick_datetime})", "DEBUG")
+        return True
+
+# Market Snapshots Class
+class MarketSnapshots:
+    """Registry of one MarketSnapshot per trade server, cleared at the start of every cycle."""
+    def __init__(self):
+        self.snapshots: Dict[str, MarketSnapshot] = {}
+
+    def start_cycle(self) -> None:
+        """Drop the previous cycle's snapshots, logging how many tick reads they needed."""
+        if self.snapshots:
+            reads = ", ".join(f"{server}: {snapshot.tick_reads}" for server, snapshot in self.snapshots.items())
+            log_and_print(f"Previous cycle tick reads per server: {reads}", "DEBUG")
+        self.snapshots = {}
+
+    def for_server(self, server: Optional[str]) -> MarketSnapshot:
+        """Return this cycle's snapshot for a trade server."""
+        key = server or "default"
+        if key not in self.snapshots:
+            self.snapshots[key] = MarketSnapshot(key)
+        return self.snapshots[key]
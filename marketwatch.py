@@ -0,0 +1,159 @@
+import os
+import json
+import logging
+import time
+import mt5retry
+from typing import List, Optional, Tuple
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+MARKETWATCH_CACHE_FILE = "marketwatchsymbols.json"  # Stored next to each terminal64.exe
+MARKETWATCH_SELECT_ATTEMPTS = 3
+MARKETWATCH_SELECT_DELAY = 0.5  # Seconds between symbol_select attempts
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Market Watch Class
+class MarketWatch:
+    """Provisions a terminal's Market Watch and caches which symbols are already visible.
+
+    MT5 has no documented terminal/profile setting for Market Watch contents, but a portable
+    terminal keeps its Market Watch selection between sessions. Symbols are therefore provisioned
+    once per terminal after login (one symbols_get() visibility read, then symbol_select for the
+    missing ones) and recorded in a per-terminal cache, so later runs skip straight to trading.
+    """
+    def __init__(self, mt5_api, terminal_dir: Optional[str], cache_key: str):
+        self.mt5_api = mt5_api
+        self.cache_path: Optional[str] = os.path.join(terminal_dir, MARKETWATCH_CACHE_FILE) if terminal_dir else None
+        self.cache_key: str = cache_key
+        self.visible: set = self.load_cache()
+        self.refreshed: bool = False
+
+    def load_cache(self) -> set:
+        """Load the cached visible symbols for this terminal and login."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return set()
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return set(data.get(self.cache_key, [])) if isinstance(data, dict) else set()
+        except Exception as e:
+            log_and_print(f"Error loading Market Watch cache {self.cache_path}: {str(e)}", "WARNING")
+            return set()
+
+    def save_cache(self) -> None:
+        """Persist the visible symbols for this terminal and login."""
+        if not self.cache_path:
+            return
+        try:
+            data = {}
+            if os.path.exists(self.cache_path):
+                with open(self.cache_path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                if not isinstance(data, dict):
+                    data = {}
+            data[self.cache_key] = sorted(self.visible)
+            with open(self.cache_path, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=4)
+        except Exception as e:
+            log_and_print(f"Error saving Market Watch cache {self.cache_path}: {str(e)}", "WARNING")
+
+    def refresh_visible(self) -> None:
+        """Read the terminal's current Market Watch contents with a single symbols_get() call."""
+        self.refreshed = True
+        try:
+            symbols = self.mt5_api.symbols_get()
+            if symbols is None:
+                log_and_print(f"Failed to read Market Watch symbols: {self.mt5_api.last_error()}", "WARNING")
+                return
+            self.visible = {symbol.name for symbol in symbols if symbol.visible}
+        except Exception as e:
+            log_and_print(f"Error reading Market Watch symbols: {str(e)}", "WARNING")
+
+    def select(self, symbol: str) -> bool:
+        """Add a symbol to Market Watch with a few quick symbol_select attempts."""
+        for attempt in range(1, MARKETWATCH_SELECT_ATTEMPTS + 1):
+            try:
+                if self.mt5_api.symbol_select(symbol, True):
+                    log_and_print(f"Symbol {symbol} added to Market Watch", "DEBUG")
+                    return True
+            except Exception as e:
+                log_and_print(f"Error selecting {symbol} in Market Watch: {str(e)}", "WARNING")
+            if attempt < MARKETWATCH_SELECT_ATTEMPTS:
+                time.sleep(MARKETWATCH_SELECT_DELAY)
+        log_and_print(f"Failed to add {symbol} to Market Watch: {self.mt5_api.last_error()}", "ERROR")
+        return False
+
+    async def select_async(self, symbol: str) -> bool:
+        """Add a symbol to Market Watch like select(), but off the event loop with jittered backoff between attempts."""
+        selected = await mt5retry.retry(
+            self.mt5_api.symbol_select, symbol, True, attempts=MARKETWATCH_SELECT_ATTEMPTS, accept=bool,
+            base_delay=MARKETWATCH_SELECT_DELAY, description=f"symbol_select({symbol})"
+        )
+        if selected:
+            log_and_print(f"Symbol {symbol} added to Market Watch", "DEBUG")
+            return True
+        log_and_print(f"Failed to add {symbol} to Market Watch: {await mt5retry.call(self.mt5_api.last_error)}", "ERROR")
+        return False
+
+    def provision(self, symbols: List[str]) -> Tuple[List[str], List[str]]:
+        """Make the symbols visible in Market Watch; returns (visible_symbols, failed_symbols)."""
+        wanted = list(dict.fromkeys(symbols))
+        missing = [symbol for symbol in wanted if symbol not in self.visible]
+        if missing and not self.refreshed:
+            self.refresh_visible()
+            missing = [symbol for symbol in wanted if symbol not in self.visible]
+
+        failed = []
+        for symbol in missing:
+            if self.select(symbol):
+                self.visible.add(symbol)
+            else:
+                failed.append(symbol)
+        if missing:
+            self.save_cache()
+            log_and_print(f"Provisioned Market Watch: {len(missing) - len(failed)} added, {len(failed)} failed, {len(wanted) - len(missing)} already visible", "INFO")
+        return [symbol for symbol in wanted if symbol in self.visible], failed
+
+    def ensure_visible(self, symbol: str) -> bool:
+        """Return True if the symbol is (or could be made) visible in Market Watch."""
+        return symbol in self.provision([symbol])[0]
+
+    async def ensure_visible_async(self, symbol: str) -> bool:
+        """Async ensure_visible() for callers on the event loop; MT5 calls run on the MT5 executor."""
+        if symbol in self.visible:
+            return True
+        if not self.refreshed:
+            await mt5retry.call(self.refresh_visible, description="Market Watch refresh")
+            if symbol in self.visible:
+                return True
+        if not await self.select_async(symbol):
+            return False
+        self.visible.add(symbol)
+        self.save_cache()
+        return True
+
+    def forget(self, symbol: str) -> None:
+        """Drop a symbol from the cache, e.g. when the terminal reports it is no longer visible."""
+        if symbol in self.visible:
+            self.visible.discard(symbol)
+            self.save_cache()
@@ -1,4 +1,5 @@
 import connectwithinfinitydb as db
+import symbolresolver
 import MetaTrader5 as mt5
 import os
 import shutil
@@ -40,37 +41,6 @@ BASE_MT5_DIR = r"C:\xampp\htdocs\CIPHER\metaTrader5\users"  # Base directory for
 MAX_RETRIES = 5
 MT5_RETRY_DELAY = 3
 
-# Market name mappings
-MARKET_MAPPINGS = {
-    'volatility10index': 'Volatility 10 Index',
-    'volatility25index': 'Volatility 25 Index',
-    'volatility50index': 'Volatility 50 Index',
-    'volatility75index': 'Volatility 75 Index',
-    'volatility100index': 'Volatility 100 Index',
-    'driftswitchindex10': 'Drift Switch Index 10',
-    'driftswitchindex20': 'Drift Switch Index 20',
-    'driftswitchindex30': 'Drift Switch Index 30',
-    'multistep2index': 'Multi Step 2 Index',
-    'multistep4index': 'Multi Step 4 Index',
-    'stepindex': 'Step Index',
-    'usdjpy': 'USDJPY',
-    'usdcad': 'USDCAD',
-    'usdchf': 'USDCHF',
-    'eurusd': 'EURUSD',
-    'gbpusd': 'GBPUSD',
-    'audusd': 'AUDUSD',
-    'nzdusd': 'NZDUSD',
-    'xauusd': 'XAUUSD',
-    'ustech100': 'US Tech 100',
-    'wallstreet30': 'Wall Street 30',
-    'audjpy': 'AUDJPY',
-    'audnzd': 'AUDNZD',
-    'eurchf': 'EURCHF',
-    'eurgbp': 'EURGBP',
-    'eurjpy': 'EURJPY',
-    'gbpjpy': 'GBPJPY'
-}
-
 # Logging Helper Function
 def log_and_print(message, level="INFO"):
     """Helper function to print formatted messages with color coding and spacing."""
@@ -487,7 +457,7 @@ class ProgrammeContractFetcher:
                 parsed['contractType'] = part.replace('contract type: ', '')
             elif part.startswith('market name: '):
                 raw_market = part.replace('market name: ', '').lower()
-                parsed['marketName'] = MARKET_MAPPINGS.get(raw_market, raw_market)
+                parsed['marketName'] = symbolresolver.MARKET_MAPPINGS.get(raw_market, raw_market)
             elif part.startswith('timeframe: '):
                 parsed['timeframe'] = part.replace('timeframe: ', '')
             elif part.startswith('entry price: '):
@@ -609,7 +579,7 @@ class ProgrammeContractFetcher:
 
             for market in markets:
                 market_key = market.lower()
-                mapped_market = MARKET_MAPPINGS.get(market_key, market_key)
+                mapped_market = symbolresolver.MARKET_MAPPINGS.get(market_key, market_key)
                 # Check all contract types
                 for contract_key, contract_list in contracts.items():
                     contract_market, contract_type = contract_key.split('_')
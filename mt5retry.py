@@ -0,0 +1,154 @@
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+MT5_CALL_TIMEOUT = 30  # Seconds the event loop waits for one MT5 call before giving up on it
+MT5_INITIALIZE_TIMEOUT = 130  # mt5.initialize is passed timeout=120000 ms, so wait a little longer than that
+MT5_STALL_LIMIT = 4 * MT5_CALL_TIMEOUT  # Seconds a timed-out call may keep running before the process gives up on its terminal connection
+MT5_BACKOFF_BASE = 0.5  # Seconds before the first retry, doubled on every further attempt
+MT5_BACKOFF_MAX = 8  # Upper bound on a single backoff delay
+MT5_BACKOFF_JITTER = 0.5  # Share of each delay that is randomised so retries of many accounts do not align
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# MT5 Timeout Class
+class MT5Timeout(Exception):
+    """An MT5 call missed its deadline, or was refused because an earlier call that missed its deadline still runs.
+
+    The abandoned call may still complete (an order_send may still go through), so callers abort what they
+    were doing instead of retrying; the next pass starts again from a fresh login.
+    """
+
+# MT5 Stalled Class
+class MT5Stalled(MT5Timeout):
+    """A timed-out MT5 call has held the executor for longer than MT5_STALL_LIMIT.
+
+    The call may never return and the process's single terminal connection cannot be reused, so the
+    process must exit and be restarted with a fresh connection.
+    """
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_abandoned: Optional[Future] = None  # Call that missed its deadline and still holds the executor thread
+_abandoned_at: float = 0.0  # time.monotonic() when that call missed its deadline
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return this process's MT5 executor, creating it on first use.
+
+    The MetaTrader5 package holds one terminal connection per process, so every MT5 call of the process
+    goes through this single thread and no two calls ever use the connection at once.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+        return _executor
+
+def backoff_delay(attempt: int, base_delay: float = MT5_BACKOFF_BASE, max_delay: float = MT5_BACKOFF_MAX) -> float:
+    """Return the jittered delay after a failed attempt (1-based): base doubled per attempt, capped, partly randomised."""
+    delay = min(max_delay, base_delay * (2 ** (attempt - 1)))
+    return delay * (1 - MT5_BACKOFF_JITTER) + random.uniform(0, delay * MT5_BACKOFF_JITTER)
+
+def stalled() -> bool:
+    """Return True while a call that missed its deadline is still running on the MT5 executor."""
+    return _abandoned is not None and not _abandoned.done()
+
+def stalled_for() -> float:
+    """Return the seconds since the still-running timed-out call missed its deadline (0 when none is running)."""
+    return time.monotonic() - _abandoned_at if stalled() else 0.0
+
+async def call(func: Callable, *args, deadline: float = MT5_CALL_TIMEOUT, description: str = "", **kwargs) -> Any:
+    """Run one MT5 call on the MT5 executor without blocking the event loop and return its result.
+
+    Raises MT5Timeout if the call does not finish within the deadline, or straight away while an earlier
+    timed-out call is still running; once that call has run longer than MT5_STALL_LIMIT past its deadline,
+    MT5Stalled is raised instead. Exceptions raised by the call propagate to the caller.
+    """
+    global _abandoned, _abandoned_at
+    name = description or getattr(func, '__name__', 'MT5 call')
+    if stalled():
+        seconds = stalled_for()
+        if seconds > MT5_STALL_LIMIT:
+            raise MT5Stalled(f"{name} refused: an MT5 call has been stuck for {seconds:.0f}s, the terminal connection needs a restart")
+        raise MT5Timeout(f"{name} refused: an earlier MT5 call that missed its deadline is still running")
+    future = get_executor().submit(functools.partial(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=deadline)
+    except asyncio.TimeoutError:
+        _abandoned = future
+        _abandoned_at = time.monotonic()
+        raise MT5Timeout(f"{name} did not finish within {deadline}s") from None
+
+def run_sync(func: Callable, *args, deadline: float = MT5_CALL_TIMEOUT, **kwargs) -> Any:
+    """Run one MT5 call on the MT5 executor from synchronous code (e.g. shutdown); returns None if it times out or fails."""
+    if stalled():
+        log_and_print(f"Skipping {getattr(func, '__name__', 'MT5 call')}: an earlier MT5 call is still running", "WARNING")
+        return None
+    try:
+        return get_executor().submit(functools.partial(func, *args, **kwargs)).result(timeout=deadline)
+    except Exception as e:
+        log_and_print(f"{getattr(func, '__name__', 'MT5 call')} failed: {str(e) or type(e).__name__}", "WARNING")
+        return None
+
+async def retry(func: Callable, *args, attempts: int = 3, accept: Callable[[Any], bool] = lambda result: result is not None,
+                base_delay: float = MT5_BACKOFF_BASE, max_delay: float = MT5_BACKOFF_MAX, call_timeout: float = MT5_CALL_TIMEOUT,
+                deadline: Optional[float] = None, description: str = "", **kwargs) -> Any:
+    """Call an MT5 function until accept(result) holds, sleeping a jittered backoff between attempts.
+
+    Each attempt is bounded by call_timeout and, if given, all attempts together by deadline seconds.
+    An exception counts as a failed attempt, but MT5Timeout propagates: a call that may still complete is
+    never repeated. Returns the accepted result, or the last result (None after an exception) once attempts
+    or the deadline run out.
+    """
+    name = description or getattr(func, '__name__', 'MT5 call')
+    expires = time.monotonic() + deadline if deadline is not None else None
+    result = None
+    for attempt in range(1, attempts + 1):
+        timeout = call_timeout
+        if expires is not None:
+            timeout = min(timeout, expires - time.monotonic())
+            if timeout <= 0:
+                break
+        try:
+            result = await call(func, *args, deadline=timeout, description=name, **kwargs)
+        except MT5Timeout:
+            raise
+        except Exception as e:
+            log_and_print(f"Error during {name} (attempt {attempt}/{attempts}): {str(e)}", "WARNING")
+            result = None
+        if accept(result):
+            return result
+        if attempt == attempts:
+            break
+        delay = backoff_delay(attempt, base_delay, max_delay)
+        if expires is not None and time.monotonic() + delay >= expires:
+            break
+        log_and_print(f"{name} not ready (attempt {attempt}/{attempts}), retrying in {delay:.1f}s", "DEBUG")
+        await asyncio.sleep(delay)
+    return result
@@ -0,0 +1,203 @@
+import os
+import logging
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Callable, Tuple
+from colorama import Fore, Style
+import errorjournal
+import ordervalidation
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+ENGINE_MAX_WORKERS = max(1, min(8, os.cpu_count() or 1))  # Concurrent MT5 worker processes
+ENGINE_BROKER_CONCURRENCY = 2  # Accounts per broker server placing orders at the same time
+ENGINE_BROKER_MIN_INTERVAL = 1.0  # Seconds between account logins on the same broker server
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+def account_key_for(account: Dict) -> str:
+    """Build the user_{id} / user_{id}_sub_{sub} key for an account."""
+    return f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account.get('subaccount_id') else f"user_{account['user_id']}"
+
+def terminal_key_for(account: Dict) -> str:
+    """Name the terminal an account logs in through, as ConfigManager.create_account_terminal names its directory.
+
+    Every subaccount of a user shares one 'sa' terminal, so the key is not unique per account.
+    """
+    account_type = "sa" if account.get('subaccount_id') else "ma"
+    return f"{account_type}-{account['user_id']}"
+
+# Batch Submission Functions
+def validate_pending_order(mt5_api, symbol_info, tick, symbol: str, order_type: str, entry_price: float, profit_price: float,
+                           stop_loss: float, lot_size: float, allowed_risk: float) -> Tuple[bool, Optional[Dict], Optional[str], Optional[str]]:
+    """Validate a pending order against a symbol info/tick snapshot and build its order_send request.
+
+    Returns (True, request, None, None) or (False, None, error_message, error_category) without any MT5 calls.
+    """
+    if not symbol_info.trade_mode == mt5_api.SYMBOL_TRADE_MODE_FULL:
+        error_message = f"Symbol {symbol} is not tradeable (trade mode: {symbol_info.trade_mode})"
+        log_and_print(error_message, "ERROR")
+        return False, None, error_message, "unknown"
+
+    snapshot = ordervalidation.SymbolSnapshot(symbol, symbol_info, tick)
+    try:
+        validation, i = ordervalidation.validate_order(snapshot, order_type, entry_price, profit_price, stop_loss)
+    except (ValueError, TypeError) as e:  # Zero or missing tick size, or a price that is not a number
+        error_message = f"Error placing pending order for {symbol}: {str(e)}"
+        log_and_print(error_message, "ERROR")
+        return False, None, error_message, "unknown"
+    entry_price, profit_price, stop_loss = validation.prices(i)
+    log_and_print(
+        f"Validating order for {symbol}: "
+        f"Order Type={order_type}, Entry={entry_price}, TP={profit_price}, SL={stop_loss}, "
+        f"Current Bid={snapshot.bid}, Ask={snapshot.ask}, Stops Level={snapshot.stops_level}, Tick Size={snapshot.tick_size}, "
+        f"Allowed Risk={allowed_risk}",
+        "DEBUG"
+    )
+    if not validation.accepted(i):
+        error_message, error_category = validation.error(i)
+        log_and_print(error_message, "ERROR")
+        return False, None, error_message, error_category
+
+    request = {
+        "action": mt5_api.TRADE_ACTION_PENDING,
+        "symbol": symbol,
+        "volume": float(lot_size),
+        "type": mt5_api.ORDER_TYPE_BUY_LIMIT if validation.is_buy_limit[i] else mt5_api.ORDER_TYPE_SELL_LIMIT,
+        "price": entry_price,
+        "sl": stop_loss if stop_loss else 0.0,
+        "tp": profit_price if profit_price else 0.0,
+        "type_time": mt5_api.ORDER_TIME_GTC,
+        "type_filling": mt5_api.ORDER_FILLING_IOC,
+    }
+    return True, request, None, None
+
+def submit_order_batch(mt5_api, requests: List[Dict]) -> List[Tuple[bool, Optional[int], Optional[str], Optional[str]]]:
+    """Send pre-validated pending order requests back-to-back and collect every result in one pass.
+
+    Returns one (success, order_id, error_message, error_category) tuple per request, in order.
+    """
+    results = []
+    for request in requests:
+        symbol = request["symbol"]
+        try:
+            log_and_print(f"Sending order for {symbol}: {request}", "DEBUG")
+            result = mt5_api.order_send(request)
+            if result is None or result.retcode != mt5_api.TRADE_RETCODE_DONE:
+                error_code, error_message = mt5_api.last_error()
+                retcode = result.retcode if result is not None else error_code
+                full_error = f"Pending order for {symbol} failed, error: {retcode}, {error_message}"
+                log_and_print(full_error, "ERROR")
+                error_category = "invalid_entry" if retcode == 10015 else "stop_loss" if retcode == 10016 else "unknown"
+                results.append((False, None, full_error, error_category))
+                continue
+            log_and_print(
+                f"Pending order for {symbol} placed successfully at {request['price']} "
+                f"with TP {request['tp']}, SL {request['sl']} (Order #{result.order})",
+                "SUCCESS"
+            )
+            results.append((True, result.order, None, None))
+        except Exception as e:
+            error_message = f"Error placing pending order for {symbol}: {str(e)}"
+            log_and_print(error_message, "ERROR")
+            results.append((False, None, error_message, "unknown"))
+    return results
+
+# Worker Process Functions
+def init_worker() -> None:
+    """Give each worker process its own error journal shard."""
+    errorjournal.set_shard(f"worker{os.getpid()}")
+
+def run_account_plan(account: Dict, signals: List[Dict], plans: Optional[Dict[tuple, Dict]] = None) -> Dict[str, int]:
+    """Run one account's full placement plan in a worker process and return its counters.
+
+    Each worker process owns a single MT5 connection, so accounts in different workers never
+    share terminal state.
+    """
+    import bouncestreamtrades  # Imported here; bouncestreamtrades imports this module
+    fetcher = bouncestreamtrades.ProgrammeFetcher()
+    try:
+        return asyncio.run(fetcher.run_account_plan(account, signals, plans))
+    finally:
+        errorjournal.flush_all()
+
+# Order Placement Engine Class
+class OrderPlacementEngine:
+    """Dispatches per-account placement plans to MT5 worker processes with concurrency and broker rate limits.
+
+    Accounts sharing a terminal are dispatched one at a time, so two workers never log different accounts
+    into (or first copy) the same terminal64.exe.
+    """
+    def __init__(self, max_workers: int = ENGINE_MAX_WORKERS, broker_concurrency: int = ENGINE_BROKER_CONCURRENCY,
+                 broker_min_interval: float = ENGINE_BROKER_MIN_INTERVAL):
+        self.max_workers: int = max(1, max_workers)
+        self.broker_concurrency: int = max(1, broker_concurrency)
+        self.broker_min_interval: float = broker_min_interval
+        self.broker_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.broker_locks: Dict[str, asyncio.Lock] = {}
+        self.broker_last_start: Dict[str, float] = {}
+        self.terminal_locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire_broker_slot(self, server: str) -> asyncio.Semaphore:
+        """Wait for a free slot on the broker server and keep logins spaced by the minimum interval."""
+        semaphore = self.broker_semaphores.setdefault(server, asyncio.Semaphore(self.broker_concurrency))
+        await semaphore.acquire()
+        lock = self.broker_locks.setdefault(server, asyncio.Lock())
+        async with lock:
+            wait = self.broker_min_interval - (time.monotonic() - self.broker_last_start.get(server, 0.0))
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.broker_last_start[server] = time.monotonic()
+        return semaphore
+
+    async def dispatch(self, executor: ProcessPoolExecutor, worker_slots: asyncio.Semaphore, worker: Callable,
+                       account: Dict, signals: List[Dict], plans: Optional[Dict[tuple, Dict]]) -> Optional[Dict[str, int]]:
+        """Run one account's plan in the pool once its terminal is free and a broker slot and a worker slot are free."""
+        account_key = account_key_for(account)
+        server = account.get('broker_server') or 'N/A'
+        terminal_lock = self.terminal_locks.setdefault(terminal_key_for(account), asyncio.Lock())
+        async with terminal_lock:
+            broker_slot = await self.acquire_broker_slot(server)
+            try:
+                async with worker_slots:
+                    log_and_print(f"Dispatching order placement for {account_key} (server: {server})", "INFO")
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(executor, worker, account, signals, plans)
+            except Exception as e:
+                log_and_print(f"Order placement worker failed for {account_key}: {str(e)}", "ERROR")
+                return None
+            finally:
+                broker_slot.release()
+
+    async def run(self, accounts: List[Dict], signals: List[Dict], plans: Optional[Dict[tuple, Dict]] = None,
+                  worker: Callable = run_account_plan) -> List[Optional[Dict[str, int]]]:
+        """Place orders for all accounts concurrently; returns each account's counters (None on worker failure).
+        Plan templates compiled in the parent are shipped to every worker unchanged."""
+        if not accounts:
+            return []
+        workers = min(self.max_workers, len({terminal_key_for(account) for account in accounts}))
+        log_and_print(f"Starting order placement engine with {workers} workers for {len(accounts)} accounts", "INFO")
+        worker_slots = asyncio.Semaphore(workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            return await asyncio.gather(
+                *(self.dispatch(executor, worker_slots, worker, account, signals, plans) for account in accounts)
+            )
@@ -0,0 +1,180 @@
+import logging
+import time
+from typing import List, Dict, Optional, Tuple, Callable
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+DEFAULT_PROGRAMME_TIMEFRAME = 'priority_lowtohigh_timeframe'
+TIMEFRAME_PRIORITIES = {
+    'priority_lowtohigh_timeframe': ['15minutes', '30minutes', '1hour', '4hours', '5minutes'],
+    'priority_hightolow_timeframe': ['4hours', '1hour', '30minutes', '15minutes', '5minutes']
+}
+TIER_RISK_LEVELS = {
+    0: [4.0],              # balance < 96
+    1: [4.0, 8.0],         # 96 <= balance < 144
+    2: [4.0, 8.0, 16.0]    # balance >= 144
+}
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Plan Helpers
+def normalize_timeframe(timeframe: str) -> str:
+    """Normalize a signal or priority timeframe the same way on both sides of the match."""
+    return timeframe.lower().replace('4hour', '4hours')
+
+def resolve_programme_timeframe(programme_timeframe: Optional[str]) -> str:
+    """Return a known programme_timeframe, defaulting to low-to-high."""
+    if programme_timeframe in TIMEFRAME_PRIORITIES:
+        return programme_timeframe
+    log_and_print(f"Unknown programme_timeframe '{programme_timeframe}', defaulting to low-to-high", "WARNING")
+    return DEFAULT_PROGRAMME_TIMEFRAME
+
+def balance_tier(balance: float) -> int:
+    """Map an account balance to its risk tier."""
+    if balance < 96:
+        return 0
+    if balance < 144:
+        return 1
+    return 2
+
+def risk_multipliers(balance: float) -> Dict[float, int]:
+    """Return the lot size multiplier for each allowed risk level at this balance."""
+    tier = balance_tier(balance)
+    if tier == 0:
+        return {4.0: 1}
+    if tier == 1:
+        return {4.0: 4, 8.0: 1}
+    return {4.0: 3 + max(0, int((balance - 144) // 48)), 8.0: 2, 16.0: 1}
+
+def signal_risk(signal: Dict) -> float:
+    """Return a signal's allowed_risk as a float (0.0 when missing)."""
+    return float(signal.get('allowed_risk', 0.0)) if signal.get('allowed_risk') is not None else 0.0
+
+def resolve_pairing(steps: List[Tuple[str, Optional[Dict], Optional[Dict]]], min_distance: float,
+                    succeeds: Callable[[Dict], bool], log_skips: bool = False) -> List[Tuple[str, Dict]]:
+    """Run the buy/sell pairing state machine over a symbol's plan steps.
+
+    succeeds(signal) reports whether placing the signal succeeds (known or predicted) and is called
+    for every signal returned. Returns the (timeframe, signal) placements to attempt, in order.
+    """
+    attempts = []
+    placed_buy_entry = None
+    placed_sell_entry = None
+    for timeframe, plan_buy, plan_sell in steps:
+        candidate_buy = plan_buy if placed_buy_entry is None else None
+        candidate_sell = plan_sell if placed_sell_entry is None else None
+
+        # Case 1: This timeframe has candidates for both (none placed yet); attempt both and stop
+        if candidate_buy and candidate_sell:
+            distance = abs(candidate_buy['entry_price'] - candidate_sell['entry_price'])
+            if distance >= min_distance:
+                for candidate in (candidate_buy, candidate_sell):
+                    succeeds(candidate)
+                    attempts.append((timeframe, candidate))
+                break
+            if log_skips:
+                log_and_print(f"Buy and sell too close in {timeframe} for {candidate_buy['pair']}: dist {distance} < {min_distance}, skipping TF", "WARNING")
+            continue
+
+        # Case 2: Place candidate buy if available (no dist check needed yet)
+        if candidate_buy:
+            attempts.append((timeframe, candidate_buy))
+            if succeeds(candidate_buy):
+                placed_buy_entry = candidate_buy['entry_price']
+
+        # Case 3: Place candidate sell if far enough from a placed buy
+        if candidate_sell:
+            sell_entry = candidate_sell['entry_price']
+            if placed_buy_entry is not None and abs(placed_buy_entry - sell_entry) < min_distance:
+                if log_skips:
+                    log_and_print(f"Sell too close to placed buy in {timeframe} for {candidate_sell['pair']}: dist {abs(placed_buy_entry - sell_entry)} < {min_distance}, skipping", "WARNING")
+            else:
+                attempts.append((timeframe, candidate_sell))
+                if succeeds(candidate_sell):
+                    placed_sell_entry = sell_entry
+
+        # If both placed now, stop
+        if placed_buy_entry is not None and placed_sell_entry is not None:
+            break
+    return attempts
+
+# Order Plan Compiler Class
+class OrderPlanCompiler:
+    """Compiles a signal set into per-(programme_timeframe, balance tier) order plan templates.
+
+    A template holds the symbols to add to Market Watch and, per symbol, the timeframe steps in
+    priority order with the first buy and first sell signal of each timeframe. Templates depend
+    only on the signal set, so they are built once and shared by every account; the MT5 stage
+    only executes them.
+    """
+    def __init__(self, signals: List[Dict]):
+        self.signals: List[Dict] = signals
+        self.templates: Dict[Tuple[str, int], Dict] = {}
+        self.unique_symbols: List[str] = list(dict.fromkeys(signal['pair'] for signal in signals))
+
+    def template(self, programme_timeframe: str, tier: int) -> Dict:
+        """Return the memoized plan template for a programme timeframe and balance tier."""
+        key = (programme_timeframe, tier)
+        if key not in self.templates:
+            self.templates[key] = self.build_template(programme_timeframe, tier)
+        return self.templates[key]
+
+    def build_template(self, programme_timeframe: str, tier: int) -> Dict:
+        """Group allowed signals by symbol and timeframe and pick each timeframe's buy/sell candidates."""
+        timeframe_priority = TIMEFRAME_PRIORITIES[programme_timeframe]
+        allowed_risk_levels = TIER_RISK_LEVELS[tier]
+
+        signals_by_symbol: Dict[str, Dict[str, List[Dict]]] = {}
+        for signal in self.signals:
+            if signal_risk(signal) not in allowed_risk_levels:
+                continue
+            by_timeframe = signals_by_symbol.setdefault(signal['pair'].lower(), {})
+            by_timeframe.setdefault(normalize_timeframe(signal['timeframe']), []).append(signal)
+
+        symbol_steps: Dict[str, List[Tuple[str, Optional[Dict], Optional[Dict]]]] = {}
+        for json_symbol in self.unique_symbols:
+            by_timeframe = signals_by_symbol.get(json_symbol.lower(), {})
+            steps = []
+            for timeframe in timeframe_priority:
+                tf_signals = by_timeframe.get(normalize_timeframe(timeframe))
+                if not tf_signals:
+                    continue
+                buy = next((s for s in tf_signals if s['order_type'].lower() == 'buy_limit'), None)
+                sell = next((s for s in tf_signals if s['order_type'].lower() == 'sell_limit'), None)
+                steps.append((timeframe, buy, sell))
+            symbol_steps[json_symbol] = steps
+
+        return {
+            'programme_timeframe': programme_timeframe,
+            'timeframe_priority': timeframe_priority,
+            'allowed_risk_levels': allowed_risk_levels,
+            'unique_symbols': self.unique_symbols,
+            'symbol_steps': symbol_steps
+        }
+
+    def compile_all(self) -> Dict[Tuple[str, int], Dict]:
+        """Build every template up front so worker processes receive them ready to execute."""
+        for programme_timeframe in TIMEFRAME_PRIORITIES:
+            for tier in TIER_RISK_LEVELS:
+                self.template(programme_timeframe, tier)
+        log_and_print(f"Compiled {len(self.templates)} order plan templates for {len(self.unique_symbols)} symbols", "INFO")
+        return self.templates
@@ -0,0 +1,337 @@
+import logging
+import time
+from typing import List, Optional, Tuple
+import numpy as np
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+CODE_ACCEPT = 0  # Order is valid as given (after tick-size rounding)
+CODE_ADJUST = 1  # Order is valid after moving its entry, SL or TP
+CODE_REJECT = 2  # Order cannot be placed; see its reason
+REASON_NONE = 0
+REASON_ORDER_TYPE = 1
+REASON_ENTRY = 2
+REASON_SL_SIDE = 3
+REASON_TP_SIDE = 4
+REASON_RISK_VIOLATION = 5
+REASON_SL_DISTANCE = 6
+REASON_TP_DISTANCE = 7
+REASON_CATEGORIES = {
+    REASON_NONE: None,
+    REASON_ORDER_TYPE: "unknown",
+    REASON_ENTRY: "invalid_entry",
+    REASON_SL_SIDE: "stop_loss",
+    REASON_TP_SIDE: "stop_loss",
+    REASON_RISK_VIOLATION: "adjusted_risk_violation",
+    REASON_SL_DISTANCE: "stop_loss",
+    REASON_TP_DISTANCE: "stop_loss"
+}
+BENCHMARK_ORDERS = 20000  # Orders per run in the __main__ micro-benchmark
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Symbol Snapshot Class
+class SymbolSnapshot:
+    """Read-only spec and tick of one symbol, read once and shared by every order validated against it."""
+    def __init__(self, symbol: str, symbol_info, tick):
+        self.symbol: str = symbol
+        self.trade_mode = symbol_info.trade_mode
+        self.tick_size = symbol_info.trade_tick_size
+        self.stops_level = symbol_info.trade_stops_level * symbol_info.point  # Minimum distance in price units
+        self.bid = tick.bid
+        self.ask = tick.ask
+
+def take_symbol_snapshot(mt5_api, symbol: str) -> Tuple[Optional[SymbolSnapshot], Optional[str]]:
+    """Read symbol_info and symbol_info_tick once; returns (snapshot, None) or (None, error_message)."""
+    try:
+        symbol_info = mt5_api.symbol_info(symbol)
+        if symbol_info is None:
+            return None, f"Cannot retrieve info for {symbol}"
+        if not symbol_info.trade_mode == mt5_api.SYMBOL_TRADE_MODE_FULL:
+            return None, f"Symbol {symbol} is not tradeable (trade mode: {symbol_info.trade_mode})"
+        tick = mt5_api.symbol_info_tick(symbol)
+        if tick is None:
+            return None, f"Cannot retrieve tick data for {symbol}, error: {mt5_api.last_error()}"
+        return SymbolSnapshot(symbol, symbol_info, tick), None
+    except Exception as e:
+        return None, f"Error reading snapshot for {symbol}: {str(e)}"
+
+# Order Validation Class
+class OrderValidation:
+    """Result of one validate_orders call: a code and reason per order plus its final, tick-normalized prices."""
+    def __init__(self, snapshot: SymbolSnapshot, order_types: List[str], adjust: bool, codes: np.ndarray, reasons: np.ndarray,
+                 is_buy_limit: np.ndarray, entry: np.ndarray, profit: np.ndarray, stop: np.ndarray, original_entry: np.ndarray,
+                 original_stop: np.ndarray, entry_adjusted: np.ndarray, profit_adjusted: np.ndarray, stop_adjusted: np.ndarray):
+        self.snapshot: SymbolSnapshot = snapshot
+        self.order_types: List[str] = order_types
+        self.adjust: bool = adjust
+        self.codes: np.ndarray = codes
+        self.reasons: np.ndarray = reasons
+        self.is_buy_limit: np.ndarray = is_buy_limit
+        self.entry: np.ndarray = entry
+        self.profit: np.ndarray = profit
+        self.stop: np.ndarray = stop
+        self.original_entry: np.ndarray = original_entry
+        self.original_stop: np.ndarray = original_stop
+        self.entry_adjusted: np.ndarray = entry_adjusted
+        self.profit_adjusted: np.ndarray = profit_adjusted
+        self.stop_adjusted: np.ndarray = stop_adjusted
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def accepted(self, i: int) -> bool:
+        """Return True if order i can be placed (as given or adjusted)."""
+        return self.codes[i] != CODE_REJECT
+
+    def prices(self, i: int) -> Tuple[float, float, float]:
+        """Return (entry, take-profit, stop-loss) of order i; a missing TP/SL is 0.0."""
+        return float(self.entry[i]), float(self.profit[i]), float(self.stop[i])
+
+    def side(self, i: int) -> str:
+        return "buy_limit" if self.is_buy_limit[i] else "sell_limit"
+
+    def adjustments(self, i: int) -> List[str]:
+        """Describe the entry/SL/TP moves made for order i, one line each."""
+        symbol = self.snapshot.symbol
+        side = self.side(i)
+        entry_price, profit_price, stop_loss = self.prices(i)
+        notes = []
+        if self.entry_adjusted[i]:
+            bound = f"<= {self.snapshot.ask - self.snapshot.stops_level}" if self.is_buy_limit[i] else f">= {self.snapshot.bid + self.snapshot.stops_level}"
+            notes.append(f"Adjusted {side} entry for {symbol} from {float(self.original_entry[i])} to {entry_price} (to meet stops_level: {bound})")
+        if self.stop_adjusted[i] and self.reasons[i] != REASON_RISK_VIOLATION:
+            notes.append(f"Adjusted invalid SL for {symbol} ({side}) from {float(self.original_stop[i])} to {stop_loss}")
+        if self.profit_adjusted[i] and self.reasons[i] != REASON_RISK_VIOLATION:
+            notes.append(f"Adjusted invalid TP for {symbol} ({side}) to {profit_price} (min distance)")
+        return notes
+
+    def error(self, i: int) -> Tuple[Optional[str], Optional[str]]:
+        """Return (error_message, error_category) for a rejected order i, or (None, None)."""
+        reason = int(self.reasons[i])
+        if reason == REASON_NONE:
+            return None, None
+        symbol = self.snapshot.symbol
+        stops_level = self.snapshot.stops_level
+        side = self.side(i)
+        entry_price, profit_price, stop_loss = self.prices(i)
+        entry_label = "adjusted entry" if self.adjust else "entry price"
+        if reason == REASON_ORDER_TYPE:
+            error_message = f"Unsupported order type {self.order_types[i]} for {symbol}"
+        elif reason == REASON_ENTRY and self.is_buy_limit[i]:
+            error_message = (
+                f"Invalid buy_limit entry price for {symbol}. "
+                f"Entry: {entry_price}, must be <= {self.snapshot.ask - stops_level} (ask: {self.snapshot.ask}, stops_level: {stops_level})"
+            )
+        elif reason == REASON_ENTRY:
+            error_message = (
+                f"Invalid sell_limit entry price for {symbol}. "
+                f"Entry: {entry_price}, must be >= {self.snapshot.bid + stops_level} (bid: {self.snapshot.bid}, stops_level: {stops_level})"
+            )
+        elif reason == REASON_SL_SIDE:
+            bound = "<=" if self.is_buy_limit[i] else ">="
+            error_message = f"Invalid stop-loss for {symbol} ({side}). SL: {stop_loss}, must be {bound} {entry_price}"
+        elif reason == REASON_TP_SIDE:
+            bound = ">=" if self.is_buy_limit[i] else "<="
+            error_message = f"Invalid take-profit for {symbol} ({side}). TP: {profit_price}, must be {bound} {entry_price}"
+        elif reason == REASON_RISK_VIOLATION:
+            error_message = (
+                f"Cannot adjust SL for {symbol} ({side}) without violating stops_level. "
+                f"Original SL: {float(self.original_stop[i])}, Adjusted Entry: {entry_price}"
+            )
+        elif reason == REASON_SL_DISTANCE:
+            error_message = (
+                f"{'SL' if self.adjust else 'Stop-loss'} too close to {entry_label} for {symbol}. "
+                f"SL: {stop_loss}, Entry: {entry_price}, Distance: {abs(entry_price - stop_loss)}, "
+                f"Required: >= {stops_level}"
+            )
+        else:
+            error_message = (
+                f"{'TP' if self.adjust else 'Take-profit'} too close to {entry_label} for {symbol}. "
+                f"TP: {profit_price}, Entry: {entry_price}, Distance: {abs(profit_price - entry_price)}, "
+                f"Required: >= {stops_level}"
+            )
+        return error_message, REASON_CATEGORIES[reason]
+
+# Validation Functions
+def normalize_to_tick(prices: np.ndarray, tick_size: float) -> np.ndarray:
+    """Round prices to the nearest multiple of the tick size."""
+    return np.round(prices / tick_size) * tick_size
+
+def validate_orders(snapshot: SymbolSnapshot, order_types: List[str], entry_prices, profit_prices, stop_losses,
+                    adjust: bool = False) -> OrderValidation:
+    """Validate pending orders (buy_limit or sell_limit) of one symbol against its snapshot in one vectorized pass.
+
+    Prices are rounded to the tick size and checked against stops_level. With adjust=False an entry, SL or TP on
+    the wrong side is rejected; with adjust=True the entry is moved to the nearest valid level, a wrong-side SL onto
+    the entry and a wrong-side TP to the minimum distance before the distance checks. Missing TP/SL are passed as 0.
+    """
+    tick_size = snapshot.tick_size
+    stops_level = snapshot.stops_level
+    if not tick_size or tick_size <= 0:
+        raise ValueError(f"Invalid tick size {tick_size} for {snapshot.symbol}")
+
+    entry = normalize_to_tick(np.asarray(entry_prices, dtype=np.float64), tick_size)
+    profit = normalize_to_tick(np.asarray(profit_prices, dtype=np.float64), tick_size)
+    stop = normalize_to_tick(np.asarray(stop_losses, dtype=np.float64), tick_size)
+    original_entry = entry.copy()
+    original_stop = stop.copy()
+
+    order_kinds = np.array([str(order_type).lower() for order_type in order_types])
+    is_buy_limit = order_kinds == "buy_limit"
+    is_sell_limit = order_kinds == "sell_limit"
+    unsupported = ~(is_buy_limit | is_sell_limit)
+
+    # Buy limits must sit at least stops_level below the ask, sell limits at least stops_level above the bid
+    min_price = snapshot.ask - stops_level
+    max_price = snapshot.bid + stops_level
+    entry_invalid = (is_buy_limit & (entry > min_price)) | (is_sell_limit & (entry < max_price))
+    no_change = np.zeros(len(entry), dtype=bool)
+    if adjust:
+        entry = normalize_to_tick(np.where(entry_invalid & is_buy_limit, min_price, np.where(entry_invalid, max_price, entry)), tick_size)
+        entry_adjusted, entry_invalid = entry_invalid, no_change
+
+    # SL must not be beyond the entry in the profit direction, TP must not be beyond it in the loss direction
+    stop_wrong_side = (stop != 0) & ((is_buy_limit & (stop > entry)) | (is_sell_limit & (stop < entry)))
+    profit_wrong_side = (profit != 0) & ((is_buy_limit & (profit < entry)) | (is_sell_limit & (profit > entry)))
+    if adjust:
+        stop = np.where(stop_wrong_side, entry, stop)
+        profit = np.where(profit_wrong_side & is_buy_limit, entry + stops_level, np.where(profit_wrong_side, entry - stops_level, profit))
+        stop_adjusted, profit_adjusted = stop_wrong_side, profit_wrong_side
+        stop_wrong_side, profit_wrong_side = no_change, no_change
+    else:
+        entry_adjusted, stop_adjusted, profit_adjusted = no_change, no_change, no_change
+
+    stop_too_close = (stop != 0) & (np.abs(entry - stop) < stops_level)
+    profit_too_close = (profit != 0) & (np.abs(profit - entry) < stops_level)
+    risk_violation = stop_adjusted & stop_too_close
+
+    # The first failing check decides the reason
+    reasons = np.select(
+        [unsupported, entry_invalid, stop_wrong_side, profit_wrong_side, risk_violation, stop_too_close, profit_too_close],
+        [REASON_ORDER_TYPE, REASON_ENTRY, REASON_SL_SIDE, REASON_TP_SIDE, REASON_RISK_VIOLATION, REASON_SL_DISTANCE, REASON_TP_DISTANCE],
+        default=REASON_NONE
+    )
+    codes = np.where(
+        reasons != REASON_NONE, CODE_REJECT,
+        np.where(entry_adjusted | stop_adjusted | profit_adjusted, CODE_ADJUST, CODE_ACCEPT)
+    )
+    return OrderValidation(
+        snapshot, list(order_types), adjust, codes, reasons, is_buy_limit, entry, profit, stop, original_entry,
+        original_stop, entry_adjusted, profit_adjusted, stop_adjusted
+    )
+
+def validate_order(snapshot: SymbolSnapshot, order_type: str, entry_price, profit_price, stop_loss,
+                   adjust: bool = False) -> Tuple[OrderValidation, int]:
+    """Validate a single order; returns (validation, 0) so callers index the one result like a batch."""
+    validation = validate_orders(
+        snapshot, [order_type], [float(entry_price)], [float(profit_price) if profit_price else 0.0],
+        [float(stop_loss) if stop_loss else 0.0], adjust
+    )
+    return validation, 0
+
+# Benchmark Functions
+def validate_order_scalar(snapshot: SymbolSnapshot, order_type: str, entry_price: float, profit_price: float, stop_loss: float,
+                          adjust: bool = False) -> Tuple[int, int]:
+    """Return (code, reason) for one order with the per-order float checks validate_orders replaced; benchmark reference only."""
+    tick_size = snapshot.tick_size
+    stops_level = snapshot.stops_level
+    entry_price = round(float(entry_price) / tick_size) * tick_size
+    profit_price = round(float(profit_price) / tick_size) * tick_size if profit_price else 0.0
+    stop_loss = round(float(stop_loss) / tick_size) * tick_size if stop_loss else 0.0
+    is_buy_limit = order_type.lower() == "buy_limit"
+    is_sell_limit = order_type.lower() == "sell_limit"
+    adjusted = False
+    stop_adjusted = False
+
+    if is_buy_limit:
+        min_price = snapshot.ask - stops_level
+        if entry_price > min_price:
+            if not adjust:
+                return CODE_REJECT, REASON_ENTRY
+            entry_price = round(min_price / tick_size) * tick_size
+            adjusted = True
+    elif is_sell_limit:
+        max_price = snapshot.bid + stops_level
+        if entry_price < max_price:
+            if not adjust:
+                return CODE_REJECT, REASON_ENTRY
+            entry_price = round(max_price / tick_size) * tick_size
+            adjusted = True
+    else:
+        return CODE_REJECT, REASON_ORDER_TYPE
+
+    if stop_loss and (stop_loss > entry_price if is_buy_limit else stop_loss < entry_price):
+        if not adjust:
+            return CODE_REJECT, REASON_SL_SIDE
+        stop_loss = entry_price
+        adjusted = stop_adjusted = True
+    if profit_price and (profit_price < entry_price if is_buy_limit else profit_price > entry_price):
+        if not adjust:
+            return CODE_REJECT, REASON_TP_SIDE
+        profit_price = entry_price + stops_level if is_buy_limit else entry_price - stops_level
+        adjusted = True
+
+    if stop_loss and abs(entry_price - stop_loss) < stops_level:
+        return CODE_REJECT, REASON_RISK_VIOLATION if stop_adjusted else REASON_SL_DISTANCE
+    if profit_price and abs(profit_price - entry_price) < stops_level:
+        return CODE_REJECT, REASON_TP_DISTANCE
+    return (CODE_ADJUST if adjusted else CODE_ACCEPT), REASON_NONE
+
+def run_benchmark(order_count: int = BENCHMARK_ORDERS) -> None:
+    """Time one batch call against the previous per-order scalar checks on random orders for a single symbol."""
+    from types import SimpleNamespace
+    rng = np.random.default_rng(7)
+    snapshot = SymbolSnapshot(
+        "EURUSD",
+        SimpleNamespace(trade_mode=4, trade_tick_size=0.00001, point=0.00001, trade_stops_level=20),
+        SimpleNamespace(bid=1.10000, ask=1.10012)
+    )
+    order_types = list(rng.choice(["buy_limit", "sell_limit"], order_count))
+    entries = 1.1 + rng.uniform(-0.01, 0.01, order_count)
+    profits = np.where(rng.random(order_count) < 0.9, entries + rng.uniform(-0.005, 0.005, order_count), 0.0)
+    stops = np.where(rng.random(order_count) < 0.9, entries + rng.uniform(-0.005, 0.005, order_count), 0.0)
+    entry_list, profit_list, stop_list = entries.tolist(), profits.tolist(), stops.tolist()
+
+    for adjust in (False, True):
+        started = time.perf_counter()
+        batch = validate_orders(snapshot, order_types, entries, profits, stops, adjust)
+        batch_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        single_results = [
+            validate_order_scalar(snapshot, order_types[i], entry_list[i], profit_list[i], stop_list[i], adjust)
+            for i in range(order_count)
+        ]
+        single_seconds = time.perf_counter() - started
+
+        matches = bool(np.array_equal(np.stack([batch.codes, batch.reasons], axis=1), np.array(single_results)))
+        counts = {name: int(np.sum(batch.codes == code)) for name, code in (("accept", CODE_ACCEPT), ("adjust", CODE_ADJUST), ("reject", CODE_REJECT))}
+        log_and_print(
+            f"adjust={adjust}: {order_count} orders, batch {batch_seconds * 1000:.1f} ms, scalar per-order {single_seconds * 1000:.1f} ms, "
+            f"speedup {single_seconds / max(batch_seconds, 1e-9):.0f}x, codes {counts}, results match: {matches}",
+            "SUCCESS" if matches else "ERROR"
+        )
+
+if __name__ == "__main__":
+    log_and_print("===== Order Validation Micro-Benchmark =====", "TITLE")
+    run_benchmark()
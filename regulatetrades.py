@@ -1,4 +1,15 @@
 import connectwithinfinitydb as db
+import accountschedule
+import accountstate
+import closedledger
+import errorjournal
+import marketwatch
+import marketsnapshot
+import mt5retry
+import dealhistory
+import signalstore
+import symbolresolver
+import thresholdindex
 import MetaTrader5 as mt5
 import os
 import shutil
@@ -6,12 +17,13 @@ import json
 import logging
 import time
 import asyncio
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timedelta
 import pytz
 from typing import List, Dict, Optional
 from colorama import Fore, Style, init
 import threading
-import difflib
+import multiprocessing
+import queue
 from collections import defaultdict
 
 # Initialize colorama for colored console output
@@ -49,6 +61,12 @@ MT5_RETRY_DELAY = 3
 CHECK_INTERVAL = 10  # Seconds to wait between trade regulation checks
 SL_ADJUSTMENT_PERCENT = 0.10  # Stop-loss adjustment percentage for entry price
 SL_RR_05_PERCENT = 0.25  # Stop-loss adjustment percentage for 1:0.5 RR
+HISTORY_CONSUMER = "regulatetrades"  # Deal watermark consumer name for this program
+REGULATION_MAX_WORKERS = max(1, min(8, os.cpu_count() or 1))  # Regulation worker processes, each owning a shard of terminals
+REGULATION_REPORT_TIMEOUT = 5  # Seconds the scheduler waits for a shard report before checking worker health
+REGULATION_RESTART_DELAY = 30  # Seconds before a crashed shard worker is restarted
+REGULATION_STALLED_EXIT_CODE = 75  # Exit code of a worker whose MT5 terminal connection is stuck
+STALE_MATCH_TOLERANCE = 0.0001  # Entry price distance below which a limit order duplicates a historical trade
 
 # Logging Helper Function
 def log_and_print(message, level="INFO"):
@@ -150,37 +168,48 @@ class MT5Manager:
     def __init__(self):
         pass  # No need for mt5_instances dict
 
-    def initialize_mt5(self, server: str, login: str, password: str, terminal_path: str, account_key: str) -> bool:
-        """Initialize MT5 terminal and login with provided credentials using the specified terminal path."""
+    async def initialize_mt5(self, server: str, login: str, password: str, terminal_path: str, account_key: str) -> bool:
+        """Initialize MT5 terminal and login with provided credentials using the specified terminal path.
+
+        The blocking initialize and terminal_info calls run on the MT5 executor, so the event loop keeps
+        running while a terminal starts up. A call that misses its deadline fails the login; MT5Stalled propagates.
+        """
         log_and_print(f"Attempting MT5 login for {account_key} (server: {server}, login: {login}) using {terminal_path}", "INFO")
         
         try:
-            if mt5.initialize(  # Use global mt5 directly
+            if await mt5retry.call(  # Use global mt5 directly
+                mt5.initialize,
                 path=terminal_path,
                 login=int(login),
                 password=password,
                 server=server,
                 portable=True,
-                timeout=120000
+                timeout=120000,
+                deadline=mt5retry.MT5_INITIALIZE_TIMEOUT,
+                description=f"MT5 initialization for {account_key}"
             ):
                 log_and_print(f"Successfully initialized MT5 terminal for {account_key}", "SUCCESS")
             else:
-                error_code, error_message = mt5.last_error()
+                error_code, error_message = await mt5retry.call(mt5.last_error) or (None, "no response from terminal")
                 log_and_print(f"Failed to initialize MT5 terminal for {account_key}. Error: {error_code}, {error_message}", "ERROR")
                 return False
+        except mt5retry.MT5Stalled:
+            raise
         except Exception as e:
             log_and_print(f"Exception during MT5 initialization for {account_key}: {str(e)}", "ERROR")
             return False
 
-        for _ in range(5):
-            if mt5.terminal_info() is not None:  # Use global mt5
+        try:
+            if await mt5retry.retry(mt5.terminal_info, attempts=5, base_delay=1, description=f"MT5 terminal readiness for {account_key}") is not None:
                 log_and_print(f"MT5 terminal fully initialized for {account_key}", "DEBUG")
                 return True
-            log_and_print(f"Waiting for MT5 terminal to fully initialize for {account_key}...", "INFO")
-            time.sleep(2)
-        else:
-            log_and_print(f"MT5 terminal not ready for {account_key}", "ERROR")
+        except mt5retry.MT5Stalled:
+            raise
+        except mt5retry.MT5Timeout as e:
+            log_and_print(f"MT5 terminal not responding for {account_key}: {str(e)}", "ERROR")
             return False
+        log_and_print(f"MT5 terminal not ready for {account_key}", "ERROR")
+        return False
 
 # Trade Regulator Class
 class TradeRegulator:
@@ -192,15 +221,29 @@ class TradeRegulator:
         self.total_orders_adjusted = 0
         self.total_orders_failed = 0
         self.signals = []
-
-    def get_available_symbols(self, mt5_instance) -> List[str]:
+        self.signal_ids = []  # Signal store ids, parallel to self.signals
+        self.signals_by_id: Dict[int, Dict] = {}
+        self.signals_version: Optional[tuple] = None  # Store data version the in-memory signals were loaded at
+        self.signal_indexes: Dict[symbolresolver.SymbolResolver, accountstate.SignalIndex] = {}  # Per server symbol list
+        self.signal_store: Optional[signalstore.SignalStore] = None
+        self.market_watch: Optional[marketwatch.MarketWatch] = None  # Market Watch of the account currently connected
+        self.history_sync = dealhistory.HistorySync(CLOSED_TRADES_DIR, HISTORY_CONSUMER)
+        self.threshold_indexes: Dict[str, thresholdindex.ThresholdIndex] = {}  # account_key -> stop-loss trigger index
+        self.market_snapshots = marketsnapshot.MarketSnapshots()
+        self.market_snapshot: Optional[marketsnapshot.MarketSnapshot] = None  # Cycle snapshot of the server currently connected
+        self.account_files = accountstate.AccountStateCache()  # Running/closed/limit JSON kept in memory, flushed per cycle
+        self.account_activity: Dict[str, accountschedule.AccountActivity] = {}  # What each account's last pass saw
+
+    async def get_available_symbols(self, mt5_instance) -> List[str]:
         """Retrieve all available symbols from the MT5 server."""
         try:
-            symbols = mt5_instance.symbols_get()
+            symbols = await mt5retry.call(mt5_instance.symbols_get)
             if not symbols:
                 log_and_print("No symbols retrieved from MT5 server", "ERROR")
                 return []
             return [symbol.name for symbol in symbols]
+        except mt5retry.MT5Timeout:
+            raise
         except Exception as e:
             log_and_print(f"Error retrieving symbols from MT5 server: {str(e)}", "ERROR")
             return []
@@ -208,88 +251,16 @@ class TradeRegulator:
     def get_exact_symbol_match(self, json_symbol: str, available_symbols: List[str]) -> Optional[str]:
         """Find an exact case-insensitive match for the JSON symbol in available MT5 symbols."""
         try:
-            json_lower = json_symbol.lower()
-            lower_available = [s.lower() for s in available_symbols]
-            if json_lower in lower_available:
-                index = lower_available.index(json_lower)
-                exact = available_symbols[index]
-                #log_and_print(f"Matched '{json_symbol}' to exact server symbol: '{exact}'", "DEBUG")
-                return exact
-            else:
-                close_matches = difflib.get_close_matches(json_lower, lower_available, n=3, cutoff=0.6)
-                log_and_print(f"No exact match for '{json_symbol}'. Closest server symbols: {', '.join(close_matches) if close_matches else 'None'}", "WARNING")
-                return None
+            return symbolresolver.resolve_symbol(json_symbol, available_symbols)
         except Exception as e:
             log_and_print(f"Error in get_exact_symbol_match for '{json_symbol}': {str(e)}", "ERROR")
             return None
 
-    def place_test_order(self, mt5_instance, symbol: str) -> bool:
-        """Place a test order to add a symbol to the Market Watch."""
-        try:
-            symbol_info = mt5_instance.symbol_info(symbol)
-            if not symbol_info:
-                log_and_print(f"Cannot retrieve symbol info for test order: {symbol}", "ERROR")
-                return False
-
-            point = symbol_info.point
-            price = mt5_instance.symbol_info_tick(symbol).ask
-            request = {
-                "action": mt5_instance.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": 0.01,  # Minimum volume for test order
-                "type": mt5_instance.ORDER_TYPE_BUY,
-                "price": price,
-                "sl": price - 100 * point,
-                "tp": price + 100 * point,
-                "type_time": mt5_instance.ORDER_TIME_DAY,
-                "type_filling": mt5_instance.ORDER_FILLING_IOC,
-            }
-            result = mt5_instance.order_send(request)
-            if result.retcode == mt5_instance.TRADE_RETCODE_DONE:
-                log_and_print(f"Test order placed successfully for {symbol}, closing position", "DEBUG")
-                position_id = result.deal
-                close_request = {
-                    "action": mt5_instance.TRADE_ACTION_DEAL,
-                    "symbol": symbol,
-                    "volume": 0.01,
-                    "type": mt5_instance.ORDER_TYPE_SELL,
-                    "position": position_id,
-                    "price": mt5_instance.symbol_info_tick(symbol).bid,
-                    "type_time": mt5_instance.ORDER_TIME_DAY,
-                    "type_filling": mt5_instance.ORDER_FILLING_IOC,
-                }
-                close_result = mt5_instance.order_send(close_request)
-                if close_result.retcode == mt5_instance.TRADE_RETCODE_DONE:
-                    log_and_print(f"Test order closed successfully for {symbol}", "DEBUG")
-                    return True
-                else:
-                    log_and_print(f"Failed to close test order for {symbol}: {close_result.comment}", "ERROR")
-                    return False
-            else:
-                log_and_print(f"Failed to place test order for {symbol}: {result.comment}", "ERROR")
-                return False
-        except Exception as e:
-            log_and_print(f"Error placing test order for {symbol}: {str(e)}", "ERROR")
-            return False
-
-    def select_symbol(self, mt5_instance, symbol: str) -> bool:
-        """Ensure a symbol is selected in the Market Watch, retrying or placing a test order if needed."""
-        for attempt in range(1, MAX_RETRIES + 1):
-            if mt5_instance.symbol_select(symbol, True):
-                return True
-            else:
-                log_and_print(f"Failed to select {symbol} in Market Watch on attempt {attempt}", "WARNING")
-                if attempt == MAX_RETRIES:
-                    log_and_print(f"Attempting to add {symbol} via test order", "INFO")
-                    if self.place_test_order(mt5_instance, symbol):
-                        if mt5_instance.symbol_select(symbol, True):
-                            log_and_print(f"Successfully selected {symbol} in Market Watch after test order", "DEBUG")
-                            return True
-                        else:
-                            log_and_print(f"Failed to select {symbol} in Market Watch even after test order", "ERROR")
-                            return False
-                time.sleep(MT5_RETRY_DELAY)
-        return False
+    async def select_symbol(self, mt5_instance, symbol: str) -> bool:
+        """Ensure a symbol is visible in the current terminal's Market Watch using the provisioned visible-symbol cache."""
+        if self.market_watch is None:
+            self.market_watch = marketwatch.MarketWatch(mt5_instance, None, "default")
+        return await self.market_watch.ensure_visible_async(symbol)
 
     def normalize_row(self, row: Dict) -> Dict:
         """Normalize row data to handle string 'None' values and ensure correct types."""
@@ -304,73 +275,80 @@ class TradeRegulator:
         return normalized
 
     def load_signals(self) -> bool:
-        """Load signals from bouncestreamsignals.json."""
+        """Load a consistent snapshot of signals from the signal store, re-reading it only when the store changed."""
         try:
-            with open(SIGNALS_FILE, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-            if 'orders' not in data or not isinstance(data['orders'], list):
-                log_and_print(f"Invalid format in {SIGNALS_FILE}: 'orders' key missing or not a list", "ERROR")
-                return False
-            self.signals = data['orders']
-            log_and_print(f"Successfully loaded {len(self.signals)} signals from {SIGNALS_FILE}", "SUCCESS")
+            self.signal_store = signalstore.get_store(SIGNALS_FILE)
+            version = self.signal_store.data_version()
+            if version == self.signals_version:
+                log_and_print(f"Signals unchanged since last load ({len(self.signals)} signals)", "DEBUG")
+                return True
+            previous_ids = self.signal_ids
+            self.signal_ids, self.signals = self.signal_store.snapshot()
+            self.signals_by_id = dict(zip(self.signal_ids, self.signals))
+            self.signals_version = version
+            self.update_signal_indexes(previous_ids)
+            log_and_print(f"Successfully loaded {len(self.signals)} signals from {self.signal_store.db_path}", "SUCCESS")
             return True
-        except FileNotFoundError:
-            log_and_print(f"Signals file not found: {SIGNALS_FILE}", "ERROR")
-            return False
-        except json.JSONDecodeError:
-            log_and_print(f"Invalid JSON format in {SIGNALS_FILE}", "ERROR")
-            return False
         except Exception as e:
+            self.signals_version = None
             log_and_print(f"Error loading signals from {SIGNALS_FILE}: {str(e)}", "ERROR")
             return False
 
-    def save_to_json(self, file_path: str, data: List[Dict], append: bool = True) -> bool:
-        """Save data to a JSON file, creating parent directory if it doesn't exist."""
-        try:
-            # Ensure parent directory exists
-            parent_dir = os.path.dirname(file_path)
-            if parent_dir and not os.path.exists(parent_dir):
-                os.makedirs(parent_dir, exist_ok=True)
-                log_and_print(f"Created directory: {parent_dir}", "INFO")
-
-            existing_data = []
-            if append and os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        existing_data = json.load(file)
-                    if not isinstance(existing_data, list):
-                        existing_data = []
-                except json.JSONDecodeError:
-                    log_and_print(f"Corrupted JSON file at {file_path}, starting fresh", "WARNING")
-                    existing_data = []
-
-            if append:
-                existing_data.extend(data)
-                data_to_save = existing_data
-            else:
-                data_to_save = data
+    def update_signal_indexes(self, previous_ids: List[int]) -> None:
+        """Apply the difference between the previous and the reloaded signals to every server's signal index."""
+        if not self.signal_indexes:
+            return
+        previous = set(previous_ids)
+        removed = previous - self.signals_by_id.keys()
+        added = [signal_id for signal_id in self.signal_ids if signal_id not in previous]
+        for index in self.signal_indexes.values():
+            for signal_id in removed:
+                index.remove(signal_id)
+            for signal_id in added:
+                index.add(signal_id, self.signals_by_id[signal_id])
+
+    def signal_index_for(self, available_symbols: List[str]) -> accountstate.SignalIndex:
+        """Return the signal index of a server's symbol list, building it on first use and updating it incrementally after."""
+        resolver = symbolresolver.get_resolver(available_symbols)
+        index = self.signal_indexes.get(resolver)
+        if index is None:
+            index = accountstate.SignalIndex(resolver.resolve)
+            index.extend(self.signal_ids, self.signals)
+            self.signal_indexes[resolver] = index
+        return index
+
+    def mark_signals_current(self) -> None:
+        """Keep the loaded version after this process's own store write, which the in-memory signals already mirror."""
+        if self.signals_version is None:
+            return
+        version = self.signal_store.data_version()
+        if version[0] == self.signals_version[0]:  # No other process committed meanwhile
+            self.signals_version = version
+        else:
+            self.signals_version = None
 
-            with open(file_path, 'w', encoding='utf-8') as file:
-                json.dump(data_to_save, file, indent=4)
-            log_and_print(f"Saved {len(data)} records to {file_path}", "INFO")
-            return True
-        except Exception as e:
-            log_and_print(f"Error saving to {file_path}: {str(e)}", "ERROR")
-            return False
+    def save_to_json(self, file_path: str, data: List[Dict], append: bool = True) -> bool:
+        """Stage data for a per-account JSON file; changed files are written atomically at the end of the cycle."""
+        if append:
+            self.account_files.append(file_path, data)
+        else:
+            self.account_files.store(file_path, data)
+        return True
 
     def update_bouncestream_signals(self, new_signal: Dict) -> bool:
-        """Append a new signal to bouncestreamsignals.json."""
-        try:
-            signals_data = {"orders": self.signals}
-            signals_data["orders"].append(new_signal)
-            with open(SIGNALS_FILE, 'w', encoding='utf-8') as file:
-                json.dump(signals_data, file, indent=4)
-            log_and_print(f"Appended new signal to {SIGNALS_FILE}", "INFO")
-            self.signals = signals_data["orders"]  # Update in-memory signals
-            return True
-        except Exception as e:
-            log_and_print(f"Error updating {SIGNALS_FILE}: {str(e)}", "ERROR")
+        """Append a new signal to the signal store; bouncestreamsignals.json is refreshed at the end of the cycle."""
+        new_ids = self.signal_store.add([new_signal])
+        if not new_ids:
+            log_and_print(f"Error updating {SIGNALS_FILE}", "ERROR")
             return False
+        self.signals.append(new_signal)  # Update in-memory signals
+        self.signal_ids.extend(new_ids)
+        self.signals_by_id[new_ids[0]] = new_signal
+        for index in self.signal_indexes.values():
+            index.add(new_ids[0], new_signal)
+        self.mark_signals_current()
+        log_and_print(f"Appended new signal to {SIGNALS_FILE}", "INFO")
+        return True
 
     def save_adjustment_error(self, account_key: str, symbol: str, order_id: int, error_message: str) -> None:
         """Save stop-loss adjustment errors to a JSON file."""
@@ -384,8 +362,7 @@ class TradeRegulator:
             "error_message": error_message,
             "timestamp": datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00')
         }
-        
-        self.save_to_json(output_path, [error_entry])
+        errorjournal.get_journal(output_path, layout="list").append(error_entry)
 
     async def get_active_users(self) -> List[Dict[str, str]]:
         """Fetch active users from the users table."""
@@ -531,20 +508,12 @@ class TradeRegulator:
         return timeframe_map.get(timeframe_str.lower(), None)
 
     def load_account_json(self, file_path: str) -> List[Dict]:
-        """Load existing JSON data for an account."""
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    data = json.load(file)
-                    return data if isinstance(data, list) else []
-            except json.JSONDecodeError:
-                log_and_print(f"Corrupted JSON file at {file_path}, starting fresh", "WARNING")
-                return []
-        return []
+        """Load existing JSON data for an account, re-reading the file only when it changed on disk."""
+        return self.account_files.load(file_path)
 
-    def create_trade_record(self, position, mt5_instance) -> Dict:
+    async def create_trade_record(self, position, mt5_instance) -> Dict:
         """Create a trade record structure from a position."""
-        symbol_info = mt5_instance.symbol_info(position.symbol)
+        symbol_info = await self.current_snapshot().spec(mt5_instance, position.symbol)
         point = symbol_info.point if symbol_info else 0.00001
         is_buy = position.type == mt5_instance.ORDER_TYPE_BUY
         entry_price = position.price_open
@@ -583,26 +552,18 @@ class TradeRegulator:
     
         # New method to add to the TradeRegulator class
     
-    def is_market_open(self, mt5_instance, symbol: str) -> bool:
-        """Check if the market is open for the given symbol based on recent tick data."""
+    def current_snapshot(self) -> marketsnapshot.MarketSnapshot:
+        """Return this cycle's market snapshot for the server currently connected."""
+        if self.market_snapshot is None:
+            self.market_snapshot = self.market_snapshots.for_server(None)
+        return self.market_snapshot
+
+    async def is_market_open(self, mt5_instance, symbol: str) -> bool:
+        """Check if the market is open for the given symbol based on the cycle's snapshot tick."""
         try:
-            tick = mt5_instance.symbol_info_tick(symbol)
-            if tick is None:
-                log_and_print(f"No tick data available for {symbol}, assuming market closed", "DEBUG")
-                return False
-
-            # Get tick time in UTC
-            tick_datetime = datetime.fromtimestamp(tick.time, tz=timezone.utc)
-            now_utc = datetime.now(tz=timezone.utc)
-
-            # If tick is older than 5 minutes, consider market closed
-            time_diff = (now_utc - tick_datetime).total_seconds()
-            if time_diff > 300:  # 5 minutes threshold
-                log_and_print(f"Last tick for {symbol} is {time_diff:.0f}s old, assuming market closed", "DEBUG")
-                return False
-
-            log_and_print(f"Market open for {symbol} (last tick: {tick_datetime})", "DEBUG")
-            return True
+            return await self.current_snapshot().is_market_open(mt5_instance, symbol)
+        except mt5retry.MT5Timeout:
+            raise
         except Exception as e:
             log_and_print(f"Error checking market status for {symbol}: {str(e)}", "WARNING")
             return False
@@ -610,7 +571,7 @@ class TradeRegulator:
     # Updated helper method in the TradeRegulator class
     async def cancel_order(self, mt5_instance, ticket: int, symbol: str) -> bool:
         """Cancel a pending order by ticket, only if market is open."""
-        if not self.is_market_open(mt5_instance, symbol):
+        if not await self.is_market_open(mt5_instance, symbol):
             log_and_print(f"Market closed for {symbol}, skipping cancel for order {ticket}", "INFO")
             return False
 
@@ -620,7 +581,10 @@ class TradeRegulator:
                 "order": ticket,
                 "symbol": symbol
             }
-            result = mt5_instance.order_send(request)
+            result = await mt5retry.call(mt5_instance.order_send, request, description=f"cancel of order {ticket}")
+            if result is None:
+                log_and_print(f"Failed to cancel order {ticket} for {symbol}: {await mt5retry.call(mt5_instance.last_error)}", "ERROR")
+                return False
             if result.retcode == mt5_instance.TRADE_RETCODE_DONE:
                 log_and_print(f"Successfully canceled order {ticket} for {symbol}", "SUCCESS")
                 return True
@@ -630,6 +594,8 @@ class TradeRegulator:
                 else:
                     log_and_print(f"Failed to cancel order {ticket} for {symbol}: {result.retcode} - {result.comment}", "ERROR")
                 return False
+        except mt5retry.MT5Timeout:
+            raise
         except Exception as e:
             log_and_print(f"Exception while canceling order {ticket} for {symbol}: {str(e)}", "ERROR")
             return False
@@ -647,7 +613,7 @@ class TradeRegulator:
         if not limit_orders:
             return []
 
-        available_symbols = self.get_available_symbols(mt5_instance)
+        available_symbols = await self.get_available_symbols(mt5_instance)
         groups = defaultdict(list)
         for order in limit_orders:
             key = (order['pair'].lower(), order['order_type'].lower())
@@ -668,18 +634,18 @@ class TradeRegulator:
                 kept_orders.extend(group)
                 continue
 
-            if not self.select_symbol(mt5_instance, server_symbol):
+            if not await self.select_symbol(mt5_instance, server_symbol):
                 log_and_print(f"Skipping deduplication for {pair} ({order_type}): Failed to select symbol", "WARNING")
                 kept_orders.extend(group)
                 continue
 
             # Add check for market open before processing group
-            if not self.is_market_open(mt5_instance, server_symbol):
+            if not await self.is_market_open(mt5_instance, server_symbol):
                 log_and_print(f"Market closed for {server_symbol}, skipping deduplication for {pair} ({order_type})", "INFO")
                 kept_orders.extend(group)
                 continue
 
-            symbol_info = mt5_instance.symbol_info(server_symbol)
+            symbol_info = await self.current_snapshot().spec(mt5_instance, server_symbol)
             if not symbol_info:
                 log_and_print(f"Skipping deduplication for {pair} ({order_type}): No symbol info", "WARNING")
                 kept_orders.extend(group)
@@ -745,85 +711,136 @@ class TradeRegulator:
         log_and_print(f"Overall limit order deduplication: {len(limit_orders) - len(kept_orders)} removed", "INFO")
         return kept_orders
 
-    def match_trade_details(self, order1: Dict, order2: Dict, available_symbols: List[str], tolerance: float = 0.0001) -> bool:
-        """Check if two orders/trades match by pair, type, and entry price within tolerance."""
-        if order1.get('order_type', '').lower() != order2.get('order_type', '').lower():
-            return False
-        
-        sym1 = self.get_exact_symbol_match(order1['pair'].lower(), available_symbols)
-        sym2 = self.get_exact_symbol_match(order2['pair'].lower(), available_symbols)
-        if not (sym1 and sym2 and sym1.lower() == sym2.lower()):
-            return False
-        
+    def trade_match_key(self, record: Dict, available_symbols: List[str], tolerance: float) -> Optional[tuple]:
+        """Return (canonical symbol, order type, entry bucket, entry) for a trade or order, or None if it cannot match."""
         try:
-            entry1 = float(order1['entry_price'])
-            entry2 = float(order2['entry_price'])
-            return abs(entry1 - entry2) < tolerance
-        except (ValueError, KeyError):
-            return False
-        
+            server_symbol = self.get_exact_symbol_match(record['pair'].lower(), available_symbols)
+            entry = float(record['entry_price'])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None
+        if not server_symbol:
+            return None
+        return server_symbol.lower(), str(record.get('order_type', '')).lower(), int(entry // tolerance), entry
+
+    def index_historical_trades(self, trades: List[Dict], available_symbols: List[str], tolerance: float = STALE_MATCH_TOLERANCE) -> Dict[tuple, List[tuple]]:
+        """Hash trades by (canonical symbol, order type, entry bucket); buckets are tolerance wide and keep list order."""
+        index = defaultdict(list)
+        for position, trade in enumerate(trades):
+            key = self.trade_match_key(trade, available_symbols, tolerance)
+            if key is not None:
+                symbol, order_type, bucket, entry = key
+                index[(symbol, order_type, bucket)].append((position, entry, trade))
+        return index
+
+    def find_historical_match(self, order: Dict, index: Dict[tuple, List[tuple]], available_symbols: List[str], tolerance: float = STALE_MATCH_TOLERANCE) -> Optional[Dict]:
+        """Return the first indexed trade with the order's pair and type and an entry within tolerance, probing neighbour buckets."""
+        key = self.trade_match_key(order, available_symbols, tolerance)
+        if key is None:
+            return None
+        symbol, order_type, bucket, entry = key
+        best = None
+        for probe in (bucket - 1, bucket, bucket + 1):
+            for position, trade_entry, trade in index.get((symbol, order_type, probe), ()):
+                if abs(entry - trade_entry) < tolerance and (best is None or position < best[0]):
+                    best = (position, trade)
+                    break  # Buckets keep list order, so the first hit is the earliest in this bucket
+        return best[1] if best else None
+
+    def find_closed_match(self, order: Dict, ledger: closedledger.ClosedLedger, scope: str, available_symbols: List[str],
+                          tolerance: float = STALE_MATCH_TOLERANCE) -> Optional[Dict]:
+        """Return the oldest closed trade in the ledger with the order's pair and type and an entry within tolerance."""
+        key = self.trade_match_key(order, available_symbols, tolerance)
+        if key is None:
+            return None
+        symbol, order_type, _, entry = key
+        for trade in ledger.near(scope, order_type, entry, tolerance):
+            candidate = self.trade_match_key(trade, available_symbols, tolerance)
+            if candidate is not None and candidate[:2] == (symbol, order_type) and abs(candidate[3] - entry) < tolerance:
+                return trade
+        return None
+
+    def remove_matched_signals(self, signal_ids: List[int]) -> List[int]:
+        """Drop matched signals from memory and every signal index in one pass; returns the distinct store ids removed."""
+        removed = list(dict.fromkeys(signal_ids))
+        if removed:
+            removed_set = set(removed)
+            kept = [(signal_id, signal) for signal_id, signal in zip(self.signal_ids, self.signals) if signal_id not in removed_set]
+            self.signal_ids = [signal_id for signal_id, _ in kept]
+            self.signals = [signal for _, signal in kept]
+            for signal_id in removed:
+                self.signals_by_id.pop(signal_id, None)
+                for index in self.signal_indexes.values():
+                    index.remove(signal_id)
+        return removed
+
     # Full Updated manage_trades_and_orders Method in TradeRegulator Class
     async def manage_trades_and_orders(self, account: Dict, mt5_instance) -> tuple[int, int]:
         """Manage running trades and pending orders, syncing with JSON files without duplicates."""
         account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
         running_trades_file = os.path.join(self.config.running_trades_dir, f"{account_key}_runningtrades.json")
-        closed_trades_file = os.path.join(self.config.closed_trades_dir, f"{account_key}_closedtrades.json")
         limit_orders_file = os.path.join(self.config.limit_orders_dir, f"{account_key}_limitorders.json")
+        closed_ledger = closedledger.get_ledger(self.config.closed_trades_dir)
+        closed_scope = closedledger.account_scope(account_key)
 
         # Load existing JSON data
         running_trades = self.load_account_json(running_trades_file)
-        closed_trades = self.load_account_json(closed_trades_file)
         limit_orders = self.load_account_json(limit_orders_file)
 
         # Fetch available symbols
-        available_symbols = self.get_available_symbols(mt5_instance)
+        available_symbols = await self.get_available_symbols(mt5_instance)
+
+        # Sync deals before reading positions: a position that closes after this point is still open in
+        # positions_get or has its OUT deal in the next sync, so no closure is consumed without being seen
+        new_deals = await mt5retry.call(self.history_sync.sync_account, mt5_instance, account_key, description=f"deal history sync for {account_key}")
+        closed_positions = set(new_deals['position_id'][new_deals['entry'] == mt5_instance.DEAL_ENTRY_OUT].tolist())
 
         # Fetch current positions and orders from MT5
-        positions = mt5_instance.positions_get()
-        orders = mt5_instance.orders_get()
+        positions = await mt5retry.call(mt5_instance.positions_get)
+        orders = await mt5retry.call(mt5_instance.orders_get)
         if not positions:
             positions = []
         if not orders:
             orders = []
 
-        # Track tickets in JSON files
-        running_trade_tickets = {trade['ticket'] for trade in running_trades}
-        closed_trade_tickets = {trade['ticket'] for trade in closed_trades}
-        limit_order_tickets = {order['ticket'] for order in limit_orders}
+        # Index JSON records by ticket; closed trades are looked up in the ledger for live tickets only
+        live_tickets = {position.ticket for position in positions} | {trade['ticket'] for trade in running_trades} | {order['ticket'] for order in limit_orders}
+        closed_trades = closed_ledger.with_tickets(closed_scope, live_tickets)
+        state = accountstate.AccountState(account_key, running_trades, closed_trades, limit_orders)
 
         current_order_tickets = {order.ticket for order in orders}
 
         # Ensure no running or closed trade tickets are in limit orders (ticket-based, for safety)
         filtered_limit_orders_by_ticket = [
             order for order in limit_orders
-            if order['ticket'] not in running_trade_tickets and order['ticket'] not in closed_trade_tickets
+            if order['ticket'] not in state.running and not state.is_closed(order['ticket'])
         ]
         if len(filtered_limit_orders_by_ticket) < len(limit_orders):
             removed_count = len(limit_orders) - len(filtered_limit_orders_by_ticket)
             log_and_print(f"Removed {removed_count} limit orders with tickets matching running or closed trades for {account_key}", "INFO")
+            state.drop_limits({order['ticket'] for order in limit_orders if order['ticket'] in state.running or state.is_closed(order['ticket'])})
             limit_orders = filtered_limit_orders_by_ticket
-            limit_order_tickets = {order['ticket'] for order in limit_orders}
 
         # Find and cancel stale limit orders that match running or closed trades by details
-        all_historical_trades = running_trades + closed_trades
+        historical_index = self.index_historical_trades(running_trades, available_symbols)
         stale_limit_tickets = set()
         canceled_count = 0
         for lo in limit_orders:
             if lo['ticket'] in current_order_tickets:  # Only if still pending in MT5
-                for ht in all_historical_trades:
-                    if self.match_trade_details(lo, ht, available_symbols):
-                        server_symbol = self.get_exact_symbol_match(lo['pair'], available_symbols)
-                        if server_symbol:
-                            if self.select_symbol(mt5_instance, server_symbol):
-                                if await self.cancel_order(mt5_instance, lo['ticket'], server_symbol):
-                                    log_and_print(f"Canceled stale limit order {lo['ticket']} for {lo['pair']} (matches historical trade {ht['ticket']})", "SUCCESS")
-                                    canceled_count += 1
-                                else:
-                                    log_and_print(f"Failed to cancel stale limit order {lo['ticket']} for {lo['pair']}", "WARNING")
+                ht = self.find_historical_match(lo, historical_index, available_symbols)
+                if ht is None:
+                    ht = self.find_closed_match(lo, closed_ledger, closed_scope, available_symbols)
+                if ht is not None:
+                    server_symbol = self.get_exact_symbol_match(lo['pair'], available_symbols)
+                    if server_symbol:
+                        if await self.select_symbol(mt5_instance, server_symbol):
+                            if await self.cancel_order(mt5_instance, lo['ticket'], server_symbol):
+                                log_and_print(f"Canceled stale limit order {lo['ticket']} for {lo['pair']} (matches historical trade {ht['ticket']})", "SUCCESS")
+                                canceled_count += 1
                             else:
-                                log_and_print(f"Failed to select symbol for canceling stale limit order {lo['ticket']}", "WARNING")
-                        stale_limit_tickets.add(lo['ticket'])
-                        break  # One match per limit order
+                                log_and_print(f"Failed to cancel stale limit order {lo['ticket']} for {lo['pair']}", "WARNING")
+                        else:
+                            log_and_print(f"Failed to select symbol for canceling stale limit order {lo['ticket']}", "WARNING")
+                    stale_limit_tickets.add(lo['ticket'])
 
         if canceled_count > 0:
             log_and_print(f"Canceled {canceled_count} stale limit orders matching historical trades for {account_key}", "INFO")
@@ -831,13 +848,17 @@ class TradeRegulator:
         # Filter limit orders to remove matched stale ones
         filtered_limit_orders = [lo for lo in limit_orders if lo['ticket'] not in stale_limit_tickets]
         limit_orders = filtered_limit_orders
-        limit_order_tickets = {order['ticket'] for order in limit_orders}
+        state.drop_limits(stale_limit_tickets)
+
+        # Signals hashed per server and kept across cycles, so each position and order is matched in constant time
+        signals_by_id = self.signals_by_id
+        signal_index = self.signal_index_for(available_symbols)
 
         # Process running trades
         current_tickets = {position.ticket for position in positions}
         new_running_trades = []
         trades_to_close = []
-        signals_to_remove = []  # Indices of signals to remove after processing
+        signals_to_remove = []  # Store ids of signals to remove after processing
 
         for position in positions:
             json_symbol = position.symbol.lower()
@@ -858,19 +879,17 @@ class TradeRegulator:
                 continue
 
             # Ensure symbol is selected in Market Watch
-            if not self.select_symbol(mt5_instance, server_symbol):
+            if not await self.select_symbol(mt5_instance, server_symbol):
                 error_message = f"Failed to select symbol '{server_symbol}' in Market Watch"
                 log_and_print(error_message, "ERROR")
                 self.save_adjustment_error(account_key, json_symbol, position_id, error_message)
                 continue
 
             # Skip if already in running trades or closed trades
-            if position_id in running_trade_tickets:
-                existing_trade = next((trade for trade in running_trades if trade['ticket'] == position_id), None)
-                if existing_trade:
-                    new_running_trades.append(existing_trade)
+            if position_id in state.running:
+                new_running_trades.append(state.running_trade(position_id))
                 continue
-            if position_id in closed_trade_tickets:
+            if state.is_closed(position_id):
                 log_and_print(f"Position {position_id} for {server_symbol} found in closed trades, skipping", "DEBUG")
                 continue
 
@@ -878,16 +897,8 @@ class TradeRegulator:
             expected_order_type = 'buy_limit' if is_buy else 'sell_limit'
 
             # Find matching signal in bouncestreamsignals.json
-            matching_signal = None
-            matching_index = None
-            for i, signal in enumerate(self.signals):
-                signal_symbol = self.get_exact_symbol_match(signal['pair'].lower(), available_symbols)
-                if (signal_symbol and signal_symbol.lower() == server_symbol.lower() and 
-                    signal['order_type'].lower() == expected_order_type and 
-                    abs(float(signal['entry_price']) - entry_price) < 0.0001):
-                    matching_signal = signal
-                    matching_index = i
-                    break
+            matching_id = signal_index.match(server_symbol, expected_order_type, entry_price)
+            matching_signal = signals_by_id[matching_id] if matching_id is not None else None
 
             if matching_signal:
                 trade_record = matching_signal.copy()
@@ -896,43 +907,40 @@ class TradeRegulator:
                 trade_record['open_time'] = datetime.fromtimestamp(position.time, pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00')
                 new_running_trades.append(trade_record)
                 log_and_print(f"Added position {position_id} for {server_symbol} to running trades", "INFO")
-                if matching_index is not None:
-                    signals_to_remove.append(matching_index)
+                if matching_id is not None:
+                    signals_to_remove.append(matching_id)
             else:
                 # For orphan positions, create record without adding to signals
-                trade_record = self.create_trade_record(position, mt5_instance)
+                trade_record = await self.create_trade_record(position, mt5_instance)
                 trade_record['pair'] = server_symbol.lower()  # Use normalized symbol
                 new_running_trades.append(trade_record)
                 log_and_print(f"Added orphan position {position_id} for {server_symbol} to running trades (no signal match)", "INFO")
 
         # Remove matched signals for running trades
-        for i in sorted(signals_to_remove, reverse=True):
-            del self.signals[i]
+        removed_signal_ids = self.remove_matched_signals(signals_to_remove)
         signals_to_remove = []  # Reset for orders
 
-        # Check for stray running trades (limited to last 3 days)
-        three_days_ago = datetime.now(pytz.timezone('Africa/Lagos')) - timedelta(days=3)
+        # Check for stray running trades against the deals synced for this account since its last cycle
         for trade in running_trades:
-            if trade['ticket'] not in current_tickets and trade['ticket'] not in closed_trade_tickets:
-                history = mt5_instance.history_deals_get(position=trade['ticket'], date_from=three_days_ago)
-                if history and any(d.entry == mt5_instance.DEAL_ENTRY_OUT for d in history):
+            if trade['ticket'] not in current_tickets and not state.is_closed(trade['ticket']):
+                if trade['ticket'] in closed_positions:
                     closed_trade = trade.copy()
                     closed_trade['close_time'] = datetime.now(pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00')
                     trades_to_close.append(closed_trade)
-                    log_and_print(f"Moved trade {trade['ticket']} for {trade['pair']} to closed trades (closure in last 3 days)", "INFO")
+                    log_and_print(f"Moved trade {trade['ticket']} for {trade['pair']} to closed trades (closure since last history sync)", "INFO")
                 else:
                     new_running_trades.append(trade)
 
         # Save updated running and closed trades
         self.save_to_json(running_trades_file, new_running_trades, append=False)
         if trades_to_close:
-            existing_closed_trades = self.load_account_json(closed_trades_file)
-            existing_closed_tickets = {trade['ticket'] for trade in existing_closed_trades}
-            unique_trades_to_close = [trade for trade in trades_to_close if trade['ticket'] not in existing_closed_tickets]
-            if unique_trades_to_close:
-                self.save_to_json(closed_trades_file, unique_trades_to_close)
-            else:
+            added = closed_ledger.append(closed_scope, trades_to_close)
+            if added > 0:
+                log_and_print(f"Recorded {added} closed trades for {account_key}", "INFO")
+                closed_ledger.export_json(closed_scope)
+            elif added == 0:
                 log_and_print(f"No new closed trades to add for {account_key}", "DEBUG")
+        self.history_sync.commit([account_key])
 
         # Process pending orders
         new_limit_orders = []
@@ -956,33 +964,23 @@ class TradeRegulator:
                 continue
 
             # Ensure symbol is selected in Market Watch
-            if not self.select_symbol(mt5_instance, server_symbol):
+            if not await self.select_symbol(mt5_instance, server_symbol):
                 error_message = f"Failed to select symbol '{server_symbol}' in Market Watch"
                 log_and_print(error_message, "ERROR")
                 self.save_adjustment_error(account_key, json_symbol, order_id, error_message)
                 continue
 
             # Skip if already in limit orders
-            if order_id in limit_order_tickets:
-                existing_order = next((order_ for order_ in limit_orders if order_['ticket'] == order_id), None)
-                if existing_order:
-                    new_limit_orders.append(existing_order)
+            if order_id in state.limits:
+                new_limit_orders.append(state.limit_order(order_id))
                 continue
 
             is_buy = order_type in [mt5_instance.ORDER_TYPE_BUY_LIMIT, mt5_instance.ORDER_TYPE_BUY_STOP]
             expected_order_type = 'buy_limit' if is_buy else 'sell_limit'
 
             # Find matching signal in bouncestreamsignals.json
-            matching_signal = None
-            matching_index = None
-            for i, signal in enumerate(self.signals):
-                signal_symbol = self.get_exact_symbol_match(signal['pair'].lower(), available_symbols)
-                if (signal_symbol and signal_symbol.lower() == server_symbol.lower() and 
-                    signal['order_type'].lower() == expected_order_type and 
-                    abs(float(signal['entry_price']) - order.price_open) < 0.0001):
-                    matching_signal = signal
-                    matching_index = i
-                    break
+            matching_id = signal_index.match(server_symbol, expected_order_type, order.price_open)
+            matching_signal = signals_by_id[matching_id] if matching_id is not None else None
 
             if matching_signal:
                 order_record = matching_signal.copy()
@@ -991,8 +989,8 @@ class TradeRegulator:
                 order_record['open_time'] = datetime.fromtimestamp(order.time_setup, pytz.timezone('Africa/Lagos')).strftime('%Y-%m-%d %H:%M:%S.%f+01:00')
                 new_limit_orders.append(order_record)
                 log_and_print(f"Added limit order {order_id} for {server_symbol} to limit orders", "INFO")
-                if matching_index is not None:
-                    signals_to_remove.append(matching_index)
+                if matching_id is not None:
+                    signals_to_remove.append(matching_id)
             else:
                 # For orphan orders, create record without adding to signals
                 order_record = self.create_limit_order_record(order, mt5_instance)
@@ -1001,41 +999,279 @@ class TradeRegulator:
                 log_and_print(f"Added orphan limit order {order_id} for {server_symbol} to limit orders (no signal match)", "INFO")
 
         # Remove matched signals for limit orders
-        for i in sorted(signals_to_remove, reverse=True):
-            del self.signals[i]
+        removed_signal_ids.extend(self.remove_matched_signals(signals_to_remove))
 
         # New: Remove duplicates and too-close limit orders before handling expirations
+        handled_tickets = {order['ticket'] for order in new_limit_orders}
         new_limit_orders = await self.remove_duplicate_limit_orders(new_limit_orders, mt5_instance)
 
-        # Remove expired or canceled limit orders
+        # Remove expired or canceled limit orders; orders already handled above are not added twice
         for order in limit_orders:
             if order['ticket'] not in current_order_tickets:
                 log_and_print(f"Removed expired/canceled limit order {order['ticket']} for {order['pair']} from limit orders", "INFO")
                 continue
+            if order['ticket'] in handled_tickets:
+                continue
+            handled_tickets.add(order['ticket'])
             new_limit_orders.append(order)
 
         # Save updated limit orders
         self.save_to_json(limit_orders_file, new_limit_orders, append=False)
 
-        # Save updated signals file after removals
-        try:
-            signals_data = {"orders": self.signals}
-            with open(SIGNALS_FILE, 'w', encoding='utf-8') as file:
-                json.dump(signals_data, file, indent=4)
-            log_and_print(f"Updated {SIGNALS_FILE} with {len(self.signals)} signals after processing {account_key}", "INFO")
-        except Exception as e:
-            log_and_print(f"Error saving updated signals to {SIGNALS_FILE}: {str(e)}", "ERROR")
+        # Delete matched signals from the signal store; the legacy JSON is refreshed at the end of the cycle
+        if removed_signal_ids:
+            if self.signal_store.remove_ids(removed_signal_ids) >= 0:
+                self.mark_signals_current()
+                log_and_print(f"Removed {len(removed_signal_ids)} signals from the signal store after processing {account_key}", "INFO")
+            else:
+                self.signals_version = None  # Memory no longer mirrors the store; reload next cycle
+                log_and_print(f"Error saving updated signals to {SIGNALS_FILE}", "ERROR")
 
         return len(new_running_trades), len(new_limit_orders)
 
     # Full Updated regulate_trades Method in TradeRegulator Class
+    def sl_levels(self, matching_signal: Dict, entry_price: float, is_buy: bool, tick_size: float) -> List[tuple]:
+        """Return a position's (trigger price, stop-loss target) pairs: entry, 1:0.5, 1:1 and 1:2 RR."""
+        entry_price_signal = float(matching_signal['entry_price'])
+        ratio_0_5_price = float(matching_signal['ratio_0_5_price'])
+        ratio_1_price = float(matching_signal['ratio_1_price'])
+        ratio_2_price = float(matching_signal['ratio_2_price'])
+        ratio_0_25_price = float(matching_signal.get('ratio_0_25_price',
+                                                    entry_price_signal * (1 + SL_RR_05_PERCENT / 100) if is_buy else
+                                                    entry_price_signal * (1 - SL_RR_05_PERCENT / 100)))
+        break_even = entry_price * (1 + SL_ADJUSTMENT_PERCENT / 100) if is_buy else entry_price * (1 - SL_ADJUSTMENT_PERCENT / 100)
+        return [
+            (entry_price_signal, round(break_even / tick_size) * tick_size),
+            (ratio_0_5_price, round(ratio_0_25_price / tick_size) * tick_size),
+            (ratio_1_price, round(ratio_0_5_price / tick_size) * tick_size),
+            (ratio_2_price, round(ratio_1_price / tick_size) * tick_size)
+        ]
+
+    async def adjust_position_sl(self, account_key: str, mt5_instance, position, server_symbol: str, matching_signal: Dict,
+                                 symbol_info, tick) -> tuple[int, int]:
+        """Move one position's stop-loss to the level its current price qualifies for; returns (adjusted, failed)."""
+        position_id = position.ticket
+        entry_price = position.price_open
+        current_sl = position.sl
+        current_tp = position.tp
+        is_buy = position.type == mt5_instance.ORDER_TYPE_BUY
+        is_sell = position.type == mt5_instance.ORDER_TYPE_SELL
+        adjusted = 0
+        failed = 0
+
+        current_price = tick.bid if is_sell else tick.ask
+        tick_size = symbol_info.trade_tick_size
+        point = symbol_info.point
+        min_sl_distance = symbol_info.trade_stops_level * point
+
+        # FIX: Add buffer for synthetic indices (e.g., Drift Switch)
+        if 'drift' in server_symbol.lower() or 'synthetic' in server_symbol.lower():
+            min_sl_distance *= 1.2  # 20% extra buffer for high-vol synthetics
+            log_and_print(f"Synthetic index detected ({server_symbol}): Using buffered min SL distance {min_sl_distance}", "DEBUG")
+
+        log_and_print(f"Min SL distance required: {min_sl_distance}, Current price: {current_price}, Entry: {entry_price}", "DEBUG")
+
+        entry_price_signal = float(matching_signal['entry_price'])
+        ratio_0_5_price = float(matching_signal['ratio_0_5_price'])
+        ratio_1_price = float(matching_signal['ratio_1_price'])
+        ratio_2_price = float(matching_signal['ratio_2_price'])
+        ratio_0_25_price = float(matching_signal.get('ratio_0_25_price', 
+                                                    entry_price_signal * (1 + SL_RR_05_PERCENT / 100) if is_buy else 
+                                                    entry_price_signal * (1 - SL_RR_05_PERCENT / 100)))
+
+        new_sl = 0.0
+        adjustment_needed = False
+        adjustment_reason = ""
+        eligible_ratio = None
+        towards_threshold = None  # For descriptive messaging
+
+        # Determine price direction and eligibility for adjustment using current_price
+        is_price_toward_profit = (is_buy and current_price > entry_price_signal) or (is_sell and current_price < entry_price_signal)
+        is_price_toward_stoploss = (is_buy and current_price <= entry_price_signal) or (is_sell and current_price >= entry_price_signal)
+
+        if is_price_toward_stoploss:
+            if current_sl != 0.0:
+                # Check if between SL and entry
+                if is_buy:
+                    if current_sl < current_price < entry_price_signal:
+                        dist_to_sl = current_price - current_sl
+                        dist_to_entry = entry_price_signal - current_price
+                        closer_to = "stop-loss" if dist_to_sl < dist_to_entry else "entry"
+                        log_and_print(f"Current price {current_price} is between stop-loss {current_sl} and entry {entry_price_signal}, "
+                                    f"closer to {closer_to}, waiting for price to move {'above' if is_buy else 'below'} entry towards eligible ratios", "INFO")
+                        return 0, 0
+                else:  # sell
+                    if entry_price_signal < current_price < current_sl:
+                        dist_to_entry = current_price - entry_price_signal
+                        dist_to_sl = current_sl - current_price
+                        closer_to = "entry" if dist_to_entry < dist_to_sl else "stop-loss"
+                        log_and_print(f"Current price {current_price} is between entry {entry_price_signal} and stop-loss {current_sl}, "
+                                    f"closer to {closer_to}, waiting for price to move {'below' if is_sell else 'above'} entry towards eligible ratios", "INFO")
+                        return 0, 0
+            direction_word = "above" if is_sell else "below"
+            log_and_print(f"No stop-loss adjustment for position {position_id} ({server_symbol}): "
+                        f"Current price {current_price} is {direction_word} entry {entry_price_signal}, moving toward stop-loss, "
+                        f"waiting for price to move {'below' if is_sell else 'above'} entry toward ratios", "INFO")
+            return 0, 0
+
+        # Adjustment logic using current_price for ratio checks
+        direction_word = "above" if is_buy else "below"
+        opposite_direction_word = "below" if is_buy else "above"
+        if is_buy:
+            if current_price > ratio_2_price:
+                new_sl = round(ratio_1_price / tick_size) * tick_size
+                eligible_ratio = "1:2 RR"
+                towards_threshold = "1:1 RR"  # Already beyond 1:2, but for messaging if needed
+                if current_sl == 0.0 or (current_sl > 0 and current_sl < new_sl):
+                    adjustment_needed = True
+                    adjustment_reason = f"{direction_word} 1:2 RR (current: {current_price}, ratio_2: {ratio_2_price})"
+            elif current_price > ratio_1_price:
+                new_sl = round(ratio_0_5_price / tick_size) * tick_size
+                eligible_ratio = "1:1 RR"
+                towards_threshold = "1:2 RR"
+                if current_sl == 0.0 or (current_sl > 0 and current_sl < new_sl):
+                    adjustment_needed = True
+                    adjustment_reason = f"{direction_word} 1:1 RR (current: {current_price}, ratio_1: {ratio_1_price})"
+            elif current_price > ratio_0_5_price:
+                new_sl = round(ratio_0_25_price / tick_size) * tick_size
+                eligible_ratio = "1:0.5 RR"
+                towards_threshold = "1:1 RR"
+                if current_sl == 0.0 or (current_sl > 0 and current_sl < new_sl):
+                    adjustment_needed = True
+                    adjustment_reason = f"{direction_word} 1:0.5 RR (current: {current_price}, ratio_0_5: {ratio_0_5_price})"
+            elif current_price > entry_price_signal:
+                new_sl = round((entry_price * (1 + SL_ADJUSTMENT_PERCENT / 100)) / tick_size) * tick_size
+                eligible_ratio = "entry price"
+                towards_threshold = "1:0.5 RR"
+                if current_sl == 0.0 or (current_sl > 0 and current_sl < new_sl):
+                    adjustment_needed = True
+                    adjustment_reason = f"{direction_word} entry price (current: {current_price}, entry: {entry_price_signal})"
+
+        # Adjustment logic for sell orders (price below entry, moving toward profit)
+        elif is_sell:
+            if current_price < ratio_2_price:
+                new_sl = round(ratio_1_price / tick_size) * tick_size
+                eligible_ratio = "1:2 RR"
+                towards_threshold = "1:1 RR"
+                if current_sl == 0.0 or (current_sl > 0 and current_sl > new_sl):
+                    adjustment_needed = True
+                    adjustment_reason = f"{direction_word} 1:2 RR (current: {current_price}, ratio_2: {ratio_2_price})"
+            elif current_price < ratio_1_price:
+                new_sl = round(ratio_0_5_price / tick_size) * tick_size
+                eligible_ratio = "1:1 RR"
+                towards_threshold = "1:2 RR"
+                if current_sl == 0.0 or (current_sl > 0 and current_sl > new_sl):
+                    adjustment_needed = True
+                    adjustment_reason = f"{direction_word} 1:1 RR (current: {current_price}, ratio_1: {ratio_1_price})"
+            elif current_price < ratio_0_5_price:
+                new_sl = round(ratio_0_25_price / tick_size) * tick_size
+                eligible_ratio = "1:0.5 RR"
+                towards_threshold = "1:1 RR"
+                if current_sl == 0.0 or (current_sl > 0 and current_sl > new_sl):
+                    adjustment_needed = True
+                    adjustment_reason = f"{direction_word} 1:0.5 RR (current: {current_price}, ratio_0_5: {ratio_0_5_price})"
+            elif current_price < entry_price_signal:
+                new_sl = round((entry_price * (1 - SL_ADJUSTMENT_PERCENT / 100)) / tick_size) * tick_size
+                eligible_ratio = "entry price"
+                towards_threshold = "1:0.5 RR"
+                if current_sl == 0.0 or (current_sl > 0 and current_sl > new_sl):
+                    adjustment_needed = True
+                    adjustment_reason = f"{direction_word} entry price (current: {current_price}, entry: {entry_price_signal})"
+
+        if not adjustment_needed:
+            log_and_print(f"No stop-loss adjustment needed for position {position_id} ({server_symbol})", "DEBUG")
+            return 0, 0
+
+        # FIX: Enhanced validation with logging
+        actual_distance = abs(current_price - new_sl)
+        log_and_print(f"Proposed SL: {new_sl}, Actual distance to current: {actual_distance}, Required min: {min_sl_distance}", "DEBUG")
+
+        # Validate stop-loss distance against current price (not entry) - stricter check
+        too_close = False
+        if is_buy:
+            if new_sl >= current_price - min_sl_distance:
+                too_close = True
+        else:  # sell
+            if new_sl <= current_price + min_sl_distance:
+                too_close = True
+
+        if too_close:
+            threshold_desc = towards_threshold if towards_threshold else "entry price"
+            eligible_desc = f"break-even { '+' if is_buy else '-' }{SL_ADJUSTMENT_PERCENT}%" if eligible_ratio == "entry price" else eligible_ratio
+            towards_desc = towards_threshold if towards_threshold else 'profit ratios'
+            further_direction = direction_word
+            log_and_print(f"Stop-loss {new_sl} too close to current price {current_price} for {server_symbol} "
+                        f"({ 'buy' if is_buy else 'sell' }, min distance: {min_sl_distance}, actual: {actual_distance}), current price {direction_word} {threshold_desc} "
+                        f"and towards {towards_desc}, "
+                        f"waiting for price to move further {further_direction} {eligible_desc} ({new_sl}) to adjust stop-loss", "INFO")
+            return 0, 0  # Do not increment failed_adjustments
+
+        request = {
+            "action": mt5_instance.TRADE_ACTION_SLTP,
+            "position": position_id,
+            "symbol": server_symbol,
+            "sl": new_sl,
+            "tp": current_tp
+        }
+
+        log_and_print(f"Attempting to adjust stop-loss for position {position_id} ({server_symbol}) to {new_sl} ({adjustment_reason})", "INFO")
+
+        sl_buffer = min_sl_distance  # Buffer for retries
+        for attempt in range(1, MAX_RETRIES + 1):
+            # FIX: On retry for 10016, widen SL slightly
+            adjusted_sl = new_sl
+            if attempt > 1:
+                if is_buy:
+                    adjusted_sl += sl_buffer  # Move SL further up for buys
+                else:
+                    adjusted_sl -= sl_buffer  # Move SL further down for sells
+                adjusted_sl = round(adjusted_sl / tick_size) * tick_size
+                log_and_print(f"Retry {attempt}: Widened SL to {adjusted_sl} (buffer: {sl_buffer})", "INFO")
+                request["sl"] = adjusted_sl
+
+            result = await mt5retry.call(mt5_instance.order_send, request, description=f"SL modification for position {position_id}")
+            if result is not None and result.retcode == mt5_instance.TRADE_RETCODE_DONE:
+                log_and_print(f"Successfully adjusted stop-loss for position {position_id} ({server_symbol}) to {adjusted_sl or new_sl} ({adjustment_reason})", "SUCCESS")
+                adjusted += 1
+                self.total_orders_adjusted += 1
+                break
+            else:
+                if result is None:
+                    error_code, error_message = await mt5retry.call(mt5_instance.last_error) or (None, "no response from terminal")
+                else:
+                    error_code = result.retcode
+                    error_message = result.comment
+                full_error = f"Failed to adjust stop-loss for position {position_id} ({server_symbol}) on attempt {attempt}: {error_code}, {error_message}"
+                log_and_print(full_error, "ERROR")
+                self.save_adjustment_error(account_key, server_symbol, position_id, full_error)
+                
+                # FIX: Handle 10016 as market condition - no failure count, specific log
+                if error_code == 10016:  # Invalid stops - too close due to market conditions
+                    threshold_desc = towards_threshold if towards_threshold else "entry price"
+                    eligible_desc = f"break-even { '+' if is_buy else '-' }{SL_ADJUSTMENT_PERCENT}%" if eligible_ratio == "entry price" else eligible_ratio
+                    further_direction = direction_word
+                    log_and_print(f"Too close to modify SL for {server_symbol} (market condition: invalid stops). Waiting for current price to move further {further_direction} toward profit for adjustable SL at {eligible_desc} level.", "INFO")
+                    break  # Stop retries; respect market - don't count as failed
+                
+                if attempt == MAX_RETRIES:
+                    if error_code != 10016:  # Only count non-distance errors as failed
+                        failed += 1
+                        self.total_orders_failed += 1
+                else:
+                    delay = mt5retry.backoff_delay(attempt)
+                    log_and_print(f"Retrying adjustment after {delay:.1f} seconds...", "INFO")
+                    await asyncio.sleep(delay)
+
+        return adjusted, failed
+
     async def regulate_trades(self, account: Dict) -> tuple[int, int]:
         """Regulate stop-loss for running market orders based on signals and timeframe."""
         account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
         log_and_print(f"===== Regulating Trades for {account_key} =====", "TITLE")
+        self.account_activity.pop(account_key, None)
         
         # FIX: Re-initialize connection for this specific account/terminal before processing
-        if not self.mt5_manager.initialize_mt5(
+        if not await self.mt5_manager.initialize_mt5(
             server=account['broker_server'],
             login=account['broker_loginid'],
             password=account['broker_password'],
@@ -1047,10 +1283,16 @@ class TradeRegulator:
 
         # Use global mt5 directly (now connected to this account's terminal)
         mt5_instance = mt5
+        self.market_snapshot = self.market_snapshots.for_server(account['broker_server'])
+        self.market_watch = marketwatch.MarketWatch(
+            mt5_instance, os.path.dirname(account['terminal_path']), f"{account['broker_server']}_{account['broker_loginid']}"
+        )
 
         # Manage trades and orders first
         running_trades_count, limit_orders_count = await self.manage_trades_and_orders(account, mt5_instance)
         log_and_print(f"Managed {running_trades_count} running trades and {limit_orders_count} limit orders for {account_key}", "INFO")
+        activity = accountschedule.AccountActivity(limit_orders_count)
+        self.account_activity[account_key] = activity
 
         running_trades_file = os.path.join(self.config.running_trades_dir, f"{account_key}_runningtrades.json")
         running_trades = self.load_account_json(running_trades_file)
@@ -1059,15 +1301,24 @@ class TradeRegulator:
         failed_adjustments = 0
 
         # Fetch available symbols
-        available_symbols = self.get_available_symbols(mt5_instance)
+        available_symbols = await self.get_available_symbols(mt5_instance)
 
         try:
-            positions = mt5_instance.positions_get()
+            positions = await mt5retry.call(mt5_instance.positions_get)
             if not positions:
                 log_and_print(f"No open positions found for {account_key}", "INFO")
+                self.threshold_indexes.pop(account_key, None)
                 return 0, 0
 
             log_and_print(f"Found {len(positions)} open positions for {account_key}", "INFO")
+            activity.positions = len(positions)
+
+            index = self.threshold_indexes.setdefault(account_key, thresholdindex.ThresholdIndex())
+            index.retain({position.ticket for position in positions})
+            running_by_ticket = defaultdict(list)
+            for trade in running_trades:
+                running_by_ticket[trade['ticket']].append(trade)
+            tracked = {}  # ticket -> (position, server_symbol, matching_signal)
 
             for position in positions:
                 try:
@@ -1093,7 +1344,7 @@ class TradeRegulator:
                         continue
 
                     # Ensure symbol is selected in Market Watch
-                    if not self.select_symbol(mt5_instance, server_symbol):
+                    if not await self.select_symbol(mt5_instance, server_symbol):
                         error_message = f"Failed to select symbol '{server_symbol}' in Market Watch"
                         log_and_print(error_message, "ERROR")
                         self.save_adjustment_error(account_key, json_symbol, position_id, error_message)
@@ -1107,11 +1358,10 @@ class TradeRegulator:
 
                     # Find matching signal in running_trades JSON
                     matching_signal = None
-                    for trade in running_trades:
+                    for trade in running_by_ticket.get(position_id, []):
                         trade_symbol = self.get_exact_symbol_match(trade['pair'].lower(), available_symbols)
                         if (trade_symbol and trade_symbol.lower() == server_symbol.lower() and 
-                            trade['order_type'].lower() == expected_order_type and 
-                            trade['ticket'] == position_id):
+                            trade['order_type'].lower() == expected_order_type):
                             matching_signal = trade
                             break
 
@@ -1129,223 +1379,22 @@ class TradeRegulator:
                         self.total_orders_failed += 1
                         continue
 
-                    symbol_info = mt5_instance.symbol_info(server_symbol)
-                    if not symbol_info:
-                        error_message = f"Cannot retrieve symbol info for {server_symbol}"
-                        log_and_print(error_message, "ERROR")
-                        self.save_adjustment_error(account_key, server_symbol, position_id, error_message)
-                        failed_adjustments += 1
-                        self.total_orders_failed += 1
-                        continue
-
-                    tick = mt5_instance.symbol_info_tick(server_symbol)
-                    if not tick:
-                        error_message = f"Cannot retrieve tick data for {server_symbol}"
-                        log_and_print(error_message, "ERROR")
-                        self.save_adjustment_error(account_key, server_symbol, position_id, error_message)
-                        failed_adjustments += 1
-                        self.total_orders_failed += 1
-                        continue
-
-                    current_price = tick.bid if is_sell else tick.ask
-                    tick_size = symbol_info.trade_tick_size
-                    point = symbol_info.point
-                    min_sl_distance = symbol_info.trade_stops_level * point
-
-                    # FIX: Add buffer for synthetic indices (e.g., Drift Switch)
-                    if 'drift' in server_symbol.lower() or 'synthetic' in server_symbol.lower():
-                        min_sl_distance *= 1.2  # 20% extra buffer for high-vol synthetics
-                        log_and_print(f"Synthetic index detected ({server_symbol}): Using buffered min SL distance {min_sl_distance}", "DEBUG")
-
-                    log_and_print(f"Min SL distance required: {min_sl_distance}, Current price: {current_price}, Entry: {entry_price}", "DEBUG")
-
-                    entry_price_signal = float(matching_signal['entry_price'])
-                    ratio_0_5_price = float(matching_signal['ratio_0_5_price'])
-                    ratio_1_price = float(matching_signal['ratio_1_price'])
-                    ratio_2_price = float(matching_signal['ratio_2_price'])
-                    ratio_0_25_price = float(matching_signal.get('ratio_0_25_price', 
-                                                                entry_price_signal * (1 + SL_RR_05_PERCENT / 100) if is_buy else 
-                                                                entry_price_signal * (1 - SL_RR_05_PERCENT / 100)))
-
-                    new_sl = 0.0
-                    adjustment_needed = False
-                    adjustment_reason = ""
-                    eligible_ratio = None
-                    towards_threshold = None  # For descriptive messaging
-
-                    # Determine price direction and eligibility for adjustment using current_price
-                    is_price_toward_profit = (is_buy and current_price > entry_price_signal) or (is_sell and current_price < entry_price_signal)
-                    is_price_toward_stoploss = (is_buy and current_price <= entry_price_signal) or (is_sell and current_price >= entry_price_signal)
-
-                    if is_price_toward_stoploss:
-                        if current_sl != 0.0:
-                            # Check if between SL and entry
-                            if is_buy:
-                                if current_sl < current_price < entry_price_signal:
-                                    dist_to_sl = current_price - current_sl
-                                    dist_to_entry = entry_price_signal - current_price
-                                    closer_to = "stop-loss" if dist_to_sl < dist_to_entry else "entry"
-                                    log_and_print(f"Current price {current_price} is between stop-loss {current_sl} and entry {entry_price_signal}, "
-                                                f"closer to {closer_to}, waiting for price to move {'above' if is_buy else 'below'} entry towards eligible ratios", "INFO")
-                                    continue
-                            else:  # sell
-                                if entry_price_signal < current_price < current_sl:
-                                    dist_to_entry = current_price - entry_price_signal
-                                    dist_to_sl = current_sl - current_price
-                                    closer_to = "entry" if dist_to_entry < dist_to_sl else "stop-loss"
-                                    log_and_print(f"Current price {current_price} is between entry {entry_price_signal} and stop-loss {current_sl}, "
-                                                f"closer to {closer_to}, waiting for price to move {'below' if is_sell else 'above'} entry towards eligible ratios", "INFO")
-                                    continue
-                        direction_word = "above" if is_sell else "below"
-                        log_and_print(f"No stop-loss adjustment for position {position_id} ({server_symbol}): "
-                                    f"Current price {current_price} is {direction_word} entry {entry_price_signal}, moving toward stop-loss, "
-                                    f"waiting for price to move {'below' if is_sell else 'above'} entry toward ratios", "INFO")
-                        continue
-
-                    # Adjustment logic using current_price for ratio checks
-                    direction_word = "above" if is_buy else "below"
-                    opposite_direction_word = "below" if is_buy else "above"
-                    if is_buy:
-                        if current_price > ratio_2_price:
-                            new_sl = round(ratio_1_price / tick_size) * tick_size
-                            eligible_ratio = "1:2 RR"
-                            towards_threshold = "1:1 RR"  # Already beyond 1:2, but for messaging if needed
-                            if current_sl == 0.0 or (current_sl > 0 and current_sl < new_sl):
-                                adjustment_needed = True
-                                adjustment_reason = f"{direction_word} 1:2 RR (current: {current_price}, ratio_2: {ratio_2_price})"
-                        elif current_price > ratio_1_price:
-                            new_sl = round(ratio_0_5_price / tick_size) * tick_size
-                            eligible_ratio = "1:1 RR"
-                            towards_threshold = "1:2 RR"
-                            if current_sl == 0.0 or (current_sl > 0 and current_sl < new_sl):
-                                adjustment_needed = True
-                                adjustment_reason = f"{direction_word} 1:1 RR (current: {current_price}, ratio_1: {ratio_1_price})"
-                        elif current_price > ratio_0_5_price:
-                            new_sl = round(ratio_0_25_price / tick_size) * tick_size
-                            eligible_ratio = "1:0.5 RR"
-                            towards_threshold = "1:1 RR"
-                            if current_sl == 0.0 or (current_sl > 0 and current_sl < new_sl):
-                                adjustment_needed = True
-                                adjustment_reason = f"{direction_word} 1:0.5 RR (current: {current_price}, ratio_0_5: {ratio_0_5_price})"
-                        elif current_price > entry_price_signal:
-                            new_sl = round((entry_price * (1 + SL_ADJUSTMENT_PERCENT / 100)) / tick_size) * tick_size
-                            eligible_ratio = "entry price"
-                            towards_threshold = "1:0.5 RR"
-                            if current_sl == 0.0 or (current_sl > 0 and current_sl < new_sl):
-                                adjustment_needed = True
-                                adjustment_reason = f"{direction_word} entry price (current: {current_price}, entry: {entry_price_signal})"
-
-                    # Adjustment logic for sell orders (price below entry, moving toward profit)
-                    elif is_sell:
-                        if current_price < ratio_2_price:
-                            new_sl = round(ratio_1_price / tick_size) * tick_size
-                            eligible_ratio = "1:2 RR"
-                            towards_threshold = "1:1 RR"
-                            if current_sl == 0.0 or (current_sl > 0 and current_sl > new_sl):
-                                adjustment_needed = True
-                                adjustment_reason = f"{direction_word} 1:2 RR (current: {current_price}, ratio_2: {ratio_2_price})"
-                        elif current_price < ratio_1_price:
-                            new_sl = round(ratio_0_5_price / tick_size) * tick_size
-                            eligible_ratio = "1:1 RR"
-                            towards_threshold = "1:2 RR"
-                            if current_sl == 0.0 or (current_sl > 0 and current_sl > new_sl):
-                                adjustment_needed = True
-                                adjustment_reason = f"{direction_word} 1:1 RR (current: {current_price}, ratio_1: {ratio_1_price})"
-                        elif current_price < ratio_0_5_price:
-                            new_sl = round(ratio_0_25_price / tick_size) * tick_size
-                            eligible_ratio = "1:0.5 RR"
-                            towards_threshold = "1:1 RR"
-                            if current_sl == 0.0 or (current_sl > 0 and current_sl > new_sl):
-                                adjustment_needed = True
-                                adjustment_reason = f"{direction_word} 1:0.5 RR (current: {current_price}, ratio_0_5: {ratio_0_5_price})"
-                        elif current_price < entry_price_signal:
-                            new_sl = round((entry_price * (1 - SL_ADJUSTMENT_PERCENT / 100)) / tick_size) * tick_size
-                            eligible_ratio = "entry price"
-                            towards_threshold = "1:0.5 RR"
-                            if current_sl == 0.0 or (current_sl > 0 and current_sl > new_sl):
-                                adjustment_needed = True
-                                adjustment_reason = f"{direction_word} entry price (current: {current_price}, entry: {entry_price_signal})"
-
-                    if not adjustment_needed:
-                        log_and_print(f"No stop-loss adjustment needed for position {position_id} ({server_symbol})", "DEBUG")
-                        continue
-
-                    # FIX: Enhanced validation with logging
-                    actual_distance = abs(current_price - new_sl)
-                    log_and_print(f"Proposed SL: {new_sl}, Actual distance to current: {actual_distance}, Required min: {min_sl_distance}", "DEBUG")
-
-                    # Validate stop-loss distance against current price (not entry) - stricter check
-                    too_close = False
-                    if is_buy:
-                        if new_sl >= current_price - min_sl_distance:
-                            too_close = True
-                    else:  # sell
-                        if new_sl <= current_price + min_sl_distance:
-                            too_close = True
-
-                    if too_close:
-                        threshold_desc = towards_threshold if towards_threshold else "entry price"
-                        eligible_desc = f"break-even { '+' if is_buy else '-' }{SL_ADJUSTMENT_PERCENT}%" if eligible_ratio == "entry price" else eligible_ratio
-                        towards_desc = towards_threshold if towards_threshold else 'profit ratios'
-                        further_direction = direction_word
-                        log_and_print(f"Stop-loss {new_sl} too close to current price {current_price} for {server_symbol} "
-                                    f"({ 'buy' if is_buy else 'sell' }, min distance: {min_sl_distance}, actual: {actual_distance}), current price {direction_word} {threshold_desc} "
-                                    f"and towards {towards_desc}, "
-                                    f"waiting for price to move further {further_direction} {eligible_desc} ({new_sl}) to adjust stop-loss", "INFO")
-                        continue  # Do not increment failed_adjustments
-
-                    request = {
-                        "action": mt5_instance.TRADE_ACTION_SLTP,
-                        "position": position_id,
-                        "symbol": server_symbol,
-                        "sl": new_sl,
-                        "tp": current_tp
-                    }
-
-                    log_and_print(f"Attempting to adjust stop-loss for position {position_id} ({server_symbol}) to {new_sl} ({adjustment_reason})", "INFO")
-
-                    sl_buffer = min_sl_distance  # Buffer for retries
-                    for attempt in range(1, MAX_RETRIES + 1):
-                        # FIX: On retry for 10016, widen SL slightly
-                        adjusted_sl = new_sl
-                        if attempt > 1:
-                            if is_buy:
-                                adjusted_sl += sl_buffer  # Move SL further up for buys
-                            else:
-                                adjusted_sl -= sl_buffer  # Move SL further down for sells
-                            adjusted_sl = round(adjusted_sl / tick_size) * tick_size
-                            log_and_print(f"Retry {attempt}: Widened SL to {adjusted_sl} (buffer: {sl_buffer})", "INFO")
-                            request["sl"] = adjusted_sl
-
-                        result = mt5_instance.order_send(request)
-                        if result.retcode == mt5_instance.TRADE_RETCODE_DONE:
-                            log_and_print(f"Successfully adjusted stop-loss for position {position_id} ({server_symbol}) to {adjusted_sl or new_sl} ({adjustment_reason})", "SUCCESS")
-                            adjusted_orders += 1
-                            self.total_orders_adjusted += 1
-                            break
-                        else:
-                            error_code = result.retcode
-                            error_message = result.comment
-                            full_error = f"Failed to adjust stop-loss for position {position_id} ({server_symbol}) on attempt {attempt}: {error_code}, {error_message}"
-                            log_and_print(full_error, "ERROR")
-                            self.save_adjustment_error(account_key, server_symbol, position_id, full_error)
-                            
-                            # FIX: Handle 10016 as market condition - no failure count, specific log
-                            if error_code == 10016:  # Invalid stops - too close due to market conditions
-                                threshold_desc = towards_threshold if towards_threshold else "entry price"
-                                eligible_desc = f"break-even { '+' if is_buy else '-' }{SL_ADJUSTMENT_PERCENT}%" if eligible_ratio == "entry price" else eligible_ratio
-                                further_direction = direction_word
-                                log_and_print(f"Too close to modify SL for {server_symbol} (market condition: invalid stops). Waiting for current price to move further {further_direction} toward profit for adjustable SL at {eligible_desc} level.", "INFO")
-                                break  # Stop retries; respect market - don't count as failed
-                            
-                            if attempt == MAX_RETRIES:
-                                if error_code != 10016:  # Only count non-distance errors as failed
-                                    failed_adjustments += 1
-                                    self.total_orders_failed += 1
-                            else:
-                                log_and_print(f"Retrying adjustment after {MT5_RETRY_DELAY} seconds...", "INFO")
-                                await asyncio.sleep(MT5_RETRY_DELAY)
-
+                    # Index the position's next trigger price when first seen or when its stop-loss changed
+                    if not index.is_current(position_id, current_sl):
+                        symbol_info = await self.current_snapshot().spec(mt5_instance, server_symbol)
+                        if not symbol_info:
+                            error_message = f"Cannot retrieve symbol info for {server_symbol}"
+                            log_and_print(error_message, "ERROR")
+                            self.save_adjustment_error(account_key, server_symbol, position_id, error_message)
+                            failed_adjustments += 1
+                            self.total_orders_failed += 1
+                            continue
+                        levels = self.sl_levels(matching_signal, entry_price, is_buy, symbol_info.trade_tick_size)
+                        index.update(position_id, server_symbol, is_buy, thresholdindex.next_trigger(is_buy, current_sl, levels), current_sl)
+                    tracked[position_id] = (position, server_symbol, matching_signal)
+
+                except mt5retry.MT5Timeout:
+                    raise
                 except Exception as e:
                     error_message = f"Error processing position {position_id} for {server_symbol}: {str(e)}"
                     log_and_print(error_message, "ERROR")
@@ -1353,6 +1402,59 @@ class TradeRegulator:
                     failed_adjustments += 1
                     self.total_orders_failed += 1
 
+            # One tick per symbol; only positions whose price crossed their trigger are evaluated
+            tracked_symbols = {server_symbol for _, server_symbol, _ in tracked.values()}
+            for server_symbol in index.armed_symbols():
+                if server_symbol not in tracked_symbols:
+                    continue
+                tick = await self.current_snapshot().tick(mt5_instance, server_symbol)
+                if not tick:
+                    error_message = f"Cannot retrieve tick data for {server_symbol}"
+                    log_and_print(error_message, "ERROR")
+                    self.save_adjustment_error(account_key, server_symbol, 0, error_message)
+                    failed_adjustments += 1
+                    self.total_orders_failed += 1
+                    continue
+                activity.note_trigger(index.nearest(server_symbol, tick.bid, tick.ask))
+                fired = [ticket for ticket in index.crossed(server_symbol, tick.bid, tick.ask) if ticket in tracked]
+                if not fired:
+                    continue
+                symbol_info = await self.current_snapshot().spec(mt5_instance, server_symbol)
+                if not symbol_info:
+                    error_message = f"Cannot retrieve symbol info for {server_symbol}"
+                    log_and_print(error_message, "ERROR")
+                    self.save_adjustment_error(account_key, server_symbol, 0, error_message)
+                    failed_adjustments += 1
+                    self.total_orders_failed += 1
+                    continue
+                log_and_print(f"{len(fired)} positions crossed a stop-loss trigger on {server_symbol}", "DEBUG")
+                for position_id in fired:
+                    position, _, matching_signal = tracked[position_id]
+                    try:
+                        adjusted, failed = await self.adjust_position_sl(
+                            account_key, mt5_instance, position, server_symbol, matching_signal, symbol_info, tick
+                        )
+                        adjusted_orders += adjusted
+                        failed_adjustments += failed
+                    except mt5retry.MT5Timeout:
+                        raise
+                    except Exception as e:
+                        error_message = f"Error processing position {position_id} for {server_symbol}: {str(e)}"
+                        log_and_print(error_message, "ERROR")
+                        self.save_adjustment_error(account_key, server_symbol, position_id, error_message)
+                        failed_adjustments += 1
+                        self.total_orders_failed += 1
+
+            # Markets of the tracked positions, from the same snapshot ticks, decide how soon the account is checked again
+            if tracked_symbols:
+                activity.markets_open = False
+                for server_symbol in tracked_symbols:
+                    if await self.is_market_open(mt5_instance, server_symbol):
+                        activity.markets_open = True
+                        break
+
+        except mt5retry.MT5Timeout:
+            raise
         except Exception as e:
             error_message = f"Error retrieving positions for {account_key}: {str(e)}"
             log_and_print(error_message, "ERROR")
@@ -1392,7 +1494,7 @@ class TradeRegulator:
             if validated and validated['terminal_path']:
                 account_key = f"user_{validated['user_id']}_sub_{validated['subaccount_id']}" if validated['subaccount_id'] else f"user_{validated['user_id']}"
                 for attempt in range(1, MAX_RETRIES + 1):
-                    if self.mt5_manager.initialize_mt5(
+                    if await self.mt5_manager.initialize_mt5(
                         server=validated['broker_server'],
                         login=validated['broker_loginid'],
                         password=validated['broker_password'],
@@ -1409,8 +1511,9 @@ class TradeRegulator:
                         if attempt == MAX_RETRIES:
                             log_and_print(f"Max retries reached for {account_key}, skipping", "ERROR")
                         else:
-                            log_and_print(f"Retrying after {MT5_RETRY_DELAY} seconds...", "INFO")
-                            await asyncio.sleep(MT5_RETRY_DELAY)
+                            delay = mt5retry.backoff_delay(attempt, MT5_RETRY_DELAY)
+                            log_and_print(f"Retrying after {delay:.1f} seconds...", "INFO")
+                            await asyncio.sleep(delay)
             else:
                 skipped_records += 1
 
@@ -1418,36 +1521,211 @@ class TradeRegulator:
         log_and_print(f"Skipped {skipped_records} records", "INFO")
         return len(self.valid_accounts) > 0
 
-    async def regulation_loop(self):
-        """Main loop to continuously regulate trades for all valid accounts."""
-        log_and_print("===== Starting Trade Regulation Loop =====", "TITLE")
+    async def regulation_loop(self, interval: float = CHECK_INTERVAL, counter_queue=None, shard_label: str = "") -> None:
+        """Main loop to continuously regulate trades for all valid accounts.
+
+        A shard worker passes its own interval, a queue for per-cycle counters and a label for its logs.
+        Each account has its own next check time, set from what its last pass saw (see
+        accountschedule.next_interval); a cycle regulates every account that is due.
+        """
+        label = f" ({shard_label})" if shard_label else ""
+        log_and_print(f"===== Starting Trade Regulation Loop{label} =====", "TITLE")
+        accounts_by_key = {}
+        schedule = accountschedule.AccountSchedule()
+        for account in self.valid_accounts:
+            account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
+            accounts_by_key[account_key] = account
+            schedule.add(account_key, time.monotonic())
         cycle_count = 0
-        while True:
+        while accounts_by_key:
+            delay = max(0.0, schedule.next_due() - time.monotonic())
+            if delay > 0:
+                log_and_print(f"Next check in {delay:.1f} seconds...", "INFO")
+                await asyncio.sleep(delay)
+            due_keys = schedule.pop_due(time.monotonic())
             cycle_count += 1
-            log_and_print(f"===== Regulation Cycle {cycle_count} =====", "TITLE")
+            cycle_started = time.monotonic()
+            log_and_print(f"===== Regulation Cycle {cycle_count}{label}: {len(due_keys)} of {len(accounts_by_key)} accounts due =====", "TITLE")
             total_adjusted = 0
             total_failed = 0
 
             if not self.load_signals():
                 log_and_print("Failed to reload signals, skipping cycle", "ERROR")
-                await asyncio.sleep(CHECK_INTERVAL)
+                for account_key in due_keys:
+                    schedule.add(account_key, time.monotonic() + interval)
                 continue
 
-            for account in self.valid_accounts:
-                account_key = f"user_{account['user_id']}_sub_{account['subaccount_id']}" if account['subaccount_id'] else f"user_{account['user_id']}"
+            self.history_sync.start_cycle()
+            self.market_snapshots.start_cycle()
+            self.market_snapshot = None
+            for account_key in due_keys:
                 log_and_print(f"Processing account: {account_key}", "INFO")
-                adjusted, failed = await self.regulate_trades(account)
+                try:
+                    adjusted, failed = await self.regulate_trades(accounts_by_key[account_key])
+                except mt5retry.MT5Stalled as e:
+                    log_and_print(f"Stopping trade regulation{label} to restart it with a fresh MT5 connection: {str(e)}", "ERROR")
+                    raise
+                except mt5retry.MT5Timeout as e:
+                    # The timed-out call may still complete, so the pass is dropped rather than retried; the next pass logs in again
+                    log_and_print(f"Aborted regulation pass for {account_key}: {str(e)}", "ERROR")
+                    self.account_activity.pop(account_key, None)
+                    adjusted, failed = 0, 0
                 total_adjusted += adjusted
                 total_failed += failed
+                next_check = accountschedule.next_interval(self.account_activity.get(account_key), interval)
+                schedule.add(account_key, time.monotonic() + next_check)
                 # Log per-account summary
-                log_and_print(f"Account {account_key} Summary: {adjusted} positions adjusted, {failed} failed adjustments", "INFO")
+                log_and_print(f"Account {account_key} Summary: {adjusted} positions adjusted, {failed} failed adjustments, next check in {next_check:.1f}s", "INFO")
+
+            # Closest-symbol suggestions for unmatched pairs, off the per-account path
+            symbolresolver.report_misses()
 
             # Log cycle summary and totals
-            log_and_print(f"Cycle {cycle_count} Summary: {total_adjusted} positions adjusted, {total_failed} failed adjustments", "INFO")
+            cycle_seconds = time.monotonic() - cycle_started
+            log_and_print(f"Cycle {cycle_count}{label} Summary: {total_adjusted} positions adjusted, {total_failed} failed adjustments in {cycle_seconds:.1f}s", "INFO")
             log_and_print(f"Total Positions Adjusted (All Cycles): {self.total_orders_adjusted}", "INFO")
             log_and_print(f"Total Failed Adjustments (All Cycles): {self.total_orders_failed}", "INFO")
-            log_and_print(f"Next check in {CHECK_INTERVAL} seconds...", "INFO")
-            await asyncio.sleep(CHECK_INTERVAL)
+            written = self.account_files.flush()
+            log_and_print(f"Flushed {written} changed account files ({self.account_files.reads} reads, {self.account_files.writes} writes so far)", "DEBUG")
+            signalstore.export_all()
+            errorjournal.flush_all()
+            if counter_queue is not None:
+                counter_queue.put({
+                    'shard': shard_label,
+                    'cycle': cycle_count,
+                    'accounts': len(due_keys),
+                    'adjusted': total_adjusted,
+                    'failed': total_failed,
+                    'seconds': cycle_seconds
+                })
+
+# Regulation Scheduler Functions
+def shard_accounts(accounts: List[Dict], shard_count: int) -> List[List[Dict]]:
+    """Group accounts by terminal and spread the groups over at most shard_count shards, largest group first.
+
+    Accounts sharing a terminal always land in the same shard, so no two workers drive one terminal.
+    """
+    groups = defaultdict(list)
+    for account in accounts:
+        groups[account['terminal_path']].append(account)
+    shards = [[] for _ in range(max(1, min(shard_count, len(groups))))]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return [shard for shard in shards if shard]
+
+def run_regulation_shard(shard_index: int, accounts: List[Dict], counter_queue, interval: float) -> None:
+    """Worker process entry point: regulate one shard's accounts with its own MT5 session and report counters.
+
+    If an MT5 call stays stuck, the worker exits with REGULATION_STALLED_EXIT_CODE so the scheduler restarts it
+    with a fresh terminal connection.
+    """
+    errorjournal.set_shard(f"regulator{shard_index}")
+    regulator = TradeRegulator()
+    regulator.valid_accounts = accounts
+    stalled = False
+    try:
+        asyncio.run(regulator.regulation_loop(interval, counter_queue, f"shard {shard_index}"))
+    except KeyboardInterrupt:
+        pass
+    except mt5retry.MT5Stalled:
+        stalled = True
+        log_and_print(f"Restarting regulation shard {shard_index}: MT5 call stuck for {mt5retry.stalled_for():.0f}s", "ERROR")
+    finally:
+        regulator.account_files.flush()
+        errorjournal.flush_all()
+        signalstore.export_all()
+        mt5retry.run_sync(mt5.shutdown)
+    if stalled:
+        os._exit(REGULATION_STALLED_EXIT_CODE)  # A normal exit would wait for the stuck MT5 thread forever
+
+# Regulation Scheduler Class
+class RegulationScheduler:
+    """Runs the regulation loop in one worker process per shard of terminals and aggregates their counters.
+
+    The MT5 API allows one terminal connection per process, so each worker keeps its own session for its
+    accounts instead of the single loop re-initializing every account's terminal in turn.
+    """
+    def __init__(self, accounts: List[Dict], max_workers: int = REGULATION_MAX_WORKERS, interval: float = CHECK_INTERVAL):
+        self.shards: List[List[Dict]] = shard_accounts(accounts, max_workers)
+        self.interval: float = interval
+        self.context = multiprocessing.get_context("spawn")
+        self.counter_queue = self.context.Queue()
+        self.workers: Dict[int, multiprocessing.Process] = {}
+        self.restart_at: Dict[int, float] = {}
+        self.shard_totals: Dict[str, Dict[str, int]] = {}
+
+    def start_worker(self, shard_index: int) -> None:
+        """Start (or restart) the worker process for one shard."""
+        worker = self.context.Process(
+            target=run_regulation_shard,
+            args=(shard_index, self.shards[shard_index], self.counter_queue, self.interval),
+            name=f"regulator-shard-{shard_index}",
+            daemon=True
+        )
+        worker.start()
+        self.workers[shard_index] = worker
+        log_and_print(f"Started regulation shard {shard_index} (pid {worker.pid}) with {len(self.shards[shard_index])} accounts", "INFO")
+
+    def check_workers(self) -> None:
+        """Schedule a restart for crashed workers and restart those whose delay has passed."""
+        now = time.monotonic()
+        for shard_index, worker in list(self.workers.items()):
+            if worker.is_alive():
+                continue
+            if shard_index not in self.restart_at:
+                reason = " (MT5 call stuck)" if worker.exitcode == REGULATION_STALLED_EXIT_CODE else ""
+                log_and_print(f"Regulation shard {shard_index} exited with code {worker.exitcode}{reason}, restarting in {REGULATION_RESTART_DELAY} seconds", "ERROR")
+                self.restart_at[shard_index] = now + REGULATION_RESTART_DELAY
+            elif now >= self.restart_at[shard_index]:
+                del self.restart_at[shard_index]
+                self.start_worker(shard_index)
+
+    def next_report(self) -> Optional[Dict]:
+        """Wait briefly for the next shard report; returns None on timeout."""
+        try:
+            return self.counter_queue.get(timeout=REGULATION_REPORT_TIMEOUT)
+        except queue.Empty:
+            return None
+
+    def record(self, report: Dict) -> None:
+        """Add one shard cycle report to the aggregated counters and log the totals."""
+        totals = self.shard_totals.setdefault(report['shard'], {'cycles': 0, 'adjusted': 0, 'failed': 0})
+        totals['cycles'] = report['cycle']
+        totals['adjusted'] += report['adjusted']
+        totals['failed'] += report['failed']
+        log_and_print(
+            f"{report['shard']} cycle {report['cycle']}: {report['adjusted']} positions adjusted, {report['failed']} failed "
+            f"across {report['accounts']} accounts in {report['seconds']:.1f}s",
+            "INFO"
+        )
+        total_adjusted = sum(shard['adjusted'] for shard in self.shard_totals.values())
+        total_failed = sum(shard['failed'] for shard in self.shard_totals.values())
+        log_and_print(f"All shards: {total_adjusted} positions adjusted, {total_failed} failed adjustments (all cycles)", "INFO")
+
+    async def run(self) -> None:
+        """Start every shard worker and aggregate their counters until interrupted."""
+        log_and_print(f"===== Starting Sharded Trade Regulation: {len(self.shards)} workers =====", "TITLE")
+        for shard_index in range(len(self.shards)):
+            self.start_worker(shard_index)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                report = await loop.run_in_executor(None, self.next_report)
+                if report is not None:
+                    self.record(report)
+                self.check_workers()
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Terminate the shard workers and merge their error journal shards."""
+        for worker in self.workers.values():
+            if worker.is_alive():
+                worker.terminate()
+        for worker in self.workers.values():
+            worker.join(timeout=10)
+        errorjournal.get_journal(os.path.join(EXPORT_DIR, "errors", "stoploss_adjustment_errors.json"), layout="list").materialize()
+        log_and_print(f"Stopped {len(self.workers)} regulation shard workers", "INFO")
 
 async def main():
     """Main function to initialize accounts and start the trade regulation loop."""
@@ -1461,13 +1739,27 @@ async def main():
         print("\n")
         return
 
+    stalled = False
     try:
-        await regulator.regulation_loop()
+        if len(shard_accounts(regulator.valid_accounts, REGULATION_MAX_WORKERS)) > 1:
+            # Release this process's terminal; each shard worker logs in on its own
+            mt5retry.run_sync(mt5.shutdown)
+            await RegulationScheduler(regulator.valid_accounts).run()
+        else:
+            await regulator.regulation_loop()
     except KeyboardInterrupt:
         log_and_print("Regulation loop terminated by user", "INFO")
+    except mt5retry.MT5Stalled:
+        stalled = True
+        log_and_print(f"Exiting so trade regulation can be restarted: MT5 call stuck for {mt5retry.stalled_for():.0f}s", "ERROR")
     finally:
+        regulator.account_files.flush()
         log_and_print("===== Server Trade Regulation Completed =====", "TITLE")
         print("\n")
+    if stalled:
+        signalstore.export_all()
+        errorjournal.materialize_all()
+        os._exit(REGULATION_STALLED_EXIT_CODE)  # A normal exit would wait for the stuck MT5 thread forever
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,349 @@
+import os
+import json
+import atexit
+import logging
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple, Callable
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+SIGNALSTORE_BUSY_TIMEOUT = 30  # Seconds a writer waits for another process's transaction
+TIMEFRAME_BUCKETS = ['5minutes', '15minutes', '30minutes', '1hour', '4hours']
+LEGACY_SUMMARY_KEYS = {
+    '5minutes': "5minutes pending orders",
+    '15minutes': "15minutes pending orders",
+    '30minutes': "30minutes pending orders",
+    '1hour': "1Hour pending orders",
+    '4hours': "4Hours pending orders"
+}
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS signals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        server_id INTEGER,
+        trade_key TEXT NOT NULL,
+        pair TEXT NOT NULL,
+        timeframe_bucket TEXT NOT NULL,
+        payload TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS signals_trade_key ON signals (trade_key);
+    CREATE INDEX IF NOT EXISTS signals_server_id ON signals (server_id);
+    CREATE TABLE IF NOT EXISTS timeframe_counts (
+        timeframe TEXT PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    CREATE TRIGGER IF NOT EXISTS signals_count_insert AFTER INSERT ON signals BEGIN
+        INSERT OR IGNORE INTO timeframe_counts (timeframe, count) VALUES (NEW.timeframe_bucket, 0);
+        UPDATE timeframe_counts SET count = count + 1 WHERE timeframe = NEW.timeframe_bucket;
+    END;
+    CREATE TRIGGER IF NOT EXISTS signals_count_delete AFTER DELETE ON signals BEGIN
+        UPDATE timeframe_counts SET count = count - 1 WHERE timeframe = OLD.timeframe_bucket;
+    END;
+"""
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+# Key Helpers
+def trade_key(pair: str, order_type: str, entry_price: float) -> str:
+    """Build the '{pair}_{order_type}_{entry:.5f}' key used to match signals with trades."""
+    return f"{pair}_{order_type}_{float(entry_price):.5f}"
+
+def timeframe_bucket(timeframe: str) -> str:
+    """Normalize a signal timeframe to its summary bucket ('4hour' and '4 hours' count as '4hours')."""
+    bucket = (timeframe or '').lower().replace(' ', '')
+    return '4hours' if bucket == '4hour' else bucket
+
+# Signal Store Class
+class SignalStore:
+    """Single source of truth for bouncestream signals, backed by SQLite in WAL mode.
+
+    Signals live in <base>.db next to the legacy bouncestreamsignals.json. Per-timeframe counts are
+    kept by triggers, so removing a signal is one keyed delete instead of a full file rewrite.
+    Readers get a consistent snapshot from a single SELECT, and concurrent writers in other
+    processes wait on SQLite's lock instead of racing. The legacy JSON (same layout as before) is a
+    materialized view for the website and any reader that still opens the file: export_changed()
+    rewrites it once per cycle, and only after this process changed the signals.
+    """
+    def __init__(self, json_path: str):
+        self.json_path: str = json_path
+        self.db_path: str = os.path.splitext(json_path)[0] + ".db"
+        self.lock = threading.Lock()
+        self.local_writes: int = 0  # Commits through this connection, which PRAGMA data_version does not report
+        self.exported_writes: Optional[int] = None  # local_writes at this process's last export
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path, timeout=SIGNALSTORE_BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.import_legacy()
+
+    def import_legacy(self) -> None:
+        """Seed an empty store once from the legacy JSON file."""
+        if self.get_meta('legacy_imported') or not os.path.exists(self.json_path):
+            return
+        try:
+            with open(self.json_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            signals = data.get('orders', []) if isinstance(data, dict) else []
+        except Exception as e:
+            log_and_print(f"Error importing legacy signals from {self.json_path}: {str(e)}", "WARNING")
+            signals = []
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                if self.connection.execute("SELECT COUNT(*) FROM signals").fetchone()[0] == 0:
+                    self.insert_rows([s for s in signals if isinstance(s, dict)], None)
+                    log_and_print(f"Imported {len(signals)} signals from {self.json_path} into {self.db_path}", "INFO")
+                self.set_meta_locked('legacy_imported', '1')
+                self.connection.execute("COMMIT")
+                self.local_writes += 1
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Return a meta value, or None if unset."""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta_locked(self, key: str, value: str) -> None:
+        """Set a meta value; the caller holds the lock."""
+        self.connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def insert_rows(self, signals: List[Dict], server_ids: Optional[List[Optional[int]]]) -> List[int]:
+        """Insert signals inside the caller's transaction and return their store ids."""
+        ids = []
+        for i, signal in enumerate(signals):
+            cursor = self.connection.execute(
+                "INSERT INTO signals (server_id, trade_key, pair, timeframe_bucket, payload) VALUES (?, ?, ?, ?, ?)",
+                (
+                    server_ids[i] if server_ids else None,
+                    trade_key(signal['pair'], signal['order_type'], signal['entry_price']),
+                    signal['pair'].lower(),
+                    timeframe_bucket(signal.get('timeframe', '')),
+                    json.dumps(signal)
+                )
+            )
+            ids.append(cursor.lastrowid)
+        return ids
+
+    def snapshot(self) -> Tuple[List[int], List[Dict]]:
+        """Return (store ids, signals) in insertion order from one consistent read."""
+        with self.lock:
+            rows = self.connection.execute("SELECT id, payload FROM signals ORDER BY id").fetchall()
+        return [row[0] for row in rows], [json.loads(row[1]) for row in rows]
+
+    def data_version(self) -> Tuple[int, int]:
+        """Return a token that changes whenever this or any other connection commits a change to the store."""
+        with self.lock:
+            version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+            return version, self.local_writes
+
+    def load(self) -> List[Dict]:
+        """Return all signals in insertion order."""
+        return self.snapshot()[1]
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Set a meta value."""
+        with self.lock:
+            self.set_meta_locked(key, value)
+
+    def server_ids(self) -> set:
+        """Return the server ids of all stored signals."""
+        with self.lock:
+            rows = self.connection.execute("SELECT server_id FROM signals WHERE server_id IS NOT NULL").fetchall()
+        return {row[0] for row in rows}
+
+    def replace_all(self, signals: List[Dict], server_ids: Optional[List[Optional[int]]] = None,
+                    meta: Optional[Dict[str, str]] = None) -> bool:
+        """Atomically replace every stored signal (full fetch from the server), optionally updating meta values."""
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")
+                self.connection.execute("DELETE FROM signals")
+                self.insert_rows(signals, server_ids)
+                for key, value in (meta or {}).items():
+                    self.set_meta_locked(key, value)
+                self.connection.execute("COMMIT")
+                self.local_writes += 1
+                return True
+            except Exception as e:
+                self.connection.execute("ROLLBACK")
+                log_and_print(f"Error replacing signals in {self.db_path}: {str(e)}", "ERROR")
+                return False
+
+    def merge(self, signals: List[Dict], server_ids: List[int], deleted_server_ids: List[int],
+              meta: Optional[Dict[str, str]] = None) -> bool:
+        """Atomically add new server signals, drop tombstoned server ids and update meta values (incremental fetch)."""
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")
+                self.connection.executemany("DELETE FROM signals WHERE server_id = ?", [(int(i),) for i in deleted_server_ids])
+                self.insert_rows(signals, server_ids)
+                for key, value in (meta or {}).items():
+                    self.set_meta_locked(key, value)
+                self.connection.execute("COMMIT")
+                self.local_writes += 1
+                return True
+            except Exception as e:
+                self.connection.execute("ROLLBACK")
+                log_and_print(f"Error merging signals into {self.db_path}: {str(e)}", "ERROR")
+                return False
+
+    def rewrite_payloads(self, rewrite: Callable[[Dict], Dict], meta: Optional[Dict[str, str]] = None) -> int:
+        """Rewrite every stored signal's payload and update meta values in one transaction.
+
+        Only for fields the indexed columns (pair, trade key, timeframe) do not derive from. Returns the
+        number of signals changed (-1 on failure).
+        """
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")
+                updates = []
+                for signal_id, payload in self.connection.execute("SELECT id, payload FROM signals").fetchall():
+                    rewritten = json.dumps(rewrite(json.loads(payload)))
+                    if rewritten != payload:
+                        updates.append((rewritten, signal_id))
+                self.connection.executemany("UPDATE signals SET payload = ? WHERE id = ?", updates)
+                for key, value in (meta or {}).items():
+                    self.set_meta_locked(key, value)
+                self.connection.execute("COMMIT")
+                self.local_writes += 1
+                return len(updates)
+            except Exception as e:
+                self.connection.execute("ROLLBACK")
+                log_and_print(f"Error rewriting signals in {self.db_path}: {str(e)}", "ERROR")
+                return -1
+
+    def add(self, signals: List[Dict], server_ids: Optional[List[Optional[int]]] = None) -> List[int]:
+        """Append signals and return their store ids (empty on failure)."""
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")
+                ids = self.insert_rows(signals, server_ids)
+                self.connection.execute("COMMIT")
+                self.local_writes += 1
+                return ids
+            except Exception as e:
+                self.connection.execute("ROLLBACK")
+                log_and_print(f"Error adding signals to {self.db_path}: {str(e)}", "ERROR")
+                return []
+
+    def remove_ids(self, ids: List[int]) -> int:
+        """Delete signals by store id in one transaction; returns the number removed (-1 on failure)."""
+        if not ids:
+            return 0
+        with self.lock:
+            try:
+                self.connection.execute("BEGIN IMMEDIATE")
+                cursor = self.connection.executemany("DELETE FROM signals WHERE id = ?", [(int(i),) for i in ids])
+                self.connection.execute("COMMIT")
+                self.local_writes += 1
+                return cursor.rowcount
+            except Exception as e:
+                self.connection.execute("ROLLBACK")
+                log_and_print(f"Error removing signals from {self.db_path}: {str(e)}", "ERROR")
+                return -1
+
+    def counts(self) -> Dict[str, int]:
+        """Return the maintained per-timeframe counts plus 'total'."""
+        with self.lock:
+            return self.counts_locked()
+
+    def counts_locked(self) -> Dict[str, int]:
+        """Read the per-timeframe counts; the caller holds self.lock."""
+        rows = self.connection.execute("SELECT timeframe, count FROM timeframe_counts").fetchall()
+        counts = {bucket: 0 for bucket in TIMEFRAME_BUCKETS}
+        counts.update({timeframe: count for timeframe, count in rows})
+        counts['total'] = sum(count for _, count in rows)
+        return counts
+
+    def summary(self, counts: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """Return the legacy summary fields of bouncestreamsignals.json, from the given counts or freshly read ones."""
+        counts = counts if counts is not None else self.counts()
+        summary = {"bouncestream_pendingorders": counts['total']}
+        for bucket, key in LEGACY_SUMMARY_KEYS.items():
+            summary[key] = counts[bucket]
+        return summary
+
+    def export_json(self) -> bool:
+        """Write the legacy bouncestreamsignals.json (summary plus orders) with an atomic replace.
+
+        Orders and counts are read in one read transaction, so a concurrent writer cannot make them disagree.
+        """
+        with self.lock:
+            writes = self.local_writes
+            try:
+                self.connection.execute("BEGIN")
+                rows = self.connection.execute("SELECT payload FROM signals ORDER BY id").fetchall()
+                counts = self.counts_locked()
+            finally:
+                self.connection.execute("COMMIT")
+        output_data = self.summary(counts)
+        output_data["orders"] = [json.loads(row[0]) for row in rows]
+        temp_path = f"{self.json_path}.{os.getpid()}.tmp"  # Per process; regulation shards export concurrently
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(output_data, file, indent=4)
+            os.replace(temp_path, self.json_path)
+            os.chmod(self.json_path, 0o666)  # Read/write for owner, group, others
+            self.exported_writes = writes
+            log_and_print(f"Exported {len(rows)} signals to {self.json_path}", "DEBUG")
+            return True
+        except Exception as e:
+            log_and_print(f"Error exporting signals to {self.json_path}: {str(e)}", "ERROR")
+            return False
+
+    def export_changed(self) -> bool:
+        """Export the legacy JSON if this process changed the signals since its last export or the file is missing.
+
+        Each writer exports after its own changes, so the file catches up with every process's writes.
+        """
+        if self.exported_writes == self.local_writes and os.path.exists(self.json_path):
+            return True
+        return self.export_json()
+
+# Store Registry
+_stores: Dict[str, SignalStore] = {}
+_registry_lock = threading.Lock()
+
+def get_store(json_path: str) -> SignalStore:
+    """Return this process's shared store for a legacy signals JSON path, opening it on first use."""
+    with _registry_lock:
+        store = _stores.get(json_path)
+        if store is None:
+            store = SignalStore(json_path)
+            _stores[json_path] = store
+        return store
+
+def export_all() -> None:
+    """Refresh the legacy JSON of every store this process changed; called once at the end of a cycle."""
+    for store in list(_stores.values()):
+        store.export_changed()
+
+atexit.register(export_all)
@@ -0,0 +1,147 @@
+import difflib
+import logging
+import time
+from typing import List, Dict, Optional, Tuple
+from colorama import Fore, Style
+
+logger = logging.getLogger(__name__)
+
+# Configuration Section
+SUGGESTION_COUNT = 3  # Closest server symbols reported for an unknown symbol
+SUGGESTION_CUTOFF = 0.6
+
+# Market name mappings (lowercase, space-free signal names to server display names)
+MARKET_MAPPINGS = {
+    'volatility10index': 'Volatility 10 Index',
+    'volatility25index': 'Volatility 25 Index',
+    'volatility50index': 'Volatility 50 Index',
+    'volatility75index': 'Volatility 75 Index',
+    'volatility100index': 'Volatility 100 Index',
+    'driftswitchindex10': 'Drift Switch Index 10',
+    'driftswitchindex20': 'Drift Switch Index 20',
+    'driftswitchindex30': 'Drift Switch Index 30',
+    'multistep2index': 'Multi Step 2 Index',
+    'multistep4index': 'Multi Step 4 Index',
+    'stepindex': 'Step Index',
+    'usdjpy': 'USDJPY',
+    'usdcad': 'USDCAD',
+    'usdchf': 'USDCHF',
+    'eurusd': 'EURUSD',
+    'gbpusd': 'GBPUSD',
+    'audusd': 'AUDUSD',
+    'nzdusd': 'NZDUSD',
+    'xauusd': 'XAUUSD',
+    'ustech100': 'US Tech 100',
+    'wallstreet30': 'Wall Street 30',
+    'audjpy': 'AUDJPY',
+    'audnzd': 'AUDNZD',
+    'eurchf': 'EURCHF',
+    'eurgbp': 'EURGBP',
+    'eurjpy': 'EURJPY',
+    'gbpjpy': 'GBPJPY'
+}
+
+# Logging Helper Function
+def log_and_print(message, level="INFO"):
+    """Helper function to print formatted messages with color coding and spacing."""
+    indent = "    "
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    level_colors = {
+        "INFO": Fore.CYAN,
+        "SUCCESS": Fore.GREEN,
+        "WARNING": Fore.YELLOW,
+        "ERROR": Fore.RED,
+        "TITLE": Fore.MAGENTA,
+        "DEBUG": Fore.LIGHTBLACK_EX
+    }
+    log_level = "INFO" if level in ["TITLE", "SUCCESS"] else level
+    color = level_colors.get(level, Fore.WHITE)
+    formatted_message = f"[ {timestamp} ] │ {level:7} │ {indent}{message}"
+    print(f"{color}{formatted_message}{Style.RESET_ALL}")
+    logger.log(getattr(logging, log_level), message)
+
+def alias_key(name: str) -> str:
+    """Normalize a symbol or market name for alias lookup: lowercase with all whitespace removed."""
+    return "".join(str(name).split()).lower()
+
+# Symbol Resolver Class
+class SymbolResolver:
+    """Resolves signal symbols to one server's symbols through precomputed lookup tables.
+
+    Exact case-insensitive matches win, then the normalized alias table (whitespace stripped,
+    lowercase, MARKET_MAPPINGS). A miss is a dict lookup; fuzzy suggestions for unknown symbols
+    are only computed by report_misses(), once per symbol, after the caller's loop is done.
+    """
+    def __init__(self, available_symbols: List[str]):
+        self.source: List[str] = available_symbols
+        self.symbols: Tuple[str, ...] = tuple(available_symbols)
+        self.exact: Dict[str, str] = {}
+        self.aliases: Dict[str, str] = {}
+        for symbol in reversed(self.symbols):  # Reversed so the first server symbol wins, like list.index()
+            self.exact[symbol.lower()] = symbol
+            self.aliases[alias_key(symbol)] = symbol
+        for market_key, market_name in MARKET_MAPPINGS.items():
+            symbol = self.aliases.get(alias_key(market_name))
+            if symbol is not None:
+                self.aliases.setdefault(market_key, symbol)
+        self.misses: Dict[str, int] = {}  # Unknown symbol -> lookups since the last report
+        self.suggestions: Dict[str, List[str]] = {}
+
+    def resolve(self, json_symbol: str) -> Optional[str]:
+        """Return the server symbol for a signal symbol, or None if the server has no match."""
+        symbol = self.exact.get(json_symbol.lower())
+        if symbol is None:
+            symbol = self.aliases.get(alias_key(json_symbol))
+        if symbol is not None:
+            return symbol
+        if json_symbol not in self.misses and json_symbol not in self.suggestions:
+            log_and_print(f"No exact match for '{json_symbol}' on server ({len(self.symbols)} symbols)", "WARNING")
+        self.misses[json_symbol] = self.misses.get(json_symbol, 0) + 1
+        return None
+
+    def suggest(self, json_symbol: str) -> List[str]:
+        """Return (and memoize) the closest server symbols for an unknown symbol."""
+        if json_symbol not in self.suggestions:
+            self.suggestions[json_symbol] = difflib.get_close_matches(json_symbol, self.symbols, n=SUGGESTION_COUNT, cutoff=SUGGESTION_CUTOFF)
+        return self.suggestions[json_symbol]
+
+    def report_misses(self) -> None:
+        """Log closest-symbol suggestions for the symbols missed since the last report."""
+        for json_symbol, count in self.misses.items():
+            close_matches = self.suggest(json_symbol)
+            log_and_print(
+                f"No exact match for '{json_symbol}' ({count} lookups). Closest server symbols: {', '.join(close_matches) if close_matches else 'None'}",
+                "WARNING"
+            )
+        self.misses = {}
+
+resolvers: Dict[int, SymbolResolver] = {}
+last_resolver: Optional[SymbolResolver] = None
+
+def get_resolver(available_symbols: List[str]) -> SymbolResolver:
+    """Return the resolver for a server symbol list, building it once per distinct list.
+
+    Repeated calls with the same list object are a single identity check; a re-fetched but
+    identical list maps to the same resolver, so suggestions stay memoized per server.
+    """
+    global last_resolver
+    if last_resolver is not None and last_resolver.source is available_symbols:
+        return last_resolver
+    fingerprint = hash(tuple(available_symbols))
+    resolver = resolvers.get(fingerprint)
+    if resolver is None or resolver.symbols != tuple(available_symbols):
+        resolver = SymbolResolver(available_symbols)
+        resolvers[fingerprint] = resolver
+    resolver.source = available_symbols
+    last_resolver = resolver
+    return resolver
+
+def resolve_symbol(json_symbol: str, available_symbols: List[str]) -> Optional[str]:
+    """Resolve a signal symbol against a server symbol list through its cached resolver."""
+    return get_resolver(available_symbols).resolve(json_symbol)
+
+def report_misses() -> None:
+    """Log suggestions for every resolver's unreported misses; call once the symbol loop is done."""
+    for resolver in resolvers.values():
+        if resolver.misses:
+            resolver.report_misses()
@@ -4,7 +4,8 @@ from colorama import Fore, Style, init
 import time
 import json
 import os
-import difflib  # For closest matches in fallback
+import ordervalidation
+import symbolresolver
 
 # Initialize colorama for colored console output
 init()
@@ -112,20 +113,11 @@ def get_available_symbols():
         return []
 
 def get_exact_symbol_match(json_symbol, available_symbols):
-    """Find the exact server symbol matching the JSON symbol (case-insensitive)."""
-    json_lower = json_symbol.lower()
-    lower_available = [s.lower() for s in available_symbols]
-    if json_lower in lower_available:
-        # Get the exact case version
-        index = lower_available.index(json_lower)
-        exact = available_symbols[index]
-        log_and_print(f"Matched '{json_symbol}' to exact server symbol: '{exact}'", "DEBUG")
-        return exact
-    else:
-        # Fallback: Find closest matches for debugging
-        close_matches = difflib.get_close_matches(json_symbol, available_symbols, n=3, cutoff=0.6)
-        log_and_print(f"No exact match for '{json_symbol}'. Closest server symbols: {', '.join(close_matches) if close_matches else 'None'}", "WARNING")
-        return None
+    """Find the server symbol matching the JSON symbol (case-insensitive, then normalized aliases)."""
+    server_symbol = symbolresolver.resolve_symbol(json_symbol, available_symbols)
+    if server_symbol is not None:
+        log_and_print(f"Matched '{json_symbol}' to server symbol: '{server_symbol}'", "DEBUG")
+    return server_symbol
 
 def load_market_signals():
     """Load market signals from the JSON file."""
@@ -219,52 +211,24 @@ def place_pending_order(symbol, order_type, entry_price, profit_price, lot_size)
             log_and_print(f"Failed to select {symbol} for pending order, error: {mt5.last_error()}", "ERROR")
             return False, None
 
-        # Get symbol information
-        symbol_info = mt5.symbol_info(symbol)
-        if symbol_info is None:
-            log_and_print(f"Cannot retrieve info for {symbol}", "ERROR")
+        # Get symbol information and current market price
+        snapshot, error_message = ordervalidation.take_symbol_snapshot(mt5, symbol)
+        if snapshot is None:
+            log_and_print(error_message, "ERROR")
             return False, None
-
-        # Check if symbol is tradeable
-        if not symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
-            log_and_print(f"Symbol {symbol} is not tradeable (trade mode: {symbol_info.trade_mode})", "ERROR")
-            return False, None
-
-        # Get current market price
-        tick = mt5.symbol_info_tick(symbol)
-        if tick is None:
-            log_and_print(f"Cannot retrieve tick data for {symbol}, error: {mt5.last_error()}", "ERROR")
-            return False, None
-
-        # Get symbol constraints
-        tick_size = symbol_info.trade_tick_size
-        stops_level = symbol_info.trade_stops_level * symbol_info.point  # Minimum distance in price units
-        current_bid = tick.bid
-        current_ask = tick.ask
-
-        # Normalize prices to tick size
-        entry_price = round(float(entry_price) / tick_size) * tick_size
-        profit_price = round(float(profit_price) / tick_size) * tick_size if profit_price else 0.0
-
-        # Validate and adjust entry price based on order type
-        is_buy_limit = order_type.lower() == "buy_limit"
-        is_sell_limit = order_type.lower() == "sell_limit"
-
-        if is_buy_limit:
-            # Buy limit: entry price must be below current ask price by at least stops_level
-            min_price = current_ask - stops_level
-            if entry_price > min_price:
-                log_and_print(f"Adjusting buy_limit entry price for {symbol} from {entry_price} to {min_price} to meet minimum distance requirement", "WARNING")
-                entry_price = round(min_price / tick_size) * tick_size
-        elif is_sell_limit:
-            # Sell limit: entry price must be above current bid price by at least stops_level
-            max_price = current_bid + stops_level
-            if entry_price < max_price:
-                log_and_print(f"Adjusting sell_limit entry price for {symbol} from {entry_price} to {max_price} to meet minimum distance requirement", "WARNING")
-                entry_price = round(max_price / tick_size) * tick_size
-        else:
-            log_and_print(f"Unsupported order type {order_type} for {symbol}", "ERROR")
+        current_bid = snapshot.bid
+        current_ask = snapshot.ask
+        stops_level = snapshot.stops_level
+
+        # Normalize prices to tick size and adjust the entry to meet the minimum distance requirement
+        validation, i = ordervalidation.validate_order(snapshot, order_type, entry_price, profit_price, None, adjust=True)
+        for note in validation.adjustments(i):
+            log_and_print(note, "WARNING")
+        if not validation.accepted(i):
+            log_and_print(validation.error(i)[0], "ERROR")
             return False, None
+        entry_price, profit_price, _ = validation.prices(i)
+        is_buy_limit = bool(validation.is_buy_limit[i])
 
         # Prepare pending order
         mt5_order_type = mt5.ORDER_TYPE_BUY_LIMIT if is_buy_limit else mt5.ORDER_TYPE_SELL_LIMIT
@@ -388,6 +352,9 @@ def add_to_watchlist_and_place_orders():
         else:
             log_and_print(f"Skipping pending order for {server_symbol} as it was not added to Market Watch", "WARNING")
 
+    # Closest-symbol suggestions for unmatched pairs, once the order loop is done
+    symbolresolver.report_misses()
+
     # Output results
     log_and_print("===== Watchlist Addition and Pending Order Summary =====", "TITLE")
     if added_symbols:
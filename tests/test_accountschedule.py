@@ -0,0 +1,44 @@
+import accountschedule
+
+
+def activity(positions=0, pending_orders=0, markets_open=True, nearest=None):
+    result = accountschedule.AccountActivity(pending_orders)
+    result.positions = positions
+    result.markets_open = markets_open
+    result.note_trigger(nearest)
+    return result
+
+
+def test_next_interval_per_activity():
+    base = 10
+    assert accountschedule.next_interval(None, base) == base
+    assert accountschedule.next_interval(activity(), base) == accountschedule.REGULATION_IDLE_INTERVAL
+    assert accountschedule.next_interval(activity(pending_orders=2), base) == base
+    assert accountschedule.next_interval(activity(positions=1, markets_open=False, nearest=0.0001), base) == accountschedule.REGULATION_CLOSED_INTERVAL
+    assert accountschedule.next_interval(activity(positions=1, nearest=0.0001), base) == accountschedule.REGULATION_FAST_INTERVAL
+    assert accountschedule.next_interval(activity(positions=1, nearest=0.01), base) == base
+    assert accountschedule.next_interval(activity(positions=1), base) == base
+
+
+def test_next_interval_never_slows_a_longer_base_or_speeds_a_shorter_one():
+    assert accountschedule.next_interval(activity(), 600) == 600
+    assert accountschedule.next_interval(activity(positions=1, nearest=0.0001), 0.1) == 0.1
+
+
+def test_note_trigger_keeps_smallest_distance():
+    result = accountschedule.AccountActivity()
+    for distance in (0.01, None, 0.002, 0.005):
+        result.note_trigger(distance)
+    assert result.nearest_trigger == 0.002
+
+
+def test_schedule_pops_due_accounts_in_order():
+    schedule = accountschedule.AccountSchedule()
+    assert schedule.next_due() is None
+    schedule.add('b', 5.0)
+    schedule.add('a', 1.0)
+    schedule.add('c', 5.0)
+    assert schedule.next_due() == 1.0
+    assert schedule.pop_due(0.5) == []
+    assert schedule.pop_due(5.0) == ['a', 'b', 'c']
+    assert schedule.next_due() is None
@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("MetaTrader5")
+import bouncestreamtrades
+
+
+class FakeTerminal:
+    """Just enough of the MetaTrader5 API for one account's order placement."""
+    SYMBOL_TRADE_MODE_FULL = 4
+    TRADE_ACTION_PENDING = 5
+    ORDER_TYPE_BUY_LIMIT = 2
+    ORDER_TYPE_SELL_LIMIT = 3
+    ORDER_TIME_GTC = 0
+    ORDER_FILLING_IOC = 1
+    TRADE_RETCODE_DONE = 10009
+
+    def __init__(self):
+        self.sent = []
+
+    def account_info(self):
+        return SimpleNamespace(balance=100.0)
+
+    def symbol_info(self, symbol):
+        return SimpleNamespace(trade_mode=self.SYMBOL_TRADE_MODE_FULL, trade_tick_size=0.00001, trade_stops_level=10, point=0.00001)
+
+    def symbol_info_tick(self, symbol):
+        return SimpleNamespace(bid=1.1000, ask=1.1002)
+
+    def order_send(self, request):
+        self.sent.append(request)
+        return SimpleNamespace(retcode=self.TRADE_RETCODE_DONE, order=len(self.sent))
+
+    def last_error(self):
+        return 1, "Success"
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    terminal = FakeTerminal()
+    monkeypatch.setattr(bouncestreamtrades.thread_local, 'mt5', terminal, raising=False)
+    fetcher = bouncestreamtrades.ProgrammeFetcher()
+    fetcher.terminal = terminal
+    fetcher.logins = []
+    monkeypatch.setattr(fetcher.mt5_manager, 'initialize_mt5', lambda **kwargs: fetcher.logins.append(kwargs['login']) or True)
+    monkeypatch.setattr(fetcher, 'check_for_duplicate', lambda *args: (False, 'none'))
+    monkeypatch.setattr(fetcher, 'save_account_order_error', lambda *args: None)
+
+    def add_symbols(account, terminal_path, unique_symbols, signals, available_symbols, added_symbols, failed_symbols):
+        added_symbols.extend(fetcher.get_exact_symbol_match(symbol, available_symbols) for symbol in unique_symbols)
+        return SimpleNamespace(forget=lambda symbol: None)
+    monkeypatch.setattr(fetcher, 'add_symbols_to_market_watch', add_symbols)
+    return fetcher
+
+
+ACCOUNT = {'user_id': 7, 'subaccount_id': None, 'programme_timeframe': 'priority_lowtohigh_timeframe',
+           'broker_server': 'Demo', 'broker_loginid': '1001', 'broker_password': 'secret'}
+SIGNALS = [
+    {'pair': 'EURUSD', 'order_type': 'buy_limit', 'entry_price': 1.0900, 'profit_price': 1.1000, 'exit_price': 1.0800,
+     'lot_size': 0.01, 'allowed_risk': 4.0, 'timeframe': '15minutes'},
+    {'pair': 'EURUSD', 'order_type': 'sell_limit', 'entry_price': 1.1100, 'profit_price': 1.1000, 'exit_price': 1.1200,
+     'lot_size': 0.01, 'allowed_risk': 4.0, 'timeframe': '15minutes'},
+]
+
+
+def test_places_buy_and_sell_from_same_timeframe(fetcher):
+    symbols_added, orders_placed = asyncio.run(fetcher.place_orders_for_account(ACCOUNT, 'terminal64.exe', SIGNALS, ['EURUSD']))
+    assert (symbols_added, orders_placed) == (1, 2)
+    sent = [(request['type'], request['price']) for request in fetcher.terminal.sent]
+    assert sent == [(FakeTerminal.ORDER_TYPE_BUY_LIMIT, 1.09), (FakeTerminal.ORDER_TYPE_SELL_LIMIT, 1.11)]
+
+
+def test_account_plan_logs_in_once(fetcher, monkeypatch):
+    monkeypatch.setattr(fetcher.config, 'create_account_terminal', lambda user_id, account_type: 'terminal64.exe')
+    monkeypatch.setattr(fetcher, 'get_available_symbols', lambda: ['EURUSD'])
+    result = asyncio.run(fetcher.run_account_plan(ACCOUNT, SIGNALS))
+    assert fetcher.logins == ['1001']
+    assert (result['logged_in'], result['orders_placed']) == (1, 2)
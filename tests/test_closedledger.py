@@ -0,0 +1,60 @@
+import json
+import os
+
+import closedledger
+
+ACCOUNT_SCOPE = closedledger.account_scope("user_7")
+
+
+def trade(ticket, pair='EURUSD', order_type='buy_limit', entry=1.1, **fields):
+    return {'ticket': ticket, 'pair': pair, 'order_type': order_type, 'entry_price': entry, **fields}
+
+
+def test_account_scope_dedupes_by_ticket(tmp_path):
+    ledger = closedledger.ClosedLedger(str(tmp_path))
+    assert ledger.append(ACCOUNT_SCOPE, [trade(1), trade(2), trade(1, profit=5.0)]) == 2
+    assert ledger.append(ACCOUNT_SCOPE, [trade(2), trade(3)]) == 1
+    assert [record['ticket'] for _, record in ledger.records(ACCOUNT_SCOPE)] == [1, 2, 3]
+    assert ledger.contains(ACCOUNT_SCOPE, '3')
+
+
+def test_aggregate_scope_dedupes_by_trade_key(tmp_path):
+    ledger = closedledger.ClosedLedger(str(tmp_path))
+    scope = closedledger.ALL_CLOSED_SCOPE
+    assert ledger.append(scope, [trade(1), trade(2), trade(3, entry=1.2), {'pair': 'EURUSD'}]) == 2
+    keys = ['EURUSD_buy_limit_1.10000', 'EURUSD_buy_limit_1.30000']
+    assert ledger.existing_keys(scope, keys) == {'EURUSD_buy_limit_1.10000'}
+    assert ledger.count(scope) == 2
+
+
+def test_lookups_by_trade_ticket_and_entry(tmp_path):
+    ledger = closedledger.ClosedLedger(str(tmp_path))
+    ledger.append(ACCOUNT_SCOPE, [trade(1, 'EURUSD', 'buy_limit', 1.10000), trade(2, 'EURUSD', 'sell_limit', 1.20000),
+                                  trade(3, 'EURUSD', 'buy_limit', 1.10040)])
+    assert ledger.has_trade(ACCOUNT_SCOPE, 'eurusd', 'BUY_LIMIT', 1.1)
+    assert not ledger.has_trade(ACCOUNT_SCOPE, 'EURUSD', 'buy_limit', 'n/a')
+    assert [record['ticket'] for record in ledger.with_tickets(ACCOUNT_SCOPE, {3, 1, 9})] == [1, 3]
+    assert [record['ticket'] for record in ledger.near(ACCOUNT_SCOPE, 'buy_limit', 1.1002, 0.0003)] == [1, 3]
+
+
+def test_records_after_watermark(tmp_path):
+    ledger = closedledger.ClosedLedger(str(tmp_path))
+    ledger.append(ACCOUNT_SCOPE, [trade(1), trade(2)])
+    last_id = ledger.records(ACCOUNT_SCOPE)[-1][0]
+    ledger.append(ACCOUNT_SCOPE, [trade(3)])
+    assert [record['ticket'] for _, record in ledger.records(ACCOUNT_SCOPE, last_id)] == [3]
+
+
+def test_legacy_json_seeds_scope_and_export_skips_unchanged(tmp_path):
+    legacy_path = tmp_path / ACCOUNT_SCOPE
+    legacy_path.write_text(json.dumps([trade(1), trade(1), 'junk']), encoding='utf-8')
+    ledger = closedledger.ClosedLedger(str(tmp_path))
+    assert ledger.count(ACCOUNT_SCOPE) == 1
+    assert ledger.export_json(ACCOUNT_SCOPE)
+    os.utime(legacy_path, ns=(0, 0))
+    assert ledger.export_json(ACCOUNT_SCOPE)
+    assert os.stat(legacy_path).st_mtime_ns == 0
+    ledger.append(ACCOUNT_SCOPE, [trade(2)])
+    assert ledger.export_json(ACCOUNT_SCOPE)
+    assert [record['ticket'] for record in json.loads(legacy_path.read_text(encoding='utf-8'))] == [1, 2]
+    assert closedledger.ClosedLedger(str(tmp_path)).count(ACCOUNT_SCOPE) == 2
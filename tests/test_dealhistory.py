@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+import dealhistory
+
+ENTRY_IN, ENTRY_OUT = 0, 1
+
+
+def deal(ticket, position_id, entry, time=0, price=1.1, profit=0.0, symbol='EURUSD', type=0):
+    return SimpleNamespace(ticket=ticket, position_id=position_id, time=time, entry=entry, type=type, price=price,
+                           profit=profit, symbol=symbol)
+
+
+class FakeHistory:
+    """history_deals_get over a fixed deal list, counting calls."""
+    def __init__(self, deals):
+        self.deals = deals
+        self.calls = 0
+
+    def history_deals_get(self, *args, position=None):
+        self.calls += 1
+        if position is not None:
+            return [d for d in self.deals if d.position_id == position]
+        return list(self.deals)
+
+
+def test_pair_in_out_matches_first_in_and_out_per_position():
+    deals = dealhistory.deals_to_array([
+        deal(1, 100, ENTRY_IN, price=1.10),
+        deal(2, 200, ENTRY_IN, price=1.20),
+        deal(3, 100, ENTRY_OUT, price=1.15),
+        deal(4, 100, ENTRY_OUT, price=1.16),
+        deal(5, 300, ENTRY_OUT, price=1.30),
+    ])
+    opens, closes = dealhistory.pair_in_out(deals, ENTRY_IN, ENTRY_OUT)
+    assert list(opens['ticket']) == [1]
+    assert list(closes['ticket']) == [3]
+
+
+def test_deals_to_array_handles_empty_history():
+    assert len(dealhistory.deals_to_array(None)) == 0
+    assert dealhistory.deals_to_array([]).dtype == dealhistory.DEAL_DTYPE
+
+
+def test_trade_keys_and_lookup_join_on_last_row():
+    keys = dealhistory.trade_keys(np.array(['EURUSD', 'GBPUSD', 'EURUSD']), np.array(['buy_limit'] * 3), np.array([1.1, 1.25, 1.1]))
+    assert list(keys) == ['EURUSD_buy_limit_1.10000', 'GBPUSD_buy_limit_1.25000', 'EURUSD_buy_limit_1.10000']
+    unique_keys, key_rows = dealhistory.last_index_by_key(keys)
+    found = dealhistory.lookup_keys(unique_keys, key_rows, np.array(['EURUSD_buy_limit_1.10000', 'USDJPY_sell_limit_150.00000']))
+    assert list(found) == [2, -1]
+    assert list(dealhistory.lookup_keys(unique_keys[:0], key_rows[:0], np.array(['x']))) == [-1]
+
+
+def test_history_sync_fetches_once_per_cycle_and_commits_watermark(tmp_path):
+    api = FakeHistory([deal(1, 100, ENTRY_IN, time=1000), deal(2, 100, ENTRY_OUT, time=1100)])
+    sync = dealhistory.HistorySync(str(tmp_path), 'test')
+    assert list(sync.sync_account(api, 'user_1')['ticket']) == [1, 2]
+    sync.sync_account(api, 'user_1')
+    assert api.calls == 1
+    sync.commit()
+    assert sync.store.get('user_1') == {'ticket': 2, 'time': 1100}
+
+    api.deals.append(deal(3, 200, ENTRY_IN, time=1200))
+    sync = dealhistory.HistorySync(str(tmp_path), 'test')
+    sync.start_cycle()
+    assert list(sync.sync_account(api, 'user_1')['ticket']) == [3]
+
+
+def test_watermark_save_keeps_other_processes_accounts(tmp_path):
+    path = str(tmp_path / "test_dealwatermarks.json")
+    first = dealhistory.DealWatermarkStore(path)
+    second = dealhistory.DealWatermarkStore(path)
+    first.advance('user_1', dealhistory.deals_to_array([deal(5, 1, ENTRY_IN, time=50)]))
+    second.advance('user_2', dealhistory.deals_to_array([deal(9, 2, ENTRY_IN, time=90)]))
+    first.save()
+    second.save()
+    merged = dealhistory.DealWatermarkStore(path)
+    assert merged.get('user_1') == {'ticket': 5, 'time': 50}
+    assert merged.get('user_2') == {'ticket': 9, 'time': 90}
+    merged.advance('user_1', dealhistory.deals_to_array([deal(4, 1, ENTRY_IN, time=40)]))
+    assert merged.get('user_1') == {'ticket': 5, 'time': 50}
+
+
+def test_fetch_missing_opens_adds_opening_deals_from_before_the_watermark():
+    api = FakeHistory([deal(1, 100, ENTRY_IN), deal(7, 100, ENTRY_OUT)])
+    batch = dealhistory.deals_to_array([deal(7, 100, ENTRY_OUT)])
+    completed = dealhistory.fetch_missing_opens(api, batch, ENTRY_IN, ENTRY_OUT)
+    opens, closes = dealhistory.pair_in_out(completed, ENTRY_IN, ENTRY_OUT)
+    assert (list(opens['ticket']), list(closes['ticket'])) == ([1], [7])
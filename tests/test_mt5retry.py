@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import mt5retry
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(mt5retry, 'log_and_print', lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def hang():
+    """A call that never returns until the test ends, like a terminal that stopped answering."""
+    release = threading.Event()
+    yield lambda: release.wait()
+    release.set()
+    mt5retry.get_executor().submit(lambda: None).result(timeout=5)
+
+
+def test_call_returns_result_and_propagates_errors():
+    assert asyncio.run(mt5retry.call(lambda a, b=0: a + b, 1, b=2)) == 3
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(mt5retry.call(lambda: 1 / 0))
+
+
+def test_call_runs_on_the_single_mt5_thread():
+    names = {asyncio.run(mt5retry.call(lambda: threading.current_thread().name)) for _ in range(3)}
+    assert len(names) == 1 and names.pop().startswith("mt5")
+
+
+def test_timed_out_call_blocks_later_calls_until_it_finishes():
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(mt5retry.MT5Timeout):
+            await mt5retry.call(release.wait, deadline=0.05)
+        assert mt5retry.stalled()
+        with pytest.raises(mt5retry.MT5Timeout, match="refused"):
+            await mt5retry.call(lambda: 'next')
+        release.set()
+        await asyncio.sleep(0.05)
+        assert not mt5retry.stalled()
+        assert await mt5retry.call(lambda: 'next') == 'next'
+    asyncio.run(scenario())
+
+
+def test_retry_does_not_repeat_a_timed_out_call(hang):
+    calls = []
+
+    def send():
+        calls.append(1)
+        hang()
+
+    with pytest.raises(mt5retry.MT5Timeout):
+        asyncio.run(mt5retry.retry(send, attempts=3, call_timeout=0.05, base_delay=0))
+    time.sleep(0.05)
+    assert calls == [1]
+
+
+def test_retry_backs_off_until_accepted(monkeypatch):
+    monkeypatch.setattr(mt5retry, 'backoff_delay', lambda attempt, base, cap: 0)
+    results = iter([None, None, 'ok'])
+    assert asyncio.run(mt5retry.retry(lambda: next(results), attempts=3)) == 'ok'
+    results = iter([None, None, None])
+    assert asyncio.run(mt5retry.retry(lambda: next(results), attempts=3)) is None
+
+
+def test_retry_stops_at_overall_deadline():
+    started = time.monotonic()
+    assert asyncio.run(mt5retry.retry(lambda: None, attempts=10, base_delay=0.1, deadline=0.25)) is None
+    assert time.monotonic() - started < 1
+
+
+def test_backoff_delay_is_capped_and_jittered():
+    for attempt in range(1, 10):
+        delay = mt5retry.backoff_delay(attempt, 0.5, 8)
+        full = min(8, 0.5 * 2 ** (attempt - 1))
+        assert full * (1 - mt5retry.MT5_BACKOFF_JITTER) <= delay <= full
+
+
+def test_call_that_never_returns_escalates_to_stalled(hang, monkeypatch):
+    monkeypatch.setattr(mt5retry, 'MT5_STALL_LIMIT', 0.2)
+
+    async def scenario():
+        with pytest.raises(mt5retry.MT5Timeout):
+            await mt5retry.call(hang, deadline=0.05)
+        with pytest.raises(mt5retry.MT5Timeout) as refused:
+            await mt5retry.call(lambda: None)
+        assert not isinstance(refused.value, mt5retry.MT5Stalled)
+        await asyncio.sleep(0.25)
+        assert mt5retry.stalled_for() > 0.2
+        with pytest.raises(mt5retry.MT5Stalled):
+            await mt5retry.call(lambda: None)
+    asyncio.run(scenario())
+    assert mt5retry.run_sync(lambda: 'shutdown') is None  # Skipped rather than queued behind the stuck call
@@ -0,0 +1,74 @@
+import orderplan
+
+
+def signal(pair, order_type, entry, timeframe='15minutes', risk=4.0):
+    return {'pair': pair, 'order_type': order_type, 'entry_price': entry, 'timeframe': timeframe, 'allowed_risk': risk}
+
+
+def test_same_timeframe_pair_is_checked_and_attempted():
+    buy = signal('EURUSD', 'buy_limit', 1.0900)
+    sell = signal('EURUSD', 'sell_limit', 1.1100)
+    checked = []
+    attempts = orderplan.resolve_pairing([('15minutes', buy, sell)], 0.003, lambda s: checked.append(s) or True)
+    assert attempts == [('15minutes', buy), ('15minutes', sell)]
+    assert checked == [buy, sell]
+
+
+def test_same_timeframe_pair_stops_even_if_one_side_fails():
+    buy = signal('EURUSD', 'buy_limit', 1.0900)
+    sell = signal('EURUSD', 'sell_limit', 1.1100)
+    later_buy = signal('EURUSD', 'buy_limit', 1.0800, '30minutes')
+    steps = [('15minutes', buy, sell), ('30minutes', later_buy, None)]
+    attempts = orderplan.resolve_pairing(steps, 0.003, lambda s: s is not buy)
+    assert attempts == [('15minutes', buy), ('15minutes', sell)]
+
+
+def test_pair_too_close_skips_timeframe():
+    buy = signal('EURUSD', 'buy_limit', 1.1000)
+    sell = signal('EURUSD', 'sell_limit', 1.1010)
+    later_buy = signal('EURUSD', 'buy_limit', 1.0900, '30minutes')
+    later_sell = signal('EURUSD', 'sell_limit', 1.1100, '30minutes')
+    steps = [('15minutes', buy, sell), ('30minutes', later_buy, later_sell)]
+    attempts = orderplan.resolve_pairing(steps, 0.003, lambda s: True)
+    assert attempts == [('30minutes', later_buy), ('30minutes', later_sell)]
+
+
+def test_single_sides_are_paired_across_timeframes():
+    buy = signal('EURUSD', 'buy_limit', 1.1000)
+    close_sell = signal('EURUSD', 'sell_limit', 1.1010, '30minutes')
+    far_sell = signal('EURUSD', 'sell_limit', 1.1100, '1hour')
+    steps = [('15minutes', buy, None), ('30minutes', None, close_sell), ('1hour', None, far_sell)]
+    attempts = orderplan.resolve_pairing(steps, 0.003, lambda s: True)
+    assert attempts == [('15minutes', buy), ('1hour', far_sell)]
+
+
+def test_failed_side_is_retried_in_next_timeframe():
+    buy = signal('EURUSD', 'buy_limit', 1.1000)
+    later_buy = signal('EURUSD', 'buy_limit', 1.0950, '30minutes')
+    steps = [('15minutes', buy, None), ('30minutes', later_buy, None)]
+    attempts = orderplan.resolve_pairing(steps, 0.003, lambda s: s is not buy)
+    assert attempts == [('15minutes', buy), ('30minutes', later_buy)]
+
+
+def test_risk_tiers_and_multipliers():
+    assert [orderplan.balance_tier(b) for b in (95.9, 96, 143.9, 144)] == [0, 1, 1, 2]
+    assert orderplan.risk_multipliers(50) == {4.0: 1}
+    assert orderplan.risk_multipliers(100) == {4.0: 4, 8.0: 1}
+    assert orderplan.risk_multipliers(240) == {4.0: 5, 8.0: 2, 16.0: 1}
+
+
+def test_template_filters_risk_and_orders_timeframes():
+    signals = [
+        signal('EURUSD', 'buy_limit', 1.09, '1hour'),
+        signal('EURUSD', 'sell_limit', 1.11, '15minutes'),
+        signal('EURUSD', 'buy_limit', 1.08, '15minutes', risk=8.0),
+        signal('GBPUSD', 'buy_limit', 1.25, '4hours'),
+    ]
+    compiler = orderplan.OrderPlanCompiler(signals)
+    low_tier = compiler.template('priority_lowtohigh_timeframe', 0)
+    assert low_tier['unique_symbols'] == ['EURUSD', 'GBPUSD']
+    assert low_tier['symbol_steps']['EURUSD'] == [('15minutes', None, signals[1]), ('1hour', signals[0], None)]
+    assert low_tier['symbol_steps']['GBPUSD'] == [('4hours', signals[3], None)]
+    high_tier = compiler.template('priority_hightolow_timeframe', 1)
+    assert high_tier['symbol_steps']['EURUSD'] == [('1hour', signals[0], None), ('15minutes', signals[2], signals[1])]
+    assert compiler.template('priority_hightolow_timeframe', 1) is high_tier
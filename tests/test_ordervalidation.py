@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import ordervalidation
+
+
+def snapshot(tick_size=0.00001):
+    return ordervalidation.SymbolSnapshot(
+        "EURUSD",
+        SimpleNamespace(trade_mode=4, trade_tick_size=tick_size, point=0.00001, trade_stops_level=20),
+        SimpleNamespace(bid=1.10000, ask=1.10012)
+    )
+
+
+@pytest.mark.parametrize("adjust", [False, True])
+def test_batch_matches_scalar_checks(adjust):
+    rng = np.random.default_rng(11)
+    count = 2000
+    order_types = list(rng.choice(["buy_limit", "sell_limit", "BUY_LIMIT", "stop"], count, p=[0.45, 0.45, 0.05, 0.05]))
+    entries = 1.1 + rng.uniform(-0.01, 0.01, count)
+    profits = np.where(rng.random(count) < 0.9, entries + rng.uniform(-0.005, 0.005, count), 0.0)
+    stops = np.where(rng.random(count) < 0.9, entries + rng.uniform(-0.005, 0.005, count), 0.0)
+    batch = ordervalidation.validate_orders(snapshot(), order_types, entries, profits, stops, adjust)
+    expected = [ordervalidation.validate_order_scalar(snapshot(), order_types[i], entries[i], profits[i], stops[i], adjust)
+                for i in range(count)]
+    assert np.array_equal(np.stack([batch.codes, batch.reasons], axis=1), np.array(expected))
+
+
+def test_rejections_carry_message_and_category():
+    validation, i = ordervalidation.validate_order(snapshot(), "buy_limit", 1.1005, 1.1100, 1.0900)
+    assert not validation.accepted(i)
+    message, category = validation.error(i)
+    assert message.startswith("Invalid buy_limit entry price for EURUSD")
+    assert category == ordervalidation.REASON_CATEGORIES[ordervalidation.REASON_ENTRY]
+
+
+def test_adjust_moves_entry_to_stops_level():
+    validation, i = ordervalidation.validate_order(snapshot(), "sell_limit", 1.0990, 1.0900, 1.1100, adjust=True)
+    assert validation.accepted(i) and validation.codes[i] == ordervalidation.CODE_ADJUST
+    assert validation.prices(i) == pytest.approx((1.10020, 1.0900, 1.1100))
+    notes = validation.adjustments(i)
+    assert len(notes) == 1 and notes[0].startswith("Adjusted sell_limit entry for EURUSD")
+
+
+def test_adjusted_stop_loss_that_breaks_stops_level_is_rejected():
+    validation, i = ordervalidation.validate_order(snapshot(), "sell_limit", 1.0990, 1.0900, 1.0980, adjust=True)
+    assert validation.reasons[i] == ordervalidation.REASON_RISK_VIOLATION
+    assert validation.error(i)[0].startswith("Cannot adjust SL for EURUSD (sell_limit)")
+
+
+def test_valid_order_is_accepted_unchanged():
+    validation, i = ordervalidation.validate_order(snapshot(), "buy_limit", 1.0950, 1.1000, 1.0900)
+    assert validation.codes[i] == ordervalidation.CODE_ACCEPT
+    assert validation.prices(i) == pytest.approx((1.0950, 1.1000, 1.0900))
+    assert validation.error(i) == (None, None)
+
+
+def test_invalid_tick_size_raises_value_error():
+    with pytest.raises(ValueError):
+        ordervalidation.validate_order(snapshot(tick_size=0.0), "buy_limit", 1.0950, 1.1000, 1.0900)
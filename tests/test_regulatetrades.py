@@ -0,0 +1,69 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("MetaTrader5")
+import accountstate
+import marketsnapshot
+import mt5retry
+import regulatetrades
+
+
+def regulator_for(regulate_trades):
+    """A TradeRegulator with two accounts and a stubbed per-account pass, without touching the trade directories."""
+    regulator = regulatetrades.TradeRegulator.__new__(regulatetrades.TradeRegulator)
+    regulator.valid_accounts = [{'user_id': user_id, 'subaccount_id': None} for user_id in (1, 2)]
+    regulator.history_sync = SimpleNamespace(start_cycle=lambda: None)
+    regulator.market_snapshots = marketsnapshot.MarketSnapshots()
+    regulator.account_files = accountstate.AccountStateCache()
+    regulator.account_activity = {}
+    regulator.total_orders_adjusted = regulator.total_orders_failed = 0
+    regulator.load_signals = lambda: True
+    regulator.regulate_trades = regulate_trades
+    return regulator
+
+
+def test_timed_out_pass_is_dropped_and_the_loop_continues():
+    seen = []
+
+    async def regulate_trades(account):
+        seen.append(account['user_id'])
+        if account['user_id'] == 1:
+            raise mt5retry.MT5Timeout("order_send did not finish within 30s")
+        return 1, 0
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(regulator_for(regulate_trades).regulation_loop(60), 0.5)
+    asyncio.run(run())
+    assert seen == [1, 2]
+
+
+def test_stalled_call_stops_the_loop():
+    async def regulate_trades(account):
+        raise mt5retry.MT5Stalled("positions_get refused: an MT5 call has been stuck for 130s")
+
+    with pytest.raises(mt5retry.MT5Stalled):
+        asyncio.run(asyncio.wait_for(regulator_for(regulate_trades).regulation_loop(60), 5))
+
+
+def test_stalled_shard_exits_for_restart(monkeypatch):
+    class StalledRegulator:
+        def __init__(self):
+            self.account_files = accountstate.AccountStateCache()
+
+        async def regulation_loop(self, *args):
+            raise mt5retry.MT5Stalled("symbol_info_tick refused: an MT5 call has been stuck for 130s")
+
+    def exit_process(code):
+        raise SystemExit(code)
+
+    monkeypatch.setattr(regulatetrades, 'TradeRegulator', StalledRegulator)
+    monkeypatch.setattr(regulatetrades.errorjournal, 'set_shard', lambda name: None)
+    monkeypatch.setattr(mt5retry, 'run_sync', lambda *args, **kwargs: None)
+    monkeypatch.setattr(os, '_exit', exit_process)
+    with pytest.raises(SystemExit) as exited:
+        regulatetrades.run_regulation_shard(0, [], None, 60)
+    assert exited.value.code == regulatetrades.REGULATION_STALLED_EXIT_CODE
@@ -0,0 +1,84 @@
+import json
+import os
+
+import signalstore
+
+
+def signal(pair, order_type, entry, timeframe='15minutes', **fields):
+    return {'pair': pair, 'order_type': order_type, 'entry_price': entry, 'timeframe': timeframe, **fields}
+
+
+def open_store(tmp_path):
+    return signalstore.SignalStore(str(tmp_path / "bouncestreamsignals.json"))
+
+
+def test_counts_follow_inserts_and_deletes(tmp_path):
+    store = open_store(tmp_path)
+    ids = store.add([signal('EURUSD', 'buy_limit', 1.1), signal('EURUSD', 'sell_limit', 1.2, '4hour'),
+                     signal('GBPUSD', 'buy_limit', 1.3, '4 hours')])
+    counts = store.counts()
+    assert (counts['15minutes'], counts['4hours'], counts['total']) == (1, 2, 3)
+    assert store.remove_ids([ids[1], 999]) == 1
+    assert store.summary() == {'bouncestream_pendingorders': 2, '5minutes pending orders': 0, '15minutes pending orders': 1,
+                               '30minutes pending orders': 0, '1Hour pending orders': 0, '4Hours pending orders': 1}
+
+
+def test_merge_adds_new_rows_and_drops_tombstones(tmp_path):
+    store = open_store(tmp_path)
+    assert store.replace_all([signal('EURUSD', 'buy_limit', 1.1), signal('GBPUSD', 'buy_limit', 1.3)], [10, 11],
+                             {'signals_max_id': '11'})
+    assert store.merge([signal('USDJPY', 'sell_limit', 150.0, '1hour')], [12], [10], {'signals_max_id': '12'})
+    assert store.server_ids() == {11, 12}
+    assert [s['pair'] for s in store.load()] == ['GBPUSD', 'USDJPY']
+    assert store.get_meta('signals_max_id') == '12'
+    assert store.counts()['total'] == 2
+
+
+def test_rewrite_payloads_counts_changed_signals(tmp_path):
+    store = open_store(tmp_path)
+    store.add([signal('EURUSD', 'buy_limit', 1.1, lot_size=0.01), signal('GBPUSD', 'buy_limit', 1.3, lot_size=0.02)])
+    changed = store.rewrite_payloads(lambda s: {**s, 'lot_size': 0.02}, {'lotsize_fingerprint': 'abc'})
+    assert changed == 1
+    assert [s['lot_size'] for s in store.load()] == [0.02, 0.02]
+    assert store.get_meta('lotsize_fingerprint') == 'abc'
+
+
+def test_data_version_reports_other_connections(tmp_path):
+    store = open_store(tmp_path)
+    other = open_store(tmp_path)
+    version = store.data_version()
+    other.add([signal('EURUSD', 'buy_limit', 1.1)])
+    assert store.data_version() != version
+    version = store.data_version()
+    store.add([signal('GBPUSD', 'buy_limit', 1.3)])
+    assert store.data_version() != version
+
+
+def test_export_changed_rewrites_json_only_after_local_writes(tmp_path):
+    store = open_store(tmp_path)
+    ids = store.add([signal('EURUSD', 'buy_limit', 1.1), signal('GBPUSD', 'buy_limit', 1.3)])
+    assert store.export_changed()
+    with open(store.json_path, 'r', encoding='utf-8') as file:
+        exported = json.load(file)
+    assert exported['bouncestream_pendingorders'] == 2
+    assert [s['pair'] for s in exported['orders']] == ['EURUSD', 'GBPUSD']
+
+    os.utime(store.json_path, ns=(0, 0))
+    assert store.export_changed()
+    assert os.stat(store.json_path).st_mtime_ns == 0  # Unchanged store, file left alone
+
+    store.remove_ids([ids[0]])
+    assert store.export_changed()
+    with open(store.json_path, 'r', encoding='utf-8') as file:
+        exported = json.load(file)
+    assert [s['pair'] for s in exported['orders']] == ['GBPUSD']
+    assert os.stat(store.json_path).st_mtime_ns != 0
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    path = tmp_path / "bouncestreamsignals.json"
+    path.write_text(json.dumps({'orders': [signal('EURUSD', 'buy_limit', 1.1, '1hour')]}), encoding='utf-8')
+    store = signalstore.SignalStore(str(path))
+    assert store.counts()['1hour'] == 1
+    store.remove_ids(store.snapshot()[0])
+    assert signalstore.SignalStore(str(path)).counts()['total'] == 0
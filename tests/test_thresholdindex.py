@@ -0,0 +1,48 @@
+import thresholdindex
+
+
+def test_next_trigger_picks_first_level_that_improves_stop_loss():
+    levels = [(1.1050, 1.1000), (1.1100, 1.1050), (1.1200, 1.1150)]
+    assert thresholdindex.next_trigger(True, 0.0, levels) == 1.1050
+    assert thresholdindex.next_trigger(True, 1.1000, levels) == 1.1100
+    assert thresholdindex.next_trigger(True, 1.1150, levels) is None
+    sell_levels = [(1.0950, 1.1000), (1.0900, 1.0950)]
+    assert thresholdindex.next_trigger(False, 0.0, sell_levels) == 1.0950
+    assert thresholdindex.next_trigger(False, 1.1000, sell_levels) == 1.0900
+    assert thresholdindex.next_trigger(False, 1.0950, sell_levels) is None
+
+
+def test_crossed_returns_buys_below_ask_and_sells_above_bid():
+    index = thresholdindex.ThresholdIndex()
+    index.update(1, 'EURUSD', True, 1.1050, 0.0)
+    index.update(2, 'EURUSD', True, 1.1100, 0.0)
+    index.update(3, 'EURUSD', False, 1.0950, 0.0)
+    index.update(4, 'EURUSD', False, 1.0900, 0.0)
+    index.update(5, 'GBPUSD', True, 1.2500, 0.0)
+    assert index.crossed('EURUSD', 1.1000, 1.1002) == []
+    assert index.crossed('EURUSD', 1.1060, 1.1062) == [1]
+    assert sorted(index.crossed('EURUSD', 1.0940, 1.0942)) == [3]
+    assert sorted(index.crossed('EURUSD', 1.0800, 1.1200)) == [1, 2, 3, 4]
+    assert index.crossed('USDJPY', 150.0, 150.1) == []
+
+
+def test_update_reindexes_and_remove_disarms():
+    index = thresholdindex.ThresholdIndex()
+    index.update(1, 'EURUSD', True, 1.1050, 0.0)
+    assert index.is_current(1, 0.0)
+    index.update(1, 'EURUSD', True, 1.1100, 1.1000)
+    assert not index.is_current(1, 0.0) and index.is_current(1, 1.1000)
+    assert index.crossed('EURUSD', 1.1060, 1.1062) == []
+    index.update(2, 'GBPUSD', False, None, 1.2600)
+    assert index.armed_symbols() == ['EURUSD']
+    index.retain({2})
+    assert index.armed_symbols() == [] and index.is_current(2, 1.2600)
+
+
+def test_nearest_reports_relative_distance_to_uncrossed_triggers():
+    index = thresholdindex.ThresholdIndex()
+    assert index.nearest('EURUSD', 1.1000, 1.1000) is None
+    index.update(1, 'EURUSD', True, 1.1110, 0.0)
+    index.update(2, 'EURUSD', False, 1.0945, 0.0)
+    assert abs(index.nearest('EURUSD', 1.1000, 1.1000) - 0.005) < 1e-9
+    assert abs(index.nearest('EURUSD', 1.1100, 1.1100) - 0.0009009) < 1e-6
@@ -0,0 +1,85 @@
+import bisect
+from typing import List, Dict, Optional, Tuple
+
+def next_trigger(is_buy: bool, current_sl: float, levels: List[Tuple[float, float]]) -> Optional[float]:
+    """Return the price at which a position's stop-loss first becomes movable, or None if no level improves it.
+
+    levels holds (trigger price, stop-loss target) pairs. A buy's level applies once the ask is above its
+    trigger and improves a stop-loss below its target; a sell's once the bid is below its trigger and
+    improves a stop-loss above its target. A position without stop-loss (0.0) is improved by every level.
+    """
+    triggers = [
+        trigger for trigger, target in levels
+        if current_sl == 0.0 or (current_sl < target if is_buy else current_sl > target)
+    ]
+    if not triggers:
+        return None
+    return min(triggers) if is_buy else max(triggers)
+
+# Threshold Index Class
+class ThresholdIndex:
+    """Per-symbol sorted trigger prices of one account's open positions.
+
+    Triggers are computed when a position is first seen or its stop-loss changes. Each cycle one tick per
+    symbol is bisected against the sorted triggers, so only positions whose price crossed a trigger are
+    evaluated; a crossed position stays armed until its stop-loss actually moves.
+    """
+    def __init__(self):
+        self.entries: Dict[int, Tuple[str, bool, Optional[float], float]] = {}  # ticket -> (symbol, is_buy, trigger, sl)
+        self.buy_triggers: Dict[str, List[Tuple[float, int]]] = {}
+        self.sell_triggers: Dict[str, List[Tuple[float, int]]] = {}
+
+    def is_current(self, ticket: int, current_sl: float) -> bool:
+        """Return True if the ticket is indexed for its current stop-loss."""
+        entry = self.entries.get(ticket)
+        return entry is not None and entry[3] == current_sl
+
+    def update(self, ticket: int, symbol: str, is_buy: bool, trigger: Optional[float], current_sl: float) -> None:
+        """Index (or re-index) a position; a None trigger keeps it tracked without ever firing."""
+        self.remove(ticket)
+        self.entries[ticket] = (symbol, is_buy, trigger, current_sl)
+        if trigger is not None:
+            triggers = self.buy_triggers if is_buy else self.sell_triggers
+            bisect.insort(triggers.setdefault(symbol, []), (trigger, ticket))
+
+    def remove(self, ticket: int) -> None:
+        """Drop a position from the index."""
+        entry = self.entries.pop(ticket, None)
+        if entry is None or entry[2] is None:
+            return
+        symbol, is_buy, trigger, _ = entry
+        triggers = (self.buy_triggers if is_buy else self.sell_triggers).get(symbol, [])
+        index = bisect.bisect_left(triggers, (trigger, ticket))
+        if index < len(triggers) and triggers[index] == (trigger, ticket):
+            del triggers[index]
+
+    def retain(self, tickets: set) -> None:
+        """Drop every indexed position that is no longer open."""
+        for ticket in [ticket for ticket in self.entries if ticket not in tickets]:
+            self.remove(ticket)
+
+    def armed_symbols(self) -> List[str]:
+        """Symbols with at least one position that can still fire."""
+        return sorted({symbol for symbol, triggers in self.buy_triggers.items() if triggers} |
+                      {symbol for symbol, triggers in self.sell_triggers.items() if triggers})
+
+    def crossed(self, symbol: str, bid: float, ask: float) -> List[int]:
+        """Return the tickets whose trigger the tick has crossed: buys with trigger < ask, sells with trigger > bid."""
+        buys = self.buy_triggers.get(symbol, [])
+        sells = self.sell_triggers.get(symbol, [])
+        fired = [ticket for _, ticket in buys[:bisect.bisect_left(buys, (ask, -1))]]
+        fired.extend(ticket for _, ticket in sells[bisect.bisect_right(sells, (bid, float('inf'))):])
+        return fired
+
+    def nearest(self, symbol: str, bid: float, ask: float) -> Optional[float]:
+        """Return the smallest distance, relative to price, from the tick to a trigger it has not crossed yet."""
+        distances = []
+        buys = self.buy_triggers.get(symbol, [])
+        index = bisect.bisect_left(buys, (ask, -1))
+        if index < len(buys) and ask > 0:
+            distances.append((buys[index][0] - ask) / ask)
+        sells = self.sell_triggers.get(symbol, [])
+        index = bisect.bisect_right(sells, (bid, float('inf'))) - 1
+        if index >= 0 and bid > 0:
+            distances.append((bid - sells[index][0]) / bid)
+        return min(distances) if distances else None
@@ -4,7 +4,11 @@ from colorama import Fore, Style, init
 import time
 import json
 import os
-import difflib  # For closest matches in fallback
+import errorjournal
+import marketwatch
+import ordervalidation
+import signalstore
+import symbolresolver
 
 # Initialize colorama for colored console output
 init()
@@ -50,7 +54,6 @@ TERMINAL_PATH = r"C:\Program Files\MetaTrader 5\terminal64.exe"  # Update with y
 BASE_OUTPUT_FOLDER = r"C:\xampp\htdocs\CIPHER\cipher trader\market\bouncestreamsignals.json"
 MAX_RETRIES = 5
 RETRY_DELAY = 3
-TEST_ORDER_VOLUME = 0.01  # Volume for test orders
 
 def initialize_mt5():
     """Initialize MT5 terminal and login."""
@@ -112,108 +115,22 @@ def get_available_symbols():
         return []
 
 def get_exact_symbol_match(json_symbol, available_symbols):
-    """Find the exact server symbol matching the JSON symbol (case-insensitive)."""
-    json_lower = json_symbol.lower()
-    lower_available = [s.lower() for s in available_symbols]
-    if json_lower in lower_available:
-        # Get the exact case version
-        index = lower_available.index(json_lower)
-        exact = available_symbols[index]
-        log_and_print(f"Matched '{json_symbol}' to exact server symbol: '{exact}'", "DEBUG")
-        return exact
-    else:
-        # Fallback: Find closest matches for debugging
-        close_matches = difflib.get_close_matches(json_symbol, available_symbols, n=3, cutoff=0.6)
-        log_and_print(f"No exact match for '{json_symbol}'. Closest server symbols: {', '.join(close_matches) if close_matches else 'None'}", "WARNING")
-        return None
+    """Find the server symbol matching the JSON symbol (case-insensitive, then normalized aliases)."""
+    server_symbol = symbolresolver.resolve_symbol(json_symbol, available_symbols)
+    if server_symbol is not None:
+        log_and_print(f"Matched '{json_symbol}' to server symbol: '{server_symbol}'", "DEBUG")
+    return server_symbol
 
 def load_market_signals():
+    """Load signals from the signal store (seeded from bouncestreamsignals.json on first use)."""
     try:
-        if not os.path.exists(BASE_OUTPUT_FOLDER):
-            log_and_print(f"JSON file not found at {BASE_OUTPUT_FOLDER}", "ERROR")
-            return []
-        with open(BASE_OUTPUT_FOLDER, 'r') as file:
-            data = json.load(file)
-        if not isinstance(data, dict) or 'orders' not in data:
-            log_and_print("Invalid JSON structure: Expected a dictionary with 'orders' key", "ERROR")
-            return []
-        signals = data['orders']
-        if not isinstance(signals, list):
-            log_and_print("Invalid JSON structure: 'orders' must be a list", "ERROR")
-            return []
-        log_and_print(f"Loaded {len(signals)} signals from JSON 'orders' array, expected 387 per metadata", "INFO")
+        signals = signalstore.get_store(BASE_OUTPUT_FOLDER).load()
+        log_and_print(f"Loaded {len(signals)} signals from the signal store, expected 387 per metadata", "INFO")
         return signals
-    except json.JSONDecodeError as e:
-        log_and_print(f"Error decoding JSON file: {str(e)}", "ERROR")
-        return []
     except Exception as e:
-        log_and_print(f"Error loading signals from JSON: {str(e)}", "ERROR")
+        log_and_print(f"Error loading signals from the signal store: {str(e)}", "ERROR")
         return []
       
-def place_test_order(symbol):
-    """Attempt to place and immediately cancel a test order to ensure symbol is in Market Watch."""
-    try:
-        # Ensure symbol is selected
-        if not mt5.symbol_select(symbol, True):
-            log_and_print(f"Failed to select {symbol} for test order, error: {mt5.last_error()}", "ERROR")
-            return False
-
-        # Get symbol information
-        symbol_info = mt5.symbol_info(symbol)
-        if symbol_info is None:
-            log_and_print(f"Cannot retrieve info for {symbol}", "ERROR")
-            return False
-
-        # Check if symbol is tradeable
-        if not symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
-            log_and_print(f"Symbol {symbol} is not tradeable (trade mode: {symbol_info.trade_mode})", "ERROR")
-            return False
-
-        # Get current market price
-        price = mt5.symbol_info_tick(symbol)
-        if price is None:
-            log_and_print(f"Cannot retrieve tick data for {symbol}, error: {mt5.last_error()}", "ERROR")
-            return False
-
-        # Prepare a test buy order
-        request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "volume": TEST_ORDER_VOLUME,
-            "type": mt5.ORDER_TYPE_BUY,
-            "price": price.ask,
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_IOC,
-        }
-
-        # Send test order
-        result = mt5.order_send(request)
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            log_and_print(f"Test order for {symbol} failed, error: {result.retcode}, {mt5.last_error()}", "ERROR")
-            return False
-
-        # Order placed successfully, now cancel it
-        log_and_print(f"Test order for {symbol} placed successfully (Order #{result.order})", "SUCCESS")
-
-        # Prepare cancellation request
-        cancel_request = {
-            "action": mt5.TRADE_ACTION_REMOVE,
-            "order": result.order
-        }
-
-        # Attempt to cancel the order
-        cancel_result = mt5.order_send(cancel_request)
-        if cancel_result.retcode != mt5.TRADE_RETCODE_DONE:
-            log_and_print(f"Failed to cancel test order for {symbol} (Order #{result.order}), error: {cancel_result.retcode}, {mt5.last_error()}", "WARNING")
-        else:
-            log_and_print(f"Test order for {symbol} (Order #{result.order}) canceled successfully", "SUCCESS")
-
-        return True
-
-    except Exception as e:
-        log_and_print(f"Error processing test order for {symbol}: {str(e)}", "ERROR")
-        return False
-
 def save_failed_orders(symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk, error_message, error_category="unknown", signal=None):
     """Save a single failed pending order to a categorized JSON file incrementally with timeframe-specific summary."""
     # Define output paths based on error category
@@ -225,17 +142,6 @@ def save_failed_orders(symbol, order_type, entry_price, profit_price, stop_loss,
     }
     output_path = output_paths.get(error_category, output_paths["unknown"])
 
-    # Define summary structure for all error categories
-    summary_structure = {
-        "total_failed_orders": 0,
-        "5m_failed_orders": 0,
-        "15m_failed_orders": 0,
-        "30m_failed_orders": 0,
-        "1h_failed_orders": 0,
-        "4h_failed_orders": 0,
-        "orders": []
-    }
-
     # Extract timeframe from signal, default to "unknown" if not present
     timeframe = signal.get("timeframe", "unknown") if signal else "unknown"
     # Normalize timeframe to standard format
@@ -262,56 +168,18 @@ def save_failed_orders(symbol, order_type, entry_price, profit_price, stop_loss,
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
     }
 
-    try:
-        # Ensure the directory exists
-        os.makedirs(base_path, exist_ok=True)
-        
-        # Load existing data or initialize with summary structure
-        existing_data = summary_structure.copy()
-        if os.path.exists(output_path):
-            try:
-                with open(output_path, 'r') as file:
-                    existing_data = json.load(file)
-                if not isinstance(existing_data, dict) or "orders" not in existing_data:
-                    log_and_print(f"Corrupted JSON file at {output_path}, resetting with new structure", "WARNING")
-                    existing_data = summary_structure.copy()
-            except json.JSONDecodeError:
-                log_and_print(f"Corrupted JSON file at {output_path}, starting fresh", "WARNING")
-                existing_data = summary_structure.copy()
-
-        # Append new failed order to orders list
-        existing_data["orders"].append(failed_order)
-
-        # Update summary counts
-        existing_data["total_failed_orders"] = len(existing_data["orders"])
-        
-        # Update timeframe-specific count
-        timeframe_key = {
-            "5m": "5m_failed_orders",
-            "15m": "15m_failed_orders",
-            "30m": "30m_failed_orders",
-            "1h": "1h_failed_orders",
-            "4h": "4h_failed_orders"
-        }.get(normalized_timeframe)
-        
-        if timeframe_key:
-            existing_data[timeframe_key] = existing_data.get(timeframe_key, 0) + 1
-        else:
-            log_and_print(f"Unrecognized timeframe '{timeframe}' for {symbol}, not updating timeframe-specific count", "WARNING")
-
-        # Save updated data to JSON file
-        with open(output_path, 'w') as file:
-            json.dump(existing_data, file, indent=4)
-        log_and_print(
-            f"Successfully saved failed order for {symbol} to {output_path} "
-            f"(Category: {error_category}, Timeframe: {normalized_timeframe})",
-            "SUCCESS"
-        )
-    except Exception as e:
-        log_and_print(f"Error saving failed order for {symbol} to {output_path}: {str(e)}", "ERROR")
+    # Journal the failed order; the summary JSON is materialized once before filtering
+    errorjournal.get_journal(output_path, layout="summary").append(failed_order)
+    if normalized_timeframe not in errorjournal.TIMEFRAME_SUMMARY_KEYS:
+        log_and_print(f"Unrecognized timeframe '{timeframe}' for {symbol}, not updating timeframe-specific count", "WARNING")
+    log_and_print(
+        f"Journaled failed order for {symbol} to {output_path} "
+        f"(Category: {error_category}, Timeframe: {normalized_timeframe})",
+        "DEBUG"
+    )
 
 def filter_failed_orders():
-    """Filter failed orders from invalid entry and stop-loss JSONs, save to filteredsignals.json, and remove them from bouncestreamsignals.json."""
+    """Filter failed orders from invalid entry and stop-loss JSONs, save to filteredsignals.json, and remove them from the signal store."""
     log_and_print("===== Filtering Failed Orders and Updating Bouncestream Signals =====", "TITLE")
     
     base_path = r"C:\xampp\htdocs\CIPHER\cipher trader\market\errors"
@@ -319,6 +187,9 @@ def filter_failed_orders():
     stop_loss_path = os.path.join(base_path, "failedordersbystoploss.json")
     output_path = os.path.join(base_path, "filteredsignals.json")
     bouncestream_path = BASE_OUTPUT_FOLDER  # Path to bouncestreamsignals.json
+
+    # Materialize journaled failed orders so the summary files are complete before reading them
+    errorjournal.materialize_all([invalid_entry_path, stop_loss_path, os.path.join(base_path, "failedpendingorders.json")])
     
     # Initialize structure for filteredsignals.json
     filtered_data = {
@@ -372,281 +243,105 @@ def filter_failed_orders():
     except Exception as e:
         log_and_print(f"Error saving filtered signals to {output_path}: {str(e)}", "ERROR")
     
-    # Update bouncestreamsignals.json by removing failed orders
-    if os.path.exists(bouncestream_path):
-        try:
-            with open(bouncestream_path, 'r') as file:
-                bouncestream_data = json.load(file)
-            
-            if not isinstance(bouncestream_data, dict) or 'orders' not in bouncestream_data:
-                log_and_print(f"Invalid structure in {bouncestream_path}: Expected a dictionary with 'orders' key", "ERROR")
-                return filtered_data
-            
-            # Normalize timeframe for matching
-            timeframe_map = {
-                "5m": "5m", "5 minutes": "5m", "5minutes": "5m", "M5": "5m",
-                "15m": "15m", "15 minutes": "15m", "15minutes": "15m", "M15": "15m",
-                "30m": "30m", "30 minutes": "30m", "30minutes": "30m", "M30": "30m",
-                "1h": "1h", "1 hour": "1h", "1hour": "1h", "H1": "1h",
-                "4h": "4h", "4 hours": "4h", "4hours": "4h", "H4": "4h"
-            }
-            
-            # Create a set of failed orders for efficient lookup
-            failed_set = {(order["pair"].lower(), timeframe_map.get(order["timeframe"].lower(), order["timeframe"].lower())) for order in failed_orders}
-            
-            # Filter out failed orders
-            original_order_count = len(bouncestream_data["orders"])
-            filtered_orders = []
-            removed_count = 0
-            
-            for order in bouncestream_data["orders"]:
-                if not isinstance(order, dict):
-                    log_and_print(f"Skipping invalid order format in bouncestreamsignals.json: {order}", "WARNING")
-                    continue
-                pair = order.get("pair", "unknown").lower()
-                timeframe = order.get("timeframe", "unknown")
-                normalized_timeframe = timeframe_map.get(timeframe.lower(), timeframe.lower())
-                if (pair, normalized_timeframe) not in failed_set:
-                    filtered_orders.append(order)
-                else:
-                    removed_count += 1
-                    log_and_print(f"Removed order for {pair} ({normalized_timeframe}) from bouncestreamsignals.json", "INFO")
-            
-            # Update orders list
-            bouncestream_data["orders"] = filtered_orders
-            
-            # Update summary counts
-            bouncestream_data["bouncestream_pendingorders"] = len(filtered_orders)
-            
-            # Recalculate timeframe-specific counts
-            timeframe_counts = {
-                "5m": 0,
-                "15m": 0,
-                "30m": 0,
-                "1h": 0,
-                "4h": 0
-            }
-            for order in filtered_orders:
-                timeframe = order.get("timeframe", "unknown")
-                normalized_timeframe = timeframe_map.get(timeframe.lower(), timeframe.lower())
-                if normalized_timeframe in timeframe_counts:
-                    timeframe_counts[normalized_timeframe] += 1
-            
-            # Update JSON structure with new counts
-            bouncestream_data["5minutes pending orders"] = timeframe_counts["5m"]
-            bouncestream_data["15minutes pending orders"] = timeframe_counts["15m"]
-            bouncestream_data["30minutes pending orders"] = timeframe_counts["30m"]
-            bouncestream_data["1Hour pending orders"] = timeframe_counts["1h"]
-            bouncestream_data["4Hours pending orders"] = timeframe_counts["4h"]
-            
-            # Save updated bouncestreamsignals.json
-            try:
-                with open(bouncestream_path, 'w') as file:
-                    json.dump(bouncestream_data, file, indent=4)
-                log_and_print(
-                    f"Successfully updated {bouncestream_path}: "
-                    f"Removed {removed_count} failed orders, "
-                    f"New total orders: {bouncestream_data['bouncestream_pendingorders']}, "
-                    f"5m: {bouncestream_data['5minutes pending orders']}, "
-                    f"15m: {bouncestream_data['15minutes pending orders']}, "
-                    f"30m: {bouncestream_data['30minutes pending orders']}, "
-                    f"1h: {bouncestream_data['1Hour pending orders']}, "
-                    f"4h: {bouncestream_data['4Hours pending orders']}",
-                    "SUCCESS"
-                )
-            except Exception as e:
-                log_and_print(f"Error saving updated {bouncestream_path}: {str(e)}", "ERROR")
-                
-        except (json.JSONDecodeError, Exception) as e:
-            log_and_print(f"Error reading or processing {bouncestream_path}: {str(e)}", "ERROR")
-    
-    return filtered_data
-
-def place_pending_order(symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk):
-    """Validate a pending order (buy_limit or sell_limit), adjust entry if needed to meet stops_level, 
-    and mark as success if valid, otherwise save errors to JSON."""
+    # Remove failed orders from the signal store; bouncestreamsignals.json is exported once at the end of the run
     try:
-        # Ensure symbol is selected and visible
-        if not mt5.symbol_select(symbol, True):
-            error_message = f"Failed to select {symbol} for pending order, error: {mt5.last_error()}"
-            log_and_print(error_message, "ERROR")
-            return False, None, error_message, "unknown"
-
-        # Get symbol information
-        symbol_info = mt5.symbol_info(symbol)
-        if symbol_info is None:
-            error_message = f"Cannot retrieve info for {symbol}"
-            log_and_print(error_message, "ERROR")
-            return False, None, error_message, "unknown"
-
-        # Check if symbol is tradeable
-        if not symbol_info.trade_mode == mt5.SYMBOL_TRADE_MODE_FULL:
-            error_message = f"Symbol {symbol} is not tradeable (trade mode: {symbol_info.trade_mode})"
-            log_and_print(error_message, "ERROR")
-            return False, None, error_message, "unknown"
-
-        # Get current market price
-        tick = mt5.symbol_info_tick(symbol)
-        if tick is None:
-            error_message = f"Cannot retrieve tick data for {symbol}, error: {mt5.last_error()}"
-            log_and_print(error_message, "ERROR")
-            return False, None, error_message, "unknown"
-
-        # Get symbol constraints
-        tick_size = symbol_info.trade_tick_size
-        point = symbol_info.point
-        stops_level = symbol_info.trade_stops_level * point  # Minimum distance in price units
-        current_bid = tick.bid
-        current_ask = tick.ask
+        store = signalstore.get_store(bouncestream_path)
+        signal_ids, signals = store.snapshot()
+
+        # Normalize timeframe for matching
+        timeframe_map = {
+            "5m": "5m", "5 minutes": "5m", "5minutes": "5m", "M5": "5m",
+            "15m": "15m", "15 minutes": "15m", "15minutes": "15m", "M15": "15m",
+            "30m": "30m", "30 minutes": "30m", "30minutes": "30m", "M30": "30m",
+            "1h": "1h", "1 hour": "1h", "1hour": "1h", "H1": "1h",
+            "4h": "4h", "4 hours": "4h", "4hours": "4h", "H4": "4h"
+        }
 
-        # Normalize prices to tick size (initial)
-        entry_price = round(float(entry_price) / tick_size) * tick_size
-        profit_price = round(float(profit_price) / tick_size) * tick_size if profit_price else 0.0
-        stop_loss = round(float(stop_loss) / tick_size) * tick_size if stop_loss else 0.0
+        # Create a set of failed orders for efficient lookup
+        failed_set = {(order["pair"].lower(), timeframe_map.get(order["timeframe"].lower(), order["timeframe"].lower())) for order in failed_orders}
+
+        # Collect the store ids of failed orders
+        ids_to_remove = []
+        for signal_id, order in zip(signal_ids, signals):
+            pair = order.get("pair", "unknown").lower()
+            timeframe = order.get("timeframe", "unknown")
+            normalized_timeframe = timeframe_map.get(timeframe.lower(), timeframe.lower())
+            if (pair, normalized_timeframe) in failed_set:
+                ids_to_remove.append(signal_id)
+                log_and_print(f"Removed order for {pair} ({normalized_timeframe}) from bouncestreamsignals.json", "INFO")
+
+        removed_count = store.remove_ids(ids_to_remove)
+        if removed_count < 0:
+            log_and_print(f"Error saving updated {bouncestream_path}", "ERROR")
+            return filtered_data
+        summary = store.summary()
+        log_and_print(
+            f"Successfully updated {bouncestream_path}: "
+            f"Removed {removed_count} failed orders, "
+            f"New total orders: {summary['bouncestream_pendingorders']}, "
+            f"5m: {summary['5minutes pending orders']}, "
+            f"15m: {summary['15minutes pending orders']}, "
+            f"30m: {summary['30minutes pending orders']}, "
+            f"1h: {summary['1Hour pending orders']}, "
+            f"4h: {summary['4Hours pending orders']}",
+            "SUCCESS"
+        )
+    except Exception as e:
+        log_and_print(f"Error reading or processing {bouncestream_path}: {str(e)}", "ERROR")
+    
+    return filtered_data
 
-        # Log initial price details for debugging
+def take_symbol_snapshot(symbol):
+    """Read one symbol's spec and tick once for all of its signals; returns (snapshot, error_message)."""
+    snapshot, error_message = ordervalidation.take_symbol_snapshot(mt5, symbol)
+    if snapshot is not None:
         log_and_print(
-            f"Validating order for {symbol}: "
-            f"Order Type={order_type}, Entry={entry_price}, TP={profit_price}, SL={stop_loss}, "
-            f"Current Bid={current_bid}, Ask={current_ask}, Stops Level={stops_level}, Tick Size={tick_size}, "
-            f"Allowed Risk={allowed_risk}",
+            f"Snapshot for {symbol}: Bid={snapshot.bid}, Ask={snapshot.ask}, "
+            f"Stops Level={snapshot.stops_level}, Tick Size={snapshot.tick_size}",
             "DEBUG"
         )
-
-        # Validate/adjust order type
-        is_buy_limit = order_type.lower() == "buy_limit"
-        is_sell_limit = order_type.lower() == "sell_limit"
-        if not (is_buy_limit or is_sell_limit):
-            error_message = f"Unsupported order type {order_type} for {symbol}"
+    return snapshot, error_message
+
+def validate_symbol_orders(snapshot, order_types, entry_prices, profit_prices, stop_losses, allowed_risks):
+    """Validate all pending orders of one symbol in one ordervalidation pass, adjusting entries to meet stops_level.
+
+    Returns one (success, error_message, error_category) tuple per order, in input order.
+    """
+    symbol = snapshot.symbol
+    validation = ordervalidation.validate_orders(snapshot, order_types, entry_prices, profit_prices, stop_losses, adjust=True)
+    results = []
+    for i, order_type in enumerate(order_types):
+        for note in validation.adjustments(i):
+            log_and_print(note, "WARNING")
+        if not validation.accepted(i):
+            error_message, error_category = validation.error(i)
             log_and_print(error_message, "ERROR")
-            return False, None, error_message, "unknown"
-
-        # Dynamically adjust entry price to meet stops_level if invalid
-        adjustment_made = False
-        original_entry = entry_price
-        if is_buy_limit:
-            # Buy limit: entry must be below current ask by at least stops_level
-            min_price = current_ask - stops_level
-            if entry_price > min_price:
-                # Adjust entry down to the maximum valid level (just below ask by stops_level)
-                entry_price = min_price
-                adjustment_made = True
-                log_and_print(
-                    f"Adjusted buy_limit entry for {symbol} from {original_entry} to {entry_price} "
-                    f"(to meet stops_level: <= {min_price})",
-                    "WARNING"
-                )
-        elif is_sell_limit:
-            # Sell limit: entry must be above current bid by at least stops_level
-            max_price = current_bid + stops_level
-            if entry_price < max_price:
-                # Adjust entry up to the minimum valid level (just above bid by stops_level)
-                entry_price = max_price
-                adjustment_made = True
-                log_and_print(
-                    f"Adjusted sell_limit entry for {symbol} from {original_entry} to {entry_price} "
-                    f"(to meet stops_level: >= {max_price})",
-                    "WARNING"
-                )
-
-        # Re-normalize adjusted entry to tick size
-        entry_price = round(entry_price / tick_size) * tick_size
-
-        # Now validate/adjust SL and TP relative to ADJUSTED entry
-        # (Re-normalize them again if needed)
-        profit_price = round(float(profit_price) / tick_size) * tick_size if profit_price else 0.0
-        stop_loss = round(float(stop_loss) / tick_size) * tick_size if stop_loss else 0.0
-
-        if is_buy_limit:
-            # For buy_limit: SL <= entry_price, TP >= entry_price
-            if stop_loss and stop_loss > entry_price:
-                # Adjust SL down to valid level (but check if it violates risk)
-                original_sl = stop_loss
-                stop_loss = entry_price  # Minimal adjustment; you could subtract a buffer
-                if abs(entry_price - stop_loss) < stops_level:  # If still too close after adjust
-                    error_message = (
-                        f"Cannot adjust SL for {symbol} (buy_limit) without violating stops_level. "
-                        f"Original SL: {original_sl}, Adjusted Entry: {entry_price}"
-                    )
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "adjusted_risk_violation"
-                log_and_print(
-                    f"Adjusted invalid SL for {symbol} (buy_limit) from {original_sl} to {stop_loss}",
-                    "WARNING"
-                )
-            if profit_price and profit_price < entry_price:
-                profit_price = entry_price + stops_level  # Minimal valid TP
-                log_and_print(
-                    f"Adjusted invalid TP for {symbol} (buy_limit) to {profit_price} (min distance)",
-                    "WARNING"
-                )
-            # Check distances (post-adjustment)
-            if stop_loss and abs(entry_price - stop_loss) < stops_level:
-                error_message = (
-                    f"SL too close to adjusted entry for {symbol}. "
-                    f"SL: {stop_loss}, Entry: {entry_price}, Distance: {abs(entry_price - stop_loss)}, "
-                    f"Required: >= {stops_level}"
-                )
-                log_and_print(error_message, "ERROR")
-                return False, None, error_message, "stop_loss"
-            if profit_price and abs(profit_price - entry_price) < stops_level:
-                error_message = (
-                    f"TP too close to adjusted entry for {symbol}. "
-                    f"TP: {profit_price}, Entry: {entry_price}, Distance: {abs(profit_price - entry_price)}, "
-                    f"Required: >= {stops_level}"
-                )
-                log_and_print(error_message, "ERROR")
-                return False, None, error_message, "stop_loss"
-        elif is_sell_limit:
-            # For sell_limit: SL >= entry_price, TP <= entry_price
-            if stop_loss and stop_loss < entry_price:
-                # Adjust SL up to valid level
-                original_sl = stop_loss
-                stop_loss = entry_price  # Minimal adjustment
-                if abs(entry_price - stop_loss) < stops_level:
-                    error_message = (
-                        f"Cannot adjust SL for {symbol} (sell_limit) without violating stops_level. "
-                        f"Original SL: {original_sl}, Adjusted Entry: {entry_price}"
-                    )
-                    log_and_print(error_message, "ERROR")
-                    return False, None, error_message, "adjusted_risk_violation"
-                log_and_print(
-                    f"Adjusted invalid SL for {symbol} (sell_limit) from {original_sl} to {stop_loss}",
-                    "WARNING"
-                )
-            if profit_price and profit_price > entry_price:
-                profit_price = entry_price - stops_level  # Minimal valid TP
-                log_and_print(
-                    f"Adjusted invalid TP for {symbol} (sell_limit) to {profit_price} (min distance)",
-                    "WARNING"
-                )
-            # Check distances (post-adjustment)
-            if stop_loss and abs(entry_price - stop_loss) < stops_level:
-                error_message = (
-                    f"SL too close to adjusted entry for {symbol}. "
-                    f"SL: {stop_loss}, Entry: {entry_price}, Distance: {abs(entry_price - stop_loss)}, "
-                    f"Required: >= {stops_level}"
-                )
-                log_and_print(error_message, "ERROR")
-                return False, None, error_message, "stop_loss"
-            if profit_price and abs(profit_price - entry_price) < stops_level:
-                error_message = (
-                    f"TP too close to adjusted entry for {symbol}. "
-                    f"TP: {profit_price}, Entry: {entry_price}, Distance: {abs(profit_price - entry_price)}, "
-                    f"Required: >= {stops_level}"
-                )
-                log_and_print(error_message, "ERROR")
-                return False, None, error_message, "stop_loss"
+            results.append((False, error_message, error_category))
+            continue
 
         # If all validations pass (post-adjustment), mark as success
-        adjustment_note = f" (entry adjusted from {original_entry} to {entry_price})" if adjustment_made else ""
+        entry_price, profit_price, stop_loss = validation.prices(i)
+        adjustment_note = f" (entry adjusted from {float(validation.original_entry[i])} to {entry_price})" if validation.entry_adjusted[i] else ""
         log_and_print(
             f"Pending {order_type} order for {symbol} validated successfully at {entry_price}{adjustment_note} "
-            f"with TP {profit_price}, SL {stop_loss}, Allowed Risk={allowed_risk} (Order not sent as per request)",
+            f"with TP {profit_price}, SL {stop_loss}, Allowed Risk={allowed_risks[i]} (Order not sent as per request)",
             "SUCCESS"
         )
-        return True, None, None, None
+        results.append((True, None, None))
+    return results
 
+def place_pending_order(symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk):
+    """Validate a single pending order (buy_limit or sell_limit) against a fresh snapshot of its symbol."""
+    try:
+        snapshot, error_message = take_symbol_snapshot(symbol)
+        if snapshot is None:
+            log_and_print(error_message, "ERROR")
+            return False, None, error_message, "unknown"
+        success, error_message, error_category = validate_symbol_orders(
+            snapshot, [order_type], [float(entry_price)], [float(profit_price) if profit_price else 0.0],
+            [float(stop_loss) if stop_loss else 0.0], [allowed_risk]
+        )[0]
+        return success, None, error_message, error_category
     except Exception as e:
         error_message = f"Error validating pending order for {symbol}: {str(e)}"
         log_and_print(error_message, "ERROR")
@@ -680,13 +375,7 @@ def add_to_watchlist_and_place_orders():
         r"C:\xampp\htdocs\CIPHER\cipher trader\market\errors\filteredsignals.json"  # Added filteredsignals.json
     ]
     for f in error_files:
-        if os.path.exists(f):
-            try:
-                with open(f, 'w') as file:
-                    json.dump([], file)  # Clear the file
-                log_and_print(f"Cleared error file {f}", "DEBUG")
-            except Exception as e:
-                log_and_print(f"Error clearing {f}: {str(e)}", "WARNING")
+        errorjournal.get_journal(f, layout="summary").reset()  # Clear the file and any pending journal
 
     added_symbols = []
     failed_symbols = []
@@ -710,40 +399,28 @@ def add_to_watchlist_and_place_orders():
             invalid_signals.append(signal)
             continue
 
+    server_symbols = {}
     for json_symbol in unique_symbols:
-        try:
-            server_symbol = get_exact_symbol_match(json_symbol, available_symbols)
-            if server_symbol is None:
-                log_and_print(f"Skipping {json_symbol}: No server match found", "ERROR")
-                failed_symbols.append(json_symbol)
-                continue
-
-            # Attempt to select the symbol directly
-            if mt5.symbol_select(server_symbol, True):
-                log_and_print(f"Symbol {server_symbol} selected directly in Market Watch", "SUCCESS")
-                added_symbols.append(server_symbol)
-                continue
-
-            # If direct selection fails, attempt test order
-            log_and_print(f"Direct selection of {server_symbol} failed, attempting test order...", "WARNING")
-            for attempt in range(MAX_RETRIES):
-                if place_test_order(server_symbol):
-                    log_and_print(f"Symbol {server_symbol} added to Market Watch via test order", "SUCCESS")
-                    added_symbols.append(server_symbol)
-                    break
-                else:
-                    log_and_print(f"Attempt {attempt + 1}/{MAX_RETRIES}: Test order for {server_symbol} failed, retrying...", "WARNING")
-                    time.sleep(RETRY_DELAY)
-            else:
-                log_and_print(f"Symbol {server_symbol} could not be added to Market Watch after retries", "ERROR")
-                failed_symbols.append(json_symbol)
-
-        except Exception as e:
-            log_and_print(f"Error processing symbol {json_symbol}: {str(e)}", "ERROR")
+        server_symbol = get_exact_symbol_match(json_symbol, available_symbols)
+        if server_symbol is None:
+            log_and_print(f"Skipping {json_symbol}: No server match found", "ERROR")
+            failed_symbols.append(json_symbol)
+            continue
+        server_symbols[json_symbol] = server_symbol
+
+    # Provision Market Watch once from the cached visible set instead of per-symbol test orders
+    market_watch = marketwatch.MarketWatch(mt5, os.path.dirname(BASE_OUTPUT_FOLDER), f"{SERVER}_{LOGIN_ID}")
+    visible_symbols, _ = market_watch.provision(list(server_symbols.values()))
+    for json_symbol, server_symbol in server_symbols.items():
+        if server_symbol in visible_symbols:
+            added_symbols.append(server_symbol)
+        else:
+            log_and_print(f"Symbol {server_symbol} could not be added to Market Watch", "ERROR")
             failed_symbols.append(json_symbol)
 
-    # Step 2: Validate pending orders for all signals
+    # Step 2: Validate pending orders, grouped per symbol so each symbol is read once
     log_and_print("===== Validating Pending Orders =====", "TITLE")
+    orders_by_symbol = {}
     for signal in signals:
         try:
             if not isinstance(signal, dict):
@@ -769,25 +446,53 @@ def add_to_watchlist_and_place_orders():
                 continue
 
             if server_symbol in added_symbols:
-                success, order_id, error_message, error_category = place_pending_order(server_symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk)
-                if success:
-                    pending_orders_placed.append((server_symbol, order_id, order_type, entry_price, profit_price, stop_loss, allowed_risk))
-                else:
-                    log_and_print(f"Failed to validate pending order for {server_symbol}: {error_message}", "ERROR")
-                    failed_symbols.append(json_symbol)
-                    save_failed_orders(server_symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk, error_message or "Unknown error", error_category, signal=signal)
-                    current_failed_orders.append(server_symbol)
+                prices = (float(entry_price), float(profit_price) if profit_price else 0.0, float(stop_loss) if stop_loss else 0.0)
+                orders_by_symbol.setdefault(server_symbol, []).append(
+                    (json_symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk, signal, prices)
+                )
             else:
                 error_message = f"Symbol {server_symbol} not added to Market Watch"
                 log_and_print(f"Skipping validation for {server_symbol}: {error_message}", "WARNING")
                 save_failed_orders(server_symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk, error_message, "unknown", signal=signal)
                 current_failed_orders.append(server_symbol)
 
-        except (TypeError, KeyError) as e:
+        except (TypeError, KeyError, ValueError) as e:
             log_and_print(f"Error processing signal for validation: {signal}, Error: {str(e)}", "ERROR")
             invalid_signals.append(signal)
             continue
 
+    for server_symbol, orders in orders_by_symbol.items():
+        snapshot, error_message = take_symbol_snapshot(server_symbol)
+        if snapshot is None:
+            log_and_print(error_message, "ERROR")
+            results = [(False, error_message, "unknown")] * len(orders)
+        else:
+            try:
+                results = validate_symbol_orders(
+                    snapshot,
+                    [order[1] for order in orders],
+                    [order[8][0] for order in orders],
+                    [order[8][1] for order in orders],
+                    [order[8][2] for order in orders],
+                    [order[6] for order in orders]
+                )
+            except Exception as e:
+                error_message = f"Error validating pending orders for {server_symbol}: {str(e)}"
+                log_and_print(error_message, "ERROR")
+                results = [(False, error_message, "unknown")] * len(orders)
+
+        for (json_symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk, signal, _), (success, error_message, error_category) in zip(orders, results):
+            if success:
+                pending_orders_placed.append((server_symbol, None, order_type, entry_price, profit_price, stop_loss, allowed_risk))
+            else:
+                log_and_print(f"Failed to validate pending order for {server_symbol}: {error_message}", "ERROR")
+                failed_symbols.append(json_symbol)
+                save_failed_orders(server_symbol, order_type, entry_price, profit_price, stop_loss, lot_size, allowed_risk, error_message or "Unknown error", error_category, signal=signal)
+                current_failed_orders.append(server_symbol)
+
+    # Closest-symbol suggestions for unmatched pairs, once the validation loop is done
+    symbolresolver.report_misses()
+
     # Step 3: Filter failed orders and save to filteredsignals.json
     filtered_data = filter_failed_orders()
 
@@ -820,6 +525,7 @@ def main():
     except Exception as e:
         log_and_print(f"Error in main process: {str(e)}", "ERROR")
     finally:
+        errorjournal.materialize_all()
         mt5.shutdown()
         log_and_print("MT5 connection closed", "INFO")
         